@@ -86,6 +86,17 @@ install_files(){
 
   install -D -m 0755 lib/linux_maint.sh "$lib/linux_maint.sh"
   install -D -m 0755 lib/linux_maint_conf.sh "$lib/linux_maint_conf.sh"
+  install -D -m 0644 lib/linux_maint_summary.py "$lib/linux_maint_summary.py"
+  install -D -m 0644 lib/linux_maint_runindex.py "$lib/linux_maint_runindex.py"
+  install -D -m 0644 lib/linux_maint_trace.py "$lib/linux_maint_trace.py"
+  install -D -m 0644 lib/linux_maint_serve.py "$lib/linux_maint_serve.py"
+  install -D -m 0644 lib/linux_maint_cli.py "$lib/linux_maint_cli.py"
+  install -D -m 0644 lib/linux_maint_outputs.py "$lib/linux_maint_outputs.py"
+  install -D -m 0644 lib/linux_maint_shard.py "$lib/linux_maint_shard.py"
+  install -D -m 0644 lib/linux_maint_archive.py "$lib/linux_maint_archive.py"
+  install -D -m 0644 lib/linux_maint_schema.py "$lib/linux_maint_schema.py"
+  # Precompile so CLI calls start from cached bytecode instead of compiling the sources.
+  python3 -m compileall -q "$lib"/linux_maint_*.py >/dev/null 2>&1 || true
   install -D -m 0755 run_full_health_monitor.sh "$sbin/run_full_health_monitor.sh"
   install -D -m 0755 bin/linux-maint "$prefix/bin/linux-maint"
   install -d "$libexec"
@@ -124,6 +135,9 @@ install_files(){
   mkdir -p "$prefix/share/Linux_Maint_ToolKit/docs"
   if [ -d "docs" ]; then
     cp -a docs/*.md "$prefix/share/Linux_Maint_ToolKit/docs/" 2>/dev/null || true
+    # JSON schemas for the LM_VALIDATE_OUTPUTS post-run check.
+    mkdir -p "$prefix/share/Linux_Maint_ToolKit/docs/schemas"
+    cp -a docs/schemas/*.json "$prefix/share/Linux_Maint_ToolKit/docs/schemas/" 2>/dev/null || true
   fi
   # config templates for linux-maint init (installed-mode)
   mkdir -p "$prefix/share/linux_maint/templates"
@@ -219,6 +233,10 @@ uninstall_files(){
   echo "Uninstalling from prefix: $prefix"
   rm -f "$prefix/sbin/run_full_health_monitor.sh"
   rm -f "$prefix/lib/linux_maint.sh"
+  rm -f "$prefix/lib/linux_maint_summary.py" "$prefix/lib/linux_maint_runindex.py" "$prefix/lib/linux_maint_trace.py" "$prefix/lib/linux_maint_serve.py" "$prefix/lib/linux_maint_cli.py" \
+    "$prefix/lib/linux_maint_outputs.py" "$prefix/lib/linux_maint_shard.py" "$prefix/lib/linux_maint_archive.py" \
+    "$prefix/lib/linux_maint_schema.py"
+  rm -f "$prefix"/lib/__pycache__/linux_maint_*.pyc
   rm -rf "$prefix/libexec/linux_maint"
   rm -rf "$prefix/share/Linux_Maint_ToolKit/docs" 2>/dev/null || true
   echo "Uninstall complete. (Kept /etc/linux_maint and /var/log by default.)"
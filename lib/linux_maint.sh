@@ -61,7 +61,8 @@ fi
 lm_validate_ssh_opts() {
   local s="${LM_SSH_OPTS:-}"
   [[ -z "$s" ]] && return 0
-  if printf '%s' "$s" | grep -Eq '[;&|`<>]|\$\(|\$\{'; then
+  local unsafe_re='[;&|`<>]|\$\(|\$\{'
+  if [[ "$s" =~ $unsafe_re ]]; then
     echo "ERROR: unsafe characters detected in LM_SSH_OPTS" >&2
     echo "LM_SSH_OPTS=$s" >&2
     return 2
@@ -77,26 +78,33 @@ lm_validate_ssh_opts() {
 }
 
 # ========= Pretty timestamps =========
-lm_ts() { date '+%Y-%m-%d %H:%M:%S'; }
+# Timestamps come from printf's %(...)T (no date fork per log line).
+lm_ts() { printf '%(%Y-%m-%d %H:%M:%S)T\n' -1; }
 
 # ========= Logging =========
 # lm_log LEVEL MSG...
+# Hot path: no forks unless LM_REDACT_LOGS or LM_LOG_FORMAT=json is enabled; the log
+# directory is created once per LM_LOGFILE.
+_LM_LOGDIR_READY=""
 lm_log() {
   local lvl="$1"; shift
-  local line
+  local line ts msg="$*"
+  printf -v ts '%(%Y-%m-%d %H:%M:%S)T' -1
+  _lm_redact_enabled && msg="$(lm_redact_line "$msg")"
   if [[ "${LM_LOG_FORMAT:-text}" == "json" ]]; then
-    local msg ts esc_msg esc_prefix
-    ts="$(lm_ts)"
-    msg="$(lm_redact_line "$*")"
+    local esc_msg esc_prefix
     esc_msg="$(lm_json_escape "$msg")"
     esc_prefix="$(lm_json_escape "${LM_PREFIX}")"
     line="{\"ts\":\"${ts}\",\"level\":\"${lvl}\",\"prefix\":\"${esc_prefix}\",\"msg\":\"${esc_msg}\"}"
   else
-    line="$(lm_ts) - ${LM_PREFIX}${lvl} - $(lm_redact_line "$*")"
+    line="${ts} - ${LM_PREFIX}${lvl} - ${msg}"
+  fi
+  # append to LM_LOGFILE (create parent dir if needed)
+  if [[ "$_LM_LOGDIR_READY" != "$LM_LOGFILE" ]]; then
+    [[ "$LM_LOGFILE" == */* ]] && mkdir -p "${LM_LOGFILE%/*}" 2>/dev/null
+    _LM_LOGDIR_READY="$LM_LOGFILE"
   fi
-  # print to stdout and append to LM_LOGFILE (create parent dir if needed)
-  mkdir -p "$(dirname "$LM_LOGFILE")" 2>/dev/null || true
-  echo "$line" | tee -a "$LM_LOGFILE" >/dev/null
+  printf '%s\n' "$line" >> "$LM_LOGFILE"
 }
 lm_info(){ lm_log INFO "$@"; }
 lm_warn(){ lm_log WARN "$@"; }
@@ -207,6 +215,11 @@ lm_mktemp() {
 # Emits: RUNTIME_STEP monitor=<name> step=<label> ms=<duration> rc=<rc>
 lm_now_ms() {
   local ms
+  if [[ -n "${EPOCHREALTIME:-}" ]]; then
+    ms="${EPOCHREALTIME/[.,]/}"
+    printf '%s' "${ms:0:${#ms}-3}"
+    return 0
+  fi
   ms="$(date +%s%3N 2>/dev/null || true)"
   if [[ "$ms" =~ ^[0-9]+$ ]]; then
     printf '%s' "$ms"
@@ -227,14 +240,82 @@ lm_time() {
   end="$(lm_now_ms)"
   if [[ "$start" =~ ^[0-9]+$ && "$end" =~ ^[0-9]+$ ]]; then
     echo "RUNTIME_STEP monitor=$monitor step=$step ms=$((end-start)) rc=$rc"
+    [[ -n "${LM_PROFILE_FILE:-}" ]] && \
+      lm_span_emit step "$step" "$((start * 1000))" monitor="$monitor" rc="$rc"
   fi
   return "$rc"
 }
 
+# ========= Span profiler (linux-maint run --profile) =========
+# The wrapper sets LM_PROFILE_FILE when profiling; helpers then append one raw
+# span per line (tab separated):
+#   <start_us> <dur_us> <tid> <cat> <name> [key=value ...]
+# and the wrapper converts the file into a Chrome/Perfetto trace at the end of
+# the run (lib/linux_maint_trace.py). With LM_PROFILE_FILE unset every hook is a
+# single string test. _LM_SPAN_TID groups spans into tracks: the wrapper exports
+# one per monitor job and the host pool sets one per parallel host.
+
+# _lm_span_us -> sets _LM_US to wall-clock microseconds (fork-free on bash >= 5)
+_lm_span_us() {
+  if [[ -n "${EPOCHREALTIME:-}" ]]; then
+    _LM_US="${EPOCHREALTIME/[.,]/}"
+  else
+    _LM_US="$(( $(lm_now_ms) * 1000 ))"
+  fi
+}
+
+# lm_span_emit CAT NAME START_US [key=value ...]
+# Records a span that started at START_US and ends now. monitor= defaults to the
+# running script name.
+lm_span_emit() {
+  [[ -n "${LM_PROFILE_FILE:-}" ]] || return 0
+  local cat="$1" name="$2" start="$3"; shift 3
+  local mon="${0##*/}" kv args=""
+  mon="${LM_POOL_MONITOR:-${mon%.sh}}"
+  _lm_span_us
+  [[ "$start" =~ ^[0-9]+$ ]] || start="$_LM_US"
+  for kv in "$@"; do
+    [[ "$kv" == monitor=* ]] && mon=""
+    args+=$'\t'"${kv//[$'\t\n']/ }"
+  done
+  [[ -n "$mon" ]] && args=$'\tmonitor='"$mon$args"
+  name="${name//[$'\t\n']/ }"
+  printf '%s\t%s\t%s\t%s\t%s%s\n' "$start" "$((_LM_US - start))" "${_LM_SPAN_TID:-$$}" \
+    "$cat" "${name:0:120}" "$args" >> "$LM_PROFILE_FILE" 2>/dev/null || true
+}
+
+# lm_span CAT NAME [key=value ...] -- CMD...
+# Runs CMD (in the current shell, so it may set globals) and records it with rc=.
+lm_span() {
+  local -a _span_kv=()
+  local _span_cat="$1" _span_name="$2" _span_t0 _span_rc
+  shift 2
+  while [[ "$#" -gt 0 && "$1" != "--" ]]; do
+    _span_kv+=("$1"); shift
+  done
+  [[ "${1:-}" == "--" ]] && shift
+  if [[ -z "${LM_PROFILE_FILE:-}" ]]; then
+    "$@"
+    return
+  fi
+  _lm_span_us; _span_t0="$_LM_US"
+  "$@"
+  _span_rc=$?
+  lm_span_emit "$_span_cat" "$_span_name" "$_span_t0" ${_span_kv[@]+"${_span_kv[@]}"} rc="$_span_rc"
+  return "$_span_rc"
+}
+
 # ========= Optional log redaction =========
 # If LM_REDACT_LOGS=1|true, redact common secret patterns from log lines.
 # This is best-effort and intentionally conservative.
 # Default: off (no behavior change).
+_lm_redact_enabled() {
+  case "${LM_REDACT_LOGS:-0}" in
+    1|true|TRUE|yes|YES) return 0 ;;
+  esac
+  return 1
+}
+
 lm_redact_line() {
   local s="$1"
 
@@ -416,7 +497,29 @@ lm_is_localhost() {
 }
 
 # lm_ssh HOST CMD...
+# When profiling, output is buffered so the span can record bytes= returned.
 lm_ssh() {
+  if [[ -z "${LM_PROFILE_FILE:-}" ]]; then
+    _lm_ssh_run "$@"
+    return
+  fi
+  local _t0 _rc=0 _bytes=0 _buf
+  _lm_span_us; _t0="$_LM_US"
+  if _buf="$(mktemp "${TMPDIR:-/tmp}/lm_span.XXXXXX" 2>/dev/null)"; then
+    _lm_ssh_run "$@" > "$_buf"
+    _rc=$?
+    _bytes="$(wc -c < "$_buf" 2>/dev/null || echo 0)"
+    cat "$_buf"
+    rm -f "$_buf" 2>/dev/null || true
+  else
+    _lm_ssh_run "$@"
+    _rc=$?
+  fi
+  lm_span_emit ssh "${*:2}" "$_t0" host="$1" rc="$_rc" bytes="${_bytes//[!0-9]/}"
+  return "$_rc"
+}
+
+_lm_ssh_run() {
   local host="$1"; shift
   if ! lm_validate_ssh_opts; then
     return 2
@@ -442,6 +545,10 @@ lm_ssh() {
       PATH="$PATH" "$@" 2>/dev/null
     fi
   else
+    # Host marked down by the reachability sweep or the circuit breaker: fail fast.
+    if [[ -n "${LM_HOST_STATE_DIR:-}" ]] && lm_host_down "$host"; then
+      return 255
+    fi
     if [[ -n "${LM_SSH_KNOWN_HOSTS_FILE:-}" ]]; then
       mkdir -p "$(dirname "${LM_SSH_KNOWN_HOSTS_FILE}")" 2>/dev/null || true
     fi
@@ -449,60 +556,639 @@ lm_ssh() {
     local -a _ssh_opts=()
     # shellcheck disable=SC2206
     _ssh_opts=(${LM_SSH_OPTS:-})
+    # Connection multiplexing: reuse one master connection per host (see lm_ssh_mux_path).
+    local -a _mux_opts=()
+    local mux_sock="" had_master=0
+    if mux_sock="$(lm_ssh_mux_path "$host")"; then
+      _mux_opts=(-o ControlMaster=auto -o "ControlPath=$mux_sock" -o "ControlPersist=${LM_SSH_MUX_PERSIST:-300}")
+      if [[ -S "$mux_sock" ]]; then
+        had_master=1
+        _lm_ssh_mux_stat mux "$host"
+      else
+        _lm_ssh_mux_stat opened "$host"
+      fi
+    fi
     local attempts=1
     if [[ "${LM_SSH_RETRY:-0}" =~ ^[0-9]+$ ]] && [[ "${LM_SSH_RETRY}" -gt 0 ]]; then
       attempts=$((LM_SSH_RETRY + 1))
     fi
     local try=1
-    local rc=0
+    local rc=0 span_t0=""
     while [[ "$try" -le "$attempts" ]]; do
-      if [[ "${LM_SSH_TIMEOUT:-0}" -gt 0 ]] && command -v timeout >/dev/null 2>&1; then
-        # shellcheck disable=SC2029
-        timeout "${LM_SSH_TIMEOUT}" ssh "${_ssh_opts[@]}" "$host" "$@" 2>/dev/null
-      else
-        # shellcheck disable=SC2029
-        ssh "${_ssh_opts[@]}" "$host" "$@" 2>/dev/null
-      fi
+      [[ -n "${LM_PROFILE_FILE:-}" ]] && { _lm_span_us; span_t0="$_LM_US"; }
+      _lm_ssh_exec "$host" "${_ssh_opts[@]}" "${_mux_opts[@]}" -- "$@"
       rc=$?
-      if [[ "$rc" -eq 0 ]]; then
-        return 0
+      if [[ "$rc" -eq 255 && "$had_master" -eq 1 ]] \
+        && ! ssh -o "ControlPath=$mux_sock" -O check "$host" >/dev/null 2>&1; then
+        # The master we reused is dead (stale socket): drop it and retry on a plain
+        # connection. A live master means 255 came from the remote command itself,
+        # and a first connect that failed means the host is unreachable; neither is retried here.
+        had_master=0
+        rm -f "$mux_sock" 2>/dev/null || true
+        _mux_opts=()
+        _lm_ssh_mux_stat fallback "$host"
+        _lm_ssh_exec "$host" "${_ssh_opts[@]}" -- "$@"
+        rc=$?
+      fi
+      # One span per attempt: separates connect/retry cost from the remote command.
+      [[ -n "$span_t0" ]] && lm_span_emit remote "ssh_exec" "$span_t0" host="$host" try="$try" \
+        mux="$(( ${#_mux_opts[@]} > 0 ))" rc="$rc"
+      if [[ "$rc" -ne 255 && "$rc" -ne 124 ]]; then
+        # Connected (the remote command's own rc is not a connection failure).
+        [[ -n "${LM_HOST_STATE_DIR:-}" ]] && _lm_breaker_record "$host" "$rc"
+        [[ "$rc" -eq 0 ]] && return 0
       fi
       if [[ "$try" -lt "$attempts" ]]; then
         sleep "$((2 ** (try - 1)))"
       fi
       try=$((try + 1))
     done
+    [[ -n "${LM_HOST_STATE_DIR:-}" ]] && _lm_breaker_record "$host" "$rc"
     return "$rc"
   fi
 }
-# quick reachability probe (0=ok)
-lm_reachable() { lm_ssh "$1" "echo ok" | grep -q ok; }
+
+# _lm_ssh_exec HOST SSH_OPTS... -- CMD...
+_lm_ssh_exec() {
+  local host="$1"; shift
+  local -a opts=()
+  while [[ "$#" -gt 0 && "$1" != "--" ]]; do
+    opts+=("$1"); shift
+  done
+  [[ "${1:-}" == "--" ]] && shift
+  if [[ "${LM_SSH_TIMEOUT:-0}" -gt 0 ]] && command -v timeout >/dev/null 2>&1; then
+    # shellcheck disable=SC2029
+    timeout "${LM_SSH_TIMEOUT}" ssh "${opts[@]}" "$host" "$@" 2>/dev/null
+  else
+    # shellcheck disable=SC2029
+    ssh "${opts[@]}" "$host" "$@" 2>/dev/null
+  fi
+}
+
+# ========= SSH connection pool (ControlMaster multiplexing) =========
+# Enabled with LM_SSH_MUX=1 and a writable LM_SSH_MUX_DIR (the wrapper sets both
+# per run). The first lm_ssh call to a host opens a master connection; later calls
+# from any monitor reuse it until lm_ssh_mux_close (or ControlPersist) tears it down.
+# Skipped when LM_SSH_OPTS already configures ControlMaster/ControlPath.
+
+# lm_ssh_mux_path HOST -> prints the control socket path (rc=1 when muxing is off)
+lm_ssh_mux_path() {
+  local host="$1"
+  [[ "${LM_SSH_MUX:-0}" == "1" || "${LM_SSH_MUX:-}" == "true" ]] || return 1
+  [[ -n "${LM_SSH_MUX_DIR:-}" ]] || return 1
+  case "${LM_SSH_OPTS:-}" in
+    *ControlMaster*|*ControlPath*) return 1 ;;
+  esac
+  if [[ ! -d "$LM_SSH_MUX_DIR" ]]; then
+    mkdir -p "$LM_SSH_MUX_DIR" 2>/dev/null || return 1
+    chmod 0700 "$LM_SSH_MUX_DIR" 2>/dev/null || true
+  fi
+  local name="${host//[^A-Za-z0-9._@-]/_}"
+  local path="$LM_SSH_MUX_DIR/$name.sock"
+  # Unix socket paths are limited (~108 bytes); fall back to a short hash of the host.
+  if [[ "${#path}" -gt 100 ]]; then
+    local i c h=5381
+    for ((i = 0; i < ${#host}; i++)); do
+      printf -v c '%d' "'${host:i:1}"
+      h=$(( (h * 33 + c) & 0xFFFFFFFF ))
+    done
+    path="$LM_SSH_MUX_DIR/h$h.sock"
+  fi
+  printf '%s\n' "$path"
+}
+
+# _lm_ssh_mux_stat EVENT HOST (EVENT: opened|mux|fallback); one short append per call.
+_lm_ssh_mux_stat() {
+  [[ -n "${LM_SSH_MUX_DIR:-}" ]] || return 0
+  printf '%s %s\n' "$1" "$2" >> "$LM_SSH_MUX_DIR/stats" 2>/dev/null || true
+}
+
+# lm_ssh_mux_report -> "SSH_POOL hosts=N opened=N multiplexed=N fallback=N"
+lm_ssh_mux_report() {
+  local stats="${LM_SSH_MUX_DIR:-}/stats"
+  [[ -n "${LM_SSH_MUX_DIR:-}" && -f "$stats" ]] || return 0
+  awk '
+    { hosts[$2]=1 }
+    $1=="opened"{o++} $1=="mux"{m++} $1=="fallback"{f++}
+    END { n=0; for (h in hosts) n++; printf "SSH_POOL hosts=%d opened=%d multiplexed=%d fallback=%d\n", n, o+0, m+0, f+0 }
+  ' "$stats"
+}
+
+# lm_ssh_mux_close -> ask every live master to exit and remove its socket.
+lm_ssh_mux_close() {
+  [[ -n "${LM_SSH_MUX_DIR:-}" && -d "$LM_SSH_MUX_DIR" ]] || return 0
+  local stats="$LM_SSH_MUX_DIR/stats" host sock
+  if [[ -f "$stats" ]]; then
+    while read -r host; do
+      [[ -z "$host" ]] && continue
+      sock="$(lm_ssh_mux_path "$host")" || continue
+      [[ -S "$sock" ]] || continue
+      ssh -o "ControlPath=$sock" -O exit "$host" >/dev/null 2>&1 || true
+      rm -f "$sock" 2>/dev/null || true
+    done < <(awk '!seen[$2]++ {print $2}' "$stats")
+  fi
+  return 0
+}
+# ========= Remote fact collection (one SSH round trip per host) =========
+# The wrapper's collect stage calls lm_collect_facts once per remote host before
+# monitors run. The probe prints framed sections:
+#   @@LM_FACT <name> BEGIN
+#   ...raw command output...
+#   @@LM_FACT <name> END rc=<rc>
+# and the payload is cached as $LM_FACTS_DIR/<host>.facts. Monitors read sections
+# with lm_fact and fall back to their own live commands when no cache exists.
+# Localhost is never collected: local commands are cheap and always live.
+
+# Remote commands monitors probe for (resolved in one round trip; see lm_has_cmd_remote).
+LM_REMOTE_CMDS="${LM_REMOTE_CMDS:-awk df stat timeout systemctl timedatectl chronyc ntpq apt-get dnf yum zypper needs-restarting curl nc ss netstat openssl smartctl mountpoint ping}"
+# Commands whose availability is reported in the "commands" section.
+LM_FACT_COMMANDS="${LM_FACT_COMMANDS:-$LM_REMOTE_CMDS}"
+
+# Host fingerprint used to invalidate cached command availability:
+# kernel release + newest package database mtime.
+_lm_fingerprint_probe() {
+  cat <<'EOF'
+_fp(){ printf '%s|%s\n' "$(uname -r 2>/dev/null)" "$(stat -c %Y /var/lib/dpkg/status /var/lib/rpm /var/lib/rpm/rpmdb.sqlite /var/lib/rpm/Packages /var/lib/pacman/local 2>/dev/null | sort -n | tail -n 1)"; }
+EOF
+}
+
+_lm_facts_probe() {
+  _lm_fingerprint_probe
+  cat <<EOF
+_f(){ n="\$1"; shift; echo "@@LM_FACT \$n BEGIN"; "\$@" 2>/dev/null; r=\$?; echo "@@LM_FACT \$n END rc=\$r"; }
+_cmds(){ for c in $LM_FACT_COMMANDS; do command -v "\$c" >/dev/null 2>&1 && echo "\$c"; done; return 0; }
+_f df_pt df -PT -k
+_f df_pti df -PTi
+_f df_pi df -Pi
+_f timesync timedatectl show -p SystemClockSync --value
+_f systemctl_failed systemctl --failed --no-legend --plain
+_f meminfo cat /proc/meminfo
+_f loadavg cat /proc/loadavg
+_f commands _cmds
+_f fingerprint _fp
+echo "@@LM_FACT __complete__ END rc=0"
+EOF
+}
+
+# lm_facts_file HOST -> prints the cache path (rc=1 when fact caching is off)
+lm_facts_file() {
+  local host="$1"
+  [[ -n "${LM_FACTS_DIR:-}" ]] || return 1
+  lm_is_localhost "$host" && return 1
+  printf '%s/%s.facts\n' "$LM_FACTS_DIR" "${host//[^A-Za-z0-9._@-]/_}"
+}
+
+# lm_collect_facts HOST -> collect and cache facts (rc=0 on a complete payload)
+lm_collect_facts() {
+  local host="$1" f tmp
+  f="$(lm_facts_file "$host")" || return 1
+  mkdir -p "$LM_FACTS_DIR" 2>/dev/null || return 1
+  tmp="$f.tmp.$$"
+  lm_ssh "$host" "$(_lm_facts_probe)" > "$tmp" 2>/dev/null
+  if grep -q '^@@LM_FACT __complete__ END' "$tmp" 2>/dev/null; then
+    mv -f "$tmp" "$f"
+    return 0
+  fi
+  rm -f "$tmp" 2>/dev/null || true
+  return 1
+}
+
+# lm_fact HOST SECTION -> prints the cached section body (rc=1 if absent or the probe failed)
+lm_fact() {
+  local host="$1" section="$2" f
+  f="$(lm_facts_file "$host")" || return 1
+  [[ -f "$f" ]] || return 1
+  awk -v s="$section" '
+    $1=="@@LM_FACT" && $2==s && $3=="BEGIN" { on=1; next }
+    $1=="@@LM_FACT" && $2==s && $3=="END"   { rc=$4; sub(/^rc=/,"",rc); found=1; on=0; next }
+    on { print }
+    END { if (!found || rc != "0") exit 1 }
+  ' "$f"
+}
+
+# lm_fact_has_cmd HOST CMD -> 0=available 1=missing 2=unknown (no cached facts)
+lm_fact_has_cmd() {
+  local host="$1" cmd="$2" list
+  list="$(lm_fact "$host" commands)" || return 2
+  [[ $'\n'"$list"$'\n' == *$'\n'"$cmd"$'\n'* ]] && return 0
+  case " $LM_FACT_COMMANDS " in
+    *" $cmd "*) return 1 ;;
+  esac
+  return 2
+}
+
+# ========= Remote command-availability cache =========
+# lm_has_cmd_remote answers, in order, from: process memory, the run's fact cache,
+# then a per-host cache file under $LM_CMD_CACHE_DIR. A miss resolves every command
+# in LM_REMOTE_CMDS with one SSH call and persists the result for LM_CMD_CACHE_TTL
+# seconds (0 disables the file cache). Entries are discarded early when the host
+# fingerprint (uname -r + package DB mtime) from the fact cache no longer matches.
+declare -gA _LM_CMD_MEM=()
+declare -gA _LM_CMD_MEM_LOADED=()
+
+# _lm_cmd_cache_file HOST -> prints the cache file path
+_lm_cmd_cache_file() {
+  printf '%s/%s.cmds\n' "${LM_CMD_CACHE_DIR:-${LM_STATE_DIR:-/var/lib/linux_maint}/cmd_cache}" "${1//[^A-Za-z0-9._@-]/_}"
+}
+
+# _lm_cmd_cache_apply HOST < "have|miss CMD" lines -> fill process memory
+_lm_cmd_cache_apply() {
+  local host="$1" kind cmd
+  while read -r kind cmd; do
+    case "$kind" in
+      have) _LM_CMD_MEM["$host|$cmd"]=0 ;;
+      miss) _LM_CMD_MEM["$host|$cmd"]=1 ;;
+    esac
+  done
+  _LM_CMD_MEM_LOADED["$host"]=1
+}
+
+# _lm_cmd_cache_load HOST -> rc=0 when a fresh cache file was loaded into memory
+_lm_cmd_cache_load() {
+  local host="$1" f ttl now ts="" fp="" live_fp line
+  [[ -n "${_LM_CMD_MEM_LOADED[$host]:-}" ]] && return 0
+  ttl="${LM_CMD_CACHE_TTL:-86400}"
+  [[ "$ttl" =~ ^[0-9]+$ && "$ttl" -gt 0 ]] || return 1
+  f="$(_lm_cmd_cache_file "$host")"
+  [[ -f "$f" ]] || return 1
+  while IFS= read -r line; do
+    case "$line" in
+      ts=*) ts="${line#ts=}" ;;
+      fp=*) fp="${line#fp=}" ;;
+    esac
+  done < "$f"
+  printf -v now '%(%s)T' -1
+  [[ "$ts" =~ ^[0-9]+$ ]] || return 1
+  [[ $((now - ts)) -le "$ttl" ]] || return 1
+  if live_fp="$(lm_fact "$host" fingerprint)" && [[ -n "$live_fp" && "$live_fp" != "$fp" ]]; then
+    return 1
+  fi
+  _lm_cmd_cache_apply "$host" < "$f"
+  return 0
+}
+
+# lm_cmd_cache_refresh HOST -> resolve LM_REMOTE_CMDS in one SSH call (memory + file)
+lm_cmd_cache_refresh() {
+  local host="$1" out f dir now tmp
+  out="$(lm_ssh "$host" "$(_lm_fingerprint_probe)
+echo \"fp=\$(_fp)\"
+for c in $LM_REMOTE_CMDS; do if command -v \"\$c\" >/dev/null 2>&1; then echo \"have \$c\"; else echo \"miss \$c\"; fi; done")" || return 1
+  [[ "$out" == *$'\n'have\ * || "$out" == *$'\n'miss\ * ]] || return 1
+  _lm_cmd_cache_apply "$host" <<< "$out"
+  [[ "${LM_CMD_CACHE_TTL:-86400}" =~ ^[0-9]+$ && "${LM_CMD_CACHE_TTL:-86400}" -gt 0 ]] || return 0
+  f="$(_lm_cmd_cache_file "$host")"
+  dir="${f%/*}"
+  mkdir -p "$dir" 2>/dev/null || return 0
+  printf -v now '%(%s)T' -1
+  tmp="$f.tmp.$$"
+  { echo "ts=$now"; printf '%s\n' "$out"; } > "$tmp" 2>/dev/null && mv -f "$tmp" "$f" 2>/dev/null
+  rm -f "$tmp" 2>/dev/null || true
+  return 0
+}
+
+# ========= Host state (reachability sweep + circuit breaker) =========
+# The wrapper probes every host once at run start and publishes
+# $LM_HOST_STATE_DIR/hosts.tsv ("host<TAB>up|slow|down<TAB>latency_ms"). During the
+# run, lm_ssh fails fast (rc=255) for down hosts, lm_reachable answers from the
+# sweep and host pools report down hosts as UNKNOWN reason=ssh_unreachable without
+# calling the monitor. The circuit breaker marks a host down mid-run after
+# LM_BREAKER_THRESHOLD consecutive connection failures (ssh rc=255), counted across
+# monitors in $LM_HOST_STATE_DIR/fail/<host>. A timeout (rc=124) is usually a slow
+# remote command on a reachable host, so it neither counts nor resets. Trips are recorded
+# in $LM_HOST_STATE_DIR/tripped/<host>. Without LM_HOST_STATE_DIR nothing changes.
+declare -gA _LM_HOST_STATE=()
+_LM_HOST_STATE_SRC=""
+
+# _lm_host_state_load -> load hosts.tsv once per process (rc=1 until the sweep published it)
+_lm_host_state_load() {
+  local f="${LM_HOST_STATE_DIR:-}/hosts.tsv" h st ms
+  [[ "$_LM_HOST_STATE_SRC" == "$f" ]] && return 0
+  [[ -n "${LM_HOST_STATE_DIR:-}" && -f "$f" ]] || return 1
+  _LM_HOST_STATE=()
+  while IFS=$'\t' read -r h st ms _; do
+    [[ -n "$h" ]] && _LM_HOST_STATE["x$h"]="$st ${ms:-0}"
+  done < "$f"
+  _LM_HOST_STATE_SRC="$f"
+}
+
+# lm_host_state HOST -> prints "<up|slow|down|unknown> <latency_ms>" (breaker trips report down)
+lm_host_state() {
+  local h="$1"
+  if [[ -n "${LM_HOST_STATE_DIR:-}" && -e "$LM_HOST_STATE_DIR/tripped/${h//[^A-Za-z0-9._@-]/_}" ]]; then
+    echo "down 0"
+    return 0
+  fi
+  if _lm_host_state_load && [[ -n "${_LM_HOST_STATE[x$h]:-}" ]]; then
+    printf '%s\n' "${_LM_HOST_STATE[x$h]}"
+    return 0
+  fi
+  echo "unknown 0"
+}
+
+# lm_host_down HOST -> rc=0 when the sweep or the circuit breaker marked HOST down
+lm_host_down() {
+  [[ -n "${LM_HOST_STATE_DIR:-}" ]] || return 1
+  lm_is_localhost "$1" && return 1
+  [[ -e "$LM_HOST_STATE_DIR/tripped/${1//[^A-Za-z0-9._@-]/_}" ]] && return 0
+  _lm_host_state_load || return 1
+  [[ "${_LM_HOST_STATE[x$1]:-}" == down\ * ]]
+}
+
+# _lm_breaker_record HOST RC -> count consecutive connection failures; trip at the threshold
+_lm_breaker_record() {
+  local d="${LM_HOST_STATE_DIR:-}" host="$1" rc="$2" n=0 f name
+  local limit="${LM_BREAKER_THRESHOLD:-3}"
+  [[ -n "$d" && "$limit" =~ ^[0-9]+$ && "$limit" -gt 0 ]] || return 0
+  name="${host//[^A-Za-z0-9._@-]/_}"
+  f="$d/fail/$name"
+  [[ "$rc" -eq 124 ]] && return 0
+  if [[ "$rc" -ne 255 ]]; then
+    [[ -s "$f" ]] && : > "$f"
+    return 0
+  fi
+  [[ -d "$d/fail" && -d "$d/tripped" ]] || mkdir -p "$d/fail" "$d/tripped" 2>/dev/null || return 0
+  [[ -s "$f" ]] && read -r n < "$f"
+  [[ "$n" =~ ^[0-9]+$ ]] || n=0
+  n=$((n + 1))
+  printf '%s\n' "$n" > "$f" 2>/dev/null || return 0
+  if [[ "$n" -ge "$limit" && ! -e "$d/tripped/$name" ]]; then
+    printf '%s\tfailures=%s rc=%s\n' "$host" "$n" "$rc" > "$d/tripped/$name" 2>/dev/null || true
+    lm_warn "[$host] circuit breaker open after $n consecutive SSH connection failures; skipping host for the rest of the run"
+  fi
+  return 0
+}
+
+# quick reachability probe (0=ok); answered from the run's reachability sweep when present
+lm_reachable() {
+  if [[ -n "${LM_HOST_STATE_DIR:-}" ]] && ! lm_is_localhost "$1"; then
+    lm_host_down "$1" && return 1
+    case "${_LM_HOST_STATE[x$1]:-}" in
+      up\ *|slow\ *) return 0 ;;
+    esac
+  fi
+  lm_ssh "$1" "echo ok" | grep -q ok
+}
+
+# _lm_split_list VAR STRING: split a comma/space-separated list into array VAR.
+_lm_split_list() {
+  local -n _out="$1"
+  local _s="${2//,/ }"
+  _out=()
+  IFS=$' \t\n' read -r -d '' -a _out <<< "$_s" || true
+}
 
 # LM_SSH_ALLOWLIST: comma/space-separated regex patterns.
-# Returns 0 if the command line matches any pattern.
+# Returns 0 if the command line matches any pattern. The list is split once per value.
+_LM_SSH_ALLOW_SRC=""
+_LM_SSH_ALLOW=()
 lm_ssh_allowed_cmd() {
   local cmdline="$1"
   [[ -z "${LM_SSH_ALLOWLIST:-}" ]] && return 0
-  local allow
+  if [[ "$_LM_SSH_ALLOW_SRC" != "$LM_SSH_ALLOWLIST" ]]; then
+    _lm_split_list _LM_SSH_ALLOW "$LM_SSH_ALLOWLIST"
+    _LM_SSH_ALLOW_SRC="$LM_SSH_ALLOWLIST"
+  fi
   local pat
-  allow="$(printf '%s' "$LM_SSH_ALLOWLIST" | tr ', ' '\n' | awk 'NF{print $1}')"
-  while IFS= read -r pat; do
-    [[ -z "$pat" ]] && continue
+  for pat in "${_LM_SSH_ALLOW[@]}"; do
     if [[ "$cmdline" =~ $pat ]]; then
       return 0
     fi
-  done <<< "$allow"
+  done
   return 1
 }
 
+# ========= Incremental log scanning (per-source read cursors) =========
+# lm_log_scan reads only what was appended to a log since the previous run and
+# counts it in one streaming awk pass on the target. The cursor is kept on the
+# runner as $LM_LOG_CURSOR_DIR/<monitor>_<host>.cursor (ts=, source=, cursor=, hist=):
+#   cursor=j <journalctl cursor>               journalctl --after-cursor/--show-cursor
+#   cursor=f <inode> <offset> <path>           one line per log file
+#   hist=<epoch> <matches>                     per-run match counts inside the window
+# A file whose inode changed was rotated: the rest of the old file is read from
+# <path>.1 when it still has the saved inode, then the new file from the start.
+# A file smaller than the saved offset was truncated and is read from the start.
+# Without a usable cursor (first run, LM_LOG_CURSOR=0, cursor rejected) the scan
+# falls back to the window: journalctl -S -<N>min, or the last INITIAL_LINES
+# lines of each file (0 = whole file).
+#
+# Patterns are extended regexes matched case-insensitively against each line;
+# CATEGORIES is "name=regex;name=regex" and a line may count in several.
+
+# _lm_sq STRING -> STRING single-quoted for a POSIX shell
+_lm_sq() { printf "'%s'" "${1//\'/\'\\\'\'}"; }
+
+# _lm_log_scan_probe SOURCE WINDOW_MIN INITIAL_LINES PATTERN CATEGORIES SAMPLES CURSORS FILES
+_lm_log_scan_probe() {
+  printf 'src=%s since=%s initial=%s files=%s\n' "$(_lm_sq "$1")" "$(_lm_sq "-${2}min")" "$(_lm_sq "$3")" "$(_lm_sq "$8")"
+  printf 'cursors=%s\n' "$(_lm_sq "$7")"
+  printf 'LM_SCAN_PATTERN=%s LM_SCAN_CATS=%s LM_SCAN_SAMPLES=%s\n' "$(_lm_sq "$4")" "$(_lm_sq "$5")" "$(_lm_sq "$6")"
+  cat <<'EOF'
+export LM_SCAN_PATTERN LM_SCAN_CATS LM_SCAN_SAMPLES
+case "$src" in
+  auto|auto-k) if command -v journalctl >/dev/null 2>&1; then src="journal${src#auto}"; else src=files; fi ;;
+esac
+_journal(){
+  jf=""; [ "$src" = journal-k ] && jf="-k"
+  command -v journalctl >/dev/null 2>&1 || { echo "-- lm-error: missing_journalctl"; return; }
+  # journalctl exits 1 with --show-cursor when there are no entries, so decide on stderr.
+  _j(){ { e="$(journalctl $jf --no-pager --show-cursor "$@" 2>&1 >&3 3>&-)"; } 3>&1; }
+  c="$(printf '%s\n' "$cursors" | sed -n 's/^j //p' | head -n 1)"
+  if [ -n "$c" ]; then
+    _j --after-cursor="$c"
+    case "$e" in
+      *[Cc]ursor*) ;;
+      *) echo; echo "-- lm-mode: cursor"; return ;;
+    esac
+  fi
+  _j -S "$since"
+  case "$e" in
+    *ermission*|*[Ff]ailed*) echo; echo "-- lm-error: journal_unreadable"; return ;;
+  esac
+  echo; echo "-- lm-mode: window"
+}
+_files(){
+  n=0
+  for f in $files; do
+    [ -r "$f" ] || continue
+    ino="$(stat -c %i "$f" 2>/dev/null)" && size="$(stat -c %s "$f" 2>/dev/null)" || continue
+    n=$((n + 1))
+    set -- $(printf '%s\n' "$cursors" | awk -v p="$f" '$1=="f" && $4==p {print $2, $3; exit}')
+    if [ "$#" -eq 2 ]; then
+      start=0
+      if [ "$1" = "$ino" ] && [ "$2" -le "$size" ]; then
+        start="$2"
+      elif [ "$1" != "$ino" ] && [ -r "$f.1" ] && [ "$(stat -c %i "$f.1" 2>/dev/null)" = "$1" ]; then
+        tail -c +"$(($2 + 1))" "$f.1" 2>/dev/null
+        echo; echo "-- lm-rotated: $f"
+      fi
+      tail -c +"$((start + 1))" "$f" 2>/dev/null | head -c "$((size - start))"
+      echo; echo "-- lm-mode: cursor"
+    else
+      if [ "$initial" -gt 0 ] 2>/dev/null; then
+        head -c "$size" "$f" 2>/dev/null | tail -n "$initial"
+      else
+        head -c "$size" "$f" 2>/dev/null
+      fi
+      echo; echo "-- lm-mode: window"
+    fi
+    echo "-- lm-cursor: f $ino $size $f"
+  done
+  [ "$n" -gt 0 ] || echo "-- lm-error: log_unreadable"
+}
+{
+  echo "-- lm-source: $src"
+  case "$src" in
+    journal|journal-k) _journal ;;
+    *) _files ;;
+  esac
+} | LC_ALL=C awk '
+BEGIN {
+  pat = tolower(ENVIRON["LM_SCAN_PATTERN"]); ns = ENVIRON["LM_SCAN_SAMPLES"] + 0
+  n = split(ENVIRON["LM_SCAN_CATS"], spec, ";")
+  for (i = 1; i <= n; i++) {
+    p = index(spec[i], "="); if (p < 2) continue
+    k++; name[k] = substr(spec[i], 1, p - 1); re[k] = tolower(substr(spec[i], p + 1)); cnt[k] = 0
+  }
+}
+/^-- lm-source: / { src = $3; next }
+/^-- lm-mode: / { if ($3 == "window") win = 1; else cm = 1; next }
+/^-- lm-cursor: / { cur[++nc] = substr($0, 15); next }
+/^-- lm-rotated: / { rot++; next }
+/^-- lm-error: / { err = $3; next }
+/^-- cursor: / { jc = substr($0, 12); next }
+/^-- / || /^$/ { next }
+{
+  lines++; l = tolower($0); hit = (pat != "" && l ~ pat)
+  for (i = 1; i <= k; i++) if (l ~ re[i]) { cnt[i]++; if (pat == "") hit = 1 }
+  if (!hit) next
+  matches++
+  if (taken < ns) { s = $0; gsub(/[[:space:]]+/, " ", s); sample = sample (taken++ ? ";" : "") substr(s, 1, 160) }
+}
+END {
+  cats = ""
+  for (i = 1; i <= k; i++) if (cnt[i]) cats = cats (cats == "" ? "" : ",") name[i] ":" cnt[i]
+  printf "source=%s\nmode=%s\nlines=%d\nmatches=%d\nrotated=%d\ncategories=%s\n", src, (win ? "window" : (cm ? "cursor" : "none")), lines, matches, rot, (cats == "" ? "none" : cats)
+  if (err != "") print "error=" err
+  if (jc != "") print "cursor=j " jc
+  for (i = 1; i <= nc; i++) print "cursor=" cur[i]
+  if (sample != "") print "sample=" sample
+}'
+EOF
+}
+
+_lm_log_cursor_file() {
+  printf '%s/%s_%s.cursor\n' "${LM_LOG_CURSOR_DIR:-${LM_STATE_DIR:-/var/lib/linux_maint}/log_cursors}" "$1" "${2//[^A-Za-z0-9._@-]/_}"
+}
+
+# lm_log_scan MONITOR HOST SOURCE WINDOW_MIN INITIAL_LINES PATTERN CATEGORIES SAMPLES [FILE...]
+# SOURCE: journal | journal-k (kernel ring) | files | auto | auto-k (journal when
+# journalctl exists, else FILEs). Prints key=value lines: source, mode
+# (cursor|window, none when nothing could be read), lines (new lines read), matches, rotated, categories
+# (name:count,... or none), elapsed_s, rate_per_min, window_matches, and sample/error when set.
+# window_matches is a rolling count over WINDOW_MIN: this run's matches plus those of earlier
+# cursor runs inside the window (hist= lines), so a threshold on it holds for the whole window.
+# Returns the transport rc when the target could not be reached.
+lm_log_scan() {
+  local monitor="$1" host="$2" source="$3" window_min="$4" initial="$5" pattern="$6" cats="$7" samples="$8"
+  shift 8
+  local state="" cursors="" ts="" line probe out rc now elapsed mode="" matches=0 wsum h
+  local -a newc=() hist=() keep=()
+  if [[ "${LM_LOG_CURSOR:-1}" != "0" ]]; then
+    state="$(_lm_log_cursor_file "$monitor" "$host")"
+    if [[ -r "$state" ]] && grep -qxF "source=$source" "$state" 2>/dev/null; then
+      while IFS= read -r line; do
+        case "$line" in
+          ts=*) ts="${line#ts=}" ;;
+          cursor=*) cursors+="${line#cursor=}"$'\n' ;;
+          hist=*) hist+=("${line#hist=}") ;;
+        esac
+      done < "$state"
+    fi
+  fi
+  probe="$(_lm_log_scan_probe "$source" "$window_min" "$initial" "$pattern" "$cats" "$samples" "$cursors" "$*")"
+  if lm_is_localhost "$host"; then
+    out="$(bash -c "$probe" 2>/dev/null)"
+  else
+    out="$(lm_ssh "$host" "$probe")"
+  fi
+  rc=$?
+  [[ "$rc" -eq 0 && -n "$out" ]] || return $(( rc ? rc : 1 ))
+  printf -v now '%(%s)T' -1
+  while IFS= read -r line; do
+    case "$line" in
+      cursor=*) newc+=("$line"); continue ;;
+      mode=*) mode="${line#mode=}" ;;
+      matches=*) matches="${line#matches=}" ;;
+    esac
+    printf '%s\n' "$line"
+  done <<< "$out"
+  elapsed=$(( window_min * 60 ))
+  if [[ "$mode" == "cursor" && "$ts" =~ ^[0-9]+$ && "$now" -gt "$ts" ]]; then
+    elapsed=$(( now - ts ))
+  fi
+  [[ "$elapsed" -gt 0 ]] || elapsed=1
+  printf 'elapsed_s=%s\n' "$elapsed"
+  awk -v m="$matches" -v s="$elapsed" 'BEGIN{printf "rate_per_min=%.1f\n", m * 60 / s}'
+  # A window scan already covers the window, so it restarts the history.
+  wsum="$matches"
+  if [[ "$mode" == "cursor" ]]; then
+    for h in ${hist[@]+"${hist[@]}"}; do
+      [[ "$h" =~ ^([0-9]+)\ ([0-9]+)$ ]] || continue
+      (( BASH_REMATCH[1] > now - window_min * 60 )) || continue
+      keep+=("hist=$h")
+      wsum=$(( wsum + BASH_REMATCH[2] ))
+    done
+  fi
+  printf 'window_matches=%s\n' "$wsum"
+  [[ "$matches" =~ ^[0-9]+$ && "$matches" -gt 0 ]] && keep+=("hist=$now $matches")
+  # No cursor back (journal had no new entries): keep the old one and its timestamp.
+  if [[ "${#newc[@]}" -eq 0 && -n "$cursors" ]]; then
+    while IFS= read -r line; do
+      [[ -n "$line" ]] && newc+=("cursor=$line")
+    done <<< "$cursors"
+    [[ "$ts" =~ ^[0-9]+$ ]] && now="$ts"
+  fi
+  if [[ -n "$state" && "${#newc[@]}" -gt 0 ]] && mkdir -p "$(dirname "$state")" 2>/dev/null; then
+    if ! { printf 'ts=%s\nsource=%s\n' "$now" "$source"; printf '%s\n' "${newc[@]}" ${keep[@]+"${keep[@]}"}; } > "$state.tmp.$$" 2>/dev/null \
+      || ! mv -f "$state.tmp.$$" "$state" 2>/dev/null; then
+      rm -f "$state.tmp.$$" 2>/dev/null || true
+    fi
+  fi
+  return 0
+}
+
 # ========= Exclusions & host list =========
-lm_is_excluded() { [ -f "$LM_EXCLUDED" ] && grep -Fxq "$1" "$LM_EXCLUDED"; }
-# yields hosts to stdout (one per line)
-lm_hosts() {
+# Both are materialized once per process (re-read only when the source paths
+# change), so per-host checks in every monitor cost no forks.
+declare -A _LM_EXCLUDED_SET=()
+_LM_EXCLUDED_SRC=""
+_lm_excluded_load() {
+  [[ "$_LM_EXCLUDED_SRC" == "${LM_EXCLUDED:-}" ]] && return 0
+  _LM_EXCLUDED_SET=()
+  _LM_EXCLUDED_SRC="${LM_EXCLUDED:-}"
+  local line
+  [ -f "$_LM_EXCLUDED_SRC" ] || return 0
+  while IFS= read -r line || [[ -n "$line" ]]; do
+    # exact whole-line match (as grep -Fx); "" is stored as a sentinel key
+    _LM_EXCLUDED_SET["x$line"]=1
+  done < "$_LM_EXCLUDED_SRC"
+}
+lm_is_excluded() {
+  [ -f "${LM_EXCLUDED:-}" ] || return 1
+  _lm_excluded_load
+  [[ -n "${_LM_EXCLUDED_SET["x$1"]+x}" ]]
+}
+
+# _lm_hosts_load: resolve the host list into _LM_HOSTS (cached per source/exclusions).
+_LM_HOSTS=()
+_LM_HOSTS_KEY=""
+_lm_hosts_load() {
   # Host selection precedence:
   #  1) LM_GROUP=<name> and $LM_HOSTS_DIR/<name>.txt exists
   #  2) LM_SERVERLIST (default /etc/linux_maint/servers.txt)
   #  3) fallback: localhost
+  local key="${LM_GROUP:-}|${LM_HOSTS_DIR:-}|${LM_SERVERLIST:-}|${LM_EXCLUDED:-}"
+  [[ "$_LM_HOSTS_KEY" == "$key" ]] && return 0
 
   local group_file=""
   local src_file=""
@@ -519,36 +1205,40 @@ lm_hosts() {
     src_file="$LM_SERVERLIST"
   fi
 
+  _LM_HOSTS=()
+  _LM_HOSTS_KEY="$key"
   if [ -z "$src_file" ]; then
-    echo "localhost"
+    _LM_HOSTS=(localhost)
     return 0
   fi
 
-  awk -v excluded="${LM_EXCLUDED:-}" '
-    function trim(s){gsub(/^[ \t]+|[ \t]+$/, "", s); return s}
-    function load_excluded(path,  line){
-      if(path=="" || system("test -f " path " >/dev/null 2>&1")!=0) return
-      while((getline line < path) > 0){
-        sub(/#.*/, "", line)
-        line=trim(line)
-        if(line!="") ex[line]=1
-      }
-      close(path)
-    }
-    BEGIN { load_excluded(excluded) }
-    {
-      line=$0
-      sub(/#.*/, "", line)
-      gsub(/,/, " ", line)
-      n=split(line, a, /[[:space:]]+/)
-      for(i=1;i<=n;i++){
-        h=a[i]
-        if(h=="") continue
-        if(h in ex) continue
-        if(!(h in seen)){ print h; seen[h]=1 }
-      }
-    }
-  ' "$src_file"
+  # Exclusions here are comment-stripped and trimmed (lm_is_excluded is exact-line).
+  local -A ex=() seen=()
+  local line h
+  local -a words
+  if [ -f "${LM_EXCLUDED:-}" ]; then
+    while IFS= read -r line || [[ -n "$line" ]]; do
+      line="${line%%#*}"
+      IFS=$' \t\r' read -r line <<< "$line"
+      [[ -n "$line" ]] && ex["$line"]=1
+    done < "$LM_EXCLUDED"
+  fi
+  while IFS= read -r line || [[ -n "$line" ]]; do
+    line="${line%%#*}"
+    IFS=$' \t\r' read -r -a words <<< "${line//,/ }"
+    for h in "${words[@]}"; do
+      [[ -n "${ex[$h]+x}" || -n "${seen[$h]+x}" ]] && continue
+      seen["$h"]=1
+      _LM_HOSTS+=("$h")
+    done
+  done < "$src_file"
+}
+
+# yields hosts to stdout (one per line)
+lm_hosts() {
+  _lm_hosts_load
+  [[ "${#_LM_HOSTS[@]}" -gt 0 ]] && printf '%s\n' "${_LM_HOSTS[@]}"
+  return 0
 }
 
 
@@ -585,185 +1275,420 @@ lm_platform() {
   esac
 }
 
-# ========= Small job-pool for per-host parallelism =========
-# Usage: lm_for_each_host my_function   (function will be called with $host)
-lm_for_each_host() {
-  local fn="$1"
-  local -a PIDS=()
-  local running=0
-  local use_progress=0
-  local max_parallel="${LM_MAX_PARALLEL:-0}"
-  local cap="${LM_MAX_PARALLEL_CAP:-25}"
-  if [[ "$max_parallel" -gt 0 && "$cap" -gt 0 && "$max_parallel" -gt "$cap" ]]; then
-    lm_warn "LM_MAX_PARALLEL=$max_parallel exceeds cap=$cap; using cap"
-    max_parallel="$cap"
-  fi
+# ========= Result cache (slow-changing checks) =========
+# A monitor whose per-host results change rarely declares, before its host loop:
+#   lm_result_cache TTL_SECS [KEY_FILE ...]
+# While LM_RESULT_CACHE=1 (the wrapper enables it; `run --no-cache` disables it),
+# host pools re-emit a host's cached monitor= lines tagged "cached=1 age_s=<n>"
+# instead of calling the monitor function, as long as the entry is younger than
+# the TTL and its key still matches. The key covers the monitor script and the
+# KEY_FILEs (baselines, configs); the host fingerprint from the fact cache (kernel
+# + package DB mtime) invalidates entries when it changes. Results with an UNKNOWN
+# line, rc=3, a reason=ssh_unreachable line (connection failure) or a host marked
+# down during the check are never cached.
+# Side effects of a host check (alert lines, per-host mail) go through
+# lm_result_cache_effect FN ARGS...: the call runs now and is stored with the
+# entry, and a cache hit replays it, so alerting does not stop for cached hosts.
+#   LM_RESULT_CACHE_DIR        entries: <dir>/<monitor>/<host> (default $LM_STATE_DIR/result_cache)
+#   LM_RESULT_CACHE_TTL_MAP    per-monitor TTL overrides, e.g. "patch_monitor=7200,user_monitor=0"
+#   LM_RESULT_CACHE_REFRESH    monitors (or "all") that ignore entries this run but rewrite them
+#   LM_RESULT_CACHE_STATS      optional file; one "hit|miss|store <monitor> <host>" line per event
+# The wrapper keeps at most LM_RESULT_CACHE_MAX entries (least recently used evicted).
+_LM_RC_TTL=0
+_LM_RC_KEY=""
+_LM_RC_MONITOR=""
+_LM_RC_REFRESH=0
+_LM_RC_RC=0
+
+# lm_result_cache TTL [KEY_FILE ...] -> enable result caching for this monitor's host loops
+lm_result_cache() {
+  local ttl="$1" tok name
+  shift
+  _LM_RC_TTL=0
+  case "${LM_RESULT_CACHE:-0}" in
+    1|true|yes) ;;
+    *) return 0 ;;
+  esac
+  _LM_RC_MONITOR="${LM_POOL_MONITOR:-${0##*/}}"
+  _LM_RC_MONITOR="${_LM_RC_MONITOR%.sh}"
+  local -a map=()
+  _lm_split_list map "${LM_RESULT_CACHE_TTL_MAP:-}"
+  for tok in ${map[@]+"${map[@]}"}; do
+    [[ "${tok%%=*}" == "$_LM_RC_MONITOR" ]] && ttl="${tok#*=}"
+  done
+  [[ "$ttl" =~ ^[0-9]+$ && "$ttl" -gt 0 ]] || return 0
+  local -a refresh_list=()
+  _lm_split_list refresh_list "${LM_RESULT_CACHE_REFRESH:-}"
+  _LM_RC_REFRESH=0
+  for name in ${refresh_list[@]+"${refresh_list[@]}"}; do
+    [[ "${name%.sh}" == "$_LM_RC_MONITOR" || "$name" == all ]] && _LM_RC_REFRESH=1
+  done
+  _LM_RC_KEY="$(cat "$0" "$@" 2>/dev/null | cksum)" || return 0
+  _LM_RC_KEY="${_LM_RC_KEY// /-}"
+  _LM_RC_TTL="$ttl"
+}
 
-  if [[ "${LM_HOST_PROGRESS:-0}" -eq 1 ]] && lm_progress_enabled; then
-    use_progress=1
+# lm_result_cache_effect FN [ARG ...] -> run FN ARGS; record the call with the host's cache entry
+lm_result_cache_effect() {
+  "$@"
+  local rc=$? rec="$1" a
+  if [[ -n "${_LM_RC_FX:-}" ]]; then
+    # One line per call: tab-separated, backslash/newline/tab escaped (decoded with %b).
+    for a in "${@:2}"; do
+      a="${a//\\/\\\\}"; a="${a//$'\n'/\\n}"; a="${a//$'\t'/\\t}"
+      rec+=$'\t'"$a"
+    done
+    printf 'effect\t%s\n' "$rec" >> "$_LM_RC_FX" 2>/dev/null || true
   fi
+  return "$rc"
+}
 
-  if [ "$use_progress" -eq 1 ]; then
-    local -a HOSTS=()
-    local total=0
-    mapfile -t HOSTS < <(lm_hosts)
-    for HOST in "${HOSTS[@]}"; do
-      [ -z "$HOST" ] && continue
-      lm_is_excluded "$HOST" && continue
-      total=$((total+1))
-    done
-    lm_progress_begin "$total"
+# _lm_rc_replay RECORD -> re-run one recorded side effect (FN must be a defined function)
+_lm_rc_replay() {
+  local rest="$1" a
+  local -a args=()
+  while [[ "$rest" == *$'\t'* ]]; do
+    args+=("${rest%%$'\t'*}")
+    rest="${rest#*$'\t'}"
+  done
+  args+=("$rest")
+  [[ "${args[0]}" =~ ^[A-Za-z_][A-Za-z0-9_]*$ ]] && declare -F "${args[0]}" >/dev/null || return 0
+  local i
+  for ((i = 1; i < ${#args[@]}; i++)); do
+    printf -v a '%b' "${args[i]}"
+    args[i]="$a"
+  done
+  "${args[@]}" >/dev/null || true
+}
 
-    for HOST in "${HOSTS[@]}"; do
-      [ -z "$HOST" ] && continue
-      if lm_is_excluded "$HOST"; then
-        lm_info "Skipping $HOST (excluded)"
-        continue
-      fi
-      lm_progress_step "$HOST"
-      if [ "$max_parallel" -gt 0 ]; then
-        "$fn" "$HOST" &
-        PIDS+=($!)
-        running=$((running+1))
-        if [ "$running" -ge "$max_parallel" ]; then
-          wait -n
-          running=$((running-1))
-        fi
-      else
-        "$fn" "$HOST"
-      fi
-    done
-  else
-    while read -r HOST; do
-      [ -z "$HOST" ] && continue
-      lm_is_excluded "$HOST" && { lm_info "Skipping $HOST (excluded)"; continue; }
-
-      if [ "$max_parallel" -gt 0 ]; then
-        # background with simple pool
-        "$fn" "$HOST" &
-        PIDS+=($!)
-        running=$((running+1))
-        if [ "$running" -ge "$max_parallel" ]; then
-          wait -n
-          running=$((running-1))
-        fi
-      else
-        "$fn" "$HOST"
-      fi
-    done < <(lm_hosts)
+# _lm_rc_file HOST -> prints the entry path for HOST
+_lm_rc_file() {
+  printf '%s/%s/%s\n' "${LM_RESULT_CACHE_DIR:-${LM_STATE_DIR:-/var/lib/linux_maint}/result_cache}" \
+    "$_LM_RC_MONITOR" "${1//[^A-Za-z0-9._@-]/_}"
+}
+
+# _lm_rc_stat EVENT HOST -> append one line to LM_RESULT_CACHE_STATS
+_lm_rc_stat() {
+  [[ -n "${LM_RESULT_CACHE_STATS:-}" ]] || return 0
+  printf '%s %s %s\n' "$1" "$_LM_RC_MONITOR" "$2" >> "$LM_RESULT_CACHE_STATS" 2>/dev/null || true
+}
+
+# _lm_rc_fp HOST -> prints the host fingerprint from the fact cache (empty if unknown)
+_lm_rc_fp() {
+  lm_fact "$1" fingerprint 2>/dev/null || true
+}
+
+# _lm_rc_hit HOST -> rc=0 and the tagged cached lines on stdout when a fresh entry exists
+#                    (sets _LM_RC_RC to the cached host rc)
+_lm_rc_hit() {
+  local host="$1" f line ts="" key="" rc="" fp="" live_fp="" now age
+  [[ "$_LM_RC_TTL" -gt 0 && "$_LM_RC_REFRESH" -eq 0 ]] || return 1
+  f="$(_lm_rc_file "$host")"
+  if [[ ! -f "$f" ]]; then
+    _lm_rc_stat miss "$host"
+    return 1
   fi
+  local -a lines=() fx=()
+  while IFS= read -r line; do
+    case "$line" in
+      effect$'\t'*) fx+=("${line#effect$'\t'}") ;;
+      "# lm_result_cache "*)
+        for line in ${line#\# lm_result_cache }; do
+          case "$line" in
+            ts=*) ts="${line#ts=}" ;;
+            key=*) key="${line#key=}" ;;
+            rc=*) rc="${line#rc=}" ;;
+            fp=*) fp="${line#fp=}" ;;
+          esac
+        done ;;
+      monitor=*) lines+=("$line") ;;
+    esac
+  done < "$f"
+  printf -v now '%(%s)T' -1
+  [[ -n "$fp" ]] && live_fp="$(_lm_rc_fp "$host")"
+  if [[ ! "$ts" =~ ^[0-9]+$ || ! "$rc" =~ ^[0-3]$ || "$key" != "$_LM_RC_KEY" || "${#lines[@]}" -eq 0 ]] \
+     || [[ $((now - ts)) -ge "$_LM_RC_TTL" ]] \
+     || [[ -n "$live_fp" && "$live_fp" != "$fp" ]]; then
+    _lm_rc_stat miss "$host"
+    return 1
+  fi
+  age=$((now - ts))
+  for line in "${lines[@]}"; do
+    printf '%s cached=1 age_s=%s\n' "$line" "$age"
+  done
+  for line in ${fx[@]+"${fx[@]}"}; do
+    _lm_rc_replay "$line"
+  done
+  touch "$f" 2>/dev/null || true   # LRU: eviction keeps recently used entries
+  _lm_rc_stat hit "$host"
+  _LM_RC_RC="$rc"
+  return 0
+}
 
-  # wait remaining
-  if [ "${#PIDS[@]}" -gt 0 ]; then
-    wait "${PIDS[@]}" 2>/dev/null || true
+# _lm_rc_run HOST FN -> run FN for HOST, pass its output through and store a cacheable result
+_lm_rc_run() {
+  local host="$1" fn="$2" cap rc line f now ok=1
+  cap="${TMPDIR:-/tmp}/lm_rc.$BASHPID.$RANDOM"
+  local _LM_RC_FX="$cap.fx"
+  lm_span host "$host" host="$host" -- "$fn" "$host" > "$cap"
+  rc=$?
+  local -a lines=() fx=()
+  while IFS= read -r line; do
+    printf '%s\n' "$line"
+    if [[ "$line" == monitor=* ]]; then
+      lines+=("$line")
+      [[ "$line" == *" status=UNKNOWN"* || "$line" == *" reason=ssh_unreachable"* ]] && ok=0
+    fi
+  done < "$cap"
+  [[ -f "$_LM_RC_FX" ]] && mapfile -t fx < "$_LM_RC_FX"
+  rm -f "$cap" "$_LM_RC_FX" 2>/dev/null || true
+  # A connection failure (or a breaker trip during the check) says nothing about the
+  # host's state once it is back; never replay it for the TTL.
+  [[ -n "${LM_HOST_STATE_DIR:-}" ]] && lm_host_down "$host" && ok=0
+  if [[ "$ok" -eq 1 && "$rc" -le 2 && "${#lines[@]}" -gt 0 ]]; then
+    f="$(_lm_rc_file "$host")"
+    if [[ -d "${f%/*}" ]] || mkdir -p "${f%/*}" 2>/dev/null; then
+      printf -v now '%(%s)T' -1
+      { printf '# lm_result_cache ts=%s key=%s rc=%s fp=%s\n' "$now" "$_LM_RC_KEY" "$rc" "$(_lm_rc_fp "$host")"
+        printf '%s\n' "${lines[@]}" ${fx[@]+"${fx[@]}"}; } > "$f.tmp.$BASHPID" 2>/dev/null \
+        && mv -f "$f.tmp.$BASHPID" "$f" 2>/dev/null && _lm_rc_stat store "$host"
+      rm -f "$f.tmp.$BASHPID" 2>/dev/null || true
+    fi
   fi
-  if [ "$use_progress" -eq 1 ]; then
-    lm_progress_done
+  return "$rc"
+}
+
+# ========= Host pool (shared by lm_for_each_host / lm_for_each_host_rc) =========
+# - Serial (LM_MAX_PARALLEL=0): calls FN inline, so FN may update globals.
+# - Parallel: every free slot immediately takes the next host (no head-of-line
+#   blocking on the oldest job). Completions are reported through a small file so
+#   the same code works on every bash >= 4.3 (wait -n only wakes us up).
+# - LM_HOST_TIMEOUT=<secs> (parallel mode): hosts still running after the deadline
+#   are killed and reported as UNKNOWN reason=host_timeout.
+# - LM_POOL_ADAPTIVE=1 (parallel mode): the slot limit grows by one per healthy
+#   completion up to LM_POOL_MAX_PARALLEL (default LM_MAX_PARALLEL) and shrinks by
+#   a quarter when the smoothed host latency exceeds 3x the fastest host seen.
+# - Every host logs "host_pool host=<h> rc=<rc> queue_ms=<ms> exec_ms=<ms> limit=<n>".
+# Sets _LM_POOL_WORST to the worst host rc (0..3).
+
+# _lm_epoch_ms -> sets _LM_MS to wall-clock milliseconds (fork-free on bash >= 5)
+_lm_epoch_ms() {
+  if [[ "${EPOCHREALTIME:-}" =~ ^([0-9]+)[.,]([0-9]{3}) ]]; then
+    _LM_MS="${BASH_REMATCH[1]}${BASH_REMATCH[2]}"
+  else
+    _LM_MS="$(lm_now_ms)"
   fi
 }
 
+# _lm_kill_tree PID -> TERM a process and all of its descendants
+_lm_kill_tree() {
+  local p="$1" c
+  kill -STOP "$p" 2>/dev/null || true
+  for c in $(pgrep -P "$p" 2>/dev/null); do
+    _lm_kill_tree "$c"
+  done
+  kill -TERM "$p" 2>/dev/null || true
+  kill -CONT "$p" 2>/dev/null || true
+}
 
-# ========= Small job-pool for per-host parallelism (with worst-rc aggregation) =========
-# Usage: lm_for_each_host_rc my_function
-# - Calls: my_function <host>
-# - Returns: worst exit code across hosts (0/1/2/3)
-# Notes:
-# - In parallel mode, collects each background job rc via wait on recorded PIDs.
-# - In serial mode, updates worst rc inline.
-lm_for_each_host_rc() {
+_lm_host_pool() {
   local fn="$1"
-  local -a PIDS=()
-  local running=0
-  local worst=0
-  local use_progress=0
   local max_parallel="${LM_MAX_PARALLEL:-0}"
   local cap="${LM_MAX_PARALLEL_CAP:-25}"
+  local host_timeout="${LM_HOST_TIMEOUT:-0}"
+  [[ "$max_parallel" =~ ^[0-9]+$ ]] || max_parallel=0
+  [[ "$cap" =~ ^[0-9]+$ ]] || cap=25
+  [[ "$host_timeout" =~ ^[0-9]+$ ]] || host_timeout=0
   if [[ "$max_parallel" -gt 0 && "$cap" -gt 0 && "$max_parallel" -gt "$cap" ]]; then
     lm_warn "LM_MAX_PARALLEL=$max_parallel exceeds cap=$cap; using cap"
     max_parallel="$cap"
   fi
 
-  wait_one_oldest(){
-    local pid rc
-    pid="${PIDS[0]}"
-    if [ -n "$pid" ]; then
-      wait "$pid" 2>/dev/null
-      rc=$?
-      [ "$rc" -gt "$worst" ] && worst="$rc"
-      # pop front
-      PIDS=("${PIDS[@]:1}")
-      running=$((running-1))
+  local -a hosts=()
+  local h
+  _lm_hosts_load
+  for h in ${_LM_HOSTS[@]+"${_LM_HOSTS[@]}"}; do
+    if lm_is_excluded "$h"; then
+      lm_info "Skipping $h (excluded)"
+      continue
     fi
-  }
+    hosts+=("$h")
+  done
 
+  local use_progress=0
   if [[ "${LM_HOST_PROGRESS:-0}" -eq 1 ]] && lm_progress_enabled; then
     use_progress=1
+    lm_progress_begin "${#hosts[@]}"
   fi
 
-  if [ "$use_progress" -eq 1 ]; then
-    local -a HOSTS=()
-    local total=0
-    mapfile -t HOSTS < <(lm_hosts)
-    for HOST in "${HOSTS[@]}"; do
-      [ -z "$HOST" ] && continue
-      lm_is_excluded "$HOST" && continue
-      total=$((total+1))
-    done
-    lm_progress_begin "$total"
+  _LM_POOL_WORST=0
+  local rc t0 t1 pool_start
+  _lm_epoch_ms; pool_start="$_LM_MS"
+  local monitor="${LM_POOL_MONITOR:-${0##*/}}"
+  monitor="${monitor%.sh}"
+
+  # _lm_pool_skip_down HOST -> rc=0 (and one UNKNOWN line) when HOST is marked down
+  _lm_pool_skip_down() {
+    [[ -n "${LM_HOST_STATE_DIR:-}" ]] && lm_host_down "$1" || return 1
+    lm_warn "[$1] host is down (reachability sweep/circuit breaker); skipped"
+    lm_summary "$monitor" "$1" "UNKNOWN" reason=ssh_unreachable host_state=down
+    _LM_POOL_WORST=3
+    lm_info "host_pool host=$1 rc=3 queue_ms=0 exec_ms=0 skipped=down"
+    return 0
+  }
 
-    for HOST in "${HOSTS[@]}"; do
-      [ -z "$HOST" ] && continue
-      if lm_is_excluded "$HOST"; then
-        lm_info "Skipping $HOST (excluded)"
-        continue
-      fi
-      lm_progress_step "$HOST"
-      if [ "$max_parallel" -gt 0 ]; then
-        "$fn" "$HOST" &
-        PIDS+=($!)
-        running=$((running+1))
-
-        # throttle
-        while [ "$running" -ge "$max_parallel" ]; do
-          wait_one_oldest
-        done
+  # _lm_pool_cached HOST -> rc=0 when HOST's result was re-emitted from the result cache
+  _lm_pool_cached() {
+    [[ "$_LM_RC_TTL" -gt 0 ]] && _lm_rc_hit "$1" || return 1
+    [[ "$_LM_RC_RC" -gt "$_LM_POOL_WORST" ]] && _LM_POOL_WORST="$_LM_RC_RC"
+    lm_info "host_pool host=$1 rc=$_LM_RC_RC queue_ms=0 exec_ms=0 cached=1"
+    return 0
+  }
+
+  if [[ "$max_parallel" -le 0 ]]; then
+    for h in "${hosts[@]}"; do
+      [[ "$use_progress" -eq 1 ]] && lm_progress_step "$h"
+      _lm_pool_skip_down "$h" && continue
+      _lm_pool_cached "$h" && continue
+      _lm_epoch_ms; t0="$_LM_MS"
+      if [[ "$_LM_RC_TTL" -gt 0 ]]; then
+        _lm_rc_run "$h" "$fn"
       else
-        "$fn" "$HOST"
-        rc=$?
-        [ "$rc" -gt "$worst" ] && worst="$rc"
+        lm_span host "$h" host="$h" -- "$fn" "$h"
       fi
+      rc=$?
+      _lm_epoch_ms; t1="$_LM_MS"
+      [[ "$rc" -gt 3 ]] && rc=3
+      [[ "$rc" -gt "$_LM_POOL_WORST" ]] && _LM_POOL_WORST="$rc"
+      lm_info "host_pool host=$h rc=$rc queue_ms=$((t0 - pool_start)) exec_ms=$((t1 - t0)) limit=1"
     done
-  else
-    while read -r HOST; do
-      [ -z "$HOST" ] && continue
-      lm_is_excluded "$HOST" && { lm_info "Skipping $HOST (excluded)"; continue; }
-
-      if [ "$max_parallel" -gt 0 ]; then
-        "$fn" "$HOST" &
-        PIDS+=($!)
-        running=$((running+1))
-
-        # throttle
-        while [ "$running" -ge "$max_parallel" ]; do
-          wait_one_oldest
-        done
-      else
-        "$fn" "$HOST"
-        rc=$?
-        [ "$rc" -gt "$worst" ] && worst="$rc"
-      fi
-    done < <(lm_hosts)
+    [[ "$use_progress" -eq 1 ]] && lm_progress_done
+    return 0
   fi
 
-  # wait remaining
-  while [ "$running" -gt 0 ]; do
-    wait_one_oldest
+  local limit="$max_parallel" ceiling="${LM_POOL_MAX_PARALLEL:-$max_parallel}"
+  [[ "$ceiling" =~ ^[0-9]+$ && "$ceiling" -ge 1 ]] || ceiling="$max_parallel"
+  [[ "$cap" -gt 0 && "$ceiling" -gt "$cap" ]] && ceiling="$cap"
+  local adaptive=0
+  [[ "${LM_POOL_ADAPTIVE:-0}" == "1" || "${LM_POOL_ADAPTIVE:-}" == "true" ]] && adaptive=1
+  local base_ms=0 ewma_ms=0
+
+  local done_file
+  done_file="$(mktemp "${TMPDIR:-/tmp}/lm_pool.XXXXXX" 2>/dev/null)" || done_file="${TMPDIR:-/tmp}/lm_pool.$$.$RANDOM"
+  : > "$done_file"
+  local -A job_host=() job_start=() job_queue=()
+  local -a lines=()
+  local running=0 next=0 total="${#hosts[@]}" consumed=0 ticker="" pid line q e now
+
+  # _lm_pool_finish PID RC -> account one finished host
+  _lm_pool_finish() {
+    local p="$1" r="$2" hh="${job_host[$1]}"
+    _lm_epoch_ms
+    e=$((_LM_MS - job_start[$p]))
+    q="${job_queue[$p]}"
+    unset 'job_host[$p]' 'job_start[$p]' 'job_queue[$p]'
+    running=$((running - 1))
+    [[ "$r" =~ ^[0-9]+$ ]] || r=3
+    [[ "$r" -gt 3 ]] && r=3
+    [[ "$r" -gt "$_LM_POOL_WORST" ]] && _LM_POOL_WORST="$r"
+    if [[ "$adaptive" -eq 1 && "${3:-}" != "timeout" ]]; then
+      if [[ "$base_ms" -eq 0 || "$e" -lt "$base_ms" ]]; then base_ms="$e"; fi
+      [[ "$base_ms" -lt 1 ]] && base_ms=1
+      if [[ "$ewma_ms" -eq 0 ]]; then ewma_ms="$e"; else ewma_ms=$(( (ewma_ms * 3 + e) / 4 )); fi
+      if [[ "$ewma_ms" -gt $((base_ms * 3)) ]]; then
+        limit=$(( limit - (limit + 3) / 4 ))
+        [[ "$limit" -lt 1 ]] && limit=1
+      elif [[ "$limit" -lt "$ceiling" ]]; then
+        limit=$((limit + 1))
+      fi
+    fi
+    lm_info "host_pool host=$hh rc=$r queue_ms=$q exec_ms=$e limit=$limit"
+  }
+
+  while [[ "$next" -lt "$total" || "$running" -gt 0 ]]; do
+    while [[ "$running" -lt "$limit" && "$next" -lt "$total" ]]; do
+      h="${hosts[$next]}"
+      next=$((next + 1))
+      [[ "$use_progress" -eq 1 ]] && lm_progress_step "$h"
+      _lm_pool_skip_down "$h" && continue
+      _lm_pool_cached "$h" && continue
+      _lm_epoch_ms
+      # The EXIT trap also reports hosts whose function calls exit (e.g. lm_die).
+      # Profiling: each parallel host gets its own trace track.
+      ( trap 'echo "$BASHPID $?" >> "$done_file"' EXIT
+        [[ -n "${LM_PROFILE_FILE:-}" ]] && _LM_SPAN_TID="$BASHPID"
+        if [[ "$_LM_RC_TTL" -gt 0 ]]; then
+          _lm_rc_run "$h" "$fn"
+        else
+          lm_span host "$h" host="$h" -- "$fn" "$h"
+        fi ) &
+      pid=$!
+      job_host[$pid]="$h"
+      job_start[$pid]="$_LM_MS"
+      job_queue[$pid]=$((_LM_MS - pool_start))
+      running=$((running + 1))
+    done
+
+    # With deadlines, a 1s ticker child guarantees wait -n wakes up to check them.
+    if [[ "$host_timeout" -gt 0 ]] && { [[ -z "$ticker" ]] || ! kill -0 "$ticker" 2>/dev/null; }; then
+      sleep 1 &
+      ticker=$!
+    fi
+    local wrc=0
+    wait -n 2>/dev/null || wrc=$?
+
+    mapfile -t -s "$consumed" lines < "$done_file"
+    consumed=$((consumed + ${#lines[@]}))
+    if [[ "${#lines[@]}" -gt 0 ]]; then
+      for line in "${lines[@]}"; do
+        pid="${line%% *}"
+        [[ -n "${job_host[$pid]:-}" ]] || continue
+        _lm_pool_finish "$pid" "${line##* }"
+      done
+    fi
+    if [[ "$wrc" -eq 127 && "$running" -gt 0 ]]; then
+      # No children left but some hosts never reported: count them as UNKNOWN.
+      for pid in "${!job_host[@]}"; do
+        _lm_pool_finish "$pid" 3
+      done
+    fi
+
+    if [[ "$host_timeout" -gt 0 && "$running" -gt 0 ]]; then
+      _lm_epoch_ms; now="$_LM_MS"
+      for pid in "${!job_host[@]}"; do
+        if [[ $((now - job_start[$pid])) -ge $((host_timeout * 1000)) ]]; then
+          h="${job_host[$pid]}"
+          _lm_kill_tree "$pid"
+          lm_warn "[$h] host deadline exceeded (${host_timeout}s); killed"
+          lm_summary "$monitor" "$h" "UNKNOWN" reason=host_timeout timeout_secs="$host_timeout"
+          lm_span_emit host "$h" "$((job_start[$pid] * 1000))" host="$h" rc=3 timeout=1
+          _lm_pool_finish "$pid" 3 timeout
+        fi
+      done
+    fi
   done
-  if [ "$use_progress" -eq 1 ]; then
-    lm_progress_done
-  fi
 
-  return "$worst"
+  [[ -n "$ticker" ]] && kill "$ticker" 2>/dev/null
+  wait 2>/dev/null || true
+  rm -f "$done_file" 2>/dev/null || true
+  [[ "$use_progress" -eq 1 ]] && lm_progress_done
+  return 0
+}
+
+# ========= Per-host loops =========
+# Usage: lm_for_each_host my_function   (function will be called with $host)
+# Returns 0; use lm_for_each_host_rc when the worst host rc matters.
+lm_for_each_host() {
+  _lm_host_pool "$1"
+  return 0
+}
+
+# Usage: lm_for_each_host_rc my_function
+# - Calls: my_function <host>
+# - Returns: worst exit code across hosts (0/1/2/3)
+lm_for_each_host_rc() {
+  _lm_host_pool "$1"
+  return "$_LM_POOL_WORST"
 }
 
 # ========= Standard summary line =========
@@ -782,10 +1707,21 @@ lm_for_each_host_rc() {
 # Prints a single machine-parseable line.
 # Example:
 #   lm_summary "patch_monitor" "$host" "WARN" total=5 security=2 reboot_required=unknown
+# Node name of the runner: resolved once per process (the wrapper exports LM_NODE_NAME
+# so monitors skip the lookup entirely).
+_LM_NODE="${LM_NODE_NAME:-}"
+lm_node_name() {
+  if [[ -z "$_LM_NODE" ]]; then
+    _LM_NODE="$(hostname -f 2>/dev/null || hostname)"
+  fi
+  printf '%s' "$_LM_NODE"
+}
+
 lm_summary() {
   local monitor="$1" target_host="$2" status="$3"; shift 3
   local node
-  node="$(hostname -f 2>/dev/null || hostname)"
+  [[ -n "$_LM_NODE" ]] || _LM_NODE="$(hostname -f 2>/dev/null || hostname)"
+  node="$_LM_NODE"
   if [[ "${LM_SUMMARY_STRICT:-0}" == "1" || "${LM_SUMMARY_STRICT:-}" == "true" ]]; then
     if [[ -z "${monitor}" || -z "${target_host}" || -z "${status}" ]]; then
       echo "ERROR: lm_summary missing required fields (monitor/host/status)" >&2
@@ -840,11 +1776,13 @@ lm_summary() {
       has_reason=0
     fi
   fi
+  local -a allow_keys=()
   if [[ -n "${LM_SUMMARY_ALLOWLIST:-}" ]]; then
+    _lm_split_list allow_keys "$LM_SUMMARY_ALLOWLIST"
     allow_next_step=0
-    if printf '%s' "${LM_SUMMARY_ALLOWLIST}" | tr ', ' '\n' | awk 'NF{print $1}' | grep -qx 'next_step'; then
-      allow_next_step=1
-    fi
+    for tok in "${allow_keys[@]}"; do
+      [[ "$tok" == "next_step" ]] && allow_next_step=1
+    done
   fi
   if [[ "$has_next_step" -eq 0 && -n "$reason" && "$allow_next_step" -eq 1 ]]; then
     local next_step=""
@@ -862,11 +1800,11 @@ lm_summary() {
   fi
   if [[ -n "${LM_SUMMARY_ALLOWLIST:-}" ]]; then
     local allowlist
-    allowlist="$(printf '%s' "${LM_SUMMARY_ALLOWLIST}" | tr ', ' '\n' | awk 'NF{print $1}' | paste -sd '|' -)"
+    allowlist="$(IFS='|'; printf '%s' "${allow_keys[*]}")"
     if [[ -n "$reason" ]]; then
       if [[ -z "$allowlist" ]]; then
         allowlist="reason"
-      elif ! printf '%s' "$allowlist" | grep -qE '(^|\\|)reason(\\||$)'; then
+      elif [[ "|$allowlist|" != *"|reason|"* ]]; then
         allowlist="${allowlist}|reason"
       fi
     fi
@@ -892,8 +1830,16 @@ lm_summary() {
   fi
 
   line="monitor=${monitor} host=${target_host} status=${status} node=${node} ${args[*]}"
-  line="$(printf '%s' "$line" | sed "s/[[:space:]]\\+/ /g; s/[[:space:]]$//")"
-  line="$(lm_redact_kv_line "$line")"
+  if [[ "$line" == *$'\n'* ]]; then
+    line="$(printf '%s' "$line" | sed "s/[[:space:]]\\+/ /g; s/[[:space:]]$//")"
+  else
+    # collapse whitespace runs and drop trailing whitespace (no fork)
+    local -a words=()
+    IFS=$' \t' read -r -a words <<< "$line"
+    printf -v line '%s ' "${words[@]}"
+    line="${line% }"
+  fi
+  _lm_redact_enabled && line="$(lm_redact_kv_line "$line")"
   printf '%s\n' "$line"
 }
 
@@ -913,14 +1859,37 @@ lm_has_cmd_remote(){
     return 1
   fi
   [[ "$cmd" =~ ^[A-Za-z0-9._+-]+$ ]] || return 1
-  lm_ssh "$host" "command -v $cmd >/dev/null 2>&1"
+  lm_is_localhost "$host" && { lm_ssh "$host" "command -v $cmd >/dev/null 2>&1"; return; }
+  local key="$host|$cmd" rc=0
+  if [[ -n "${_LM_CMD_MEM[$key]:-}" ]]; then
+    return "${_LM_CMD_MEM[$key]}"
+  fi
+  lm_fact_has_cmd "$host" "$cmd" || rc=$?
+  if [[ "$rc" -ne 2 ]]; then
+    _LM_CMD_MEM["$key"]="$rc"
+    return "$rc"
+  fi
+  case " $LM_REMOTE_CMDS " in
+    *" $cmd "*)
+      if _lm_cmd_cache_load "$host" || lm_cmd_cache_refresh "$host"; then
+        if [[ -n "${_LM_CMD_MEM[$key]:-}" ]]; then
+          return "${_LM_CMD_MEM[$key]}"
+        fi
+      fi
+      ;;
+  esac
+  rc=0
+  lm_ssh "$host" "command -v $cmd >/dev/null 2>&1" || rc=$?
+  # Only remember definitive answers (255 = ssh failure, not a missing command).
+  [[ "$rc" -eq 0 || "$rc" -eq 1 ]] && _LM_CMD_MEM["$key"]="$rc"
+  return "$rc"
 }
 
 # Allow tests to force specific deps to appear missing (comma-separated list)
 lm_force_missing_dep(){
   local cmd="$1"
   [[ -z "${LM_FORCE_MISSING_DEPS:-}" ]] && return 1
-  echo ",${LM_FORCE_MISSING_DEPS}," | grep -q ",${cmd},"
+  [[ ",${LM_FORCE_MISSING_DEPS}," == *",${cmd},"* ]]
 }
 
 
@@ -928,6 +1897,10 @@ lm_force_missing_dep(){
 # If missing required cmd: prints standardized summary line and returns 3.
 # If missing optional cmd: prints standardized summary line and returns 0.
 lm_require_cmd(){
+  lm_span require_cmd "${3:-}" host="${2:-}" monitor="${1:-}" -- _lm_require_cmd "$@"
+}
+
+_lm_require_cmd(){
   local monitor="$1" host="$2" cmd="$3" opt="${4:-}"
   if lm_is_localhost "$host"; then
     if lm_has_cmd "$cmd"; then
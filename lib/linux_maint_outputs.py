@@ -0,0 +1,277 @@
+"""Run artifacts written at the end of a wrapper run (and by `linux-maint aggregate`).
+
+    write_summary_json()   full_health_monitor_summary_<ts>.json (+ _latest symlink)
+    write_prom()           Prometheus textfile (rows deduped by monitor+host, worst status)
+    trend_index_entry()    one trend_index.jsonl line for a summary file
+    run_index_entry()      one run_index.jsonl record for a run
+
+The wrapper calls `write_from_env()` with the values it computed during the
+run; `aggregate` calls the same writers with rows merged from several shards,
+so both produce identical formats.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import linux_maint_summary as lms  # noqa: E402
+
+__all__ = [
+    "STATUS_MAP", "read_status_file", "worst_status", "dedup_rows_worst",
+    "write_summary_json", "write_prom", "trend_index_entry", "run_index_entry",
+    "write_from_env",
+]
+
+STATUS_MAP = {"OK": 0, "WARN": 1, "CRIT": 2, "UNKNOWN": 3, "SKIP": 3}
+
+
+def read_status_file(path):
+    """key=value lines of last_status_full as a dict ({} if missing)."""
+    d = {}
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.strip()
+                if not line or "=" not in line:
+                    continue
+                k, v = line.split("=", 1)
+                d[k] = v
+    except FileNotFoundError:
+        pass
+    return d
+
+
+def worst_status(s1, s2):
+    """Return the worst of two status strings using the project's exit-code scale."""
+    return s1 if STATUS_MAP.get(s1, 3) >= STATUS_MAP.get(s2, 3) else s2
+
+
+def dedup_rows_worst(rows):
+    """Deduplicate monitor+host rows keeping the worst status.
+
+    Some monitors may emit more than one summary line for the same monitor/host
+    (e.g. preflight emitting both SKIP and UNKNOWN). Prometheus must not contain
+    duplicate labelsets.
+    """
+    out = {}
+    for r in rows:
+        mon = r.get("monitor", "unknown")
+        host = r.get("host", "all")
+        key = (mon, host)
+        if key not in out:
+            out[key] = r
+            continue
+        prev = out[key]
+        st = worst_status(prev.get("status", "UNKNOWN"), r.get("status", "UNKNOWN"))
+        keep = prev if st == prev.get("status") else r
+        # Ensure the kept row has the worst status.
+        keep = dict(keep)
+        keep["status"] = st
+        out[key] = keep
+    return list(out.values())
+
+
+def write_summary_json(rows, meta, json_file, json_latest="", legacy=False):
+    """Write {"meta", "rows"} (or the bare row list when *legacy*) and point *json_latest* at it."""
+    # Wrap rows with metadata so consumers can use one stable JSON contract.
+    payload = rows if legacy else {"meta": meta, "rows": rows}
+    os.makedirs(os.path.dirname(json_file), exist_ok=True)
+    try:
+        tmp_dir = os.path.dirname(json_file) or "."
+        fd, tmp = tempfile.mkstemp(prefix=".summary_json.", dir=tmp_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, sort_keys=True)
+        os.replace(tmp, json_file)
+    except Exception:
+        pass
+    if json_latest:
+        try:
+            if os.path.islink(json_latest) or os.path.exists(json_latest):
+                try:
+                    os.unlink(json_latest)
+                except OSError:
+                    pass
+            os.symlink(os.path.basename(json_file), json_latest)
+        except OSError:
+            pass
+
+
+def _esc(v):
+    return str(v).replace("\\", "\\\\").replace("\"", "\\\"")
+
+
+def write_prom(prom_file, rows, meta, exit_code, hosts, runtime_file="", runtime_warn_count=0,
+               run_epoch="", prom_format="", max_reason_labels=20):
+    """Prometheus textfile for *rows*; *hosts* maps ok/warn/crit/unknown/skipped to counts."""
+    os.makedirs(os.path.dirname(prom_file), exist_ok=True)
+    prom_rows = dedup_rows_worst(rows)
+    counts = {"OK": 0, "WARN": 0, "CRIT": 0, "UNKNOWN": 0, "SKIP": 0}
+    reason_counts = {}
+    for r in prom_rows:
+        st = r.get("status", "UNKNOWN")
+        counts[st] = counts.get(st, 0) + 1
+        if st != "OK":
+            reason = r.get("reason")
+            if reason:
+                reason_counts[reason] = reason_counts.get(reason, 0) + 1
+
+    def last_run_epoch_seconds():
+        try:
+            if run_epoch and str(run_epoch).isdigit():
+                return int(run_epoch)
+        except Exception:
+            pass
+        ts = meta.get("timestamp")
+        if not ts:
+            return -1
+        try:
+            dt = datetime.fromisoformat(ts)
+            return int(dt.timestamp())
+        except Exception:
+            return -1
+
+    def last_run_age_seconds():
+        # Prefer current run epoch if provided (close to 0), fallback to status file timestamp.
+        try:
+            if run_epoch and str(run_epoch).isdigit():
+                return max(0, int(time.time() - int(run_epoch)))
+        except Exception:
+            pass
+        ts = meta.get("timestamp")
+        if not ts:
+            return -1
+        try:
+            dt = datetime.fromisoformat(ts)
+            return max(0, int(time.time() - dt.timestamp()))
+        except Exception:
+            return -1
+
+    with open(prom_file, "w", encoding="utf-8") as f:
+        f.write("# HELP linux_maint_monitor_status Monitor status as exit-code scale (OK=0,WARN=1,CRIT=2,UNKNOWN/SKIP=3)\n")
+        f.write("# TYPE linux_maint_monitor_status gauge\n")
+        f.write("\n# HELP linux_maint_overall_status Overall run status as exit-code scale (OK=0,WARN=1,CRIT=2,UNKNOWN=3)\n")
+        f.write("# TYPE linux_maint_overall_status gauge\n")
+        f.write(f"linux_maint_overall_status {exit_code}\n")
+        f.write("\n# HELP linux_maint_last_run_age_seconds Seconds since the last wrapper run timestamp\n")
+        f.write("# TYPE linux_maint_last_run_age_seconds gauge\n")
+        f.write(f"linux_maint_last_run_age_seconds {last_run_age_seconds()}\n")
+        f.write("\n# HELP linux_maint_last_run_exit_code Exit code of last wrapper run\n")
+        f.write("# TYPE linux_maint_last_run_exit_code gauge\n")
+        f.write(f"linux_maint_last_run_exit_code {exit_code}\n")
+        f.write("\n# HELP linux_maint_last_run_timestamp Last wrapper run timestamp as epoch seconds\n")
+        f.write("# TYPE linux_maint_last_run_timestamp gauge\n")
+        f.write(f"linux_maint_last_run_timestamp {last_run_epoch_seconds()}\n")
+        f.write("\n# HELP linux_maint_summary_hosts_count Fleet counters derived from monitor= lines\n")
+        f.write("# TYPE linux_maint_summary_hosts_count gauge\n")
+        for key in ("ok", "warn", "crit", "unknown", "skipped"):
+            f.write(f"linux_maint_summary_hosts_count{{status=\"{key}\"}} {hosts.get(key, 0)}\n")
+        f.write("\n# HELP linux_maint_monitor_status_count Count of monitor results by status (deduped by monitor+host)\n")
+        f.write("# TYPE linux_maint_monitor_status_count gauge\n")
+        for st in ("OK", "WARN", "CRIT", "UNKNOWN", "SKIP"):
+            f.write(f"linux_maint_monitor_status_count{{status=\"{st.lower()}\"}} {counts.get(st, 0)}\n")
+
+        monitor_counts = {}
+        for r in prom_rows:
+            mon = r.get("monitor", "unknown")
+            monitor_counts[mon] = monitor_counts.get(mon, 0) + 1
+        f.write("\n# HELP linux_maint_monitor_host_count Count of host results per monitor (deduped by monitor+host)\n")
+        f.write("# TYPE linux_maint_monitor_host_count gauge\n")
+        for mon, cnt in sorted(monitor_counts.items()):
+            f.write(f"linux_maint_monitor_host_count{{monitor=\"{_esc(mon)}\"}} {cnt}\n")
+
+        f.write("\n# HELP linux_maint_reason_count Count of non-OK monitor results by reason token (deduped by monitor+host; top N reasons)\n")
+        f.write("# TYPE linux_maint_reason_count gauge\n")
+        if reason_counts and max_reason_labels > 0:
+            for reason, count in sorted(reason_counts.items(), key=lambda kv: (-kv[1], kv[0]))[:max_reason_labels]:
+                f.write(f"linux_maint_reason_count{{reason=\"{_esc(reason)}\"}} {count}\n")
+
+        for r in prom_rows:
+            mon = r.get("monitor", "unknown"); host = r.get("host", "all"); st = r.get("status", "UNKNOWN")
+            val = STATUS_MAP.get(st, 3)
+            f.write(f"linux_maint_monitor_status{{monitor=\"{mon}\",host=\"{host}\"}} {val}\n")
+
+        # Runtime metrics (per monitor script)
+        if runtime_file:
+            f.write("\n# HELP linux_maint_monitor_runtime_ms Monitor runtime in milliseconds (wrapper)\n")
+            f.write("# TYPE linux_maint_monitor_runtime_ms gauge\n")
+            for d in lms.read_dicts(runtime_file):
+                mon = d.get("monitor")
+                ms = d.get("ms")
+                if mon and ms and ms.isdigit():
+                    f.write(f"linux_maint_monitor_runtime_ms{{monitor=\"{mon}\"}} {ms}\n")
+
+        # Runtime warning count (wrapper guard)
+        f.write("\n# HELP linux_maint_runtime_warn_count Count of monitors exceeding runtime warn thresholds\n")
+        f.write("# TYPE linux_maint_runtime_warn_count gauge\n")
+        f.write(f"linux_maint_runtime_warn_count {runtime_warn_count}\n")
+        if prom_format == "openmetrics":
+            f.write("# EOF\n")
+
+
+def trend_index_entry(summary_file, agg=None):
+    """trend_index.jsonl record: per-run aggregate keyed by file name + size + mtime."""
+    agg = agg if agg is not None else lms.aggregate(summary_file)
+    st_ = os.stat(summary_file)
+    return {"v": 1, "file": os.path.basename(summary_file), "size": st_.st_size,
+            "mtime_ns": st_.st_mtime_ns, "totals": agg.totals, "reasons": agg.reasons}
+
+
+def run_index_entry(summary_file, summary_json, logfile, overall, exit_code, ts_epoch, agg=None):
+    """run_index.jsonl record for one run (host counts and top reasons from *summary_file*)."""
+    # One pass over the summary for both rollups (reason counts include OK rows carrying reason=).
+    if agg is None:
+        agg = lms.aggregate(summary_file) if summary_file else lms.Aggregate()
+    ts_epoch = str(ts_epoch)
+    top_reasons = [{"reason": r, "count": c} for r, c in agg.top_reasons(10, non_ok=False)]
+    host_counts = {
+        "ok": agg.totals["OK"],
+        "warn": agg.totals["WARN"],
+        "crit": agg.totals["CRIT"],
+        "unknown": agg.totals["UNKNOWN"],
+        "skipped": agg.totals["SKIP"],
+    }
+    return {
+        "run_index_version": 1,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(int(ts_epoch))) if ts_epoch.isdigit() else "",
+        "timestamp_epoch": int(ts_epoch) if ts_epoch.isdigit() else None,
+        "overall": overall,
+        "exit_code": int(exit_code) if str(exit_code).isdigit() else 3,
+        "logfile": logfile,
+        "summary_file": summary_file if summary_file else None,
+        "summary_json": summary_json if summary_json else None,
+        "hosts": host_counts,
+        "top_reasons": top_reasons,
+    }
+
+
+def write_from_env():
+    """Wrapper entry point: summary JSON + Prometheus textfile from the run's env values (best-effort)."""
+    env = os.environ.get
+    summary_file = env("SUMMARY_FILE")
+    json_file = env("SUMMARY_JSON_FILE")
+    prom_file = env("PROM_FILE")
+    rows = lms.read_dicts(summary_file) if summary_file else []
+    status_file = env("LM_STATUS_FILE")
+    meta = read_status_file(status_file) if status_file else {}
+    if json_file:
+        # Back-compat: set LM_JSON_LEGACY_LIST=1 to output only the list.
+        write_summary_json(rows, meta, json_file, env("SUMMARY_JSON_LATEST_FILE") or "",
+                           legacy=env("LM_JSON_LEGACY_LIST", "0") == "1")
+    if prom_file and rows:
+        try:
+            max_reason_labels = max(0, int(env("LM_PROM_MAX_REASON_LABELS", "20")))
+        except Exception:
+            max_reason_labels = 20
+        hosts = {k: int(env("LM_HOSTS_" + k.upper(), "0")) for k in ("ok", "warn", "crit", "unknown", "skipped")}
+        try:
+            write_prom(prom_file, rows, meta, int(env("LM_EXIT_CODE", "3")), hosts,
+                       runtime_file=env("LM_RUNTIME_FILE") or "",
+                       runtime_warn_count=int(env("LM_RUNTIME_WARN_COUNT", "0")),
+                       run_epoch=env("LM_RUN_EPOCH", ""), prom_format=env("LM_PROM_FORMAT", ""),
+                       max_reason_labels=max_reason_labels)
+        except Exception:
+            pass
@@ -0,0 +1,287 @@
+"""Segmented run index (`run_index.jsonl`) shared by the wrapper and the CLI.
+
+Layout (all next to the configured index path):
+
+    run_index.jsonl          active segment, append-only (newest records)
+    run_index.jsonl.000007   sealed segments, oldest = lowest sequence number
+    run_index.jsonl.hdr      small JSON header: per-segment record/byte counts
+
+Appending writes one line and rewrites the tiny header; the active segment is
+sealed (renamed) once it holds `segment_size` records. Appends and prunes hold
+an exclusive lock on `run_index.jsonl.lock`, so concurrent writers (parallel
+serve batches, shards) cannot seal over each other. Retention drops whole
+sealed segments, so no run ever rewrites the history. Readers walk segments
+newest-first with a reverse block reader, so `history --last N` touches only
+the tail.
+
+The header is advisory: a missing/stale header (e.g. an index written by an
+older release or edited by hand) is rebuilt from the files, and a legacy
+single-file index simply becomes the first active segment.
+"""
+
+import glob
+import json
+import os
+import tempfile
+
+__all__ = ["RunIndex", "DEFAULT_SEGMENT_SIZE", "iter_reverse_lines"]
+
+DEFAULT_SEGMENT_SIZE = 50
+HEADER_VERSION = 1
+_BLOCK = 8192
+
+
+def iter_reverse_lines(path, block=_BLOCK):
+    """Non-empty lines of *path*, last line first, reading fixed blocks from the end."""
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return
+    with f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        rest = b""
+        while pos > 0:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step) + rest
+            parts = chunk.split(b"\n")
+            # parts[0] may be the tail of an earlier line; keep it for the next block.
+            rest = parts[0]
+            for raw in reversed(parts[1:]):
+                if raw.strip():
+                    yield raw.decode("utf-8", "ignore")
+        if rest.strip():
+            yield rest.decode("utf-8", "ignore")
+
+
+def _count_lines(path):
+    n = 0
+    try:
+        with open(path, "rb") as f:
+            for raw in f:
+                if raw.strip():
+                    n += 1
+    except OSError:
+        pass
+    return n
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return -1
+
+
+class RunIndex(object):
+    """Segmented JSONL run index rooted at *path* (the active segment)."""
+
+    def __init__(self, path, segment_size=DEFAULT_SEGMENT_SIZE):
+        self.path = path
+        self.header_path = path + ".hdr"
+        try:
+            self.segment_size = max(1, int(segment_size))
+        except (TypeError, ValueError):
+            self.segment_size = DEFAULT_SEGMENT_SIZE
+        self._hdr = None
+
+    # ---- header -------------------------------------------------------
+    def _seg_path(self, seq):
+        return "%s.%06d" % (self.path, seq)
+
+    def _scan(self):
+        """Rebuild the header from the files on disk."""
+        segs = []
+        for p in glob.glob(glob.escape(self.path) + ".[0-9]*"):
+            suffix = p[len(self.path) + 1:]
+            if suffix.isdigit():
+                segs.append({"seq": int(suffix), "records": _count_lines(p), "bytes": _size(p)})
+        segs.sort(key=lambda s: s["seq"])
+        return {
+            "v": HEADER_VERSION,
+            "next_seq": (segs[-1]["seq"] + 1) if segs else 1,
+            "segments": segs,
+            "active": {"records": _count_lines(self.path), "bytes": max(0, _size(self.path))},
+        }
+
+    def header(self):
+        if self._hdr is not None:
+            return self._hdr
+        hdr = None
+        try:
+            with open(self.header_path, "r", encoding="utf-8") as f:
+                hdr = json.load(f)
+            if hdr.get("v") != HEADER_VERSION:
+                hdr = None
+        except (OSError, ValueError, AttributeError):
+            hdr = None
+        if hdr is not None:
+            # Sealed segments must still exist unchanged; the active segment may have
+            # been appended to or replaced by something that does not know about the header.
+            if any(_size(self._seg_path(s["seq"])) != s["bytes"] for s in hdr["segments"]):
+                hdr = None
+            elif max(0, _size(self.path)) != hdr["active"]["bytes"]:
+                hdr["active"] = {"records": _count_lines(self.path), "bytes": max(0, _size(self.path))}
+        if hdr is None:
+            hdr = self._scan()
+        self._hdr = hdr
+        return hdr
+
+    def _write_header(self):
+        hdr = self._hdr
+        d = os.path.dirname(self.header_path) or "."
+        fd, tmp = tempfile.mkstemp(prefix=".run_index_hdr.", dir=d)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(hdr, f, sort_keys=True)
+            os.replace(tmp, self.header_path)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    # ---- queries ------------------------------------------------------
+    def exists(self):
+        hdr = self.header()
+        return os.path.exists(self.path) or bool(hdr["segments"])
+
+    def count(self):
+        hdr = self.header()
+        return hdr["active"]["records"] + sum(s["records"] for s in hdr["segments"])
+
+    def segment_files(self):
+        """Segment paths, newest first (active segment first)."""
+        hdr = self.header()
+        out = [self.path]
+        out.extend(self._seg_path(s["seq"]) for s in reversed(hdr["segments"]))
+        return out
+
+    def iter_reverse(self):
+        """Decoded records, newest first; undecodable lines are skipped."""
+        for p in self.segment_files():
+            for line in iter_reverse_lines(p):
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def tail(self, n):
+        """Last *n* records, oldest first."""
+        out = []
+        if n <= 0:
+            return out
+        for rec in self.iter_reverse():
+            out.append(rec)
+            if len(out) >= n:
+                break
+        out.reverse()
+        return out
+
+    def last(self):
+        for rec in self.iter_reverse():
+            return rec
+        return {}
+
+    # ---- writes -------------------------------------------------------
+    def _lock(self):
+        """Exclusive writer lock (held until the file object is closed).
+
+        The header is re-read under the lock: another writer may have appended or
+        sealed since this object loaded it.
+        """
+        try:
+            f = open(self.path + ".lock", "a")
+        except OSError:
+            f = open(os.devnull, "a")
+        try:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        except (ImportError, OSError):
+            pass
+        self._hdr = None
+        return f
+
+    def append(self, entry, keep=0):
+        """Append one record (dict or JSON line); seal/prune whole segments as needed."""
+        line = entry if isinstance(entry, str) else json.dumps(entry, sort_keys=True)
+        line = line.rstrip("\n") + "\n"
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with self._lock():
+            self._append(line, keep)
+
+    def _append(self, line, keep):
+        hdr = self.header()
+        if hdr["active"]["records"] >= self.segment_size:
+            self._seal()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+        hdr["active"]["records"] += 1
+        hdr["active"]["bytes"] = max(0, _size(self.path))
+        if keep > 0:
+            self._drop_segments(keep)
+        self._write_header()
+
+    def _seal(self):
+        hdr = self.header()
+        seq = hdr["next_seq"]
+        os.replace(self.path, self._seg_path(seq))
+        hdr["segments"].append({"seq": seq, "records": hdr["active"]["records"],
+                                "bytes": hdr["active"]["bytes"]})
+        hdr["next_seq"] = seq + 1
+        hdr["active"] = {"records": 0, "bytes": 0}
+
+    def _drop_segments(self, keep):
+        """Remove oldest sealed segments while the rest still holds >= *keep* records."""
+        hdr = self.header()
+        total = self.count()
+        segs = hdr["segments"]
+        while segs and total - segs[0]["records"] >= keep:
+            old = segs.pop(0)
+            total -= old["records"]
+            try:
+                os.unlink(self._seg_path(old["seq"]))
+            except FileNotFoundError:
+                pass
+        return total
+
+    def prune(self, keep):
+        """Keep exactly the newest *keep* records.
+
+        Whole segments are dropped first; only the single boundary segment (at most
+        one segment's worth of lines) is rewritten.
+        """
+        with self._lock():
+            return self._prune(keep)
+
+    def _prune(self, keep):
+        hdr = self.header()
+        before = self.count()
+        if keep <= 0 or before <= keep:
+            return before, before
+        self._drop_segments(keep)
+        total = self.count()
+        excess = total - keep
+        if excess > 0:
+            if hdr["segments"]:
+                seg = hdr["segments"][0]
+                p = self._seg_path(seg["seq"])
+            else:
+                seg = hdr["active"]
+                p = self.path
+            with open(p, "r", encoding="utf-8", errors="ignore") as f:
+                lines = [l for l in f if l.strip()]
+            lines = lines[excess:]
+            fd, tmp = tempfile.mkstemp(prefix=".run_index.", dir=os.path.dirname(p) or ".")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            os.replace(tmp, p)
+            seg["records"] = len(lines)
+            seg["bytes"] = max(0, _size(p))
+        self._write_header()
+        return before, self.count()
@@ -0,0 +1,356 @@
+"""Compiled JSON Schema (subset) validation for run artifacts and --json outputs.
+
+compile_schema() turns a schema into a tree of closures, one per schema node,
+each specialised for the keywords that node uses; validating a document is then
+a single walk over the document. Each schema compiles twice: a boolean tree
+(exact-type tests, no paths) that valid documents take, and an error-collecting
+tree that runs only for documents the first one rejects. Supported keywords (what docs/schemas uses):
+type (name or list), enum, minimum, required, properties,
+additionalProperties (false), items. Other keywords are ignored. Errors are
+collected, not raised, each with its JSON path:
+
+    $.hosts.ok: type mismatch (expected integer, got str)
+
+Compiled schemas are cached per file (path, size, mtime), so one process can
+check many documents against many schemas.
+
+    python3 linux_maint_schema.py check [--schema S] [--jsonl] [--tail N] [--max-errors N] FILE...
+
+Without --schema the schema is picked by file name (ARTIFACTS); *.jsonl files
+and sealed run index segments (*.jsonl.NNNNNN) are checked one document per line. Prints `SCHEMA_CHECK files=N docs=N errors=N ms=N`
+after the errors and exits 2 when any document fails.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+
+# Run artifacts the wrapper writes -> schema file in the schema dir.
+ARTIFACTS = (
+    (re.compile(r"^full_health_monitor_summary_.*\.json$"), "summary.json"),
+    (re.compile(r"^run_index\.jsonl(\.\d+)?$"), "run_index.json"),
+)
+_JSONL = re.compile(r"\.jsonl(\.\d+)?$")
+
+_TYPES = {
+    "null": lambda v: v is None,
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+}
+
+
+# Fast-path type tests: JSON decoding yields exact builtin types.
+_EXACT = {
+    None: (type(None),),
+    "null": (type(None),),
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "object": (dict,),
+    "array": (list,),
+}
+
+
+def _never(v):
+    return False
+
+
+def _always(v):
+    return True
+
+
+def _noop(v, path, errs):
+    return None
+
+
+def _type_check(t):
+    if isinstance(t, list):
+        preds = tuple(_TYPES["null"] if x is None else _TYPES.get(x, _never) for x in t)
+
+        def check(v, path, errs):
+            for p in preds:
+                if p(v):
+                    return
+            errs.append("%s: type mismatch (expected one of %s, got %s)" % (path, t, type(v).__name__))
+        return check
+    pred = _TYPES.get(t, _never)
+
+    def check(v, path, errs):
+        if not pred(v):
+            errs.append("%s: type mismatch (expected %s, got %s)" % (path, t, type(v).__name__))
+    return check
+
+
+def _has(t, name):
+    return t == name or (isinstance(t, list) and name in t)
+
+
+def _all(tests):
+    if len(tests) == 1:
+        return tests[0]
+    if len(tests) == 2:
+        a, b = tests
+        return lambda v: a(v) and b(v)
+    tests = tuple(tests)
+    return lambda v: all(t(v) for t in tests)
+
+
+def _compile_ok(schema):
+    """Boolean closure ok(value) for *schema*, or None when the node accepts anything."""
+    tests = []
+    t = schema.get("type")
+    # An object/array node tests its own container type below.
+    if t is not None and t not in ("object", "array"):
+        types = frozenset(k for x in (t if isinstance(t, list) else [t]) for k in _EXACT.get(x, ()))
+        if len(types) == 1:
+            only = next(iter(types))
+            tests.append(lambda v: type(v) is only)
+        else:
+            tests.append(lambda v: type(v) in types)
+    if "enum" in schema:
+        enum = list(schema["enum"])
+        tests.append(lambda v: v in enum)
+    if "minimum" in schema:
+        low = schema["minimum"]
+        tests.append(lambda v: not (type(v) in (int, float) and v < low))
+    if _has(t, "object"):
+        props = {}
+        for k, sub in schema.get("properties", {}).items():
+            props[k] = _compile_ok(sub)
+        checked = dict((k, f) for k, f in props.items() if f is not None)
+        required = tuple(schema.get("required", ()))
+        closed = schema.get("additionalProperties") is False
+        strict = t == "object"
+
+        def ok_object(v):
+            if type(v) is not dict:
+                return not strict and not required
+            for key in required:
+                if key not in v:
+                    return False
+            if closed:
+                for k in v:
+                    if k not in props:
+                        return False
+            for k, f in checked.items():
+                if k in v and not f(v[k]):
+                    return False
+            return True
+        tests.append(ok_object)
+    if t == "array" or (_has(t, "array") and "items" in schema):
+        item = _compile_ok(schema["items"]) if "items" in schema else None
+        strict = t == "array"
+
+        def ok_array(v):
+            if type(v) is not list:
+                return not strict
+            return item is None or all(map(item, v))
+        tests.append(ok_array)
+    return _all(tests) if tests else None
+
+
+def compile_schema(schema):
+    """Validator closure f(value, path, errors) for *schema*; appends "path: message" errors.
+
+    The closure's ``ok`` attribute is the boolean fast path (None: accepts anything).
+    """
+    inner = _compile_collect(schema)
+
+    def collect(v, path, errs):
+        inner(v, path, errs)
+    collect.ok = _compile_ok(schema) or _always
+    return collect
+
+
+def _compile_collect(schema):
+    checks = []
+    t = schema.get("type")
+    if t is not None:
+        checks.append(_type_check(t))
+    if "enum" in schema:
+        enum = list(schema["enum"])
+
+        def check_enum(v, path, errs):
+            if v not in enum:
+                errs.append("%s: value %r not in enum" % (path, v))
+        checks.append(check_enum)
+    if "minimum" in schema:
+        low = schema["minimum"]
+
+        def check_min(v, path, errs):
+            if isinstance(v, (int, float)) and not isinstance(v, bool) and v < low:
+                errs.append("%s: value %r below minimum %r" % (path, v, low))
+        checks.append(check_min)
+    if _has(t, "object"):
+        props = dict((k, _compile_collect(s)) for k, s in schema.get("properties", {}).items())
+        required = tuple(schema.get("required", ()))
+        closed = schema.get("additionalProperties") is False
+
+        def check_object(v, path, errs):
+            if not isinstance(v, dict):
+                if required:
+                    errs.append("%s: missing required key %r" % (path, required[0]))
+                return
+            for key in required:
+                if key not in v:
+                    errs.append("%s: missing required key %r" % (path, key))
+            for k, x in v.items():
+                c = props.get(k)
+                if c is not None:
+                    c(x, path + "." + k, errs)
+                elif closed:
+                    errs.append("%s: unexpected key %r" % (path, k))
+        checks.append(check_object)
+    if _has(t, "array") and "items" in schema:
+        item = _compile_collect(schema["items"])
+        if item is not _noop:
+            def check_items(v, path, errs):
+                if isinstance(v, list):
+                    for i, x in enumerate(v):
+                        item(x, "%s[%d]" % (path, i), errs)
+            checks.append(check_items)
+    if not checks:
+        return _noop
+    checks = tuple(checks)
+
+    def node(v, path, errs):
+        for c in checks:
+            c(v, path, errs)
+    return node
+
+
+def errors(validator, value, path="$"):
+    """All errors of *value* against a compiled *validator* (empty list when valid)."""
+    ok = getattr(validator, "ok", None)
+    if ok is not None and ok(value):
+        return []
+    errs = []
+    validator(value, path, errs)
+    return errs
+
+
+_CACHE = {}
+
+
+def load(schema_path):
+    """Compiled validator for a schema file, compiled once per (path, size, mtime)."""
+    st = os.stat(schema_path)
+    key = os.path.abspath(schema_path)
+    hit = _CACHE.get(key)
+    if hit is not None and hit[0] == (st.st_size, st.st_mtime):
+        return hit[1]
+    with open(schema_path, "r", encoding="utf-8") as f:
+        compiled = compile_schema(json.load(f))
+    _CACHE[key] = ((st.st_size, st.st_mtime), compiled)
+    return compiled
+
+
+def schema_dir():
+    """docs/schemas of the checkout, else the installed copy ($LM_SCHEMA_DIR wins)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    for d in (os.environ.get("LM_SCHEMA_DIR"), os.path.join(here, "..", "docs", "schemas"),
+              "/usr/local/share/Linux_Maint_ToolKit/docs/schemas", "/usr/share/Linux_Maint_ToolKit/docs/schemas"):
+        if d and os.path.isdir(d):
+            return d
+    return ""
+
+
+def schema_for(path, sdir):
+    """Schema file for a run artifact, by its file name ("" when none applies)."""
+    name = os.path.basename(path)
+    for pat, schema in ARTIFACTS:
+        if pat.match(name):
+            return os.path.join(sdir, schema) if sdir else ""
+    return ""
+
+
+def check_file(path, validator, jsonl=False, tail=0):
+    """(documents, errors) for one file; errors are prefixed with file[:line]."""
+    try:
+        f = open(path, "r", encoding="utf-8", errors="replace")
+    except OSError as e:
+        return 0, ["%s: cannot read: %s" % (path, e.strerror or e)]
+    with f:
+        if not jsonl:
+            try:
+                doc = json.load(f)
+            except ValueError as e:
+                return 1, ["%s: invalid JSON: %s" % (path, e)]
+            return 1, ["%s: %s" % (path, e) for e in errors(validator, doc)]
+        lines = deque(enumerate(f, 1), maxlen=tail) if tail > 0 else enumerate(f, 1)
+        docs, errs = 0, []
+        for n, line in lines:
+            if not line.strip():
+                continue
+            docs += 1
+            try:
+                doc = json.loads(line)
+            except ValueError as e:
+                errs.append("%s:%d: invalid JSON: %s" % (path, n, e))
+                continue
+            for e in errors(validator, doc):
+                errs.append("%s:%d: %s" % (path, n, e))
+        return docs, errs
+
+
+def _check(args):
+    started = time.time()
+    sdir = args.schema_dir or schema_dir()
+    files = docs = 0
+    errs = []
+    for path in args.files:
+        schema = args.schema or schema_for(path, sdir)
+        if not schema:
+            errs.append("%s: no schema for this file (use --schema)" % path)
+            continue
+        try:
+            validator = load(schema)
+        except (OSError, ValueError) as e:
+            errs.append("%s: cannot load schema %s: %s" % (path, schema, e))
+            continue
+        jsonl = args.jsonl or bool(_JSONL.search(path))
+        n, e = check_file(path, validator, jsonl, args.tail)
+        files += 1
+        docs += n
+        errs.extend(e)
+    shown = errs if args.max_errors <= 0 else errs[:args.max_errors]
+    for e in shown:
+        print("SCHEMA FAIL: %s" % e)
+    if len(errs) > len(shown):
+        print("SCHEMA FAIL: ... %d more" % (len(errs) - len(shown)))
+    print("SCHEMA_CHECK files=%d docs=%d errors=%d ms=%d"
+          % (files, docs, len(errs), int((time.time() - started) * 1000)))
+    return 2 if errs else 0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="linux_maint_schema.py")
+    sub = p.add_subparsers(dest="cmd")
+    c = sub.add_parser("check")
+    c.add_argument("--schema", default="", help="schema for every FILE (default: by file name)")
+    c.add_argument("--schema-dir", default="", help="where by-name schemas live (default: docs/schemas)")
+    c.add_argument("--jsonl", action="store_true", help="one document per line (implied for *.jsonl and *.jsonl.NNNNNN)")
+    c.add_argument("--tail", type=int, default=0, help="check only the last N lines of JSONL files")
+    c.add_argument("--max-errors", type=int, default=0, help="print at most N errors (0 = all)")
+    c.add_argument("files", nargs="+")
+    args = p.parse_args(argv)
+    if args.cmd == "check":
+        return _check(args)
+    p.print_usage(sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        sys.exit(1)
@@ -0,0 +1,589 @@
+"""`linux-maint serve`: per-monitor scheduler with an in-memory result store.
+
+Each monitor runs on its own interval (built-in defaults, monitor_intervals.conf,
+`--interval MON=SECS`). Monitors that fall due together run as one wrapper
+invocation (`LM_MONITORS=...`) in a private run directory, so the wrapper's
+gates, timeouts, reachability sweep and fact collection apply unchanged while
+full-run artifacts (latest summary, JSON, Prometheus textfile, notifications)
+are never touched. The latest `monitor=` rows of every monitor stay in memory
+and are served over a unix socket, and optionally over localhost HTTP:
+
+    GET /summary       monitor= lines (summary file format, monitor order)
+    GET /last_status   key=value lines (last_status_full format)
+    GET /status        JSON: overall, totals, per-monitor schedule and last run
+    GET /metrics       Prometheus text exposition
+    GET /health        "ok"
+
+`linux-maint status` (and report/metrics/summary/dashboard, which call it)
+reads /summary and /last_status instead of the files when the socket answers:
+
+    python3 linux_maint_serve.py run --wrapper W --socket S --monitors "a.sh b.sh"
+    python3 linux_maint_serve.py fetch --socket S --summary F --last-status F
+    python3 linux_maint_serve.py get --socket S /metrics
+"""
+
+import argparse
+import http.client
+import http.server
+import json
+import os
+import re
+import shutil
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import linux_maint_summary as lms  # noqa: E402
+
+__all__ = ["DEFAULT_INTERVALS", "Store", "Scheduler", "load_intervals", "fetch"]
+
+# Seconds between runs when neither the config file nor --interval sets one.
+DEFAULT_INTERVAL = 900
+DEFAULT_INTERVALS = {
+    "preflight_check": 86400,
+    "config_validate": 86400,
+    "resource_monitor": 60,
+    "health_monitor": 300,
+    "filesystem_readonly_monitor": 300,
+    "service_monitor": 300,
+    "network_monitor": 300,
+    "log_spike_monitor": 300,
+    "kernel_events_monitor": 300,
+    "patch_monitor": 3600,
+    "cert_monitor": 3600,
+    "disk_trend_monitor": 3600,
+    "storage_health_monitor": 3600,
+    "config_drift_monitor": 3600,
+    "user_monitor": 3600,
+    "backup_check": 3600,
+    "inventory_export": 86400,
+}
+
+# Wrapper exit-code precedence: UNKNOWN(3) > CRIT(2) > WARN(1) > OK/SKIP(0).
+RC_BY_STATUS = {"OK": 0, "SKIP": 0, "WARN": 1, "CRIT": 2, "UNKNOWN": 3}
+OVERALL_BY_RC = ("OK", "WARN", "CRIT", "UNKNOWN")
+
+
+def _iso(epoch):
+    if not epoch:
+        return None
+    return datetime.fromtimestamp(epoch, timezone.utc).astimezone().isoformat(timespec="seconds")
+
+
+def _name(monitor):
+    return monitor[:-3] if monitor.endswith(".sh") else monitor
+
+
+def load_intervals(path):
+    """`monitor_name=seconds` lines (comments/blank lines ignored) -> dict."""
+    out = {}
+    try:
+        f = open(path, "r", encoding="utf-8", errors="ignore")
+    except OSError:
+        return out
+    with f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            m = re.match(r"^([A-Za-z0-9_.-]+)\s*=\s*([0-9]+)$", line)
+            if m and int(m.group(2)) > 0:
+                out[_name(m.group(1))] = int(m.group(2))
+    return out
+
+
+class Store(object):
+    """Latest rows per monitor plus per-monitor run bookkeeping (thread-safe)."""
+
+    def __init__(self, monitors, intervals, node=""):
+        self.lock = threading.Lock()
+        self.order = list(monitors)
+        self.intervals = intervals
+        self.node = node
+        self.started = time.time()
+        self.rows = {}      # monitor -> [line, ...] from its latest run
+        self.runs = {}      # monitor -> {"last_run", "duration_ms", "rc", "runs"}
+        self.next_due = {}  # monitor -> epoch
+        self.last_log = ""
+
+    def seed(self, path):
+        """Preload rows from an existing summary file (e.g. the last full run)."""
+        try:
+            epoch = os.stat(path).st_mtime
+        except OSError:
+            return 0
+        by_mon = {}
+        for row in lms.iter_rows(path):
+            if row.monitor in self.intervals:
+                by_mon.setdefault(row.monitor, []).append(row.line)
+        with self.lock:
+            for mon, lines in by_mon.items():
+                self.rows[mon] = lines
+                self.runs[mon] = {"last_run": epoch, "duration_ms": None, "rc": None, "runs": 0, "seeded": True}
+        return sum(len(v) for v in by_mon.values())
+
+    def update(self, monitors, lines, finished, duration_ms, rc, logfile=""):
+        """Replace the rows of *monitors* with the monitor= lines of their latest run.
+
+        Wrapper-generated lines (runtime_guard, wrapper) are kept with the monitor
+        they are about (target_monitor=), else with the first monitor of the batch.
+        """
+        by_mon = dict((m, []) for m in monitors)
+        for line in lines:
+            row = lms.parse_row(line)
+            owner = row.monitor
+            if owner not in by_mon:
+                owner = row.get("target_monitor")
+                if owner not in by_mon:
+                    owner = monitors[0]
+            by_mon[owner].append(line)
+        with self.lock:
+            for mon in monitors:
+                self.rows[mon] = by_mon[mon]
+                prev = self.runs.get(mon) or {}
+                self.runs[mon] = {"last_run": finished, "duration_ms": duration_ms, "rc": rc,
+                                  "runs": prev.get("runs", 0) + 1}
+            if logfile:
+                self.last_log = logfile
+
+    def lines(self):
+        with self.lock:
+            out = []
+            for mon in self.order:
+                out.extend(self.rows.get(mon, ()))
+            return out
+
+    def _overall(self, lines):
+        worst = 0
+        for line in lines:
+            st = lms.parse_row(line).status
+            worst = max(worst, RC_BY_STATUS.get(st, 3))
+        return worst
+
+    def last_run(self):
+        with self.lock:
+            stamps = [r["last_run"] for r in self.runs.values() if r.get("last_run")]
+        return max(stamps) if stamps else 0
+
+    def last_status_text(self):
+        lines = self.lines()
+        worst = self._overall(lines)
+        out = [
+            "timestamp=%s" % (_iso(self.last_run()) or ""),
+            "host=%s" % self.node,
+            "overall=%s" % OVERALL_BY_RC[worst],
+            "exit_code=%d" % worst,
+            "logfile=%s" % self.last_log,
+            "source=serve",
+        ]
+        return "\n".join(out) + "\n"
+
+    def status_doc(self):
+        lines = self.lines()
+        agg = lms.aggregate(lines)
+        worst = self._overall(lines)
+        monitors = []
+        with self.lock:
+            for mon in self.order:
+                run = self.runs.get(mon) or {}
+                monitors.append({
+                    "monitor": mon,
+                    "interval_s": self.intervals.get(mon),
+                    "last_run": _iso(run.get("last_run")),
+                    "next_run": _iso(self.next_due.get(mon)),
+                    "duration_ms": run.get("duration_ms"),
+                    "rc": run.get("rc"),
+                    "runs": run.get("runs", 0),
+                    "rows": len(self.rows.get(mon, ())),
+                })
+        return {
+            "overall": OVERALL_BY_RC[worst],
+            "exit_code": worst,
+            "node": self.node,
+            "started": _iso(self.started),
+            "generated": _iso(time.time()),
+            "last_run": _iso(self.last_run()),
+            "rows": agg.rows,
+            "totals": agg.totals,
+            "hosts": len(agg.hosts),
+            "monitors": monitors,
+        }
+
+    def metrics_text(self):
+        doc = self.status_doc()
+        totals = doc["totals"]
+        out = [
+            "# HELP linux_maint_overall_status Overall status (labelled)",
+            "# TYPE linux_maint_overall_status gauge",
+        ]
+        for st in ("OK", "WARN", "CRIT", "UNKNOWN", "SKIP"):
+            out.append('linux_maint_overall_status{status="%s"} %d' % (st, 1 if st == doc["overall"] else 0))
+        out += ["# HELP linux_maint_status_count Count of monitor results by status",
+                "# TYPE linux_maint_status_count gauge"]
+        for st in ("OK", "WARN", "CRIT", "UNKNOWN", "SKIP"):
+            out.append('linux_maint_status_count{status="%s"} %d' % (st.lower(), totals.get(st, 0)))
+        out += ["# HELP linux_maint_last_run_timestamp Newest monitor run as epoch seconds (serve)",
+                "# TYPE linux_maint_last_run_timestamp gauge",
+                "linux_maint_last_run_timestamp %d" % int(self.last_run() or -1)]
+        out += ["# HELP linux_maint_monitor_last_run_timestamp Last run of each monitor as epoch seconds",
+                "# TYPE linux_maint_monitor_last_run_timestamp gauge"]
+        with self.lock:
+            runs = dict(self.runs)
+        for mon in self.order:
+            run = runs.get(mon) or {}
+            out.append('linux_maint_monitor_last_run_timestamp{monitor="%s"} %d' % (mon, int(run.get("last_run") or -1)))
+        out += ["# HELP linux_maint_monitor_runtime_ms Duration of the last run of each monitor batch (ms)",
+                "# TYPE linux_maint_monitor_runtime_ms gauge"]
+        for mon in self.order:
+            ms = (runs.get(mon) or {}).get("duration_ms")
+            if ms is not None:
+                out.append('linux_maint_monitor_runtime_ms{monitor="%s"} %d' % (mon, ms))
+        out += ["# HELP linux_maint_monitor_interval_seconds Scheduled interval of each monitor",
+                "# TYPE linux_maint_monitor_interval_seconds gauge"]
+        for mon in self.order:
+            out.append('linux_maint_monitor_interval_seconds{monitor="%s"} %d' % (mon, self.intervals.get(mon, 0)))
+        out += ["# HELP linux_maint_serve_uptime_seconds Seconds since linux-maint serve started",
+                "# TYPE linux_maint_serve_uptime_seconds gauge",
+                "linux_maint_serve_uptime_seconds %d" % int(time.time() - self.started)]
+        return "\n".join(out) + "\n"
+
+
+class Scheduler(object):
+    """Runs due monitors as wrapper batches; one batch per due set, never a monitor twice at once."""
+
+    def __init__(self, store, wrapper, run_root, keep_runs=5, env=None):
+        self.store = store
+        self.wrapper = wrapper
+        self.run_root = run_root
+        self.keep_runs = keep_runs
+        self.env = dict(env if env is not None else os.environ)
+        self.stop = threading.Event()
+        self.wake = threading.Event()
+        self.inflight = set()
+        self.procs = set()
+        self.active_dirs = set()
+        self.seq = 0
+        self.lock = threading.Lock()
+        now = time.time()
+        for mon in store.order:
+            store.next_due[mon] = now
+
+    def _batch_env(self, monitors, run_dir):
+        env = dict(self.env)
+        for k in ("SUMMARY_FILE", "SUMMARY_LATEST_FILE", "SUMMARY_JSON_FILE", "SUMMARY_JSON_LATEST_FILE"):
+            env.pop(k, None)
+        env.update({
+            "LM_MONITORS": " ".join(m + ".sh" for m in monitors),
+            "LOG_DIR": run_dir,
+            "SUMMARY_DIR": run_dir,
+            "PROM_FILE": os.path.join(run_dir, "linux_maint.prom"),
+            "LM_RUN_INDEX_FILE": os.path.join(self.run_root, "run_index.jsonl"),
+            "LM_RUN_INDEX_KEEP": "50",
+            "LM_NOTIFY_STATE_DIR": self.run_root,
+            "LM_TREND_INDEX": "0",
+            "LM_ARCHIVE_AFTER_DAYS": "0",
+            "LM_NOTIFY": "0",
+            "LM_PROGRESS": "0",
+            "LM_HOST_PROGRESS": "0",
+        })
+        return env
+
+    def run_batch(self, monitors):
+        with self.lock:
+            self.seq += 1
+            seq = self.seq
+            run_dir = os.path.join(self.run_root, "runs", "%d-%06d" % (int(time.time()), seq))
+            # Pruning by a batch that finishes first must not remove this one's run dir.
+            self.active_dirs.add(os.path.basename(run_dir))
+        os.makedirs(run_dir, exist_ok=True)
+        t0 = time.time()
+        rc = 3
+        try:
+            proc = subprocess.Popen(["bash", self.wrapper], env=self._batch_env(monitors, run_dir),
+                                    stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            with self.lock:
+                self.procs.add(proc)
+            rc = proc.wait()
+            with self.lock:
+                self.procs.discard(proc)
+        except OSError as e:
+            print("linux-maint serve: cannot run wrapper: %s" % e, file=sys.stderr)
+        finished = time.time()
+        summary = os.path.join(run_dir, "full_health_monitor_summary_latest.log")
+        logfile = os.path.join(run_dir, "full_health_monitor_latest.log")
+        lines = list(lms.iter_lines(summary))
+        # A wrapper that died before writing its summary keeps the previous rows.
+        if (lines or rc == 0) and not self.stop.is_set():
+            self.store.update(monitors, lines, finished, int((finished - t0) * 1000), rc,
+                              os.path.realpath(logfile) if os.path.exists(logfile) else "")
+        with self.lock:
+            for mon in monitors:
+                self.store.next_due[mon] = t0 + self.store.intervals[mon]
+                self.inflight.discard(mon)
+            self.active_dirs.discard(os.path.basename(run_dir))
+        self._prune()
+        self.wake.set()
+
+    def _prune(self):
+        """Keep the newest keep_runs finished batch dirs; dirs of running batches are never removed."""
+        base = os.path.join(self.run_root, "runs")
+        with self.lock:
+            active = set(self.active_dirs)
+            try:
+                dirs = sorted(d for d in os.listdir(base) if d not in active)
+            except OSError:
+                return
+        for d in dirs[:-self.keep_runs] if self.keep_runs > 0 else dirs:
+            shutil.rmtree(os.path.join(base, d), ignore_errors=True)
+
+    def due(self, now):
+        with self.lock:
+            due = [m for m in self.store.order
+                   if m not in self.inflight and self.store.next_due.get(m, now) <= now]
+            self.inflight.update(due)
+        return due
+
+    def loop(self):
+        while not self.stop.is_set():
+            now = time.time()
+            due = self.due(now)
+            if due:
+                t = threading.Thread(target=self.run_batch, args=(due,))
+                t.daemon = True
+                t.start()
+            with self.lock:
+                pending = [self.store.next_due[m] for m in self.store.order if m not in self.inflight]
+            wait = min(pending) - time.time() if pending else 60
+            self.wake.wait(max(0.2, min(wait, 60)))
+            self.wake.clear()
+
+    def shutdown(self):
+        self.stop.set()
+        self.wake.set()
+        with self.lock:
+            procs = list(self.procs)
+        for p in procs:
+            try:
+                p.terminate()
+            except OSError:
+                pass
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    server_version = "linux-maint-serve"
+
+    def do_GET(self):
+        store = self.server.store
+        path = self.path.split("?", 1)[0].rstrip("/") or "/"
+        ctype = "text/plain; charset=utf-8"
+        if path == "/summary":
+            body = "".join(line + "\n" for line in store.lines())
+        elif path == "/last_status":
+            body = store.last_status_text()
+        elif path == "/status":
+            body = json.dumps(store.status_doc(), indent=2, sort_keys=True) + "\n"
+            ctype = "application/json"
+        elif path == "/metrics":
+            body = store.metrics_text()
+            ctype = "text/plain; version=0.0.4"
+        elif path == "/health":
+            body = "ok\n"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = self.socket.accept()
+        return request, ("local", 0)
+
+
+class _TCPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        http.client.HTTPConnection.__init__(self, "localhost", timeout=timeout)
+        self.sock_path = path
+
+    def connect(self):
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(self.timeout)
+        s.connect(self.sock_path)
+        self.sock = s
+
+
+def fetch(target, path, timeout=2.0):
+    """Body of GET *path* from a socket path or http://host:port (raises OSError on failure)."""
+    if target.startswith("http://"):
+        hostport = target[len("http://"):].rstrip("/")
+        conn = http.client.HTTPConnection(hostport, timeout=timeout)
+    else:
+        conn = _UnixHTTPConnection(target, timeout)
+    try:
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        body = resp.read()
+        if resp.status != 200:
+            raise OSError("HTTP %d for %s" % (resp.status, path))
+        return body.decode("utf-8", "replace")
+    except (http.client.HTTPException, socket.error) as e:
+        raise OSError(str(e))
+    finally:
+        conn.close()
+
+
+def _bind_socket(path, store):
+    if os.path.exists(path):
+        try:
+            fetch(path, "/health", timeout=1.0)
+        except OSError:
+            os.unlink(path)  # stale socket from a daemon that did not exit cleanly
+        else:
+            raise SystemExit("linux-maint serve: already running on %s" % path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    old = os.umask(0o177)
+    try:
+        srv = _UnixServer(path, _Handler)
+    finally:
+        os.umask(old)
+    srv.store = store
+    return srv
+
+
+def _bind_http(spec, store):
+    host, _, port = spec.rpartition(":")
+    host = host or "127.0.0.1"
+    if host not in ("127.0.0.1", "localhost", "::1"):
+        print("linux-maint serve: WARNING: HTTP listener on %s is reachable from the network (no auth)" % host,
+              file=sys.stderr)
+    srv = _TCPServer((host, int(port)), _Handler)
+    srv.store = store
+    return srv
+
+
+def _run(args):
+    monitors = [_name(m) for m in args.monitors.split() if m]
+    if not monitors:
+        raise SystemExit("linux-maint serve: no monitors to schedule")
+    intervals = {}
+    for mon in monitors:
+        intervals[mon] = DEFAULT_INTERVALS.get(mon, args.default_interval)
+    if args.intervals_file:
+        for mon, secs in load_intervals(args.intervals_file).items():
+            if mon in intervals:
+                intervals[mon] = secs
+    for spec in args.interval or ():
+        mon, _, secs = spec.partition("=")
+        if not secs.isdigit() or int(secs) <= 0:
+            raise SystemExit("linux-maint serve: invalid --interval %r (use monitor=seconds)" % spec)
+        if _name(mon) in intervals:
+            intervals[_name(mon)] = int(secs)
+
+    store = Store(monitors, intervals, node=args.node or socket.getfqdn())
+    if args.seed:
+        store.seed(args.seed)
+    os.makedirs(args.run_root, exist_ok=True)
+    sched = Scheduler(store, args.wrapper, args.run_root, keep_runs=args.keep_runs)
+
+    servers = [_bind_socket(args.socket, store)]
+    if args.http:
+        servers.append(_bind_http(args.http, store))
+    for srv in servers:
+        t = threading.Thread(target=srv.serve_forever)
+        t.daemon = True
+        t.start()
+
+    def _stop(signum, frame):
+        sched.shutdown()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    print("linux-maint serve: socket=%s http=%s monitors=%d" % (args.socket, args.http or "-", len(monitors)),
+          file=sys.stderr)
+    try:
+        sched.loop()
+    finally:
+        for srv in servers:
+            srv.shutdown()
+            srv.server_close()
+        try:
+            os.unlink(args.socket)
+        except OSError:
+            pass
+    return 0
+
+
+def _fetch(args):
+    try:
+        summary = fetch(args.socket, "/summary")
+        status = fetch(args.socket, "/last_status")
+    except OSError:
+        return 1
+    for path, body in ((args.summary, summary), (args.last_status, status)):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(body)
+    return 0
+
+
+def _get(args):
+    try:
+        sys.stdout.write(fetch(args.socket, args.path))
+    except OSError as e:
+        print("linux-maint serve: %s: %s" % (args.socket, e), file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="linux_maint_serve.py")
+    sub = p.add_subparsers(dest="cmd")
+    r = sub.add_parser("run")
+    r.add_argument("--wrapper", required=True)
+    r.add_argument("--socket", required=True)
+    r.add_argument("--monitors", required=True, help="space-separated monitor scripts")
+    r.add_argument("--run-root", required=True, help="private wrapper log/summary directory")
+    r.add_argument("--http", default="", help="[addr:]port for an HTTP listener")
+    r.add_argument("--interval", action="append", help="monitor=seconds (repeatable)")
+    r.add_argument("--intervals-file", default="")
+    r.add_argument("--default-interval", type=int, default=DEFAULT_INTERVAL)
+    r.add_argument("--keep-runs", type=int, default=5)
+    r.add_argument("--seed", default="", help="summary file to preload")
+    r.add_argument("--node", default="")
+    f = sub.add_parser("fetch")
+    f.add_argument("--socket", required=True)
+    f.add_argument("--summary", required=True)
+    f.add_argument("--last-status", required=True)
+    g = sub.add_parser("get")
+    g.add_argument("--socket", required=True)
+    g.add_argument("path")
+    args = p.parse_args(argv)
+    if args.cmd == "run":
+        return _run(args)
+    if args.cmd == "fetch":
+        return _fetch(args)
+    if args.cmd == "get":
+        return _get(args)
+    p.print_usage(sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
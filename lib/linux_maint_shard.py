@@ -0,0 +1,371 @@
+"""Sharded runs: host partitioning (`run --shard i/N`) and merging shards (`aggregate`).
+
+Hosts are assigned with rendezvous (highest-random-weight) hashing: host h
+belongs to the shard j in 1..N with the largest sha1("<j>:<h>") score. The
+assignment depends only on the host name and N, so adding or removing hosts
+never moves other hosts, and growing N from 3 to 4 moves only ~1/4 of them.
+
+A shard run writes its usual artifacts into its own directory
+(`<LOG_DIR>/shards/shard-<i>-of-<N>/`); its last_status_full carries
+`shard=i/N` and `summary_file=`. `aggregate` merges shard directories (or
+summary .log/.json files) into one canonical run:
+
+  * rows of a (monitor, host) key reported by one shard are kept as-is;
+    a key reported by several shards (runner-level rows such as
+    monitor=wrapper host=runner) keeps the rows of the shard with the worst
+    status for it (same worst-status rule as the Prometheus dedup, later
+    shard wins ties);
+  * missing shards add `monitor=aggregate host=shard-<i>-of-<N> status=UNKNOWN
+    reason=shard_missing`, and shards older than --max-age add reason=shard_stale;
+  * the merged summary log/JSON, last_status_full, trend and run index
+    entries and the Prometheus textfile use the wrapper's formats
+    (linux_maint_outputs).
+
+    python3 linux_maint_shard.py select --shard i/N < hosts.txt
+    python3 linux_maint_shard.py aggregate --out DIR [--prom-file F] [--run-index F] SHARD...
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import linux_maint_summary as lms  # noqa: E402
+import linux_maint_outputs as lmo  # noqa: E402
+
+__all__ = ["parse_shard", "shard_of", "select_hosts", "load_shard", "merge_rows", "aggregate"]
+
+SHARD_RE = re.compile(r"^([0-9]+)/([0-9]+)$")
+STATUS_FILE = "last_status_full"
+SUMMARY_LATEST = "full_health_monitor_summary_latest.log"
+SUMMARY_JSON_LATEST = "full_health_monitor_summary_latest.json"
+_OVERALL = {0: "OK", 1: "WARN", 2: "CRIT", 3: "UNKNOWN"}
+
+
+def parse_shard(spec):
+    """"i/N" -> (i, N) with 1 <= i <= N; ValueError otherwise."""
+    m = SHARD_RE.match(str(spec or "").strip())
+    if not m:
+        raise ValueError("invalid shard %r (use i/N, e.g. 1/4)" % spec)
+    i, n = int(m.group(1)), int(m.group(2))
+    if n < 1 or not 1 <= i <= n:
+        raise ValueError("invalid shard %r (need 1 <= i <= N)" % spec)
+    return i, n
+
+
+def shard_name(i, n):
+    return "shard-%d-of-%d" % (i, n)
+
+
+def shard_of(host, n):
+    """1-based shard of *host* among *n* shards (rendezvous hashing)."""
+    best, best_score = 1, b""
+    for j in range(1, n + 1):
+        score = hashlib.sha1(("%d:%s" % (j, host)).encode("utf-8")).digest()
+        if score > best_score:
+            best, best_score = j, score
+    return best
+
+
+def select_hosts(hosts, i, n):
+    """The hosts of shard *i*, in input order."""
+    return [h for h in hosts if shard_of(h, n) == i]
+
+
+# ---- aggregate ------------------------------------------------------------------
+class Shard(object):
+    """One shard's results: summary Rows, last_status meta and where they came from."""
+
+    __slots__ = ("source", "index", "count", "meta", "rows", "epoch")
+
+    def __init__(self, source, meta, rows):
+        self.source = source
+        self.meta = meta
+        self.rows = rows
+        self.index = self.count = None
+        try:
+            self.index, self.count = parse_shard(meta.get("shard", ""))
+        except ValueError:
+            pass
+        self.epoch = _epoch(meta.get("timestamp", ""))
+
+
+def _epoch(ts):
+    """Epoch seconds of a `date -Is` timestamp (None if unparsable)."""
+    from datetime import datetime
+    # Python 3.6 has no fromisoformat and its %z wants +HHMM.
+    if len(ts) >= 6 and ts[-3] == ":" and ts[-6] in "+-":
+        ts = ts[:-3] + ts[-2:]
+    for fmt in ("%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return int(datetime.strptime(ts, fmt).timestamp())
+        except ValueError:
+            continue
+    return None
+
+
+def load_shard(path):
+    """A Shard from a shard directory or a summary .log/.json file; None if nothing is there."""
+    if os.path.isdir(path):
+        meta = lmo.read_status_file(os.path.join(path, STATUS_FILE))
+        summary = meta.get("summary_file", "")
+        if not summary or not os.path.isfile(summary):
+            summary = os.path.join(path, SUMMARY_LATEST)
+        if os.path.isfile(summary):
+            return Shard(path, meta, list(lms.iter_rows(summary)))
+        path = os.path.join(path, SUMMARY_JSON_LATEST)
+        if not os.path.isfile(path):
+            return None
+    if not os.path.isfile(path):
+        return None
+    if path.endswith(".json"):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                doc = json.load(f)
+        except (OSError, ValueError):
+            return None
+        meta, rows = ({}, doc) if isinstance(doc, list) else (dict(doc.get("meta") or {}), doc.get("rows", []))
+        return Shard(path, meta, [lms.parse_row(_row_line(r)) for r in rows if isinstance(r, dict)])
+    return Shard(path, {}, list(lms.iter_rows(path)))
+
+
+def merge_rows(shards):
+    """Merged rows: keys seen in one shard keep all their rows; shared keys keep the worst shard's rows."""
+    order = []          # keys in first-seen order, grouped by monitor
+    groups = {}         # key -> [rows of one shard, ...] in shard order
+    for sh in shards:
+        per_key = {}
+        for r in sh.rows:
+            key = (r.get("monitor", "unknown"), r.get("host", "all"))
+            if key not in per_key:
+                per_key[key] = []
+                if key not in groups:
+                    groups[key] = []
+                    order.append(key)
+            per_key[key].append(r)
+        for key, rows in per_key.items():
+            groups[key].append(rows)
+    mon_rank = {}
+    for mon, _ in order:
+        mon_rank.setdefault(mon, len(mon_rank))
+    order.sort(key=lambda k: mon_rank[k[0]])   # stable: hosts stay in shard order
+    out = []
+    for key in order:
+        best, best_sev = None, -1
+        for rows in groups[key]:
+            sev = max(lmo.STATUS_MAP.get(r.get("status", "UNKNOWN"), 3) for r in rows)
+            if sev >= best_sev:
+                best, best_sev = rows, sev
+        out.extend(best)
+    return out
+
+
+def _row_line(d):
+    """Summary line for a row dict (summary JSON rows, synthetic aggregate rows)."""
+    head = ["monitor=%s" % d.get("monitor", "unknown"), "host=%s" % d.get("host", "all"),
+            "status=%s" % d.get("status", "UNKNOWN")]
+    rest = ["%s=%s" % (k, v) for k, v in d.items() if k not in ("monitor", "host", "status")]
+    return " ".join(head + rest)
+
+
+def _atomic_write(path, text):
+    tmp = "%s.tmp.%d" % (path, os.getpid())
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _relink(target, link):
+    try:
+        if os.path.islink(link) or os.path.exists(link):
+            os.unlink(link)
+        os.symlink(os.path.basename(target), link)
+    except OSError:
+        pass
+
+
+def aggregate(inputs, out_dir, expect=0, max_age=0, node="", prom_file="", run_index="",
+              run_index_keep=200, run_index_segment=50, trend_index="", now=None):
+    """Merge shard results into *out_dir*; returns a result dict (overall, exit_code, files, shards)."""
+    now = int(time.time()) if now is None else int(now)
+    shards, notes = [], []
+    for p in inputs:
+        sh = load_shard(p)
+        if sh is None:
+            notes.append("no results in %s" % p)
+        else:
+            shards.append(sh)
+    counts = sorted({sh.count for sh in shards if sh.count})
+    if len(counts) > 1:
+        raise ValueError("shards disagree on N: %s" % ", ".join("%s=%s/%s" % (sh.source, sh.index, sh.count)
+                                                               for sh in shards if sh.count))
+    if expect and counts and counts[0] != expect:
+        raise ValueError("--shards %d does not match the shards' N=%d" % (expect, counts[0]))
+    n = expect or (counts[0] if counts else 0)
+
+    # Newest result per shard index; unlabelled inputs are merged as-is.
+    by_index = {}
+    plain = []
+    for sh in shards:
+        if sh.index is None:
+            plain.append(sh)
+            continue
+        prev = by_index.get(sh.index)
+        if prev is not None:
+            notes.append("duplicate shard %d/%d: %s and %s (newest kept)" % (sh.index, n, prev.source, sh.source))
+        if prev is None or (sh.epoch or 0) >= (prev.epoch or 0):
+            by_index[sh.index] = sh
+    merged = [by_index[i] for i in sorted(by_index)] + plain
+
+    rows = merge_rows(merged)
+    extra = []
+    for i in range(1, n + 1):
+        if i not in by_index:
+            extra.append({"monitor": "aggregate", "host": shard_name(i, n), "status": "UNKNOWN",
+                          "reason": "shard_missing"})
+    if max_age > 0:
+        for i, sh in sorted(by_index.items()):
+            if sh.epoch is None or now - sh.epoch > max_age:
+                extra.append({"monitor": "aggregate", "host": shard_name(i, n), "status": "UNKNOWN",
+                              "reason": "shard_stale", "age_s": str(now - sh.epoch) if sh.epoch else "unknown"})
+    if node:
+        for d in extra:
+            d["node"] = node
+    rows.extend(lms.parse_row(_row_line(d)) for d in extra)
+
+    # Worst shard exit code (shards without a status file: worst non-SKIP row); missing/stale -> UNKNOWN.
+    exit_code = 3 if extra else 0
+    for sh in merged:
+        ec = sh.meta.get("exit_code", "")
+        if ec.isdigit():
+            exit_code = max(exit_code, min(int(ec), 3))
+            continue
+        for r in sh.rows:
+            if r.get("status") != "SKIP":
+                exit_code = max(exit_code, lmo.STATUS_MAP.get(r.get("status", "UNKNOWN"), 3))
+    overall = _OVERALL[exit_code]
+
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = time.strftime("%Y-%m-%d_%H%M%S", time.localtime(now))
+    summary_file = os.path.join(out_dir, "full_health_monitor_summary_%s.log" % stamp)
+    json_file = os.path.join(out_dir, "full_health_monitor_summary_%s.json" % stamp)
+    status_file = os.path.join(out_dir, STATUS_FILE)
+    _atomic_write(summary_file, "".join(r.line + "\n" for r in rows))
+    _relink(summary_file, os.path.join(out_dir, SUMMARY_LATEST))
+    with open(summary_file, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    _atomic_write(summary_file + ".sha256", "%s  %s\n" % (digest, summary_file))
+
+    iso = time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(now))
+    iso = iso[:-2] + ":" + iso[-2:]
+    _atomic_write(status_file, "".join("%s=%s\n" % kv for kv in (
+        ("timestamp", iso), ("host", node), ("overall", overall), ("exit_code", exit_code),
+        ("logfile", ""), ("shards", "%d/%d" % (len(by_index), n) if n else str(len(merged))))))
+    meta = lmo.read_status_file(status_file)
+    merged_rows = lms.read_dicts(summary_file)
+    lmo.write_summary_json(merged_rows, meta, json_file, os.path.join(out_dir, SUMMARY_JSON_LATEST))
+
+    agg = lms.aggregate(summary_file)
+    if trend_index:
+        with open(trend_index, "a", encoding="utf-8") as f:
+            f.write(json.dumps(lmo.trend_index_entry(summary_file, agg), sort_keys=True) + "\n")
+    if run_index:
+        try:
+            import linux_maint_runindex as lmri
+            entry = lmo.run_index_entry(summary_file, json_file, None, overall, exit_code, now, agg)
+            entry["shards"] = n or len(merged)
+            lmri.RunIndex(run_index, run_index_segment).append(entry, keep=run_index_keep)
+        except Exception as e:  # best-effort, like the wrapper
+            notes.append("run index not updated: %s" % e)
+    if prom_file and merged_rows:
+        hosts = {"ok": agg.totals["OK"], "warn": agg.totals["WARN"], "crit": agg.totals["CRIT"],
+                 "unknown": agg.totals["UNKNOWN"], "skipped": agg.totals["SKIP"]}
+        runtime_warn = sum(1 for r in merged_rows if r.get("monitor") == "runtime_guard" and r.get("status") == "WARN")
+        try:
+            max_labels = max(0, int(os.environ.get("LM_PROM_MAX_REASON_LABELS", "20")))
+        except ValueError:
+            max_labels = 20
+        try:
+            lmo.write_prom(prom_file, merged_rows, meta, exit_code, hosts, runtime_warn_count=runtime_warn,
+                           run_epoch=str(now), prom_format=os.environ.get("LM_PROM_FORMAT", ""),
+                           max_reason_labels=max_labels)
+        except OSError as e:
+            notes.append("prometheus file not written: %s" % e)
+            prom_file = ""
+
+    return {
+        "overall": overall, "exit_code": exit_code, "shards_expected": n,
+        "shards_found": sorted(by_index), "inputs": [sh.source for sh in merged],
+        "rows": len(merged_rows), "summary_file": summary_file, "summary_json": json_file,
+        "status_file": status_file, "prom_file": prom_file or None, "notes": notes,
+    }
+
+
+# ---- CLI ------------------------------------------------------------------------
+def _select(args):
+    try:
+        i, n = parse_shard(args.shard)
+    except ValueError as e:
+        print("ERROR: %s" % e, file=sys.stderr)
+        return 2
+    hosts = [ln.strip() for ln in sys.stdin if ln.strip()]
+    for h in select_hosts(hosts, i, n):
+        print(h)
+    return 0
+
+
+def _aggregate(args):
+    try:
+        res = aggregate(args.inputs, args.out, expect=args.shards, max_age=args.max_age, node=args.node,
+                        prom_file=args.prom_file, run_index=args.run_index, run_index_keep=args.run_index_keep,
+                        run_index_segment=args.run_index_segment,
+                        trend_index=args.trend_index)
+    except ValueError as e:
+        print("ERROR: %s" % e, file=sys.stderr)
+        return 2
+    for note in res["notes"]:
+        print("WARN: %s" % note, file=sys.stderr)
+    if args.json:
+        print(json.dumps(res, indent=2, sort_keys=True))
+    else:
+        found = len(res["shards_found"]) if res["shards_expected"] else len(res["inputs"])
+        print("aggregate: shards=%d/%s rows=%d overall=%s exit_code=%d" % (
+            found, res["shards_expected"] or len(res["inputs"]), res["rows"], res["overall"], res["exit_code"]))
+        print("summary: %s" % res["summary_file"])
+        if res["prom_file"]:
+            print("prometheus: %s" % res["prom_file"])
+    return res["exit_code"]
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="linux_maint_shard.py")
+    sub = p.add_subparsers(dest="cmd")
+    s = sub.add_parser("select")
+    s.add_argument("--shard", required=True)
+    a = sub.add_parser("aggregate")
+    a.add_argument("--out", required=True, help="directory for the merged summary/status files")
+    a.add_argument("--shards", type=int, default=0, help="expected N (default: from the shards)")
+    a.add_argument("--max-age", type=int, default=0, help="flag shards older than SECS (0 = off)")
+    a.add_argument("--node", default="")
+    a.add_argument("--prom-file", default="")
+    a.add_argument("--run-index", default="")
+    a.add_argument("--run-index-keep", type=int, default=200)
+    a.add_argument("--run-index-segment", type=int, default=50)
+    a.add_argument("--trend-index", default="")
+    a.add_argument("--json", action="store_true")
+    a.add_argument("inputs", nargs="+")
+    args = p.parse_args(argv)
+    if args.cmd == "select":
+        return _select(args)
+    if args.cmd == "aggregate":
+        return _aggregate(args)
+    p.print_usage(sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
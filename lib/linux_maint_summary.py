@@ -0,0 +1,232 @@
+"""Parser for linux-maint summary lines (the `monitor= host= status= ...` contract).
+
+Shared by the CLI (`bin/linux-maint`), the wrapper and the tools so that summary
+files are parsed one way.
+
+    rows    = iter_rows(path)        # streaming, compact Row objects
+    agg     = aggregate(path)        # totals + reason rollups in one pass
+    kv      = parse_kv(line)         # full key=value dict for one line
+"""
+
+import sys
+
+__all__ = [
+    "STATUSES", "Row", "Aggregate",
+    "parse_kv", "parse_kv_strict", "parse_row",
+    "iter_lines", "iter_rows", "iter_embedded_lines", "read_dicts", "aggregate",
+]
+
+# Report order used by status/trend/report output.
+STATUSES = ("CRIT", "WARN", "UNKNOWN", "SKIP", "OK")
+
+_intern = sys.intern
+
+
+def parse_kv(line):
+    """All key=value tokens of *line* as a dict (last key wins; other tokens ignored)."""
+    d = {}
+    for tok in line.split():
+        k, sep, v = tok.partition("=")
+        if sep:
+            d[k] = v
+    return d
+
+
+def parse_kv_strict(line):
+    """Like parse_kv() but also return (dup_keys, bad_tokens) for contract linting."""
+    d = {}
+    dup_keys = []
+    bad_tokens = []
+    for tok in line.split():
+        k, sep, v = tok.partition("=")
+        if not sep:
+            bad_tokens.append(tok)
+            continue
+        if k in d:
+            dup_keys.append(k)
+        d[k] = v
+    return d, dup_keys, bad_tokens
+
+
+class Row(object):
+    """One summary line: identity fields pre-split and interned, the rest parsed on demand."""
+
+    __slots__ = ("monitor", "host", "status", "reason", "line")
+
+    def __init__(self, monitor, host, status, reason, line):
+        self.monitor = monitor
+        self.host = host
+        self.status = status
+        self.reason = reason
+        self.line = line
+
+    def get(self, key, default=None):
+        if key in _CORE:
+            val = getattr(self, key)
+        else:
+            val = parse_kv(self.line).get(key)
+        return default if val is None else val
+
+    def as_dict(self):
+        return parse_kv(self.line)
+
+    def __repr__(self):
+        return "Row(%r)" % self.line
+
+
+_CORE = frozenset(("monitor", "host", "status", "reason"))
+
+
+def parse_row(line):
+    """Compact Row for one summary line; missing identity fields are None."""
+    line = line.strip()
+    monitor = host = status = reason = None
+    for tok in line.split():
+        k, _, v = tok.partition("=")
+        if k == "monitor":
+            monitor = _intern(v)
+        elif k == "host":
+            host = _intern(v)
+        elif k == "status":
+            status = _intern(v)
+        elif k == "reason":
+            reason = _intern(v)
+    return Row(monitor, host, status, reason, line)
+
+
+def _open_lines(source):
+    if isinstance(source, str):
+        return open(source, "r", encoding="utf-8", errors="ignore")
+    return None
+
+
+def iter_lines(source):
+    """Stripped `monitor=` lines from a path or an iterable of lines.
+
+    A missing/unreadable path yields nothing, matching the best-effort readers
+    this replaces.
+    """
+    try:
+        f = _open_lines(source)
+    except OSError:
+        return
+    it = f if f is not None else source
+    try:
+        for line in it:
+            if line.startswith("monitor=") or (line[:1].isspace() and line.lstrip().startswith("monitor=")):
+                yield line.strip()
+    finally:
+        if f is not None:
+            f.close()
+
+
+def iter_rows(source):
+    """Row for every `monitor=` line of *source* (streaming)."""
+    for line in iter_lines(source):
+        yield parse_row(line)
+
+
+def read_dicts(source):
+    """Full key=value dicts for every `monitor=` line (JSON export shape)."""
+    return [parse_kv(line) for line in iter_lines(source)]
+
+
+def iter_embedded_lines(lines):
+    """`monitor=` lines embedded in wrapper logs (timestamp-prefixed or raw).
+
+    Skips the wrapper's own headers such as `FINAL_STATUS_SUMMARY (monitor= lines only)`.
+    """
+    for line in lines:
+        i = line.find("monitor=")
+        if i < 0:
+            continue
+        # The token must start the line or follow whitespace.
+        while i > 0 and not line[i - 1].isspace():
+            i = line.find("monitor=", i + 1)
+            if i < 0:
+                break
+        if i < 0:
+            continue
+        ml = line[i:].rstrip("\r\n")
+        if ml.startswith("monitor= ") or ml.startswith("monitor=lines"):
+            continue
+        yield ml
+
+
+class Aggregate(object):
+    """One-pass rollups over a summary file.
+
+    totals       status -> count (STATUSES keys; unexpected/missing status counts as UNKNOWN)
+    reasons      reason -> count for non-OK rows
+    all_reasons  reason -> count for every row carrying reason=
+    monitors     monitor -> row count
+    hosts        host -> {status: count}
+    rows         number of `monitor=` lines
+    """
+
+    __slots__ = ("totals", "reasons", "all_reasons", "monitors", "hosts", "rows")
+
+    def __init__(self):
+        self.totals = dict.fromkeys(STATUSES, 0)
+        self.reasons = {}
+        self.all_reasons = {}
+        self.monitors = {}
+        self.hosts = {}
+        self.rows = 0
+
+    def add(self, row):
+        st = row.status if row.status in self.totals else "UNKNOWN"
+        self.totals[st] += 1
+        self.rows += 1
+        mon = row.monitor or ""
+        self.monitors[mon] = self.monitors.get(mon, 0) + 1
+        h = self.hosts.setdefault(row.host or "", {})
+        h[st] = h.get(st, 0) + 1
+        reason = row.reason
+        if reason:
+            self.all_reasons[reason] = self.all_reasons.get(reason, 0) + 1
+            if st != "OK":
+                self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def top_reasons(self, n, non_ok=True):
+        src = self.reasons if non_ok else self.all_reasons
+        return sorted(src.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+
+
+def aggregate(source):
+    """Aggregate every `monitor=` line of *source* in a single pass."""
+    agg = Aggregate()
+    totals = agg.totals
+    reasons = agg.reasons
+    all_reasons = agg.all_reasons
+    monitors = agg.monitors
+    hosts = agg.hosts
+    n = 0
+    for line in iter_lines(source):
+        # Inlined parse_row() + Aggregate.add(): no per-line objects on the hot path.
+        monitor = host = status = reason = ""
+        for tok in line.split():
+            k, _, v = tok.partition("=")
+            if k == "monitor":
+                monitor = v
+            elif k == "host":
+                host = v
+            elif k == "status":
+                status = v
+            elif k == "reason":
+                reason = v
+        if status not in totals:
+            status = "UNKNOWN"
+        totals[status] += 1
+        n += 1
+        monitors[monitor] = monitors.get(monitor, 0) + 1
+        h = hosts.get(host)
+        if h is None:
+            h = hosts[host] = {}
+        h[status] = h.get(status, 0) + 1
+        if reason:
+            all_reasons[reason] = all_reasons.get(reason, 0) + 1
+            if status != "OK":
+                reasons[reason] = reasons.get(reason, 0) + 1
+    agg.rows = n
+    return agg
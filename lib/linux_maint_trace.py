@@ -0,0 +1,216 @@
+"""Span traces for `linux-maint run --profile`.
+
+The shell helpers in lib/linux_maint.sh append raw spans (one per line, tab
+separated) while the run is in progress:
+
+    <start_us> <dur_us> <tid> <cat> <name> [key=value ...]
+
+`write_trace()` turns that file into Chrome trace-event JSON ("X" complete
+events) that chrome://tracing and ui.perfetto.dev load directly, and the
+`linux-maint runtimes --hosts/--top-spans` views read it back with
+`load_trace()`. Span categories: run, stage, monitor, host, ssh, remote,
+require_cmd, step.
+"""
+
+import json
+import os
+import tempfile
+
+__all__ = [
+    "read_raw", "to_chrome", "write_trace", "load_trace",
+    "self_times", "host_rollup", "top_spans",
+]
+
+TRACE_VERSION = 1
+_INT_ARGS = ("rc", "bytes", "try", "mux", "timeout")
+
+
+def _span(ts, dur, tid, cat, name, args):
+    return {"ts": ts, "dur": dur, "tid": tid, "cat": cat, "name": name, "args": args}
+
+
+def read_raw(path):
+    """Spans from a raw span file, oldest first; malformed lines are skipped."""
+    spans = []
+    try:
+        f = open(path, "r", encoding="utf-8", errors="ignore")
+    except OSError:
+        return spans
+    with f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 5:
+                continue
+            try:
+                ts, dur, tid = int(parts[0]), int(parts[1]), int(parts[2])
+            except ValueError:
+                continue
+            args = {}
+            for kv in parts[5:]:
+                k, sep, v = kv.partition("=")
+                if not sep:
+                    continue
+                if k in _INT_ARGS and v.lstrip("-").isdigit():
+                    v = int(v)
+                args[k] = v
+            spans.append(_span(ts, max(0, dur), tid, parts[3], parts[4], args))
+    spans.sort(key=lambda s: (s["ts"], -s["dur"]))
+    return spans
+
+
+def _track_name(span):
+    if span["cat"] == "host":
+        return "host %s (%s)" % (span["name"], span["args"].get("monitor", ""))
+    if span["cat"] in ("run", "monitor"):
+        return "%s %s" % (span["cat"], span["name"])
+    return str(span["args"].get("monitor") or span["name"])
+
+
+def to_chrome(spans, meta=None):
+    """Chrome trace-event document for *spans* (one process, one track per tid)."""
+    events = []
+    tracks = {}
+    for s in spans:
+        tracks.setdefault(s["tid"], _track_name(s))
+        events.append({
+            "name": s["name"], "cat": s["cat"], "ph": "X",
+            "ts": s["ts"], "dur": s["dur"], "pid": 1, "tid": s["tid"],
+            "args": s["args"],
+        })
+    events.append({"name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+                   "args": {"name": "linux-maint run"}})
+    for tid, name in sorted(tracks.items()):
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                       "args": {"name": name}})
+    other = {"trace_version": TRACE_VERSION, "spans": len(spans)}
+    if meta:
+        other.update(meta)
+    return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": other}
+
+
+def write_trace(raw_path, out_path, meta=None):
+    """Convert *raw_path* into a trace at *out_path* (atomic). Returns the span count."""
+    spans = read_raw(raw_path)
+    d = os.path.dirname(out_path) or "."
+    fd, tmp = tempfile.mkstemp(prefix=".lm_trace.", dir=d)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(to_chrome(spans, meta), f, separators=(",", ":"))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, out_path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return len(spans)
+
+
+def load_trace(path):
+    """Spans ("X" events) from a trace file written by write_trace()."""
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    events = doc.get("traceEvents", []) if isinstance(doc, dict) else doc
+    spans = [_span(int(e.get("ts", 0)), int(e.get("dur", 0)), e.get("tid", 0),
+                   e.get("cat", ""), e.get("name", ""), e.get("args") or {})
+             for e in events if e.get("ph") == "X"]
+    spans.sort(key=lambda s: (s["ts"], -s["dur"]))
+    return spans
+
+
+def self_times(spans):
+    """Duration minus time covered by direct children on the same track, per span index.
+
+    Spans on one track nest by time; *spans* must be sorted by (ts, -dur).
+    """
+    out = [s["dur"] for s in spans]
+    stacks = {}
+    for i, s in enumerate(spans):
+        stack = stacks.setdefault(s["tid"], [])
+        end = s["ts"] + s["dur"]
+        while stack and spans[stack[-1]]["ts"] + spans[stack[-1]]["dur"] < end:
+            stack.pop()
+        if stack:
+            out[stack[-1]] -= s["dur"]
+        stack.append(i)
+    return [max(0, v) for v in out]
+
+
+def _ms(us):
+    return round(us / 1000.0, 3)
+
+
+def host_rollup(spans):
+    """Per-host totals: host span time plus the SSH calls made for that host."""
+    hosts = {}
+
+    def row(h):
+        r = hosts.get(h)
+        if r is None:
+            r = hosts[h] = {"host": h, "host_us": 0, "monitors": set(), "ssh_calls": 0,
+                            "ssh_us": 0, "ssh_bytes": 0, "ssh_failed": 0, "require_cmd_us": 0}
+        return r
+
+    for s in spans:
+        a = s["args"]
+        h = a.get("host")
+        if not h:
+            continue
+        if s["cat"] == "host":
+            r = row(h)
+            r["host_us"] += s["dur"]
+            if a.get("monitor"):
+                r["monitors"].add(a["monitor"])
+        elif s["cat"] == "ssh":
+            r = row(h)
+            r["ssh_calls"] += 1
+            r["ssh_us"] += s["dur"]
+            r["ssh_bytes"] += a.get("bytes", 0) if isinstance(a.get("bytes"), int) else 0
+            if a.get("rc") not in (0, None):
+                r["ssh_failed"] += 1
+        elif s["cat"] == "require_cmd":
+            row(h)["require_cmd_us"] += s["dur"]
+
+    rows = []
+    for r in hosts.values():
+        rows.append({
+            "host": r["host"], "host_ms": _ms(r["host_us"]), "monitors": len(r["monitors"]),
+            "ssh_calls": r["ssh_calls"], "ssh_ms": _ms(r["ssh_us"]), "ssh_bytes": r["ssh_bytes"],
+            "ssh_failed": r["ssh_failed"], "require_cmd_ms": _ms(r["require_cmd_us"]),
+        })
+    rows.sort(key=lambda r: (-r["host_ms"], -r["ssh_ms"], r["host"]))
+    return rows
+
+
+def top_spans(spans, n=20):
+    """Spans grouped by (cat, monitor, name), slowest total first.
+
+    self_ms excludes nested spans, so a monitor span's self time is local work
+    (parsing, sleeping) rather than SSH/host time.
+    """
+    selfs = self_times(spans)
+    groups = {}
+    for s, self_us in zip(spans, selfs):
+        key = (s["cat"], s["args"].get("monitor", ""), s["name"])
+        g = groups.get(key)
+        if g is None:
+            g = groups[key] = {"count": 0, "total_us": 0, "self_us": 0, "max_us": 0,
+                               "bytes": 0, "failed": 0}
+        g["count"] += 1
+        g["total_us"] += s["dur"]
+        g["self_us"] += self_us
+        g["max_us"] = max(g["max_us"], s["dur"])
+        if isinstance(s["args"].get("bytes"), int):
+            g["bytes"] += s["args"]["bytes"]
+        if s["args"].get("rc") not in (0, None):
+            g["failed"] += 1
+    rows = []
+    for (cat, mon, name), g in groups.items():
+        rows.append({
+            "cat": cat, "monitor": mon, "name": name, "count": g["count"],
+            "total_ms": _ms(g["total_us"]), "self_ms": _ms(g["self_us"]),
+            "max_ms": _ms(g["max_us"]), "bytes": g["bytes"], "failed": g["failed"],
+        })
+    rows.sort(key=lambda r: (-r["total_ms"], r["cat"], r["monitor"], r["name"]))
+    return rows[:n] if n > 0 else rows
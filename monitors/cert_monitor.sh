@@ -41,7 +41,7 @@ MAIL_SUBJECT_PREFIX='[Cert Monitor]'
 # ========================
 # Configuration
 # ========================
-TARGETS_FILE="/etc/linux_maint/certs.txt"   # Formats (one per line):
+TARGETS_FILE="${CERTS_TARGETS_FILE:-${LM_CFG_DIR:-/etc/linux_maint}/certs.txt}"   # Formats (one per line):
 CERTS_SCAN_DIR="${CERTS_SCAN_DIR:-}"
 CERTS_SCAN_IGNORE_FILE="${CERTS_SCAN_IGNORE_FILE:-/etc/linux_maint/certs_scan_ignore.txt}"
 CERTS_SCAN_EXTS="${CERTS_SCAN_EXTS:-crt,cer,pem}"
@@ -54,37 +54,44 @@ CERTS_SCAN_EXTS="${CERTS_SCAN_EXTS:-crt,cer,pem}"
 THRESHOLD_WARN_DAYS="${LM_CERT_WARN_DAYS:-30}"
 THRESHOLD_CRIT_DAYS="${LM_CERT_CRIT_DAYS:-7}"
 TIMEOUT_SECS="${LM_CERT_TIMEOUT_SECS:-10}"
+PARALLEL="${LM_CERT_PARALLEL:-8}"          # endpoints probed concurrently (1 = one at a time)
+CACHE_ENABLED="${LM_CERT_CACHE:-1}"        # reuse parsed fields for unchanged certificates
+CACHE_FILE="${LM_CERT_CACHE_DIR:-${LM_STATE_DIR:-/var/lib/linux_maint}/cert_cache}/certs.tsv"
 EMAIL_ON_WARN="true"
+[[ "$PARALLEL" =~ ^[0-9]+$ && "$PARALLEL" -ge 1 ]] || PARALLEL=1
 
 # ========================
 # Helpers (script-local)
 # ========================
 mail_if_enabled(){ [ "$EMAIL_ON_WARN" = "true" ] || return 0; lm_mail "$1" "$2"; }
 
+trim(){ local s="$1"; s="${s#"${s%%[![:space:]]*}"}"; TRIMMED="${s%"${s##*[![:space:]]}"}"; }   # -> TRIMMED
+
+IGNORE_PATTERNS=()
 load_ignore_patterns() {
-  # Outputs ignore patterns, one per line. Blank and # comments ignored.
-  local f="$CERTS_SCAN_IGNORE_FILE"
+  # Fills IGNORE_PATTERNS. Blank and # comments ignored.
+  local f="$CERTS_SCAN_IGNORE_FILE" line
   [ -r "$f" ] || return 0
   while IFS= read -r line || [ -n "$line" ]; do
-    line="$(echo "$line" | sed 's/^[[:space:]]*//;s/[[:space:]]*$//')"
+    trim "$line"; line="$TRIMMED"
     [ -z "$line" ] && continue
     [[ "$line" =~ ^# ]] && continue
-    printf '%s\n' "$line"
+    IGNORE_PATTERNS+=("$line")
   done < "$f"
 }
 
 is_ignored_path() {
   local path="$1" pat
-  while IFS= read -r pat; do
-    [ -z "$pat" ] && continue
+  for pat in ${IGNORE_PATTERNS[@]+"${IGNORE_PATTERNS[@]}"}; do
     case "$path" in
       *$pat*) return 0 ;;
     esac
-  done < <(load_ignore_patterns)
+  done
   return 1
 }
 
 scan_cert_files() {
+  # Prints "path<TAB>mtime<TAB>size" for every matching, non-ignored file.
   local dir="$1" exts_csv="$2"
   [ -n "$dir" ] || return 0
   [ -d "$dir" ] || return 0
@@ -92,7 +99,7 @@ scan_cert_files() {
   local find_expr=""
   IFS=',' read -r -a exts <<< "$exts_csv"
   for e in "${exts[@]}"; do
-    e="$(printf '%s' "$e" | tr -d '[:space:]')"
+    e="${e//[[:space:]]/}"
     [ -z "$e" ] && continue
     if [ -n "$find_expr" ]; then
       find_expr+=" -o "
@@ -100,65 +107,128 @@ scan_cert_files() {
     find_expr+=" -iname *.$e "
   done
 
+  local p
   # shellcheck disable=SC2086
   while IFS= read -r p; do
-    is_ignored_path "$p" && continue
+    is_ignored_path "${p%%$'\t'*}" && continue
     printf '%s\n' "$p"
-  done < <(find "$dir" -type f \( $find_expr \) 2>/dev/null)
+  done < <(find "$dir" -type f \( $find_expr \) -printf '%p\t%T@\t%s\n' 2>/dev/null)
+}
+
+# ---- Certificate parsing (one openssl call per certificate, cached) ----
+# The cache maps a key to "end_epoch<TAB>subject<TAB>issuer<TAB>sha256_fingerprint":
+#   file:<path>:<mtime>:<size>   cert files (unchanged file -> no parse)
+#   pem:<base64 tail>            endpoint leaf certs; the tail of the base64 body is
+#                                signature bytes, so it identifies the certificate
+# Entries not used by a run are dropped when the cache is rewritten.
+declare -A CERT_CACHE=()
+declare -A CERT_CACHE_USED=()
+
+cache_load() {
+  [ "$CACHE_ENABLED" = "1" ] || return 0
+  [ -r "$CACHE_FILE" ] || return 0
+  local key val
+  while IFS=$'\t' read -r key val; do
+    [ -n "$key" ] && CERT_CACHE["$key"]="$val"
+  done < "$CACHE_FILE"
+}
+
+cache_save() {
+  [ "$CACHE_ENABLED" = "1" ] || return 0
+  mkdir -p "$(dirname "$CACHE_FILE")" 2>/dev/null || return 0
+  local key tmp="$CACHE_FILE.tmp.$$"
+  {
+    for key in "${!CERT_CACHE_USED[@]}"; do
+      [ -n "${CERT_CACHE[$key]+x}" ] && printf '%s\t%s\n' "$key" "${CERT_CACHE[$key]}"
+    done
+  } > "$tmp" 2>/dev/null && mv -f "$tmp" "$CACHE_FILE" 2>/dev/null || rm -f "$tmp" 2>/dev/null || true
+}
+
+# cert_epoch "Mon DD HH:MM:SS YYYY GMT" -> sets C_END (epoch seconds, "" if unparsable)
+cert_epoch() {
+  local mon d t y _r m yy era yoe doy doe
+  C_END=""
+  read -r mon d t y _r <<< "$1"
+  case "$mon" in
+    Jan) m=1 ;; Feb) m=2 ;; Mar) m=3 ;; Apr) m=4 ;; May) m=5 ;; Jun) m=6 ;;
+    Jul) m=7 ;; Aug) m=8 ;; Sep) m=9 ;; Oct) m=10 ;; Nov) m=11 ;; Dec) m=12 ;;
+    *) m=0 ;;
+  esac
+  if [ "$m" -gt 0 ] && [[ "$d" =~ ^[0-9]{1,2}$ && "$y" =~ ^[0-9]{4}$ && "$t" =~ ^([0-9]{2}):([0-9]{2}):([0-9]{2})$ ]]; then
+    # days since 1970-01-01 from a civil date (proleptic Gregorian)
+    yy=$(( 10#$y - (m <= 2) )); era=$(( yy / 400 )); yoe=$(( yy - era * 400 ))
+    doy=$(( (153 * ((m + 9) % 12) + 2) / 5 + 10#$d - 1 ))
+    doe=$(( yoe * 365 + yoe / 4 - yoe / 100 + doy ))
+    C_END=$(( (era * 146097 + doe - 719468) * 86400 + 10#${BASH_REMATCH[1]} * 3600 + 10#${BASH_REMATCH[2]} * 60 + 10#${BASH_REMATCH[3]} ))
+    return 0
+  fi
+  C_END="$(date -u -d "$1" +%s 2>/dev/null)" || C_END=""
+}
+
+# cert_parse KEY < PEM -> sets C_END C_SUBJECT C_ISSUER C_FP (from the cache when KEY is known)
+cert_parse() {
+  local key="$1" line rest
+  CERT_CACHE_USED["$key"]=1
+  if [ -n "${CERT_CACHE[$key]+x}" ]; then
+    IFS=$'\t' read -r C_END C_SUBJECT C_ISSUER C_FP <<< "${CERT_CACHE[$key]}"
+    return 0
+  fi
+  C_END="" C_SUBJECT="" C_ISSUER="" C_FP=""
+  while IFS= read -r line; do
+    case "$line" in
+      subject=*) rest="${line#subject=}"; C_SUBJECT="${rest# }" ;;
+      issuer=*) rest="${line#issuer=}"; C_ISSUER="${rest# }" ;;
+      notAfter=*) cert_epoch "${line#notAfter=}" ;;
+      *Fingerprint=*) C_FP="${line#*Fingerprint=}" ;;
+    esac
+  done < <(openssl x509 -noout -subject -issuer -enddate -fingerprint -sha256 2>/dev/null)
+  C_SUBJECT="${C_SUBJECT//$'\t'/ }"; C_ISSUER="${C_ISSUER//$'\t'/ }"
+  # Only complete parses are cached.
+  [ -n "$C_END" ] && CERT_CACHE["$key"]="$C_END"$'\t'"$C_SUBJECT"$'\t'"$C_ISSUER"$'\t'"$C_FP"
+  return 0
+}
+
+days_left_for() {
+  # $1 = end epoch ("" -> ?)
+  if [ -z "$1" ]; then
+    DAYS_LEFT="?"
+  else
+    DAYS_LEFT=$(( ($1 - NOW_EPOCH) / 86400 ))
+  fi
 }
 
 check_cert_file() {
-  local path="$1"
+  # $1 = "path<TAB>mtime<TAB>size" -> status|days|note|subject|issuer
+  local path mtime size
+  IFS=$'\t' read -r path mtime size <<< "$1"
 
   # Extract enddate/subject/issuer from file. If unreadable/invalid, report UNKNOWN.
   if [ ! -r "$path" ]; then
-    echo "status=UNKNOWN file=\"$path\" days=? subject=? issuer=? note=unreadable"
+    printf '%s|%s|%s|%s|%s\n' UNKNOWN "?" unreadable "?" "?"
     return
   fi
 
-  local enddate subject issuer days_left
-  enddate="$(openssl x509 -in "$path" -noout -enddate 2>/dev/null | cut -d= -f2)" || enddate=""
-  subject="$(openssl x509 -in "$path" -noout -subject 2>/dev/null | sed 's/^subject= *//')" || subject=""
-  issuer="$(openssl x509 -in "$path" -noout -issuer 2>/dev/null | sed 's/^issuer= *//')" || issuer=""
-
-  if [ -z "$enddate" ]; then
-    echo "status=UNKNOWN file=\"$path\" days=? subject=\"$subject\" issuer=\"$issuer\" note=invalid_cert"
+  cert_parse "file:$path:$mtime:$size" < "$path"
+  if [ -z "$C_END" ]; then
+    printf '%s|%s|%s|%s|%s\n' UNKNOWN "?" invalid_cert "$C_SUBJECT" "$C_ISSUER"
     return
   fi
-
-  local exp_epoch now_epoch
-  exp_epoch=$(date -u -d "$enddate" +%s 2>/dev/null) || exp_epoch=0
-  now_epoch=$(date -u +%s)
-  if [ "$exp_epoch" -eq 0 ]; then
-    days_left="?"
-  else
-    days_left=$(( (exp_epoch - now_epoch) / 86400 ))
-  fi
-  days_left=${days_left:-?}
+  days_left_for "$C_END"
 
   local status="OK" note=""
-  if [ "$days_left" = "?" ]; then
-    status="UNKNOWN"; note="parse_failed"
-  else
-    if [ "$days_left" -le 0 ]; then
-      status="CRIT"; note="expired"
-    elif [ "$days_left" -le "$THRESHOLD_CRIT_DAYS" ]; then
-      status="CRIT"; note="<=${THRESHOLD_CRIT_DAYS}d"
-    elif [ "$days_left" -le "$THRESHOLD_WARN_DAYS" ]; then
-      status="WARN"; note="<=${THRESHOLD_WARN_DAYS}d"
-    fi
+  if [ "$DAYS_LEFT" -le 0 ]; then
+    status="CRIT"; note="expired"
+  elif [ "$DAYS_LEFT" -le "$THRESHOLD_CRIT_DAYS" ]; then
+    status="CRIT"; note="<=${THRESHOLD_CRIT_DAYS}d"
+  elif [ "$DAYS_LEFT" -le "$THRESHOLD_WARN_DAYS" ]; then
+    status="WARN"; note="<=${THRESHOLD_WARN_DAYS}d"
   fi
-
-  # shell-quote minimally (avoid breaking logs)
-  subject="${subject//\"/\\\"}"
-  issuer="${issuer//\"/\\\"}"
-
-  echo "status=$status file=\"$path\" days=$days_left subject=\"$subject\" issuer=\"$issuer\" note=$note"
+  printf '%s|%s|%s|%s|%s\n' "$status" "$DAYS_LEFT" "$note" "${C_SUBJECT//|//}" "${C_ISSUER//|//}"
 }
 
 parse_target_line() {
   # Input line -> HOST|PORT|SNI|STARTTLS
-  local line="$1" hostport sni starttls host port extra token
+  local line="$1" hostport sni starttls host port extra token colons
   sni=""; starttls=""; host=""; port="443"
 
   # split head (host[:port] / [ipv6]:port) from extras
@@ -171,7 +241,8 @@ parse_target_line() {
     host="${hostport%\]*}"; host="${host#[}"; port="${hostport##*:}"
   else
     # if exactly one colon and digits after it -> treat as host:port; else default 443
-    if [[ "$hostport" == *:* ]] && [ "$(printf "%s" "$hostport" | grep -o ":" | wc -l)" -eq 1 ] && [[ "${hostport##*:}" =~ ^[0-9]+$ ]]; then
+    colons="${hostport//[^:]/}"
+    if [ "${#colons}" -eq 1 ] && [[ "${hostport##*:}" =~ ^[0-9]+$ ]]; then
       host="${hostport%%:*}"; port="${hostport##*:}"
     else
       host="$hostport"; port="443"
@@ -180,7 +251,7 @@ parse_target_line() {
 
   # parse extras (order-independent)
   IFS=',' read -r -a arr <<< "$extra"
-  for token in "${arr[@]}"; do
+  for token in ${arr[@]+"${arr[@]}"}; do
     [ -z "$token" ] && continue
     case "$token" in
       sni=*)       sni="${token#sni=}" ;;
@@ -192,134 +263,154 @@ parse_target_line() {
   printf "%s|%s|%s|%s\n" "$host" "$port" "$sni" "$starttls"
 }
 
-extract_leaf_cert() {
-  # Reads s_client output on stdin, prints the first cert PEM block
-  awk '
-    /-----BEGIN CERTIFICATE-----/ {inblk=1}
-    inblk {print}
-    /-----END CERTIFICATE-----/ {exit}
-  '
-}
-
 check_one() {
+  # -> status|days|verify|note|subject|issuer, then "cache<TAB>key<TAB>value" for a fresh parse
   local host="$1" port="$2" sni="$3" starttls="$4"
-  local cmd="openssl s_client -servername \"$sni\" -connect \"$host:$port\" -showcerts"
-  [ -n "$starttls" ] && cmd="$cmd -starttls $starttls"
+  local -a cmd=(openssl s_client -servername "$sni" -connect "$host:$port" -showcerts)
+  [ -n "$starttls" ] && cmd+=(-starttls "$starttls")
+  [ "$HAVE_TIMEOUT" = "1" ] && cmd=(timeout "${TIMEOUT_SECS}s" "${cmd[@]}")
 
   local out
-  out=$(timeout "${TIMEOUT_SECS}s" bash -lc "$cmd < /dev/null 2>/dev/null") || out=""
+  out="$("${cmd[@]}" < /dev/null 2>/dev/null)" || true
 
   if [ -z "$out" ]; then
-    echo "status=CRIT host=$host port=$port sni=$sni days=? verify=? subject=? issuer=? note=connection_failed"
+    printf '%s|%s|%s|%s|%s|%s\n' CRIT "?" "?" connection_failed "?" "?"
     return
   fi
 
-  # Verify return code
-  local verify_line verify_code verify_desc
-  verify_line=$(printf "%s\n" "$out" | awk '/Verify return code:/ {line=$0} END{print line}')
-  verify_code=$(printf "%s\n" "$verify_line" | sed -n 's/.*Verify return code: \([0-9]\+\).*/\1/p')
-  verify_desc=$(printf "%s\n" "$verify_line" | sed -n 's/.*Verify return code: [0-9]\+ (\(.*\)).*/\1/p')
-  [ -z "$verify_code" ] && verify_code="?"
-
-  # Leaf certificate fields
-  local leaf subject issuer enddate
-  leaf="$(printf "%s\n" "$out" | extract_leaf_cert)"
-  if [ -z "$leaf" ]; then
-    echo "status=CRIT host=$host port=$port sni=$sni days=? verify=$verify_code/$verify_desc subject=? issuer=? note=no_leaf_cert"
-    return
+  # Verify return code (last one printed)
+  local verify_code="?" verify_desc="" verify_re='^([0-9]+) \(([^)]*)\)'
+  if [[ "$out" == *"Verify return code: "* ]] && [[ "${out##*Verify return code: }" =~ $verify_re ]]; then
+    verify_code="${BASH_REMATCH[1]}"; verify_desc="${BASH_REMATCH[2]}"
   fi
 
-  subject="$(printf "%s" "$leaf" | openssl x509 -noout -subject 2>/dev/null | sed 's/^subject= *//')"
-  issuer="$(printf "%s" "$leaf" | openssl x509 -noout -issuer 2>/dev/null | sed 's/^issuer= *//')"
-  enddate="$(printf "%s" "$leaf" | openssl x509 -noout -enddate 2>/dev/null | cut -d= -f2)"
-
-  local exp_epoch now_epoch days_left
-  exp_epoch=$(date -u -d "$enddate" +%s 2>/dev/null) || exp_epoch=0
-  now_epoch=$(date -u +%s)
-  if [ "$exp_epoch" -eq 0 ]; then
-    days_left="?"
-  else
-    days_left=$(( (exp_epoch - now_epoch) / 86400 ))
+  # Leaf certificate = first PEM block
+  local body
+  if [[ "$out" != *"-----BEGIN CERTIFICATE-----"*"-----END CERTIFICATE-----"* ]]; then
+    printf '%s|%s|%s|%s|%s|%s\n' CRIT "?" "$verify_code/$verify_desc" no_leaf_cert "?" "?"
+    return
   fi
+  body="${out#*-----BEGIN CERTIFICATE-----}"
+  body="${body%%-----END CERTIFICATE-----*}"
+  local key="pem:${body//[$'\n\r ']/}"
+  key="pem:${key: -64}"
+  cert_parse "$key" < <(printf '%s%s%s\n' "-----BEGIN CERTIFICATE-----" "$body" "-----END CERTIFICATE-----")
+  days_left_for "$C_END"
 
   # Status
   local status="OK" note=""
-  if [ "$days_left" = "?" ]; then
+  if [ "$DAYS_LEFT" = "?" ]; then
     status="WARN"; note="date_parse_error"
-  elif [ "$days_left" -lt 0 ]; then
+  elif [ "$DAYS_LEFT" -lt 0 ]; then
     status="CRIT"; note="expired"
-  elif [ "$days_left" -le "$THRESHOLD_CRIT_DAYS" ]; then
+  elif [ "$DAYS_LEFT" -le "$THRESHOLD_CRIT_DAYS" ]; then
     status="CRIT"; note="<=${THRESHOLD_CRIT_DAYS}d"
-  elif [ "$days_left" -le "$THRESHOLD_WARN_DAYS" ]; then
+  elif [ "$DAYS_LEFT" -le "$THRESHOLD_WARN_DAYS" ]; then
     status="WARN"; note="<=${THRESHOLD_WARN_DAYS}d"
   fi
   if [ "$verify_code" != "0" ] && [ "$verify_code" != "?" ] && [ "$status" = "OK" ]; then
     status="WARN"; note="verify:$verify_desc"
   fi
 
-  # shell-quote subject/issuer minimally (avoid breaking logs)
-  subject="${subject//\"/\\\"}"
-  issuer="${issuer//\"/\\\"}"
+  printf '%s|%s|%s|%s|%s|%s\n' "$status" "$DAYS_LEFT" "$verify_code/${verify_desc//|//}" "${note//|//}" "${C_SUBJECT//|//}" "${C_ISSUER//|//}"
+  # Probes run in subshells: hand the cache entry (hit or fresh parse) back to the parent.
+  [ -n "${CERT_CACHE[$key]+x}" ] && printf 'cache\t%s\t%s\n' "$key" "${CERT_CACHE[$key]}"
+  return 0
+}
 
-  echo "status=$status host=$host port=$port sni=$sni days=$days_left verify=$verify_code/$verify_desc subject=\"$subject\" issuer=\"$issuer\" note=$note"
+record_result() {
+  # $1 = label, $2 = SNI ("-" for files), $3 = status, $4 = days, $5 = verify, $6 = note
+  [ "$3" = "WARN" ] && warn=$((warn+1))
+  [ "$3" = "CRIT" ] && crit=$((crit+1))
+  if [ "$3" = "WARN" ] || [ "$3" = "CRIT" ]; then
+    printf "%s|%s|%s|%s|%s|%s\n" "$1" "$2" "${4:-?}" "$5" "$3" "$6" >> "$ALERTS_FILE"
+  fi
 }
 
 # ========================
 # Main
 # ========================
-lm_info "=== Cert Monitor Started (warn=${THRESHOLD_WARN_DAYS}d crit=${THRESHOLD_CRIT_DAYS}d timeout=${TIMEOUT_SECS}s) ==="
+lm_info "=== Cert Monitor Started (warn=${THRESHOLD_WARN_DAYS}d crit=${THRESHOLD_CRIT_DAYS}d timeout=${TIMEOUT_SECS}s parallel=${PARALLEL}) ==="
 
 # Targets list is required unless scanning a cert directory is enabled.
 if [ -z "$CERTS_SCAN_DIR" ]; then
   [ -s "$TARGETS_FILE" ] || { lm_err "Targets file not found/empty: $TARGETS_FILE"; exit 1; }
 fi
 
+HAVE_TIMEOUT=0
+command -v timeout >/dev/null 2>&1 && HAVE_TIMEOUT=1
+printf -v NOW_EPOCH '%(%s)T' -1
+cache_load
 
 ALERTS_FILE="$(lm_mktemp cert_monitor.alerts.XXXXXX)"
+RESULTS_DIR="$(mktemp -d "${TMPDIR:-/tmp}/cert_monitor.results.XXXXXX")"
+trap 'rc=$?; rm -rf "$RESULTS_DIR" 2>/dev/null; if [ "${_summary_emitted:-0}" -eq 0 ]; then lm_summary "cert_monitor" "localhost" "UNKNOWN" reason=early_exit rc="$?"; fi' EXIT
 checked=0
 warn=0
 crit=0
-while IFS= read -r raw; do
-  raw="$(echo "$raw" | sed 's/^[[:space:]]*//;s/[[:space:]]*$//')"
-  [ -z "$raw" ] && continue
-  [[ "$raw" =~ ^# ]] && continue
 
-  IFS='|' read -r HOST PORT SNI STARTTLS <<<"$(parse_target_line "$raw")"
-  checked=$((checked+1))
-  res="$(check_one "$HOST" "$PORT" "$SNI" "$STARTTLS")"
+# Endpoints: up to PARALLEL probes in flight; each writes its result to RESULTS_DIR/<n>.
+# A slow or unresponsive endpoint only holds its own slot for TIMEOUT_SECS.
+targets=()
+if [ -r "$TARGETS_FILE" ]; then
+  while IFS= read -r raw || [ -n "$raw" ]; do
+    trim "$raw"; raw="$TRIMMED"
+    [ -z "$raw" ] && continue
+    [[ "$raw" =~ ^# ]] && continue
+    targets+=("$(parse_target_line "$raw")")
+  done < "$TARGETS_FILE"
+fi
 
-  status="$(printf "%s\n" "$res" | awk '{for(i=1;i<=NF;i++) if($i ~ /^status=/){print substr($i,8)}}')"
-  days="$(  printf "%s\n" "$res" | awk '{for(i=1;i<=NF;i++) if($i ~ /^days=/){print substr($i,6)}}')"
-  verify="$(printf "%s\n" "$res" | awk '{for(i=1;i<=NF;i++) if($i ~ /^verify=/){print substr($i,8)}}')"
-  note="$(  printf "%s\n" "$res" | awk '{for(i=1;i<=NF;i++) if($i ~ /^note=/){print substr($i,6)}}')"
+running=0
+for i in "${!targets[@]}"; do
+  IFS='|' read -r HOST PORT SNI STARTTLS <<< "${targets[$i]}"
+  if [ "$PARALLEL" -le 1 ]; then
+    check_one "$HOST" "$PORT" "$SNI" "$STARTTLS" > "$RESULTS_DIR/$i"
+    continue
+  fi
+  check_one "$HOST" "$PORT" "$SNI" "$STARTTLS" > "$RESULTS_DIR/$i" &
+  running=$((running+1))
+  if [ "$running" -ge "$PARALLEL" ]; then
+    wait -n 2>/dev/null || true
+    running=$((running-1))
+  fi
+done
+wait
 
+for i in "${!targets[@]}"; do
+  IFS='|' read -r HOST PORT SNI STARTTLS <<< "${targets[$i]}"
+  checked=$((checked+1))
+  status="UNKNOWN" days="?" verify="?" note="no_result"
+  first=1
+  while IFS= read -r line; do
+    if [ "$first" = "1" ]; then
+      IFS='|' read -r status days verify note _subject _issuer <<< "$line"
+      first=0
+    elif [[ "$line" == cache$'\t'* ]]; then
+      line="${line#cache$'\t'}"
+      CERT_CACHE["${line%%$'\t'*}"]="${line#*$'\t'}"
+      CERT_CACHE_USED["${line%%$'\t'*}"]=1
+    fi
+  done < "$RESULTS_DIR/$i"
   lm_info "[$status] $HOST:$PORT (SNI=$SNI) days_left=${days:-?} verify=$verify ${note:+note=$note}"
-
-  [ "$status" = "WARN" ] && warn=$((warn+1))
-  [ "$status" = "CRIT" ] && crit=$((crit+1))
-
-  if [ "$status" = "WARN" ] || [ "$status" = "CRIT" ]; then
-    printf "%s|%s|%s|%s|%s|%s\n" "$HOST:$PORT" "$SNI" "${days:-?}" "$verify" "$status" "$note" >> "$ALERTS_FILE"
-  fi
-done < "$TARGETS_FILE"
+  record_result "$HOST:$PORT" "$SNI" "$status" "$days" "$verify" "$note"
+done
 
 # Optional: scan a directory for cert files and evaluate their expiration (offline).
 if [ -n "$CERTS_SCAN_DIR" ]; then
-  while IFS= read -r cert_path; do
-    [ -n "$cert_path" ] || continue
+  load_ignore_patterns
+  while IFS= read -r cert_entry; do
+    [ -n "$cert_entry" ] || continue
     checked=$((checked+1))
-    res="$(check_cert_file "$cert_path")"
-    status="$(printf "%s\n" "$res" | awk "{for(i=1;i<=NF;i++) if(\$i ~ /^status=/){print substr(\$i,8)}}")"
-    days="$(printf "%s\n" "$res" | awk "{for(i=1;i<=NF;i++) if(\$i ~ /^days=/){print substr(\$i,6)}}")"
-    note="$(printf "%s\n" "$res" | awk "{for(i=1;i<=NF;i++) if(\$i ~ /^note=/){print substr(\$i,6)}}")"
+    # Redirect rather than $(...): the parse must run in this shell to update the cache.
+    check_cert_file "$cert_entry" > "$RESULTS_DIR/file"
+    IFS='|' read -r status days note _subject _issuer < "$RESULTS_DIR/file"
+    cert_path="${cert_entry%%$'\t'*}"
     lm_info "[$status] file=$cert_path days_left=${days:-?} ${note:+note=$note}"
-    [ "$status" = "WARN" ] && warn=$((warn+1))
-    [ "$status" = "CRIT" ] && crit=$((crit+1))
-    if [ "$status" = "WARN" ] || [ "$status" = "CRIT" ]; then
-      printf "%s|%s|%s|%s|%s|%s\n" "$cert_path" "-" "${days:-?}" "file" "$status" "$note" >> "$ALERTS_FILE"
-    fi
+    record_result "$cert_path" "-" "$status" "$days" "file" "$note"
   done < <(scan_cert_files "$CERTS_SCAN_DIR" "$CERTS_SCAN_EXTS")
 fi
+cache_save
 
 overall="OK"
 if [ ${crit:-0} -gt 0 ]; then overall="CRIT"; elif [ ${warn:-0} -gt 0 ]; then overall="WARN"; fi
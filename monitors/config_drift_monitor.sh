@@ -79,57 +79,127 @@ is_allowed_path(){
   return 1
 }
 
-# Remote hasher for a single pattern ($1). Emits lines: "algo|hash|/absolute/path"
-# Supports file/glob/dir/dir/** (recursive)
+# Manifest cache: per-host "algo|inode|size|mtime|ctime|hash|path" lines. Only files whose
+# stat tuple changed since the previous run are rehashed; LM_CONFIG_DRIFT_FULL_EVERY=N forces
+# a full rehash every N-th run (0 = never).
+DRIFT_CACHE="${LM_CONFIG_DRIFT_CACHE:-1}"
+DRIFT_CACHE_DIR="${LM_CONFIG_DRIFT_CACHE_DIR:-${LM_STATE_DIR:-/var/lib/linux_maint}/config_drift}"
+DRIFT_FULL_EVERY="${LM_CONFIG_DRIFT_FULL_EVERY:-0}"
+[[ "$DRIFT_FULL_EVERY" =~ ^[0-9]+$ ]] || DRIFT_FULL_EVERY=0
+
+# Remote stat+hash probe (POSIX sh, no single quotes: it is wrapped in bash -lc '...').
+# stdin: config patterns, "@@KNOWN", then cached stat tuples "algo|inode|size|mtime|ctime|path".
+# stdout: "S|<stat tuple>" for every matched file, "H|algo|hash|path" for files whose tuple is
+# not cached, then "@@END". Supports file/glob/dir/ (one level)/dir/** (recursive).
 remote_hash_cmd='
-p="$1"
 hashbin="$(command -v sha256sum || command -v md5sum)"
-algo="$( [ "${hashbin##*/}" = "sha256sum" ] && echo sha256 || echo md5 )"
-
-emit_file(){
-  f="$1"
-  [ -f "$f" ] || return
-  h="$($hashbin "$f" 2>/dev/null | awk "{print \$1}")"
-  [ -n "$h" ] && printf "%s|%s|%s\n" "$algo" "$h" "$(readlink -f "$f" 2>/dev/null || echo "$f")"
-}
-
-if [[ "$p" == */** ]]; then
-  base="${p%/**}"
-  [ -d "$base" ] && find "$base" -type f -print0 2>/dev/null | xargs -0r "$hashbin" 2>/dev/null | awk -v a="$algo" "{printf \"%s|%s|%s\\n\", a, \$1, \$2}"
-elif [[ "$p" == */ ]]; then
-  dir="${p%/}"
-  [ -d "$dir" ] && find "$dir" -maxdepth 1 -type f -print0 2>/dev/null | xargs -0r "$hashbin" 2>/dev/null | awk -v a="$algo" "{printf \"%s|%s|%s\\n\", a, \$1, \$2}"
-elif [[ "$p" == *\"* ]]; then
-  : # ignore bad quotes
-elif [[ "$p" == *\"* ]]; then
-  : # guard
-elif [[ "$p" == *"*"* || "$p" == *"?"* ]]; then
-  shopt -s nullglob dotglob
-  for f in $p; do emit_file "$f"; done
-else
-  emit_file "$p"
-fi
+[ -n "$hashbin" ] || exit 3
+case "${hashbin##*/}" in sha256sum) algo=sha256 ;; *) algo=md5 ;; esac
+t="$(mktemp -d 2>/dev/null || echo /tmp/lm_drift.$$)"
+mkdir -p "$t" && trap "rm -rf \"$t\"" EXIT
+: > "$t/pats"
+while IFS= read -r p; do
+  [ "$p" = "@@KNOWN" ] && break
+  printf "%s\n" "$p" >> "$t/pats"
+done
+cat > "$t/known"
+fmt="$algo|%i|%s|%T@|%C@|%p\n"
+while IFS= read -r p; do
+  case "$p" in
+    */\*\*) b="${p%/\*\*}"; [ -d "$b" ] && find "$b" -type f -printf "$fmt" 2>/dev/null ;;
+    */) d="${p%/}"; [ -d "$d" ] && find "$d" -maxdepth 1 -type f -printf "$fmt" 2>/dev/null ;;
+    *\"*) : ;;
+    *)
+      for f in $p; do
+        [ -f "$f" ] || continue
+        find "$(readlink -f "$f" 2>/dev/null || echo "$f")" -maxdepth 0 -type f -printf "$fmt" 2>/dev/null
+      done ;;
+  esac
+done < "$t/pats" | sort -u > "$t/stat"
+sed "s/^/S|/" "$t/stat"
+grep -vxFf "$t/known" "$t/stat" | sed "s/^[^|]*|[^|]*|[^|]*|[^|]*|[^|]*|//" \
+  | xargs -d "\n" -r "$hashbin" 2>/dev/null | sed -n "s/^\([0-9a-f][0-9a-f]*\)  /H|$algo|\1|/p"
+echo "@@END"
 '
 
-collect_current(){
-  local host="$1"
-  local lines=""
-  [ -f "$CONFIG_PATHS" ] || { lm_err "[$host] config paths file $CONFIG_PATHS not found."; echo ""; return; }
-
+# Print the config patterns (trimmed, comments dropped)
+config_patterns(){
+  local pat
   while IFS= read -r pat; do
     pat="$(echo "$pat" | sed 's/^[[:space:]]*//;s/[[:space:]]*$//')"
     [ -z "$pat" ] && continue
     [[ "$pat" =~ ^# ]] && continue
-    # Pass $pat as $1 to the remote snippet (bash -c 'code' _ "$pat")
-    out=$(lm_ssh "$host" bash -lc "'$remote_hash_cmd'" _ "$pat")
-    [ -n "$out" ] && lines+="$out"$'\n'
+    printf '%s\n' "$pat"
   done < "$CONFIG_PATHS"
+}
 
-  # normalize + sort unique
-  printf "%s" "$lines" | sed '/^$/d' | sort -u
+# Print the current snapshot ("algo|hash|path", sorted) for a host and refresh its manifest.
+collect_current(){
+  local host="$1"
+  [ -f "$CONFIG_PATHS" ] || { lm_err "[$host] config paths file $CONFIG_PATHS not found."; echo ""; return; }
+
+  local manifest="$DRIFT_CACHE_DIR/${host}.manifest"
+  local since_full=0 full=1
+  if [ "$DRIFT_CACHE" = "1" ] && [ -s "$manifest" ]; then
+    since_full="$(sed -n '1s/^#since_full=\([0-9][0-9]*\)$/\1/p' "$manifest")"
+    [[ "$since_full" =~ ^[0-9]+$ ]] || since_full=0
+    full=0
+    if [ "$DRIFT_FULL_EVERY" -gt 0 ] && [ $((since_full + 1)) -ge "$DRIFT_FULL_EVERY" ]; then
+      full=1
+    fi
+  fi
+
+  local resp snap stats
+  resp="$(lm_mktemp config_drift.resp.XXXXXX)"
+  snap="$(lm_mktemp config_drift.snap.XXXXXX)"
+  {
+    config_patterns
+    echo "@@KNOWN"
+    # Known tuples: manifest line minus the hash field.
+    [ "$full" -eq 0 ] && sed '/^#/d; s/^\([^|]*|[^|]*|[^|]*|[^|]*|[^|]*|\)[^|]*|/\1/' "$manifest"
+  } | lm_ssh "$host" "bash -lc '$remote_hash_cmd'" > "$resp"
+
+  # Merge: new hashes from the probe, cached hashes for unchanged tuples.
+  stats="$(awk -v oldf="$( [ "$full" -eq 0 ] && echo "$manifest")" -v man="$resp.manifest" -v snap="$snap" '
+    function path_after(s, n,   i) { for (i = 0; i < n; i++) s = substr(s, index(s, "|") + 1); return s }
+    BEGIN {
+      if (oldf != "") {
+        while ((getline line < oldf) > 0) {
+          if (line ~ /^#/) continue
+          split(line, f, "|"); p = path_after(line, 6)
+          old[f[1] "|" f[2] "|" f[3] "|" f[4] "|" f[5] "|" p] = f[6]
+        }
+        close(oldf)
+      }
+    }
+    /^S\|/ { ks[++n] = substr($0, 3); next }
+    /^H\|/ { split($0, f, "|"); nh[f[2] "|" path_after($0, 3)] = f[3]; re++; next }
+    $0 == "@@END" { complete = 1 }
+    END {
+      for (i = 1; i <= n; i++) {
+        k = ks[i]; p = path_after(k, 5); a = k; sub(/\|.*/, "", a)
+        if ((a "|" p) in nh) h = nh[a "|" p]
+        else if (k in old) { h = old[k]; cached++ }
+        else { missing++; continue }
+        print substr(k, 1, length(k) - length(p)) h "|" p > man
+        print a "|" h "|" p > snap
+      }
+      printf "files=%d rehashed=%d cached=%d missing=%d complete=%d\n", n, re, cached, missing, complete
+    }' "$resp")"
+
+  lm_info "[$host] manifest $stats full=$full"
+  if [ "$DRIFT_CACHE" = "1" ] && [[ "$stats" == *complete=1* ]] && mkdir -p "$DRIFT_CACHE_DIR" 2>/dev/null; then
+    if [ "$full" -eq 1 ]; then since_full=0; else since_full=$((since_full + 1)); fi
+    { echo "#since_full=$since_full"; cat "$resp.manifest" 2>/dev/null; } > "$manifest.tmp.$$" \
+      && mv -f "$manifest.tmp.$$" "$manifest"
+  fi
+
+  sort -u "$snap"
+  rm -f "$resp" "$resp.manifest" "$snap" "$manifest.tmp.$$"
 }
 
 # Compare baseline vs current. Expect files containing "algo|hash|path"
+# Sets DRIFT_MODIFIED / DRIFT_ADDED / DRIFT_REMOVED (allowlist applied).
 compare_and_report(){
   local host="$1" cur_file="$2" base_file="$3"
 
@@ -210,6 +280,10 @@ Allowlist: $ALLOWLIST_FILE
     mail_if_enabled "$MAIL_SUBJECT_PREFIX $subj" "$body"
   fi
 
+  DRIFT_MODIFIED=$(wc -l < "$modified_filtered" | tr -d ' ')
+  DRIFT_ADDED=$(wc -l < "$new_filtered" | tr -d ' ')
+  DRIFT_REMOVED=$(wc -l < "$removed_file" | tr -d ' ')
+
   rm -f "$new_file" "$removed_file" "$modified_file" "$new_filtered" "$modified_filtered"
   return 0
 }
@@ -318,9 +392,9 @@ run_for_host(){
 
   compare_and_report "$host" "$cur_file" "$base_file"
 
-  modified=$( [ -f "$modified_filtered" ] && wc -l < "$modified_filtered" 2>/dev/null || echo 0)
-  added=$( [ -f "$new_filtered" ] && wc -l < "$new_filtered" 2>/dev/null || echo 0)
-  removed=$( [ -f "$removed_file" ] && wc -l < "$removed_file" 2>/dev/null || echo 0)
+  modified="${DRIFT_MODIFIED:-0}"
+  added="${DRIFT_ADDED:-0}"
+  removed="${DRIFT_REMOVED:-0}"
 
   if [ "$BASELINE_UPDATE" = "true" ]; then
     cp -f "$cur_file" "$base_file"
@@ -10,10 +10,14 @@
 # - Forecast is per mountpoint, excluding pseudo/ephemeral filesystems.
 #
 # State:
-# - /var/lib/linux_maint/disk_trend/<host>.csv
-#   columns: epoch,mount,used_pct,used_kb
+# - /var/lib/linux_maint/disk_trend/<host>.store/ (time-series store, see trend_store_update)
+#   index                      one line per (kind, mount) with the forecast accumulator
+#   <kind>.<mount>.<segment>   raw points, fixed-width "epoch pct value" records
+#   <kind>.<mount>.daily       daily means of points older than TREND_RAW_DAYS
+# - /var/lib/linux_maint/disk_trend/<host>.csv (legacy; imported into the store once,
+#   then renamed to <host>.csv.imported)
 # - /var/lib/linux_maint/disk_trend/<host>.inodes.csv (optional; when LM_DISK_TREND_INODES=1)
-#   columns: epoch,mount,iused_pct,iused_inodes
+#   columns: epoch,mount,iused_pct,iused_inodes (LM_DISK_TREND_INODES_CSV=0 stops writing it)
 
 set -euo pipefail
 
@@ -57,6 +61,13 @@ HARD_CRIT_PCT=95
 MIN_POINTS=2
 # Optional: inode trend (off by default; keeps existing state format unchanged)
 : "${LM_DISK_TREND_INODES:=0}"
+: "${LM_DISK_TREND_INODES_CSV:=1}"
+
+# Time-series store
+TREND_HALFLIFE_DAYS="${LM_DISK_TREND_HALFLIFE_DAYS:-7}"      # forecast weight halves every N days
+TREND_SEGMENT_DAYS="${LM_DISK_TREND_SEGMENT_DAYS:-30}"       # span of one raw segment file
+TREND_RAW_DAYS="${LM_DISK_TREND_RAW_DAYS:-30}"               # keep raw points this long, then daily means
+TREND_RETENTION_DAYS="${LM_DISK_TREND_RETENTION_DAYS:-400}"  # drop daily means older than this
 
 
 # Exclude filesystem types (regex)
@@ -113,69 +124,146 @@ df -PT -k 2>/dev/null | awk 'NR>1{gsub(/%/,"",$6); print $7"|"$2"|"$6"|"$4}'
 EOF
 }
 
-append_state(){
-  local host="$1" mount="$2" used_pct="$3" used_kb="$4"
-  local f="$STATE_BASE/${host}.csv"
-  printf "%s,%s,%s,%s\n" "$(date +%s)" "$mount" "$used_pct" "$used_kb" >> "$f" 2>/dev/null || true
+# trend_store_update HOST KIND
+# stdin: "epoch|mount|pct|value" samples (time ordered). Appends them to the per-(host, kind,
+# mount) segments, updates the index accumulator and prints "mount|days_to_full|slope_per_day"
+# for every mount seen (days is NA, INF or an integer).
+#
+# The accumulator holds exponentially weighted least-squares sums (s0, sx, sy, sxx, sxy) with
+# the origin re-centred on the newest point, so a forecast costs O(1) per mount regardless of
+# history length. Raw segments older than TREND_RAW_DAYS are folded into daily means when a new
+# segment starts; daily means older than TREND_RETENTION_DAYS are dropped.
+trend_store_update(){
+  local host="$1" kind="$2"
+  local dir="$STATE_BASE/${host}.store"
+  mkdir -p "$dir" 2>/dev/null || return 1
+  local now; printf -v now '%(%s)T' -1
+  [ -f "$dir/index" ] || : > "$dir/index"
+  awk -F'|' -v dir="$dir" -v kind="$kind" -v now="$now" -v hl="$TREND_HALFLIFE_DAYS" \
+      -v span="$TREND_SEGMENT_DAYS" -v raw_days="$TREND_RAW_DAYS" -v keep_days="$TREND_RETENTION_DAYS" \
+      -v min_points="$MIN_POINTS" '
+    function mkey(m) { gsub(/%/, "%25", m); gsub(/\//, "%2F", m); gsub(/ /, "%20", m); return m }
+    function base(m) { return dir "/" kind "." mkey(m) }
+    function rec(f, t, pct, v) { printf "%010d %3d %015.0f\n", t, pct, v >> f; touched_file[f] = 1 }
+    function day_add(k, m, t, pct, v,   d) {
+      d = int(t / 86400)
+      if ((k in dd) && dd[k] != d) day_flush(k, m)
+      dd[k] = d; dn[k]++; dp[k] += pct; dv[k] += v
+    }
+    function day_flush(k, m) {
+      if (!(k in dd) || dn[k] == 0) return
+      if (dd[k] * 86400 >= keep_cut) rec(base(m) ".daily", dd[k] * 86400, int(dp[k] / dn[k] + 0.5), dv[k] / dn[k])
+      delete dd[k]; dn[k] = 0; dp[k] = 0; dv[k] = 0
+    }
+    function compact(k, m,   s, f, line, r, tmp, kept) {
+      for (s = lo[k]; s < seg[k]; s++) {
+        if ((s + 1) * span * 86400 > raw_cut) break
+        f = base(m) "." s
+        while ((getline line < f) > 0) {
+          split(line, r, " ")
+          day_add(k, m, r[1] + 0, r[2] + 0, r[3] + 0)
+        }
+        close(f)
+        system("rm -f \"" f "\"")
+        lo[k] = s + 1
+      }
+      day_flush(k, m)
+      f = base(m) ".daily"
+      close(f)
+      tmp = f ".tmp"; kept = 0
+      while ((getline line < f) > 0) {
+        split(line, r, " ")
+        if (r[1] + 0 >= keep_cut) { print line > tmp; kept++ } else trimmed = 1
+      }
+      close(f); close(tmp)
+      if (trimmed) system("mv -f \"" tmp "\" \"" f "\""); else system("rm -f \"" tmp "\"")
+      trimmed = 0
+    }
+    BEGIN {
+      raw_cut = now - raw_days * 86400
+      keep_cut = now - keep_days * 86400
+      decay_k = (hl > 0) ? log(2) / hl : 0
+      while ((getline line < (dir "/index")) > 0) {
+        split(line, ix, "|")
+        m = line; for (i = 0; i < 12; i++) m = substr(m, index(m, "|") + 1)
+        k = ix[1] "|" m
+        order[++nk] = k; km[k] = m
+        n[k] = ix[2]; s0[k] = ix[3]; sx[k] = ix[4]; sy[k] = ix[5]; sxx[k] = ix[6]; sxy[k] = ix[7]
+        lt[k] = ix[8]; lp[k] = ix[9]; lv[k] = ix[10]; lo[k] = ix[11]; seg[k] = ix[12]
+      }
+      close(dir "/index")
+    }
+    {
+      t = $1 + 0; m = $2; pct = $3 + 0; v = $4 + 0
+      k = kind "|" m
+      if (!(k in km)) { order[++nk] = k; km[k] = m; n[k] = 0; lo[k] = ""; seg[k] = "" }
+      if (!(k in seen)) { seen[k] = 1; out[++no] = k }
+
+      if (n[k] > 0) {
+        if (t < lt[k]) next
+        c = (t - lt[k]) / 86400; dy = v - lv[k]
+        sxy[k] = sxy[k] - c * sy[k] - dy * sx[k] + c * dy * s0[k]
+        sxx[k] = sxx[k] - 2 * c * sx[k] + c * c * s0[k]
+        sx[k] = sx[k] - c * s0[k]
+        sy[k] = sy[k] - dy * s0[k]
+        w = exp(-decay_k * c)
+        s0[k] *= w; sx[k] *= w; sy[k] *= w; sxx[k] *= w; sxy[k] *= w
+      } else {
+        s0[k] = 0; sx[k] = 0; sy[k] = 0; sxx[k] = 0; sxy[k] = 0
+      }
+      s0[k] += 1; n[k]++
+      lt[k] = t; lp[k] = pct; lv[k] = v
+
+      if (t < keep_cut) next
+      if (t < raw_cut) { day_add(k, m, t, pct, v); next }
+      sg = int(t / (span * 86400))
+      if (seg[k] == "") { lo[k] = sg; seg[k] = sg }
+      if (sg > seg[k]) { seg[k] = sg; rollover[k] = 1 }
+      rec(base(m) "." sg, t, pct, v)
+    }
+    END {
+      for (tf in touched_file) close(tf)
+      for (i = 1; i <= no; i++) {
+        k = out[i]
+        day_flush(k, km[k])
+        if (k in rollover) compact(k, km[k])
+      }
+      tmp = dir "/index.tmp"
+      printf "" > tmp
+      for (i = 1; i <= nk; i++) {
+        k = order[i]
+        printf "%s|%d|%.10g|%.10g|%.10g|%.10g|%.10g|%d|%d|%.0f|%s|%s|%s\n", substr(k, 1, index(k, "|") - 1), n[k], s0[k], sx[k], sy[k], sxx[k], sxy[k], lt[k], lp[k], lv[k], lo[k], seg[k], km[k] > tmp
+      }
+      close(tmp)
+      for (i = 1; i <= no; i++) {
+        k = out[i]; days = "NA"; slope = "NA"
+        den = s0[k] * sxx[k] - sx[k] * sx[k]
+        if (n[k] >= min_points && den > 0) {
+          b = (s0[k] * sxy[k] - sx[k] * sy[k]) / den
+          if (b < 1) { days = "INF"; slope = 0 }
+          else if (lp[k] > 0) {
+            slope = int(b)
+            rem = lv[k] * 100 / lp[k] - lv[k]
+            days = (rem <= 0) ? 0 : int(rem / b)
+          }
+        }
+        print km[k] "|" days "|" slope
+      }
+    }'
+  local rc=$?
+  [ -f "$dir/index.tmp" ] && mv -f "$dir/index.tmp" "$dir/index"
+  return "$rc"
 }
 
-
-# Compute forecast from history of used_kb for a mount.
-# Returns: days_to_full (or NA) and slope_kb_per_day.
-forecast_mount(){
-  local host="$1" mount="$2"
-  local f="$STATE_BASE/${host}.csv"
-  [ -f "$f" ] || { echo "NA NA"; return; }
-
-  # Use last 30 points for stability.
-  # We do linear slope using oldest and newest points.
-  local rows
-  rows=$(awk -F',' -v M="$mount" '$2==M{print $0}' "$f" | tail -n 30)
-  local n; n=$(printf "%s\n" "$rows" | sed '/^$/d' | wc -l | awk '{print $1}')
-  [ "$n" -lt "$MIN_POINTS" ] && { echo "NA NA"; return; }
-
-  local first last
-  # Avoid head/tail pipelines under `set -o pipefail` (can trigger SIGPIPE noise)
-  # by extracting first/last rows in awk.
-  first=$(printf "%s\n" "$rows" | awk 'NR==1{print; exit}')
-  last=$(printf "%s\n" "$rows" | awk 'END{print}')
-
-  local t1 u1 t2 u2
-  t1=$(echo "$first" | awk -F',' '{print $1}')
-  u1=$(echo "$first" | awk -F',' '{print $4}')
-  t2=$(echo "$last" | awk -F',' '{print $1}')
-  u2=$(echo "$last" | awk -F',' '{print $4}')
-
-  # guard
-  [[ "$t1" =~ ^[0-9]+$ ]] || { echo "NA NA"; return; }
-  [[ "$t2" =~ ^[0-9]+$ ]] || { echo "NA NA"; return; }
-  [[ "$u1" =~ ^[0-9]+$ ]] || { echo "NA NA"; return; }
-  [[ "$u2" =~ ^[0-9]+$ ]] || { echo "NA NA"; return; }
-
-  local dt=$((t2-t1))
-  [ "$dt" -le 0 ] && { echo "NA NA"; return; }
-  local du=$((u2-u1))
-
-  # if not growing, no forecast
-  [ "$du" -le 0 ] && { echo "INF 0"; return; }
-
-  # slope per day
-  local slope_kb_per_day=$(( du * 86400 / dt ))
-  [ "$slope_kb_per_day" -le 0 ] && { echo "NA NA"; return; }
-
-  # Need current filesystem size to compute remaining. We approximate size_kb from last point and used_pct:
-  local used_pct
-  used_pct=$(echo "$last" | awk -F',' '{print $3}')
-  [[ "$used_pct" =~ ^[0-9]+$ ]] || { echo "NA NA"; return; }
-  [ "$used_pct" -le 0 ] && { echo "NA NA"; return; }
-
-  # size_kb ~= used_kb * 100 / used_pct
-  local size_kb=$(( u2 * 100 / used_pct ))
-  local remaining_kb=$(( size_kb - u2 ))
-  [ "$remaining_kb" -le 0 ] && { echo "0 $slope_kb_per_day"; return; }
-
-  local days=$(( remaining_kb / slope_kb_per_day ))
-  echo "$days $slope_kb_per_day"
+# trend_store_import HOST KIND CSV -> feed a legacy "epoch,mount,pct,value" CSV into the store
+# once (when the store has no series of KIND yet).
+trend_store_import(){
+  local host="$1" kind="$2" csv="$3"
+  [ -s "$csv" ] || return 1
+  grep -q "^${kind}|" "$STATE_BASE/${host}.store/index" 2>/dev/null && return 1
+  sort -t, -k1,1n "$csv" | awk -F',' 'NF>=4 && $1 ~ /^[0-9]+$/ {print $1 "|" $2 "|" $3 "|" $4}' \
+    | trend_store_update "$host" "$kind" >/dev/null
+  lm_info "[$host] imported $(wc -l < "$csv" | tr -d ' ') $kind rows from $csv into the trend store"
 }
 
 run_for_host(){
@@ -198,9 +286,14 @@ run_for_host(){
     return 2
   fi
 
-  local cmd out
-  cmd="$(remote_collect_cmd)"
-  out="$(lm_ssh "$host" "$cmd" 2>/dev/null || true)"
+  local cmd out raw
+  # Prefer facts cached by the wrapper collect stage (no extra SSH round trip).
+  if raw="$(lm_fact "$host" df_pt)"; then
+    out="$(printf '%s\n' "$raw" | awk 'NR>1{gsub(/%/,"",$6); print $7"|"$2"|"$6"|"$4}')"
+  else
+    cmd="$(remote_collect_cmd)"
+    out="$(lm_ssh "$host" "$cmd" 2>/dev/null || true)"
+  fi
   [ -z "$out" ] && { lm_summary "disk_trend_monitor" "$host" "UNKNOWN" reason=no_df_output mounts=0 note=no_df; WORST_RC=3; return 3; }
   # legacy:
   # [ -z "$out" ] && { echo "disk_trend_monitor host=$host status=UNKNOWN mounts=0 note=no_df"; WORST_RC=3; return 3; }
@@ -210,36 +303,58 @@ run_for_host(){
   local crit=0
   local insufficient=0
 
+  # Import the legacy CSV history once, then record this run's samples in the store.
+  if trend_store_import "$host" space "$STATE_BASE/${host}.csv"; then
+    mv -f "$STATE_BASE/${host}.csv" "$STATE_BASE/${host}.csv.imported" 2>/dev/null || true
+  fi
+
+  local now; printf -v now '%(%s)T' -1
+  local samples=""
+  local -a kept=()
   while IFS='|' read -r mp fstype used_pct used_kb; do
     [ -z "$mp" ] && continue
     mounts=$((mounts+1))
 
     # exclude types/mounts
-    if echo "$fstype" | grep -Eq "$EXCLUDE_FSTYPES_RE"; then
+    if [[ "$fstype" =~ $EXCLUDE_FSTYPES_RE ]]; then
       continue
     fi
     if is_mount_excluded "$mp"; then
       continue
     fi
+    if [[ ! "$used_pct" =~ ^[0-9]+$ || ! "$used_kb" =~ ^[0-9]+$ ]]; then
+      insufficient=$((insufficient+1))
+      continue
+    fi
+    samples+="$now|$mp|$used_pct|$used_kb"$'\n'
+    kept+=("$mp|$used_pct")
+  done <<< "$out"
 
-    # record state
-    append_state "$host" "$mp" "$used_pct" "$used_kb"
+  # record state + forecast (one store pass for all mounts)
+  local -A forecast=()
+  local days slope
+  while IFS='|' read -r mp days slope; do
+    [ -n "$mp" ] && forecast["$mp"]="$days $slope"
+  done < <(printf '%s' "$samples" | trend_store_update "$host" space)
+
+  local entry
+  for entry in ${kept[@]+"${kept[@]}"}; do
+    mp="${entry%|*}"
+    used_pct="${entry##*|}"
 
     # hard thresholds
-    if [[ "$used_pct" =~ ^[0-9]+$ ]]; then
-      if [ "$used_pct" -ge "$HARD_CRIT_PCT" ]; then
-        crit=$((crit+1))
-        append_alert "$host|disk_hard_crit|mount=$mp used_pct=$used_pct"
-        continue
-      elif [ "$used_pct" -ge "$HARD_WARN_PCT" ]; then
-        warn=$((warn+1))
-        append_alert "$host|disk_hard_warn|mount=$mp used_pct=$used_pct"
-        # still compute forecast below
-      fi
+    if [ "$used_pct" -ge "$HARD_CRIT_PCT" ]; then
+      crit=$((crit+1))
+      append_alert "$host|disk_hard_crit|mount=$mp used_pct=$used_pct"
+      continue
+    elif [ "$used_pct" -ge "$HARD_WARN_PCT" ]; then
+      warn=$((warn+1))
+      append_alert "$host|disk_hard_warn|mount=$mp used_pct=$used_pct"
+      # still compute forecast below
     fi
 
     # forecast
-    read -r days slope < <(forecast_mount "$host" "$mp")
+    read -r days slope <<< "${forecast[$mp]:-NA NA}"
     if [ "$days" = "NA" ]; then
       insufficient=$((insufficient+1))
       continue
@@ -256,7 +371,7 @@ run_for_host(){
         append_alert "$host|disk_trend_warn|mount=$mp days_to_full=$days slope_kb_per_day=$slope"
       fi
     fi
-  done <<< "$out"
+  done
 
   local status rc note reason
   status="OK"; rc=0; note=""
@@ -304,15 +419,26 @@ collect_inode_trend_for_host(){
 
   [[ "${LM_DISK_TREND_INODES}" == "1" || "${LM_DISK_TREND_INODES}" == "true" ]] || return 0
 
-  local cmd out
-  cmd="$(remote_collect_inodes_cmd)"
-  out="$(lm_ssh "$host" "$cmd" 2>/dev/null || true)"
+  local cmd out raw
+  if raw="$(lm_fact "$host" df_pti)"; then
+    out="$(printf '%s\n' "$raw" | awk 'NR>1{ipct=$(NF-1); gsub(/%/,"",ipct); print $NF"|"$2"|"ipct"|"$5}')"
+  elif raw="$(lm_fact "$host" df_pi)"; then
+    out="$(printf '%s\n' "$raw" | awk 'NR>1{gsub(/%/,"",$5); print $6"|?""|"$5"|"$3}')"
+  else
+    cmd="$(remote_collect_inodes_cmd)"
+    out="$(lm_ssh "$host" "$cmd" 2>/dev/null || true)"
+  fi
   [ -z "$out" ] && return 0
 
+  # Import the legacy inode CSV once (before this run appends to it).
+  trend_store_import "$host" inodes "$STATE_BASE/${host}.inodes.csv" || true
+
+  local now; printf -v now '%(%s)T' -1
+  local samples=""
   while IFS='|' read -r mp fstype iused_pct iused; do
     [ -z "$mp" ] && continue
 
-    if echo "$fstype" | grep -Eq "$EXCLUDE_FSTYPES_RE"; then
+    if [[ "$fstype" =~ $EXCLUDE_FSTYPES_RE ]]; then
       continue
     fi
     if is_mount_excluded "$mp"; then
@@ -328,8 +454,15 @@ collect_inode_trend_for_host(){
       fi
     fi
 
-    append_inode_state "$host" "$mp" "$iused_pct" "$iused"
+    if [[ "$iused_pct" =~ ^[0-9]+$ && "$iused" =~ ^[0-9]+$ ]]; then
+      samples+="$now|$mp|$iused_pct|$iused"$'\n'
+    fi
+    if [[ "${LM_DISK_TREND_INODES_CSV}" == "1" || "${LM_DISK_TREND_INODES_CSV}" == "true" ]]; then
+      append_inode_state "$host" "$mp" "$iused_pct" "$iused" "$now"
+    fi
   done <<< "$out"
+
+  printf '%s' "$samples" | trend_store_update "$host" inodes >/dev/null || true
 }
 
 # ============ Inode trend (optional) ============
@@ -350,9 +483,10 @@ CMD
 }
 
 append_inode_state(){
-  local host="$1" mount="$2" iused_pct="$3" iused="$4"
+  local host="$1" mount="$2" iused_pct="$3" iused="$4" ts="${5:-}"
   local f="$STATE_BASE/${host}.inodes.csv"
-  printf "%s,%s,%s,%s\n" "$(date +%s)" "$mount" "$iused_pct" "$iused" >> "$f" 2>/dev/null || true
+  [ -n "$ts" ] || printf -v ts '%(%s)T' -1
+  printf "%s,%s,%s,%s\n" "$ts" "$mount" "$iused_pct" "$iused" >> "$f" 2>/dev/null || true
 }
 
 main "$@"
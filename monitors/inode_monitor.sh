@@ -83,8 +83,15 @@ lookup_thresholds(){
 collect_inodes(){
   # Prints: fs|type|inodes|iused|iuse%|mount
   local host="$1"
-  local out
-  out="$(lm_ssh "$host" "df -PTi 2>/dev/null | awk 'NR>1{printf \"%s|%s|%s|%s|%s|%s\\n\",\$1,\$2,\$3,\$4,\$6,\$7}'")"
+  local out raw
+  # Prefer facts cached by the wrapper collect stage (no extra SSH round trip).
+  if raw="$(lm_fact "$host" df_pti)"; then
+    out="$(printf '%s\n' "$raw" | awk 'NR>1{printf "%s|%s|%s|%s|%s|%s\n",$1,$2,$3,$4,$6,$7}')"
+  elif raw="$(lm_fact "$host" df_pi)"; then
+    out="$(printf '%s\n' "$raw" | awk 'NR>1{printf "%s|%s|%s|%s|%s|%s\n",$1,"-",$2,$3,$5,$6}')"
+  else
+    out="$(lm_ssh "$host" "df -PTi 2>/dev/null | awk 'NR>1{printf \"%s|%s|%s|%s|%s|%s\\n\",\$1,\$2,\$3,\$4,\$6,\$7}'")"
+  fi
   if [ -z "$out" ]; then
     out="$(lm_ssh "$host" "df -Pi 2>/dev/null | awk 'NR>1{printf \"%s|%s|%s|%s|%s|%s\\n\",\$1,\"-\",\$2,\$3,\$5,\$6}'")"
   fi
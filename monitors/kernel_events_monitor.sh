@@ -30,6 +30,11 @@ EMAIL_ON_ALERT="true"
 WARN_COUNT=1
 CRIT_COUNT=5
 PATTERNS='oom-killer|out of memory|killed process|soft lockup|hard lockup|hung task|blocked for more than|I/O error|blk_update_request|Buffer I/O error|EXT4-fs error|XFS \(|btrfs: error|nvme.*timeout|resetting link|ata[0-9].*failed|mce:|machine check'
+# Per-category counts from the same pass (name=regex;..., matched case-insensitively)
+CATEGORIES='oom=oom-killer|out of memory|killed process;lockup=soft lockup|hard lockup;hung_task=hung task|blocked for more than;io_error=i/o error|blk_update_request|nvme.*timeout|resetting link|ata[0-9].*failed;fs_error=ext4-fs error|xfs \(|btrfs: error;hw_error=mce:|machine check'
+# Kernel log files read when the host has no journalctl (first run: last 5000 lines each)
+KERNEL_LOG_FILES="/var/log/kern.log /var/log/messages /var/log/syslog"
+INITIAL_LINES=5000
 
 ALERTS_FILE="$(lm_mktemp kernel_events_monitor.alerts.XXXXXX)"
 cleanup_tmpfiles(){ rm -f "$ALERTS_FILE" 2>/dev/null || true; }
@@ -39,31 +44,6 @@ mail_if_enabled(){ [ "$EMAIL_ON_ALERT" = "true" ] || return 0; lm_mail "$1" "$2"
 
 ensure_dirs(){ mkdir -p "$(dirname "$LM_LOGFILE")"; }
 
-remote_scan_cmd() {
-  cat <<'EOF'
-set -euo pipefail
-hrs="$1"
-pat="$2"
-
-have(){ command -v "$1" >/dev/null 2>&1; }
-
-if have journalctl; then
-  out=$(journalctl -k -S "-${hrs}h" 2>/dev/null || true)
-else
-  out=""
-  for f in /var/log/kern.log /var/log/messages /var/log/syslog; do
-    [ -r "$f" ] || continue
-    out="$out\n$(tail -n 5000 "$f" 2>/dev/null || true)"
-  done
-fi
-
-count=$(printf "%b" "$out" | grep -Eai "$pat" | wc -l | awk '{print $1}')
-sample=$(printf "%b" "$out" | grep -Eai "$pat" | head -n 3 | tr '\n' ';' | sed 's/[[:space:]]\+/ /g')
-
-printf "count=%s sample=%s\n" "$count" "${sample:-}"
-EOF
-}
-
 run_for_host(){
   local host="$1"
   ensure_dirs
@@ -77,21 +57,41 @@ run_for_host(){
     return 2
   fi
 
-  local cmd out
-  cmd="$(remote_scan_cmd)"
-  out="$(lm_ssh "$host" bash -lc "$cmd" _ "$KERNEL_WINDOW_HOURS" "$PATTERNS" 2>/dev/null || true)"
-  if [ -z "$out" ]; then
+  # Only kernel messages logged since the previous run are read (journal cursor or
+  # file offsets kept per host; see lm_log_scan). LM_LOG_CURSOR=0 rescans the window.
+  # Thresholds apply to the rolling count over KERNEL_WINDOW_HOURS, so an OOM keeps
+  # the host WARN for the whole window, as a full window rescan would.
+  local out
+  # shellcheck disable=SC2086
+  out="$(lm_log_scan "kernel_events_monitor" "$host" auto-k "$((KERNEL_WINDOW_HOURS * 60))" "$INITIAL_LINES" \
+    "$PATTERNS" "$CATEGORIES" 3 $KERNEL_LOG_FILES 2>/dev/null || true)"
+  local count="" new_matches="" new_lines="" sample="" mode="" rate="" categories="none" k v
+  while IFS='=' read -r k v; do
+    case "$k" in
+      window_matches) count="$v" ;;
+      matches) new_matches="$v" ;;
+      lines) new_lines="$v" ;;
+      sample) sample="$v" ;;
+      mode) mode="$v" ;;
+      rate_per_min) rate="$v" ;;
+      categories) categories="$v" ;;
+      error) lm_warn "[$host] kernel log scan: $v" ;;
+    esac
+  done <<< "$out"
+  if [ -z "$mode" ]; then
     lm_warn "[$host] unable to read kernel logs (permissions/tools)"
     lm_summary "kernel_events_monitor" "$host" "UNKNOWN" reason=kernel_log_unreadable matches=?
     # legacy:
     # echo "kernel_events_monitor host=$host status=UNKNOWN matches=?"
     return 3
   fi
+  [ -z "$count" ] && count="${new_matches:-0}"
 
-  local count sample
-  count=$(echo "$out" | awk -F'[ =]+' '{for(i=1;i<=NF;i++) if($i=="count") print $(i+1)}')
-  sample=$(echo "$out" | sed -n 's/^.*sample=//p')
-  [ -z "$count" ] && count=0
+  # In cursor mode matches= is the rolling window count; this run's share is new_matches=.
+  local -a scope=(window_h="$KERNEL_WINDOW_HOURS")
+  if [ "$mode" = "cursor" ]; then
+    scope=(new_lines="${new_lines:-0}" new_matches="${new_matches:-0}" rolling_h="$KERNEL_WINDOW_HOURS")
+  fi
 
   local status rc reason
   status="OK"; rc=0
@@ -105,9 +105,11 @@ run_for_host(){
   fi
 
   if [ "$status" != "OK" ] && [ -n "$reason" ]; then
-    lm_summary "kernel_events_monitor" "$host" "$status" reason="$reason" matches="$count" window_h="$KERNEL_WINDOW_HOURS"
+    lm_summary "kernel_events_monitor" "$host" "$status" reason="$reason" matches="$count" "${scope[@]}" \
+      mode="$mode" rate_per_min="$rate" categories="$categories"
   else
-    lm_summary "kernel_events_monitor" "$host" "$status" matches="$count" window_h="$KERNEL_WINDOW_HOURS"
+    lm_summary "kernel_events_monitor" "$host" "$status" matches="$count" "${scope[@]}" \
+      mode="$mode" rate_per_min="$rate" categories="$categories"
   fi
   # legacy:
   # echo "kernel_events_monitor host=$host status=$status matches=$count window_h=$KERNEL_WINDOW_HOURS"
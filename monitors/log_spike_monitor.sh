@@ -24,6 +24,14 @@ lm_require_singleton "log_spike_monitor"
 : "${LM_LOG_SPIKE_PATTERN:=panic|oops|segfault|out of memory|oom|error|failed}"
 pattern_token="$(printf '%s' "$LM_LOG_SPIKE_PATTERN" | tr -s '[:space:]' '_' )"
 
+# Named patterns counted in the same pass (name=regex;...), reported as categories=name:count,...
+: "${LM_LOG_SPIKE_CATEGORIES:=oom=out of memory|oom-killer|oom_reaper;segfault=segfault;panic=kernel panic|oops;io_error=i/o error|blk_update_request;fs_error=ext4-fs error|xfs .*error|btrfs.*error;hung_task=hung task|blocked for more than;unit_failed=failed with result|entered failed state}"
+
+# Read cursor: auto = on for journal/syslog/messages (only new lines each run), off for file.
+: "${LM_LOG_SPIKE_CURSOR:=auto}"
+# Lines read from a syslog/messages file when there is no cursor yet.
+: "${LM_LOG_SPIKE_INITIAL_LINES:=5000}"
+
 is_int() { [[ "${1:-}" =~ ^[0-9]+$ ]]; }
 
 if ! is_int "$LM_LOG_SPIKE_WINDOW_MIN" || [ "$LM_LOG_SPIKE_WINDOW_MIN" -le 0 ]; then
@@ -31,43 +39,13 @@ if ! is_int "$LM_LOG_SPIKE_WINDOW_MIN" || [ "$LM_LOG_SPIKE_WINDOW_MIN" -le 0 ];
   exit 3
 fi
 
-if ! is_int "$LM_LOG_SPIKE_WARN" || ! is_int "$LM_LOG_SPIKE_CRIT"; then
+if ! is_int "$LM_LOG_SPIKE_WARN" || ! is_int "$LM_LOG_SPIKE_CRIT" || ! is_int "$LM_LOG_SPIKE_INITIAL_LINES"; then
   lm_summary "log_spike_monitor" "localhost" "UNKNOWN" reason=config_invalid warn="$LM_LOG_SPIKE_WARN" crit="$LM_LOG_SPIKE_CRIT"
   exit 3
 fi
 
 # Determine source
 source=""
-get_lines() {
-  case "$1" in
-    file)
-      [ -n "$LM_LOG_SPIKE_FIXTURE_FILE" ] || return 2
-      [ -r "$LM_LOG_SPIKE_FIXTURE_FILE" ] || return 3
-      cat "$LM_LOG_SPIKE_FIXTURE_FILE"
-      ;;
-    journal)
-      lm_require_cmd "log_spike_monitor" "localhost" journalctl --optional || true
-      if ! lm_has_cmd journalctl; then
-        return 4
-      fi
-      # Best-effort: last window minutes, no pager
-      journalctl --no-pager -S "${LM_LOG_SPIKE_WINDOW_MIN} min ago" 2>/dev/null || return 5
-      ;;
-    syslog)
-      [ -r /var/log/syslog ] || return 6
-      # No reliable timestamps across distros without date parsing; use tail window.
-      tail -n 5000 /var/log/syslog 2>/dev/null || return 7
-      ;;
-    messages)
-      [ -r /var/log/messages ] || return 8
-      tail -n 5000 /var/log/messages 2>/dev/null || return 9
-      ;;
-    *)
-      return 10
-      ;;
-  esac
-}
-
 pick_source() {
   case "$LM_LOG_SPIKE_SOURCE" in
     file)
@@ -95,22 +73,48 @@ if ! pick_source; then
   exit 0
 fi
 
-# Count matching lines
-lines=""
-if ! lines="$(get_lines "$source" 2>/dev/null)"; then
+# Scan only what is new since the last run (one streaming pass; see lm_log_scan).
+cursor=1
+case "$LM_LOG_SPIKE_CURSOR" in
+  0|false|no) cursor=0 ;;
+  auto) [ "$source" = "file" ] && cursor=0 ;;
+esac
+scan_source="files" initial="$LM_LOG_SPIKE_INITIAL_LINES"
+scan_files=()
+case "$source" in
+  file)
+    [ -n "$LM_LOG_SPIKE_FIXTURE_FILE" ] && scan_files=("$LM_LOG_SPIKE_FIXTURE_FILE")
+    initial=0
+    ;;
+  journal)
+    lm_require_cmd "log_spike_monitor" "localhost" journalctl --optional || true
+    scan_source="journal"
+    ;;
+  syslog) scan_files=(/var/log/syslog) ;;
+  messages) scan_files=(/var/log/messages) ;;
+esac
+
+scan="$(LM_LOG_CURSOR="$cursor" lm_log_scan "log_spike_monitor" "localhost" "$scan_source" "$LM_LOG_SPIKE_WINDOW_MIN" "$initial" \
+  "$LM_LOG_SPIKE_PATTERN" "$LM_LOG_SPIKE_CATEGORIES" 0 ${scan_files[@]+"${scan_files[@]}"} 2>/dev/null)" || scan=""
+
+errors=0 mode="" new_lines=0 rate="" categories="none" scan_error=""
+while IFS='=' read -r k v; do
+  case "$k" in
+    matches) errors="$v" ;;
+    mode) mode="$v" ;;
+    lines) new_lines="$v" ;;
+    rate_per_min) rate="$v" ;;
+    categories) categories="$v" ;;
+    error) scan_error="$v" ;;
+  esac
+done <<< "$scan"
+
+if [ -z "$mode" ] || [ -n "$scan_error" ]; then
   # If we failed to read chosen source, degrade to UNKNOWN (not CRIT; avoid noisy alerts).
   lm_summary "log_spike_monitor" "localhost" "UNKNOWN" reason=permission_denied source="$source"
   exit 3
 fi
 
-errors=$(
-  # grep exits 1 when there are 0 matches; under `set -e` that would
-  # incorrectly abort the monitor. Treat 0 matches as a valid OK result.
-  printf %s "${lines}" | grep -Eaci "$LM_LOG_SPIKE_PATTERN" || true
-)
-errors=$(printf %s "$errors" | tr -d "[:space:]")
-errors=${errors:-0}
-
 status="OK"
 reason=""
 if [ "$errors" -ge "$LM_LOG_SPIKE_CRIT" ]; then
@@ -120,9 +124,11 @@ elif [ "$errors" -ge "$LM_LOG_SPIKE_WARN" ]; then
 fi
 
 if [ "$status" = "OK" ]; then
-  lm_summary "log_spike_monitor" "localhost" "$status" source="$source" errors="$errors" window_min="$LM_LOG_SPIKE_WINDOW_MIN" pattern="$pattern_token"
+  lm_summary "log_spike_monitor" "localhost" "$status" source="$source" errors="$errors" window_min="$LM_LOG_SPIKE_WINDOW_MIN" pattern="$pattern_token" \
+    mode="$mode" new_lines="$new_lines" rate_per_min="$rate" categories="$categories"
   exit 0
 fi
 
-lm_summary "log_spike_monitor" "localhost" "$status" reason="$reason" source="$source" errors="$errors" window_min="$LM_LOG_SPIKE_WINDOW_MIN" pattern="$pattern_token"
+lm_summary "log_spike_monitor" "localhost" "$status" reason="$reason" source="$source" errors="$errors" window_min="$LM_LOG_SPIKE_WINDOW_MIN" pattern="$pattern_token" \
+  mode="$mode" new_lines="$new_lines" rate_per_min="$rate" categories="$categories"
 exit 0
@@ -92,17 +92,13 @@ has_unsafe_chars(){
   return 1
 }
 
-ensure_uint(){
-  local v="$1" def="$2" min="${3:-0}"
-  if [[ ! "$v" =~ ^[0-9]+$ ]]; then
-    echo "$def"
-    return 0
-  fi
-  if (( v < min )); then
-    echo "$def"
-    return 0
+# uint_or VAR VALUE DEFAULT [MIN] -> VAR=VALUE when it is an integer >= MIN, else DEFAULT
+uint_or(){
+  local v="$2" def="$3" min="${4:-0}"
+  if [[ ! "$v" =~ ^[0-9]+$ ]] || (( v < min )); then
+    v="$def"
   fi
-  echo "$v"
+  printf -v "$1" '%s' "$v"
 }
 
 validate_ping_target(){
@@ -134,38 +130,51 @@ validate_url(){
 }
 
 # ========================
-# Remote probes
+# Probe parameters (targets file key=val over defaults)
 # ========================
-run_ping(){
-  local onhost="$1" target="$2"; shift 2
+ping_params(){
   declare -A P=(); parse_params P "$@"
-  local cnt="${P[count]:-$PING_COUNT}"
-  local to="${P[timeout]:-$PING_TIMEOUT}"
-  local lw="${P[loss_warn]:-$PING_LOSS_WARN}"
-  local lc="${P[loss_crit]:-$PING_LOSS_CRIT}"
-  local rw="${P[rtt_warn_ms]:-$PING_RTT_WARN_MS}"
-  local rc="${P[rtt_crit_ms]:-$PING_RTT_CRIT_MS}"
-
-  cnt="$(ensure_uint "$cnt" "$PING_COUNT" 1)"
-  to="$(ensure_uint "$to" "$PING_TIMEOUT" 1)"
-  lw="$(ensure_uint "$lw" "$PING_LOSS_WARN" 0)"
-  lc="$(ensure_uint "$lc" "$PING_LOSS_CRIT" 0)"
-  rw="$(ensure_uint "$rw" "$PING_RTT_WARN_MS" 0)"
-  rc="$(ensure_uint "$rc" "$PING_RTT_CRIT_MS" 0)"
+  uint_or PG_CNT "${P[count]:-}" "$PING_COUNT" 1
+  uint_or PG_TO "${P[timeout]:-}" "$PING_TIMEOUT" 1
+  uint_or PG_LW "${P[loss_warn]:-}" "$PING_LOSS_WARN" 0
+  uint_or PG_LC "${P[loss_crit]:-}" "$PING_LOSS_CRIT" 0
+  uint_or PG_RW "${P[rtt_warn_ms]:-}" "$PING_RTT_WARN_MS" 0
+  uint_or PG_RC "${P[rtt_crit_ms]:-}" "$PING_RTT_CRIT_MS" 0
+}
 
-  local out
-  out="$(lm_ssh "$onhost" "ping -c $cnt -w $to '$target' 2>/dev/null || ping -n -c $cnt -w $to '$target' 2>/dev/null")"
+tcp_params(){
+  declare -A P=(); parse_params P "$@"
+  uint_or TC_TO "${P[timeout]:-}" "$TCP_TIMEOUT" 1
+  uint_or TC_LW "${P[latency_warn_ms]:-}" "$TCP_LAT_WARN_MS" 0
+  uint_or TC_LC "${P[latency_crit_ms]:-}" "$TCP_LAT_CRIT_MS" 0
+}
+
+http_params(){
+  declare -A P=(); parse_params P "$@"
+  uint_or HT_TO "${P[timeout]:-}" "$HTTP_TIMEOUT" 1
+  uint_or HT_LW "${P[latency_warn_ms]:-}" "$HTTP_LAT_WARN_MS" 0
+  uint_or HT_LC "${P[latency_crit_ms]:-}" "$HTTP_LAT_CRIT_MS" 0
+  HT_EXP="${P[expect]:-$HTTP_EXPECT}"
+}
+
+# ========================
+# Result evaluation (shared by per-target and batched probing)
+# ========================
+# ping_grade ONHOST TARGET PING_OUTPUT LOSS_WARN LOSS_CRIT RTT_WARN RTT_CRIT
+ping_grade(){
+  local onhost="$1" target="$2" out="$3" lw="$4" lc="$5" rw="$6" rc="$7"
   if [ -z "$out" ]; then
     lm_err "[$onhost] ping $target tool/permission failure"
     append_alert "$onhost|ping|$target|tool_failure"
     return
   fi
 
-  local loss avg ams="?"
-  loss="$(printf "%s\n" "$out" | awk -F',' '/packet loss/ {for(i=1;i<=NF;i++) if($i ~ /packet loss/) {gsub(/[^0-9.]/,"",$i); print $i; exit}}')"
-  avg="$(printf "%s\n" "$out" | awk -F'/' '/min\/avg\/|round-trip/ {print $5; exit}')"
+  local loss="" ams="?"
+  [[ "$out" =~ ([0-9.]+)%\ packet\ loss ]] && loss="${BASH_REMATCH[1]}"
   [ -z "$loss" ] && loss="100"
-  [ -n "$avg" ] && ams=$(awk -v a="$avg" 'BEGIN{printf("%.0f", a)}')
+  if [[ "$out" =~ (min/avg/|round-trip)[^=]*=\ *[0-9.]+/([0-9.]+)/ ]]; then
+    ams="$(awk -v a="${BASH_REMATCH[2]}" 'BEGIN{printf("%.0f", a)}')"
+  fi
 
   local status="OK" note=""
   awk -v L="$loss" -v LC="$lc" 'BEGIN{exit !(L >= LC)}' && { status="CRIT"; note="loss_ge_${lc}%"; }
@@ -181,67 +190,40 @@ run_ping(){
   [ "$status" != "OK" ] && append_alert "$onhost|ping|$target|$note"
 }
 
-run_tcp(){
-  local onhost="$1" hostport="$2"; shift 2
-  declare -A P=(); parse_params P "$@"
-  local to="${P[timeout]:-$TCP_TIMEOUT}"
-  local lw="${P[latency_warn_ms]:-$TCP_LAT_WARN_MS}"
-  local lc="${P[latency_crit_ms]:-$TCP_LAT_CRIT_MS}"
-  to="$(ensure_uint "$to" "$TCP_TIMEOUT" 1)"
-  lw="$(ensure_uint "$lw" "$TCP_LAT_WARN_MS" 0)"
-  lc="$(ensure_uint "$lc" "$TCP_LAT_CRIT_MS" 0)"
-  local host="${hostport%%:*}" port="${hostport##*:}"
-
-  local out
-  out="$(lm_ssh "$onhost" "start=\$(date +%s%3N 2>/dev/null); exec 3<>/dev/tcp/$host/$port; rc=\$?; end=\$(date +%s%3N 2>/dev/null); [ \$rc -eq 0 ] && { exec 3>&-; echo OK \$((end-start)); } || echo FAIL" )"
-  if echo "$out" | grep -q '^OK '; then
-    local ms; ms="$(echo "$out" | awk '{print $2}')"
-    local status="OK" note=""
-    [ -z "$ms" ] && ms="?"
-    [ "$ms" != "?" ] && [ "$ms" -ge "$lc" ] && { status="CRIT"; note="lat_ge_${lc}ms"; }
-    [ "$status" = "OK" ] && [ "$ms" != "?" ] && [ "$ms" -ge "$lw" ] && { status="WARN"; note="lat_ge_${lw}ms"; }
-    lm_info "[$onhost] [$status] tcp ${host}:${port} conn_ms=${ms} ${note:+note=$note}"
-    [ "$status" != "OK" ] && append_alert "$onhost|tcp|${host}:${port}|$note"
-    return
-  fi
-
-  if lm_ssh "$onhost" "command -v nc >/dev/null"; then
-    if lm_ssh "$onhost" "nc -z -w $to '$host' '$port'"; then
-      lm_info "[$onhost] [OK] tcp ${host}:${port} reachable (nc)"
-    else
-      lm_err "[$onhost] [CRIT] tcp ${host}:${port} unreachable (nc)"
-      append_alert "$onhost|tcp|${host}:${port}|unreachable"
-    fi
-  else
-    lm_err "[$onhost] [CRIT] tcp ${host}:${port} no /dev/tcp timing and nc missing"
-    append_alert "$onhost|tcp|${host}:${port}|tool_missing"
-    lm_summary "network_monitor" "$onhost" "UNKNOWN" reason=missing_dependency dep=nc
-
-  fi
+# tcp_grade ONHOST HOST:PORT RESULT LAT_WARN LAT_CRIT
+#   RESULT: "OK <ms>" (/dev/tcp connect time) | NC_OK | NC_FAIL | NC_MISSING
+tcp_grade(){
+  local onhost="$1" hostport="$2" out="$3" lw="$4" lc="$5"
+  case "$out" in
+    OK\ *|OK)
+      local ms="${out#OK}"; ms="${ms// /}"
+      local status="OK" note=""
+      [[ "$ms" =~ ^[0-9]+$ ]] || ms="?"
+      [ "$ms" != "?" ] && [ "$ms" -ge "$lc" ] && { status="CRIT"; note="lat_ge_${lc}ms"; }
+      [ "$status" = "OK" ] && [ "$ms" != "?" ] && [ "$ms" -ge "$lw" ] && { status="WARN"; note="lat_ge_${lw}ms"; }
+      lm_info "[$onhost] [$status] tcp ${hostport} conn_ms=${ms} ${note:+note=$note}"
+      [ "$status" != "OK" ] && append_alert "$onhost|tcp|${hostport}|$note"
+      ;;
+    NC_OK)
+      lm_info "[$onhost] [OK] tcp ${hostport} reachable (nc)"
+      ;;
+    NC_FAIL)
+      lm_err "[$onhost] [CRIT] tcp ${hostport} unreachable (nc)"
+      append_alert "$onhost|tcp|${hostport}|unreachable"
+      ;;
+    *)
+      lm_err "[$onhost] [CRIT] tcp ${hostport} no /dev/tcp timing and nc missing"
+      append_alert "$onhost|tcp|${hostport}|tool_missing"
+      lm_summary "network_monitor" "$onhost" "UNKNOWN" reason=missing_dependency dep=nc
+      ;;
+  esac
 }
 
-run_http(){
-  local onhost="$1" url="$2"; shift 2
-  # curl is required for HTTP checks
-  if ! lm_require_cmd "network_monitor" "$onhost" curl; then
-    append_alert "$onhost|http|$url|missing_dependency:curl"
-    lm_summary "network_monitor" "$onhost" "UNKNOWN" reason=missing_dependency dep=curl
-    return 3
-  fi
-
-  declare -A P=(); parse_params P "$@"
-  local to="${P[timeout]:-$HTTP_TIMEOUT}"
-  local lw="${P[latency_warn_ms]:-$HTTP_LAT_WARN_MS}"
-  local lc="${P[latency_crit_ms]:-$HTTP_LAT_CRIT_MS}"
-  local exp="${P[expect]:-$HTTP_EXPECT}"
-  to="$(ensure_uint "$to" "$HTTP_TIMEOUT" 1)"
-  lw="$(ensure_uint "$lw" "$HTTP_LAT_WARN_MS" 0)"
-  lc="$(ensure_uint "$lc" "$HTTP_LAT_CRIT_MS" 0)"
-
-  local line; line="$(lm_ssh "$onhost" "curl -sS -o /dev/null -w '%{http_code} %{time_total}' --max-time $to '$url'")"
+# http_grade ONHOST URL "<code> <time_total>" LAT_WARN LAT_CRIT EXPECT
+http_grade(){
+  local onhost="$1" url="$2" line="$3" lw="$4" lc="$5" exp="$6"
   local code time_s ms="?"
-  code="$(echo "$line" | awk '{print $1}')"
-  time_s="$(echo "$line" | awk '{print $2}')"
+  read -r code time_s _ <<< "$line"
   if [[ -z "$code" || ! "$code" =~ ^[0-9]{3}$ ]]; then
     lm_err "[$onhost] [CRIT] http $url curl failed"
     append_alert "$onhost|http|$url|curl_failed"
@@ -263,23 +245,55 @@ run_http(){
   [ "$status" != "OK" ] && append_alert "$onhost|http|$url|$note"
 }
 
+http_missing_curl(){
+  # $1 = host, $2 = url
+  append_alert "$1|http|$2|missing_dependency:curl"
+  lm_summary "network_monitor" "$1" "UNKNOWN" reason=missing_dependency dep=curl
+}
+
 # ========================
-# Per-host runner
+# Remote probes (one SSH call per target; LM_NETWORK_BATCH=0)
 # ========================
-run_for_host(){
-  local host="$1"
-  lm_info "===== Network checks from $host ====="
+run_ping(){
+  local onhost="$1" target="$2"; shift 2
+  ping_params "$@"
+  local out
+  out="$(lm_ssh "$onhost" "ping -c $PG_CNT -w $PG_TO '$target' 2>/dev/null || ping -n -c $PG_CNT -w $PG_TO '$target' 2>/dev/null")"
+  ping_grade "$onhost" "$target" "$out" "$PG_LW" "$PG_LC" "$PG_RW" "$PG_RC"
+}
 
-  local checked=0
+run_tcp(){
+  local onhost="$1" hostport="$2"; shift 2
+  tcp_params "$@"
+  local host="${hostport%%:*}" port="${hostport##*:}"
 
-  if ! lm_reachable "$host"; then
-    lm_err "[$host] SSH unreachable"
-    append_alert "$host|ssh|$host|ssh_unreachable"
-    return
+  local out
+  out="$(lm_ssh "$onhost" "start=\$(date +%s%3N 2>/dev/null); exec 3<>/dev/tcp/$host/$port; rc=\$?; end=\$(date +%s%3N 2>/dev/null); [ \$rc -eq 0 ] && { exec 3>&-; echo OK \$((end-start)); } || echo FAIL" )"
+  if [[ "$out" != OK\ * ]]; then
+    if lm_has_cmd_remote "$onhost" nc; then
+      if lm_ssh "$onhost" "nc -z -w $TC_TO '$host' '$port'"; then out="NC_OK"; else out="NC_FAIL"; fi
+    else
+      out="NC_MISSING"
+    fi
   fi
+  tcp_grade "$onhost" "$hostport" "$out" "$TC_LW" "$TC_LC"
+}
 
-  [ -s "$TARGETS" ] || { lm_err "[$host] targets file $TARGETS missing/empty"; return; }
+run_http(){
+  local onhost="$1" url="$2"; shift 2
+  # curl is required for HTTP checks
+  if ! lm_require_cmd "network_monitor" "$onhost" curl; then
+    http_missing_curl "$onhost" "$url"
+    return 3
+  fi
 
+  http_params "$@"
+  local line; line="$(lm_ssh "$onhost" "curl -sS -o /dev/null -w '%{http_code} %{time_total}' --max-time $HT_TO '$url'")"
+  http_grade "$onhost" "$url" "$line" "$HT_LW" "$HT_LC" "$HT_EXP"
+}
+
+run_for_host_serial(){
+  local host="$1" check target rest
   # Rows for this host (* or exact), require at least 3 columns
   while IFS=',' read -r _thost check target rest; do
     checked=$((checked+1))
@@ -312,6 +326,167 @@ run_for_host(){
       *) lm_warn "[$host] unknown check '$check' for target '$target'";;
     esac
   done < <(lm_csv_rows_for_host "$TARGETS" "$host" 3)
+}
+
+# ========================
+# Batched probes (LM_NETWORK_BATCH=1): one generated script per source host runs
+# all of its targets concurrently (at most LM_NETWORK_FANOUT at a time, a FIFO of
+# tokens acts as the semaphore) and prints one "R <n> <output>" line per target
+# as it finishes (newlines in the output are sent as \037). Thresholds are
+# applied here, in targets-file order.
+# ========================
+_net_sq(){ printf "'%s'" "${1//\'/\'\\\'\'}"; }
+
+_net_batch_header(){
+  cat <<'SH'
+p_ping(){ ping -c "$2" -w "$3" "$1" 2>/dev/null || ping -n -c "$2" -w "$3" "$1" 2>/dev/null; }
+p_tcp(){
+  s=$(date +%s%3N 2>/dev/null)
+  if [ -n "${BASH_VERSION:-}" ] && (exec 3<>"/dev/tcp/$1/$2") 2>/dev/null; then
+    e=$(date +%s%3N 2>/dev/null); echo "OK $((e-s))"; return
+  fi
+  if command -v nc >/dev/null 2>&1; then
+    if nc -z -w "$3" "$1" "$2" >/dev/null 2>&1; then echo NC_OK; else echo NC_FAIL; fi
+  else
+    echo NC_MISSING
+  fi
+}
+p_http(){ command -v curl >/dev/null 2>&1 || { echo NOCURL; return; }; curl -sS -o /dev/null -w '%{http_code} %{time_total}' --max-time "$2" "$1" 2>/dev/null; }
+_sem=""
+_d=$(mktemp -d 2>/dev/null) && mkfifo "$_d/s" 2>/dev/null && exec 9<>"$_d/s" && _sem=1
+[ -n "$_d" ] && rm -rf "$_d"
+if [ -n "$_sem" ]; then
+  _i=0; while [ "$_i" -lt "$_fanout" ]; do echo >&9; _i=$((_i+1)); done
+fi
+_run(){
+  _n=$1; shift
+  [ -n "$_sem" ] && read -r _t <&9
+  { _o=$("$@" 2>/dev/null | tr '\n' '\037'); printf 'R %s %s\n' "$_n" "$_o"; [ -n "$_sem" ] && echo >&9; } &
+}
+SH
+}
+
+run_for_host_batch(){
+  local host="$1"
+  local -a kinds=() targets=() params=()
+  local script="" n=0 check target rest curl_ok=""
+
+  while IFS=',' read -r _thost check target rest; do
+    checked=$((checked+1))
+    IFS=',' read -r -a kv <<<"${rest}"
+    case "$check" in
+      ping)
+        if ! validate_ping_target "$target"; then
+          lm_err "[$host] invalid ping target '$target' (unsafe characters)"
+          append_alert "$host|ping|$target|invalid_target"
+          continue
+        fi
+        ping_params "${kv[@]}"
+        params[n]="$PG_LW $PG_LC $PG_RW $PG_RC"
+        script+="_run $n p_ping $(_net_sq "$target") $PG_CNT $PG_TO"$'\n'
+        ;;
+      tcp)
+        if ! validate_hostport "$target"; then
+          lm_err "[$host] invalid tcp target '$target' (expected host:port)"
+          append_alert "$host|tcp|$target|invalid_target"
+          continue
+        fi
+        tcp_params "${kv[@]}"
+        params[n]="$TC_LW $TC_LC"
+        script+="_run $n p_tcp $(_net_sq "${target%%:*}") $(_net_sq "${target##*:}") $TC_TO"$'\n'
+        ;;
+      http|https)
+        if ! validate_url "$target"; then
+          lm_err "[$host] invalid http target '$target' (expected http/https URL)"
+          append_alert "$host|http|$target|invalid_target"
+          continue
+        fi
+        # curl is required for HTTP checks (checked once per host)
+        if [ -z "$curl_ok" ]; then
+          curl_ok=0
+          lm_require_cmd "network_monitor" "$host" curl && curl_ok=1
+        fi
+        if [ "$curl_ok" != "1" ]; then
+          http_missing_curl "$host" "$target"
+          continue
+        fi
+        http_params "${kv[@]}"
+        params[n]="$HT_LW $HT_LC $HT_EXP"
+        script+="_run $n p_http $(_net_sq "$target") $HT_TO"$'\n'
+        check="http"
+        ;;
+      *) lm_warn "[$host] unknown check '$check' for target '$target'"; continue;;
+    esac
+    kinds[n]="$check"; targets[n]="$target"
+    n=$((n+1))
+  done < <(lm_csv_rows_for_host "$TARGETS" "$host" 3)
+
+  [ "$n" -gt 0 ] || return 0
+
+  local fanout="${LM_NETWORK_FANOUT:-8}"
+  [[ "$fanout" =~ ^[0-9]+$ && "$fanout" -ge 1 ]] || fanout=8
+  local probe
+  probe="_fanout=$fanout"$'\n'"$(_net_batch_header)"$'\n'"${script}wait"
+
+  local out
+  if lm_is_localhost "$host"; then
+    out="$(bash -c "$probe" 2>/dev/null)" || true
+  else
+    out="$(lm_ssh "$host" "$probe")" || true
+  fi
+
+  local -a results=()
+  local line i
+  while IFS= read -r line; do
+    [[ "$line" =~ ^R\ ([0-9]+)\ ?(.*)$ ]] || continue
+    line="${BASH_REMATCH[2]%$'\037'}"
+    results[BASH_REMATCH[1]]="${line//$'\037'/$'\n'}"
+  done <<< "$out"
+
+  local -a p
+  for ((i = 0; i < n; i++)); do
+    read -r -a p <<< "${params[i]}"
+    if [ -z "${results[i]+x}" ]; then
+      lm_err "[$host] [CRIT] ${kinds[i]} ${targets[i]} no result from batched probe"
+      append_alert "$host|${kinds[i]}|${targets[i]}|no_result"
+      continue
+    fi
+    case "${kinds[i]}" in
+      ping) ping_grade "$host" "${targets[i]}" "${results[i]}" "${p[@]}" ;;
+      tcp)  tcp_grade "$host" "${targets[i]}" "${results[i]}" "${p[@]}" ;;
+      http)
+        if [ "${results[i]}" = "NOCURL" ]; then
+          http_missing_curl "$host" "${targets[i]}"
+        else
+          http_grade "$host" "${targets[i]}" "${results[i]}" "${p[0]}" "${p[1]}" "${p[2]:-}"
+        fi
+        ;;
+    esac
+  done
+}
+
+# ========================
+# Per-host runner
+# ========================
+run_for_host(){
+  local host="$1"
+  lm_info "===== Network checks from $host ====="
+
+  local checked=0
+
+  if ! lm_reachable "$host"; then
+    lm_err "[$host] SSH unreachable"
+    append_alert "$host|ssh|$host|ssh_unreachable"
+    return
+  fi
+
+  [ -s "$TARGETS" ] || { lm_err "[$host] targets file $TARGETS missing/empty"; return; }
+
+  if [ "${LM_NETWORK_BATCH:-1}" = "1" ]; then
+    run_for_host_batch "$host"
+  else
+    run_for_host_serial "$host"
+  fi
 
   lm_info "===== Completed $host ====="
   local failures=0
@@ -54,9 +54,10 @@ mail_if_enabled(){ [ "$EMAIL_ON_ISSUE" = "true" ] || return 0; lm_mail "$1" "$2"
 # Echo one of: chrony | ntpd | timesyncd | unknown
 impl_detect() {
   local host="$1"
-  if lm_ssh "$host" "command -v chronyc >/dev/null"; then echo chrony; return; fi
-  if lm_ssh "$host" "command -v ntpq >/dev/null";     then echo ntpd; return; fi
-  if lm_ssh "$host" "command -v timedatectl >/dev/null 2>&1 && timedatectl show-timesync >/dev/null 2>&1"; then
+  # lm_has_cmd_remote answers from cached facts when the collect stage ran.
+  if lm_has_cmd_remote "$host" chronyc; then echo chrony; return; fi
+  if lm_has_cmd_remote "$host" ntpq;    then echo ntpd; return; fi
+  if lm_has_cmd_remote "$host" timedatectl && lm_ssh "$host" "timedatectl show-timesync >/dev/null 2>&1"; then
     echo timesyncd; return
   fi
   echo unknown
@@ -132,8 +133,9 @@ probe_timesyncd() {
   [ -z "$server" ] && server="$(printf "%s\n" "$out" | awk -F'=' '/^ServerAddress/{print $2}')"
   [ -z "$server" ] && server="?"
 
-  local synced="unknown"
-  if lm_ssh "$host" "timedatectl show -p SystemClockSync --value" | grep -q '^yes$'; then
+  local synced="unknown" sync_val
+  sync_val="$(lm_fact "$host" timesync)" || sync_val="$(lm_ssh "$host" "timedatectl show -p SystemClockSync --value")"
+  if printf '%s\n' "$sync_val" | grep -q '^yes$'; then
     synced="yes"
   else
     synced="no"
@@ -36,10 +36,11 @@ mail_if_enabled(){ [ "$EMAIL_ON_ACTION" = "true" ] || return 0; lm_mail "$1" "$2
 
 remote_pkg_mgr() {
   local host="$1"
-  if lm_ssh "$host" "command -v apt-get >/dev/null"; then echo "apt"; return; fi
-  if lm_ssh "$host" "command -v dnf >/dev/null";     then echo "dnf"; return; fi
-  if lm_ssh "$host" "command -v yum >/dev/null";     then echo "yum"; return; fi
-  if lm_ssh "$host" "command -v zypper >/dev/null";  then echo "zypper"; return; fi
+  # lm_has_cmd_remote answers from cached facts when the collect stage ran.
+  if lm_has_cmd_remote "$host" apt-get; then echo "apt"; return; fi
+  if lm_has_cmd_remote "$host" dnf;     then echo "dnf"; return; fi
+  if lm_has_cmd_remote "$host" yum;     then echo "yum"; return; fi
+  if lm_has_cmd_remote "$host" zypper;  then echo "zypper"; return; fi
   echo "unknown"
 }
 
@@ -93,7 +94,7 @@ reboot_required() {
       return
       ;;
   esac
-  if lm_ssh "$host" "command -v needs-restarting >/dev/null"; then
+  if lm_has_cmd_remote "$host" needs-restarting; then
     lm_ssh "$host" 'needs-restarting -r >/dev/null 2>&1; if [ $? -ne 0 ]; then echo yes; else echo no; fi'
     return
   fi
@@ -156,7 +157,7 @@ Pending updates: total=${total:-0}, security=${sec:-0}, kernel=${kern:-0}
 Reboot required: $reboot
 
 This is an automated notice from patch_monitor.sh."
-    mail_if_enabled "$MAIL_SUBJECT_PREFIX $subj" "$body"
+    lm_result_cache_effect mail_if_enabled "$MAIL_SUBJECT_PREFIX $subj" "$body"
   fi
   reason=""
   if [ "$status" != "OK" ]; then
@@ -181,6 +182,8 @@ This is an automated notice from patch_monitor.sh."
 # Main
 # ========================
 lm_info "=== Patch Monitor Started ==="
+# Pending updates only change with the package DB (part of the host fingerprint).
+lm_result_cache 3600
 lm_for_each_host_rc run_for_host
 worst=$?
 exit "$worst"
@@ -212,7 +212,7 @@ ctrl=$(echo "$out" | awk -F'[ =]+' '{for(i=1;i<=NF;i++) if($i=="ctrl") print $(i
   case "$overall" in OK) rc=0;; WARN) rc=1;; CRIT) rc=2;; *) rc=3;; esac
 
   if [ "$rc" -ge 1 ]; then
-    append_alert "$host|storage|mdraid=$md smart=$smart($smart_bad/$smart_checked) nvme=$nvme($nvme_bad/$nvme_checked)"
+    lm_result_cache_effect append_alert "$host|storage|mdraid=$md smart=$smart($smart_bad/$smart_checked) nvme=$nvme($nvme_bad/$nvme_checked)"
   fi
 
   lm_summary "storage_health_monitor" "$host" "$overall" mdraid="$md" smart="$smart" checked="$smart_checked" bad="$smart_bad" nvme="$nvme" checked_nvme="$nvme_checked" bad_nvme="$nvme_bad" ctrl="$ctrl"
@@ -224,6 +224,8 @@ ctrl=$(echo "$out" | awk -F'[ =]+' '{for(i=1;i<=NF;i++) if($i=="ctrl") print $(i
 main(){
   : > "$ALERTS_FILE"
 
+  # SMART/RAID state changes slowly; reuse per-host results for an hour in wrapper runs.
+  lm_result_cache 3600
   # Run per-host checks and propagate worst rc (supports parallel mode)
   lm_for_each_host_rc run_for_host
   worst=$?
@@ -141,14 +141,14 @@ run_for_host(){
 
       if [ -n "$new_users" ]; then
         while IFS= read -r u; do
-          [ -n "$u" ] && append_alert "$host|user_new|$u"
+          [ -n "$u" ] && lm_result_cache_effect append_alert "$host|user_new|$u"
     anomalies=$((anomalies+1))
         done <<< "$new_users"
         lm_warn "[$host] NEW users: $(echo "$new_users" | paste -sd',' -)"
       fi
       if [ -n "$removed_users" ]; then
         while IFS= read -r u; do
-          [ -n "$u" ] && append_alert "$host|user_removed|$u"
+          [ -n "$u" ] && lm_result_cache_effect append_alert "$host|user_removed|$u"
     anomalies=$((anomalies+1))
         done <<< "$removed_users"
         lm_warn "[$host] REMOVED users: $(echo "$removed_users" | paste -sd',' -)"
@@ -327,7 +327,7 @@ run_for_host(){
       sudo_base="$(cat "$sudo_base_file")"
       if [ "$sudo_hash" != "$sudo_base" ]; then
         lm_err "[$host] sudoers file changed (baseline vs current)"
-        append_alert "$host|sudoers_changed|old=${sudo_base:0:8} new=${sudo_hash:0:8}"
+        lm_result_cache_effect append_alert "$host|sudoers_changed|old=${sudo_base:0:8} new=${sudo_hash:0:8}"
     anomalies=$((anomalies+1))
         [ "$BASELINE_UPDATE" = "true" ] && { echo "$sudo_hash" > "$sudo_base_file"; lm_info "[$host] sudoers baseline updated."; }
       else
@@ -343,11 +343,11 @@ run_for_host(){
 
   if [ "$failed" -ge "$FAILED_CRIT" ]; then
     failed_status="CRIT"
-    append_alert "$host|failed_ssh|CRIT:$failed in ${FAILED_WINDOW_HOURS}h"
+    lm_result_cache_effect append_alert "$host|failed_ssh|CRIT:$failed in ${FAILED_WINDOW_HOURS}h"
     anomalies=$((anomalies+1))
   elif [ "$failed" -ge "$FAILED_WARN" ]; then
     failed_status="WARN"
-    append_alert "$host|failed_ssh|WARN:$failed in ${FAILED_WINDOW_HOURS}h"
+    lm_result_cache_effect append_alert "$host|failed_ssh|WARN:$failed in ${FAILED_WINDOW_HOURS}h"
     anomalies=$((anomalies+1))
   fi
   lm_info "[$host] failed SSH logins last ${FAILED_WINDOW_HOURS}h: $failed ($failed_status)"
@@ -369,6 +369,10 @@ lm_info "===== Completed $host ====="
 ensure_dirs
 lm_info "=== User Monitor Script Started ==="
 
+# Reuse per-host results while the baselines are unchanged (never in baseline modes).
+if [ "$BASELINE_ONLY" != "1" ] && [ "$BASELINE_DIFF" != "1" ] && [ "$BASELINE_SHOW" != "1" ]; then
+  lm_result_cache 900 "$USERS_BASELINE_DIR"/* "$SUDO_BASELINE_DIR"/*
+fi
 lm_for_each_host_rc run_for_host
 worst=$?
 exit "$worst"
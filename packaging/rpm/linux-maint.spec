@@ -47,6 +47,16 @@ install -d %{buildroot}/usr/share/Linux_Maint_ToolKit/docs
 install -m 0755 bin/linux-maint %{buildroot}/usr/bin/linux-maint
 install -m 0755 run_full_health_monitor.sh %{buildroot}/usr/sbin/run_full_health_monitor.sh
 install -m 0755 lib/linux_maint.sh %{buildroot}/usr/lib/linux_maint.sh
+install -m 0644 lib/linux_maint_summary.py %{buildroot}/usr/lib/linux_maint_summary.py
+install -m 0644 lib/linux_maint_runindex.py %{buildroot}/usr/lib/linux_maint_runindex.py
+install -m 0644 lib/linux_maint_trace.py %{buildroot}/usr/lib/linux_maint_trace.py
+install -m 0644 lib/linux_maint_serve.py %{buildroot}/usr/lib/linux_maint_serve.py
+install -m 0644 lib/linux_maint_cli.py %{buildroot}/usr/lib/linux_maint_cli.py
+install -m 0644 lib/linux_maint_outputs.py %{buildroot}/usr/lib/linux_maint_outputs.py
+install -m 0644 lib/linux_maint_shard.py %{buildroot}/usr/lib/linux_maint_shard.py
+install -m 0644 lib/linux_maint_archive.py %{buildroot}/usr/lib/linux_maint_archive.py
+install -m 0644 lib/linux_maint_schema.py %{buildroot}/usr/lib/linux_maint_schema.py
+python3 -m compileall -q -d /usr/lib %{buildroot}/usr/lib/linux_maint_*.py
 
 # monitors + tools
 install -m 0755 monitors/*.sh %{buildroot}/usr/libexec/linux_maint/
@@ -55,6 +65,8 @@ install -m 0755 tools/seed_known_hosts.sh %{buildroot}/usr/libexec/linux_maint/s
 
 # operator docs (for dark-site usage and `linux-maint explain`)
 cp -a docs/*.md %{buildroot}/usr/share/Linux_Maint_ToolKit/docs/ 2>/dev/null || true
+install -d %{buildroot}/usr/share/Linux_Maint_ToolKit/docs/schemas
+cp -a docs/schemas/*.json %{buildroot}/usr/share/Linux_Maint_ToolKit/docs/schemas/ 2>/dev/null || true
 
 # templates for init
 cp -a etc/linux_maint %{buildroot}/usr/share/linux_maint/templates/
@@ -83,6 +95,16 @@ fi
 /usr/bin/linux-maint
 /usr/sbin/run_full_health_monitor.sh
 /usr/lib/linux_maint.sh
+/usr/lib/linux_maint_summary.py
+/usr/lib/linux_maint_runindex.py
+/usr/lib/linux_maint_trace.py
+/usr/lib/linux_maint_serve.py
+/usr/lib/linux_maint_cli.py
+/usr/lib/linux_maint_outputs.py
+/usr/lib/linux_maint_shard.py
+/usr/lib/linux_maint_archive.py
+/usr/lib/linux_maint_schema.py
+/usr/lib/__pycache__/linux_maint_*.pyc
 /usr/libexec/linux_maint/*
 /usr/share/linux_maint/
 /usr/share/Linux_Maint_ToolKit/docs/
@@ -43,7 +43,12 @@ if [[ -f "$REPO_DIR/lib/linux_maint.sh" ]]; then
   export LINUX_MAINT_LIB="$REPO_DIR/lib/linux_maint.sh"
 fi
 export LINUX_MAINT_LIB="${LINUX_MAINT_LIB:-/usr/local/lib/linux_maint.sh}"
+# Python helpers (summary-line parser) ship next to the shell library.
+export LM_PYLIB_DIR="${LM_PYLIB_DIR:-${LINUX_MAINT_LIB%/*}}"
 export LM_LOCKDIR="${LM_LOCKDIR:-/tmp}"
+# Runner node name: resolved once per run and reused by every monitor (lm_summary node=).
+RUN_NODE="${LM_NODE_NAME:-$(hostname -f 2>/dev/null || hostname)}"
+export LM_NODE_NAME="$RUN_NODE"
 
 # Load optional notification config (wrapper-level). Default OFF.
 if [[ -f "${LINUX_MAINT_LIB:-/usr/local/lib/linux_maint.sh}" ]]; then
@@ -93,6 +98,22 @@ if [[ "${LM_TEST_MODE:-0}" == "1" || "${LM_TEST_MODE:-}" == "true" ]]; then
   fi
 fi
 
+# Sharded run (linux-maint run --shard i/N, or LM_SHARD in the config of each runner):
+# this runner checks only its share of the host list (rendezvous hashing, see
+# lib/linux_maint_shard.py) and writes its artifacts to <LOG_DIR>/shards/shard-<i>-of-<N>/,
+# which `linux-maint aggregate` merges into one canonical run.
+SHARD_NAME=""
+if [[ -n "${LM_SHARD:-}" ]]; then
+  if [[ ! "$LM_SHARD" =~ ^0*([1-9][0-9]*)/0*([1-9][0-9]*)$ ]] || (( BASH_REMATCH[1] > BASH_REMATCH[2] )); then
+    echo "ERROR: invalid LM_SHARD '$LM_SHARD' (use i/N with 1 <= i <= N)" >&2
+    exit 3
+  fi
+  LM_SHARD="${BASH_REMATCH[1]}/${BASH_REMATCH[2]}"
+  SHARD_NAME="shard-${BASH_REMATCH[1]}-of-${BASH_REMATCH[2]}"
+  # Shards of one box must not share monitor locks.
+  export LM_LOCKDIR="$LM_LOCKDIR/linux_maint_$SHARD_NAME"
+fi
+
 # Resolve state dir with fallback chain (writable-required)
 STATE_DIR_REQUESTED="${LM_STATE_DIR:-$STATE_DIR_DEFAULT}"
 STATE_DIR_FALLBACK_FROM=""
@@ -111,6 +132,13 @@ if command -v lm_pick_writable_dir >/dev/null 2>&1; then
 else
   export LM_STATE_DIR="$STATE_DIR_REQUESTED"
 fi
+# Caches stay shared (they are per host); per-run state (notify diff, host_state.tsv) is per shard.
+SHARD_STATE_DIR="$LM_STATE_DIR"
+if [[ -n "$SHARD_NAME" ]]; then
+  SHARD_STATE_DIR="$LM_STATE_DIR/shards/$SHARD_NAME"
+  mkdir -p "$SHARD_STATE_DIR" 2>/dev/null || true
+  export LM_NOTIFY_STATE_DIR="${LM_NOTIFY_STATE_DIR:-$SHARD_STATE_DIR}"
+fi
 
 # Resolve log dir with fallback chain (writable-required)
 LOG_DIR_REQUESTED="${LOG_DIR:-$LOG_DIR_DEFAULT}"
@@ -132,6 +160,11 @@ else
   mkdir -p "$LOG_DIR" 2>/dev/null || true
 fi
 
+if [[ -n "$SHARD_NAME" ]]; then
+  LOG_DIR="$LOG_DIR/shards/$SHARD_NAME"
+  [[ -n "${SUMMARY_DIR:-}" ]] && SUMMARY_DIR="$SUMMARY_DIR/shards/$SHARD_NAME"
+fi
+
 STATUS_FILE="$LOG_DIR/last_status_full"
 
 mkdir -p "$LOG_DIR" 2>/dev/null || true
@@ -175,6 +208,8 @@ SUMMARY_LATEST_FILE="${SUMMARY_LATEST_FILE:-$SUMMARY_DIR/full_health_monitor_sum
 SUMMARY_JSON_LATEST_FILE="${SUMMARY_JSON_LATEST_FILE:-$SUMMARY_DIR/full_health_monitor_summary_latest.json}"
 SUMMARY_JSON_FILE="${SUMMARY_JSON_FILE:-$SUMMARY_DIR/full_health_monitor_summary_$(lm_now_stamp).json}"
 PROM_DIR="${PROM_DIR:-/var/lib/node_exporter/textfile_collector}"
+# A shard's textfile stays in its shard directory; `aggregate` writes the fleet one.
+[[ -n "$SHARD_NAME" ]] && PROM_FILE="${PROM_FILE:-$SUMMARY_DIR/linux_maint.prom}"
 PROM_FILE="${PROM_FILE:-$PROM_DIR/linux_maint.prom}"
 SUMMARY_FILE="${SUMMARY_FILE:-$SUMMARY_DIR/full_health_monitor_summary_$(lm_now_stamp).log}"
 
@@ -189,8 +224,37 @@ export TMPDIR
 
 tmp_report="$TMPDIR/full_health_monitor_report.$$"
 tmp_summary="$TMPDIR/full_health_monitor_summary.$$"
+# monitor= lines of this run, in report order (kept as they are written, so the
+# final counters/strict check/summary file never rescan the whole report).
+tmp_monlines="$TMPDIR/full_health_monitor_monlines.$$"
+
+# report_monitor_line <line>: append a wrapper-generated monitor= line to the report.
+report_monitor_line() {
+  printf '%s\n' "$1" >> "$tmp_report"
+  printf '%s\n' "$1" >> "$tmp_monlines"
+}
+
+# Per-run SSH connection pool: one multiplexed master per host, shared by all monitors.
+# Set LM_SSH_MUX=0 to disable. Sockets live in the run temp dir and are closed on exit.
+export LM_SSH_MUX="${LM_SSH_MUX:-1}"
+export LM_SSH_MUX_DIR="${LM_SSH_MUX_DIR:-$RUN_TMP_DIR/ssh_mux}"
+
+# Span profiler (linux-maint run --profile, or LM_PROFILE=1): lib helpers append
+# raw spans to LM_PROFILE_FILE; at the end of the run they become a Chrome/Perfetto
+# trace next to the summary (full_health_monitor_trace_<ts>.json + _latest.json).
+PROFILE_TRACE_FILE=""
+unset LM_PROFILE_FILE
+if [[ "${LM_PROFILE:-0}" == "1" || "${LM_PROFILE:-}" == "true" ]] && declare -F lm_span_emit >/dev/null 2>&1; then
+  export LM_PROFILE_FILE="$RUN_TMP_DIR/spans.raw"
+  : > "$LM_PROFILE_FILE" 2>/dev/null || true
+  PROFILE_TRACE_FILE="${LM_PROFILE_TRACE_FILE:-$SUMMARY_DIR/full_health_monitor_trace_$(lm_now_stamp).json}"
+  _lm_span_us; profile_run_start="$_LM_US"
+fi
 
 cleanup_tmpdir() {
+  if declare -F lm_ssh_mux_close >/dev/null 2>&1; then
+    lm_ssh_mux_close
+  fi
   rm -rf "$RUN_TMP_DIR" 2>/dev/null || true
 }
 trap cleanup_tmpdir EXIT INT TERM
@@ -211,6 +275,19 @@ export LM_SERVERLIST="${LM_SERVERLIST:-$CFG_DIR/servers.txt}"
 export LM_EXCLUDED="${LM_EXCLUDED:-$CFG_DIR/excluded.txt}"
 export LM_SERVICES="${LM_SERVICES:-$CFG_DIR/services.txt}"
 
+# Sharded run: resolve the full host list once (group, exclusions) and hand the monitors
+# only this shard's hosts.
+if [[ -n "$SHARD_NAME" ]]; then
+  shard_hosts_file="$RUN_TMP_DIR/shard_hosts.txt"
+  shard_hosts_total="$(lm_hosts | tee "$RUN_TMP_DIR/all_hosts.txt" | wc -l)"
+  if ! python3 "$LM_PYLIB_DIR/linux_maint_shard.py" select --shard "$LM_SHARD" < "$RUN_TMP_DIR/all_hosts.txt" > "$shard_hosts_file"; then
+    echo "ERROR: could not select the hosts of shard $LM_SHARD" >&2
+    exit 3
+  fi
+  export LM_SERVERLIST="$shard_hosts_file"
+  unset LM_GROUP
+fi
+
 # Dark-site profile: optional conservative defaults for air-gapped operators.
 # Never override explicit values set by config/env/CLI.
 if [[ "${LM_DARK_SITE:-false}" == "true" ]]; then
@@ -338,51 +415,75 @@ if [[ -n "${LM_MONITORS:-}" ]]; then
   scripts=(${LM_MONITORS})
 fi
 
+# Scheduler ordering constraints (used when LM_RUN_JOBS > 1).
+# - "first" monitors run sequentially before anything else (barrier).
+# - "last" monitors run sequentially after all other monitors finished.
+# Everything else is independent and may run concurrently.
+# Summary output is always merged in SCRIPT_ORDER, regardless of completion order.
+declare -a scripts_first=("preflight_check.sh" "config_validate.sh")
+declare -a scripts_last=("last_run_age_monitor.sh")
+
+# Max monitors running concurrently (1 = sequential, legacy behavior).
+MONITOR_JOBS="${LM_RUN_JOBS:-1}"
+if [[ ! "$MONITOR_JOBS" =~ ^[0-9]+$ ]] || [[ "$MONITOR_JOBS" -lt 1 ]]; then
+  echo "WARN: invalid LM_RUN_JOBS '${MONITOR_JOBS}' (use positive integer); using 1" >&2
+  MONITOR_JOBS=1
+fi
+
 {
-  echo "SUMMARY full_health_monitor host=$(hostname -f 2>/dev/null || hostname) started=$(lm_now_iso)"
+  echo "SUMMARY full_health_monitor host=$RUN_NODE started=$(lm_now_iso)"
   echo "SCRIPTS_DIR=$SCRIPTS_DIR"
+  if [[ -n "$SHARD_NAME" ]]; then
+    echo "SHARD $LM_SHARD hosts=$(wc -l < "$shard_hosts_file" | tr -d ' ') of=${shard_hosts_total// /}"
+  fi
   echo "LM_EMAIL_ENABLED=$LM_EMAIL_ENABLED"
   echo "LM_DARK_SITE=${LM_DARK_SITE:-false}"
   echo "LM_LOCAL_ONLY=${LM_LOCAL_ONLY:-false}"
   echo "MONITOR_TIMEOUT_SECS=$MONITOR_TIMEOUT_SECS"
+  echo "MONITOR_JOBS=$MONITOR_JOBS"
   echo "SCRIPT_ORDER=${scripts[*]}"
   echo "============================================================"
 } > "$tmp_report"
+: > "$tmp_monlines"
 
 # Emit explicit warnings if we had to fall back to alternate writable dirs.
 if [[ -n "$LOG_DIR_FALLBACK_TO" ]]; then
   echo "WARN: log dir fallback from $LOG_DIR_FALLBACK_FROM to $LOG_DIR_FALLBACK_TO" >> "$tmp_report"
-  echo "monitor=wrapper host=runner status=WARN reason=log_dir_fallback from=$LOG_DIR_FALLBACK_FROM to=$LOG_DIR_FALLBACK_TO" >> "$tmp_report"
+  report_monitor_line "monitor=wrapper host=runner status=WARN reason=log_dir_fallback from=$LOG_DIR_FALLBACK_FROM to=$LOG_DIR_FALLBACK_TO"
 fi
 if [[ -n "$SUMMARY_DIR_FALLBACK_TO" ]]; then
   echo "WARN: summary dir fallback from $SUMMARY_DIR_FALLBACK_FROM to $SUMMARY_DIR_FALLBACK_TO" >> "$tmp_report"
-  echo "monitor=wrapper host=runner status=WARN reason=summary_dir_fallback from=$SUMMARY_DIR_FALLBACK_FROM to=$SUMMARY_DIR_FALLBACK_TO" >> "$tmp_report"
+  report_monitor_line "monitor=wrapper host=runner status=WARN reason=summary_dir_fallback from=$SUMMARY_DIR_FALLBACK_FROM to=$SUMMARY_DIR_FALLBACK_TO"
 fi
 if [[ -n "$STATE_DIR_FALLBACK_TO" ]]; then
   echo "WARN: state dir fallback from $STATE_DIR_FALLBACK_FROM to $STATE_DIR_FALLBACK_TO" >> "$tmp_report"
-  echo "monitor=wrapper host=runner status=WARN reason=state_dir_fallback from=$STATE_DIR_FALLBACK_FROM to=$STATE_DIR_FALLBACK_TO" >> "$tmp_report"
+  report_monitor_line "monitor=wrapper host=runner status=WARN reason=state_dir_fallback from=$STATE_DIR_FALLBACK_FROM to=$STATE_DIR_FALLBACK_TO"
 fi
 
+# run_one <script> <out_file>
+# Runs one monitor and appends all of its output to <out_file>.
+# Sets run_one_skipped=1 when a wrapper gate skipped the monitor.
 run_one() {
   local s="$1"
+  local out="$2"
   local monitor_name="${s%.sh}"
   local rc
   local path="$SCRIPTS_DIR/$s"
-  echo "" >> "$tmp_report"
-  echo "==== RUN $s @ $(date '+%F %T') ====" >> "$tmp_report"
+  echo "" >> "$out"
+  echo "==== RUN $s @ $(date '+%F %T') ====" >> "$out"
 
   # Emit standardized SKIP summary lines when wrapper gates skip a monitor
   skip_monitor() {
     local reason="$1"
     shift || true
     local extra=("$@")
-    echo "SKIP: $reason" >> "$tmp_report"
+    echo "SKIP: $reason" >> "$out"
     if [[ "${#extra[@]}" -gt 0 ]]; then
-      echo "monitor=${s%.sh} host=runner status=SKIP node=$(hostname -f 2>/dev/null || hostname) reason=$reason ${extra[*]}" >> "$tmp_report"
+      echo "monitor=${s%.sh} host=runner status=SKIP node=$RUN_NODE reason=$reason ${extra[*]}" >> "$out"
     else
-      echo "monitor=${s%.sh} host=runner status=SKIP node=$(hostname -f 2>/dev/null || hostname) reason=$reason" >> "$tmp_report"
+      echo "monitor=${s%.sh} host=runner status=SKIP node=$RUN_NODE reason=$reason" >> "$out"
     fi
-    skipped=$((skipped+1))
+    run_one_skipped=1
     return 0
   }
 
@@ -427,13 +528,13 @@ run_one() {
   esac
 
   if [ ! -f "$path" ]; then
-    echo "MISSING: $path" >> "$tmp_report"
+    echo "MISSING: $path" >> "$out"
     return 3
   fi
 
   if [ "$s" = "config_validate.sh" ]; then
     # Validation warnings should not fail the full run; log output but ignore exit code.
-    bash "$path" >> "$tmp_report" 2>&1 || true
+    bash "$path" >> "$out" 2>&1 || true
     return 0
   fi
 
@@ -441,15 +542,15 @@ run_one() {
   if command -v timeout >/dev/null 2>&1; then
     local secs
     secs="$(get_monitor_timeout_secs "$monitor_name" "$MONITOR_TIMEOUT_SECS")"
-    timeout "$secs" bash "$path" >> "$tmp_report" 2>&1
+    timeout "$secs" bash "$path" >> "$out" 2>&1
   rc=$?
     if [ "$rc" -eq 124 ]; then
-      echo "monitor=$monitor_name host=runner status=UNKNOWN node=$(hostname -f 2>/dev/null || hostname) reason=timeout timeout_secs=$secs" >> "$tmp_report"
+      echo "monitor=$monitor_name host=runner status=UNKNOWN node=$RUN_NODE reason=timeout timeout_secs=$secs" >> "$out"
       return 3
     fi
     return "$rc"
   else
-    bash "$path" >> "$tmp_report" 2>&1
+    bash "$path" >> "$out" 2>&1
   fi
 }
 
@@ -564,28 +665,170 @@ now_ms(){
   date +%s%3N 2>/dev/null || echo $(( $(date +%s) * 1000 ))
 }
 
-total_scripts=${#scripts[@]}
-idx=0
-for s in "${scripts[@]}"; do
-  set +e
-  idx=$((idx+1))
-  progress_render "$idx" "$total_scripts" "${s%.sh}"
+# Reachability sweep: probe every host once, concurrently, before any monitor runs
+# and publish $LM_HOST_STATE_DIR/hosts.tsv (host, up|slow|down, latency ms). Monitors
+# then skip down hosts (one UNKNOWN reason=ssh_unreachable line each) instead of
+# paying the SSH timeout x retries per monitor; the circuit breaker in lm_ssh adds
+# hosts that start failing mid-run. A failed probe is retried LM_REACH_RETRY times
+# (default: LM_SSH_RETRY, at least 1) so one lost packet does not take a host out of the
+# whole run. Disable with LM_REACH_SWEEP=0.
+reach_host() {
+  local h="$1" t0 out="" ms state=up
+  if lm_is_localhost "$h"; then
+    printf '%s\tup\t0\n' "$h" >> "$LM_HOST_STATE_DIR/hosts.tsv.partial"
+    return 0
+  fi
+  _lm_epoch_ms; t0="$_LM_MS"
+  out="$(LM_SSH_RETRY="$REACH_RETRY" LM_SSH_TIMEOUT="$REACH_TIMEOUT" lm_ssh "$h" "echo ok" 2>/dev/null)" || true
+  _lm_epoch_ms; ms=$((_LM_MS - t0))
+  if [[ "$out" != *ok* ]]; then
+    state=down
+  elif [[ "$ms" -ge "$REACH_SLOW_MS" ]]; then
+    state=slow
+  fi
+  printf '%s\t%s\t%s\n' "$h" "$state" "$ms" >> "$LM_HOST_STATE_DIR/hosts.tsv.partial"
+  return 0
+}
+
+# The sweep is profiled as one stage span; its per-host pool spans would otherwise
+# show up as host work of a "run_full_health_monitor" monitor in `runtimes --hosts`.
+reach_sweep_hosts() {
+  LM_PROFILE_FILE="" lm_for_each_host reach_host
+}
+
+unset LM_HOST_STATE_DIR
+if [[ "${LM_REACH_SWEEP:-1}" != "0" && "${LM_REACH_SWEEP:-1}" != "false" && "${LM_LOCAL_ONLY:-false}" != "true" ]] \
+   && declare -F lm_host_down >/dev/null 2>&1; then
+  REACH_TIMEOUT="${LM_REACH_TIMEOUT:-5}"
+  REACH_SLOW_MS="${LM_REACH_SLOW_MS:-2000}"
+  REACH_RETRY="${LM_REACH_RETRY:-${LM_SSH_RETRY:-1}}"
+  [[ "$REACH_TIMEOUT" =~ ^[0-9]+$ && "$REACH_TIMEOUT" -gt 0 ]] || REACH_TIMEOUT=5
+  [[ "$REACH_RETRY" =~ ^[0-9]+$ ]] || REACH_RETRY=1
+  [[ -z "${LM_REACH_RETRY:-}" && "$REACH_RETRY" -lt 1 ]] && REACH_RETRY=1
+  [[ "$REACH_SLOW_MS" =~ ^[0-9]+$ ]] || REACH_SLOW_MS=2000
+  reach_dir="$RUN_TMP_DIR/host_state"
+  if mkdir -p "$reach_dir/fail" "$reach_dir/tripped" 2>/dev/null; then
+    : > "$reach_dir/hosts.tsv.partial"
+    _lm_epoch_ms; reach_start_ms="$_LM_MS"
+    LM_HOST_STATE_DIR="$reach_dir" LM_MAX_PARALLEL="${LM_REACH_PARALLEL:-16}" \
+      lm_span stage reach_sweep -- reach_sweep_hosts >/dev/null 2>&1 || true
+    _lm_epoch_ms; reach_ms=$((_LM_MS - reach_start_ms))
+    mv -f "$reach_dir/hosts.tsv.partial" "$reach_dir/hosts.tsv"
+    export LM_HOST_STATE_DIR="$reach_dir"
+    reach_line="$(awk -F'\t' '{n++; c[$2]++} END {printf "REACHABILITY hosts=%d up=%d slow=%d down=%d", n, c["up"], c["slow"], c["down"]}' "$reach_dir/hosts.tsv")"
+    echo "$reach_line ms=$reach_ms" >> "$tmp_report"
+  fi
+fi
+
+# Fact collection stage: one SSH round trip per remote host gathers df/df -i,
+# timedatectl, failed units, meminfo, loadavg and command availability into
+# $LM_FACTS_DIR. Monitors read these via lm_fact and fall back to live commands.
+# Disable with LM_COLLECT_FACTS=0. Local-only runs never need it.
+collect_facts_for_host() {
+  local h="$1"
+  lm_is_localhost "$h" && return 0
+  if lm_collect_facts "$h"; then
+    echo "ok $h" >> "$LM_FACTS_DIR/collect.log"
+  else
+    echo "fail $h" >> "$LM_FACTS_DIR/collect.log"
+  fi
+  return 0
+}
+
+if [[ "${LM_COLLECT_FACTS:-1}" != "0" && "${LM_COLLECT_FACTS:-1}" != "false" && "${LM_LOCAL_ONLY:-false}" != "true" ]] \
+   && declare -F lm_collect_facts >/dev/null 2>&1; then
+  export LM_FACTS_DIR="${LM_FACTS_DIR:-$RUN_TMP_DIR/facts}"
+  mkdir -p "$LM_FACTS_DIR" 2>/dev/null || true
+  facts_start_ms="$(now_ms)"
+  lm_span stage collect_facts -- lm_for_each_host collect_facts_for_host >/dev/null 2>&1 || true
+  facts_end_ms="$(now_ms)"
+  facts_ok=0; facts_fail=0
+  if [[ -f "$LM_FACTS_DIR/collect.log" ]]; then
+    facts_ok="$(grep -c '^ok ' "$LM_FACTS_DIR/collect.log" || true)"
+    facts_fail="$(grep -c '^fail ' "$LM_FACTS_DIR/collect.log" || true)"
+  fi
+  if [[ $((facts_ok + facts_fail)) -gt 0 ]]; then
+    echo "FACTS hosts=$((facts_ok + facts_fail)) collected=$facts_ok failed=$facts_fail ms=$((facts_end_ms - facts_start_ms))" >> "$tmp_report"
+  fi
+fi
+
+# Result cache: monitors that declare lm_result_cache (patch, storage health, user
+# baselines) re-emit per-host results younger than their TTL, tagged cached=1, instead
+# of contacting the host. `linux-maint run --no-cache` sets LM_RESULT_CACHE=0;
+# `--refresh MON` ignores (and rewrites) the entries of MON for this run.
+if [[ "${LM_RESULT_CACHE:-1}" != "0" && "${LM_RESULT_CACHE:-1}" != "false" ]]; then
+  export LM_RESULT_CACHE=1
+  export LM_RESULT_CACHE_DIR="${LM_RESULT_CACHE_DIR:-$LM_STATE_DIR/result_cache}"
+  export LM_RESULT_CACHE_STATS="$RUN_TMP_DIR/result_cache.stats"
+  : > "$LM_RESULT_CACHE_STATS"
+else
+  export LM_RESULT_CACHE=0
+fi
+
+# Per-monitor output buffers: each monitor writes into its own file so that
+# concurrent runs never interleave; results are merged in SCRIPT_ORDER.
+MONITOR_BUF_DIR="$RUN_TMP_DIR/monitors"
+mkdir -p "$MONITOR_BUF_DIR" 2>/dev/null || true
+
+# run_monitor_job <index> <script>
+# Runs a monitor into its buffer and records rc/runtime/skip in <buffer>.meta.
+run_monitor_job() {
+  local i="$1" s="$2"
+  local buf="$MONITOR_BUF_DIR/$i.out"
+  local start_ms end_ms ms="" rc span_t0=""
+  run_one_skipped=0
+  : > "$buf"
+  if [[ -n "${LM_PROFILE_FILE:-}" ]]; then
+    # One trace track per monitor job; the monitor's own spans inherit it.
+    export _LM_SPAN_TID="$BASHPID"
+    _lm_span_us; span_t0="$_LM_US"
+  fi
   start_ms="$(now_ms)"
-  before_lines=$(grep -a -c "^monitor=" "$tmp_report" 2>/dev/null || true)
-  before_lines=${before_lines:-0}
-  run_one "$s"
+  run_one "$s" "$buf"
   rc=$?
-  after_lines=$(grep -a -c "^monitor=" "$tmp_report" 2>/dev/null || true)
-  after_lines=${after_lines:-0}
   end_ms="$(now_ms)"
   if [[ "$end_ms" =~ ^[0-9]+$ && "$start_ms" =~ ^[0-9]+$ ]]; then
-    runtime_ms["${s%.sh}"]=$((end_ms - start_ms))
+    ms=$((end_ms - start_ms))
+  fi
+  if [[ -n "$span_t0" ]]; then
+    lm_span_emit monitor "${s%.sh}" "$span_t0" monitor="${s%.sh}" rc="$rc" skipped="$run_one_skipped"
+  fi
+  echo "rc=$rc ms=$ms skipped=$run_one_skipped" > "$buf.meta"
+  return "$rc"
+}
+
+# merge_monitor_job <index> <script>
+# Appends a finished monitor buffer to the run report and updates counters.
+merge_monitor_job() {
+  local i="$1" s="$2"
+  local buf="$MONITOR_BUF_DIR/$i.out"
+  local rc=3 ms="" was_skipped=0 tok lines
+  local -a meta=()
+  if [[ -f "$buf.meta" ]]; then
+    read -r -a meta < "$buf.meta" || true
+    for tok in "${meta[@]}"; do
+      case "$tok" in
+        rc=*) rc="${tok#rc=}" ;;
+        ms=*) ms="${tok#ms=}" ;;
+        skipped=*) was_skipped="${tok#skipped=}" ;;
+      esac
+    done
   fi
-  if [ "$rc" -ne 0 ] && [ "$after_lines" -le "$before_lines" ]; then
+  [[ "$rc" =~ ^[0-9]+$ ]] || rc=3
+  # One pass: append the buffer to the report, keep its monitor= lines, count them.
+  lines="$(awk -v rf="$tmp_report" -v mf="$tmp_monlines" '
+    { print >> rf }
+    /^monitor=/ { print >> mf; n++ }
+    END { print n+0 }' "$buf" 2>/dev/null || true)"
+  if [[ "$ms" =~ ^[0-9]+$ ]]; then
+    runtime_ms["${s%.sh}"]="$ms"
+  fi
+  [[ "$was_skipped" == "1" ]] && skipped=$((skipped+1))
+  [[ "$lines" =~ ^[0-9]+$ ]] || lines=0
+  if [ "$rc" -ne 0 ] && [ "$lines" -eq 0 ]; then
     # Hardening: a monitor failed but emitted no standardized summary line.
-    echo "monitor=${s%.sh} host=runner status=UNKNOWN node=$(hostname -f 2>/dev/null || hostname) reason=early_exit rc=$rc" >> "$tmp_report"
+    report_monitor_line "monitor=${s%.sh} host=runner status=UNKNOWN node=$RUN_NODE reason=early_exit rc=$rc"
   fi
-  set -e
 
   case "$rc" in
     0) ok=$((ok+1));;
@@ -594,9 +837,118 @@ for s in "${scripts[@]}"; do
     *) unk=$((unk+1)); rc=3;;
   esac
   [ "$rc" -gt "$worst" ] && worst="$rc"
-done
+  return 0
+}
+
+in_list() {
+  local needle="$1"; shift
+  local x
+  for x in "$@"; do
+    [[ "$x" == "$needle" ]] && return 0
+  done
+  return 1
+}
+
+total_scripts=${#scripts[@]}
+idx=0
+set +e
+if [[ "$MONITOR_JOBS" -le 1 ]]; then
+  for i in "${!scripts[@]}"; do
+    s="${scripts[$i]}"
+    idx=$((idx+1))
+    progress_render "$idx" "$total_scripts" "${s%.sh}"
+    run_monitor_job "$i" "$s"
+    merge_monitor_job "$i" "$s"
+  done
+else
+  # Phase 1: ordering "first" monitors (sequential barrier).
+  # Phase 2: independent monitors (bounded concurrency, any free slot takes the next one).
+  # Phase 3: ordering "last" monitors (sequential, after everything else).
+  declare -a phase_first=() phase_middle=() phase_last=()
+  for i in "${!scripts[@]}"; do
+    s="${scripts[$i]}"
+    if in_list "$s" "${scripts_first[@]}"; then
+      phase_first+=("$i")
+    elif in_list "$s" "${scripts_last[@]}"; then
+      phase_last+=("$i")
+    else
+      phase_middle+=("$i")
+    fi
+  done
+
+  for i in "${phase_first[@]}"; do
+    idx=$((idx+1))
+    progress_render "$idx" "$total_scripts" "${scripts[$i]%.sh}"
+    run_monitor_job "$i" "${scripts[$i]}"
+  done
+
+  running=0
+  for i in "${phase_middle[@]}"; do
+    idx=$((idx+1))
+    progress_render "$idx" "$total_scripts" "${scripts[$i]%.sh}"
+    run_monitor_job "$i" "${scripts[$i]}" >/dev/null 2>&1 &
+    running=$((running+1))
+    while [[ "$running" -ge "$MONITOR_JOBS" ]]; do
+      wait -n 2>/dev/null
+      running=$((running-1))
+    done
+  done
+  wait
+
+  for i in "${phase_last[@]}"; do
+    idx=$((idx+1))
+    progress_render "$idx" "$total_scripts" "${scripts[$i]%.sh}"
+    run_monitor_job "$i" "${scripts[$i]}"
+  done
+
+  # Deterministic merge (SCRIPT_ORDER), independent of completion order.
+  for i in "${!scripts[@]}"; do
+    merge_monitor_job "$i" "${scripts[$i]}"
+  done
+fi
+set -e
 progress_done
 
+# SSH connection pool stats (connections opened vs commands multiplexed).
+if declare -F lm_ssh_mux_report >/dev/null 2>&1; then
+  ssh_pool_line="$(lm_ssh_mux_report 2>/dev/null || true)"
+  if [[ -n "$ssh_pool_line" ]]; then
+    { echo ""; echo "$ssh_pool_line"; } >> "$tmp_report"
+  fi
+fi
+
+# Host state after the run: sweep result with circuit-breaker trips applied,
+# published as $LM_STATE_DIR/host_state.tsv (host, state, latency_ms, source; per shard
+# under $LM_STATE_DIR/shards/<shard>/ in sharded runs).
+if [[ -n "${LM_HOST_STATE_DIR:-}" && -f "$LM_HOST_STATE_DIR/hosts.tsv" ]]; then
+  tripped_hosts="$(cat "$LM_HOST_STATE_DIR"/tripped/* 2>/dev/null | cut -f1 | paste -sd, - || true)"
+  if [[ -n "$tripped_hosts" ]]; then
+    echo "CIRCUIT_BREAKER tripped=$(tr ',' '\n' <<< "$tripped_hosts" | wc -l | tr -d ' ') hosts=$tripped_hosts" >> "$tmp_report"
+  fi
+  if awk -F'\t' -v OFS='\t' -v tripped=",$tripped_hosts," '
+      index(tripped, "," $1 ",") { print $1, "down", $3, "breaker"; next }
+      { print $1, $2, $3, "sweep" }
+    ' "$LM_HOST_STATE_DIR/hosts.tsv" > "$SHARD_STATE_DIR/host_state.tsv.tmp" 2>/dev/null; then
+    mv -f "$SHARD_STATE_DIR/host_state.tsv.tmp" "$SHARD_STATE_DIR/host_state.tsv" 2>/dev/null || true
+  fi
+fi
+
+# Result cache: hit/miss counts for this run, then keep the LM_RESULT_CACHE_MAX most
+# recently used entries (hits refresh an entry's mtime).
+if [[ "$LM_RESULT_CACHE" == "1" && -d "$LM_RESULT_CACHE_DIR" ]]; then
+  rc_max="${LM_RESULT_CACHE_MAX:-2000}"
+  [[ "$rc_max" =~ ^[0-9]+$ ]] || rc_max=2000
+  rc_evicted=0
+  while IFS= read -r rc_old; do
+    rm -f "$rc_old" 2>/dev/null && rc_evicted=$((rc_evicted + 1))
+  done < <(find "$LM_RESULT_CACHE_DIR" -mindepth 2 -maxdepth 2 -type f -printf '%T@ %p\n' 2>/dev/null \
+             | sort -rn | awk -v max="$rc_max" 'NR > max { sub(/^[^ ]+ /, ""); print }')
+  if [[ -s "$LM_RESULT_CACHE_STATS" || "$rc_evicted" -gt 0 ]]; then
+    rc_line="$(awk '{c[$1]++} END {printf "RESULT_CACHE hits=%d misses=%d stored=%d", c["hit"], c["miss"], c["store"]}' "$LM_RESULT_CACHE_STATS" 2>/dev/null)"
+    echo "${rc_line:-RESULT_CACHE hits=0 misses=0 stored=0} evicted=$rc_evicted" >> "$tmp_report"
+  fi
+fi
+
 # Persist runtime data for downstream outputs (prometheus).
 : > "$runtime_file" 2>/dev/null || true
 for mon in "${!runtime_ms[@]}"; do
@@ -612,7 +964,7 @@ for mon in "${!runtime_ms[@]}"; do
   if [ "$warn_secs" -gt 0 ] && [ "$ms" -ge $((warn_secs * 1000)) ]; then
     runtime_warned=1
     runtime_warn_count=$((runtime_warn_count+1))
-    echo "monitor=runtime_guard host=runner status=WARN reason=runtime_exceeded target_monitor=$mon runtime_ms=$ms threshold_ms=$((warn_secs * 1000))" >> "$tmp_report"
+    report_monitor_line "monitor=runtime_guard host=runner status=WARN reason=runtime_exceeded target_monitor=$mon runtime_ms=$ms threshold_ms=$((warn_secs * 1000))"
   fi
 done
 if [ "$runtime_warned" -eq 1 ]; then
@@ -620,53 +972,51 @@ if [ "$runtime_warned" -eq 1 ]; then
   [ "$worst" -lt 1 ] && worst=1
 fi
 
-# Strict summary validation (optional)
+# Fleet counters, top issues and strict validation: one pass over this run's monitor= lines.
+# Fleet counters count monitor= lines by status (per-host/per-monitor).
+strict=0
+[[ "${LM_STRICT:-0}" == "1" || "${LM_STRICT:-}" == "true" ]] && strict=1
+tmp_top="$TMPDIR/full_health_monitor_top.$$"
+hosts_ok=0 hosts_warn=0 hosts_crit=0 hosts_unknown=0 hosts_skip=0 top_count=0
 strict_failed=0
 strict_first=""
-if [[ "${LM_STRICT:-0}" == "1" || "${LM_STRICT:-}" == "true" ]]; then
-  while IFS= read -r line; do
-    [[ "$line" =~ ^monitor= ]] || continue
-    has_monitor=0
-    has_host=0
-    has_status=0
-    status=""
-    for tok in $line; do
-      if [[ "$tok" != *=* ]]; then
-        strict_failed=1
-        strict_first="$line"
-        break
-      fi
-      key="${tok%%=*}"
-      val="${tok#*=}"
-      case "$key" in
-        monitor) has_monitor=1 ;;
-        host) has_host=1 ;;
-        status) has_status=1; status="$val" ;;
-      esac
-    done
-    if [[ "$strict_failed" -eq 1 ]]; then
-      break
-    fi
-    if [[ "$has_monitor" -eq 0 || "$has_host" -eq 0 || "$has_status" -eq 0 ]]; then
-      strict_failed=1
-      strict_first="$line"
-      break
-    fi
-    case "$status" in
-      OK|WARN|CRIT|UNKNOWN|SKIP) ;;
-      *)
-        strict_failed=1
-        strict_first="$line"
-        break
-        ;;
-    esac
-  done < <(grep -a '^monitor=' "$tmp_report" 2>/dev/null || true)
-  if [[ "$strict_failed" -eq 1 ]]; then
-    echo "ERROR: strict summary validation failed" >&2
-    [[ -n "$strict_first" ]] && echo "ERROR: bad line: $strict_first" >&2
-    echo "monitor=wrapper host=runner status=UNKNOWN node=$(hostname -f 2>/dev/null || hostname) reason=summary_invalid" >> "$tmp_report"
-    worst=3
-  fi
+{
+  read -r hosts_ok hosts_warn hosts_crit hosts_unknown hosts_skip top_count || true
+  IFS= read -r strict_first || true
+} < <(awk -v strict="$strict" -v top="$tmp_top" '
+  BEGIN { printf "" > top }
+  {
+    mon = ""; host = ""; st = ""; msg = ""; keys = ""; bad = 0
+    for (i = 1; i <= NF; i++) {
+      eq = index($i, "=")
+      if (eq == 0) { bad = 1; continue }
+      k = substr($i, 1, eq - 1); v = substr($i, eq + 1)
+      if (k == "monitor" && keys !~ /m/) { mon = v; keys = keys "m" }
+      else if (k == "host" && keys !~ /h/) { host = v; keys = keys "h" }
+      else if (k == "status" && keys !~ /s/) { st = v; keys = keys "s" }
+      else if (k == "msg" && msg == "") msg = v
+    }
+    if (st in cnt) cnt[st]++; else cnt[st] = 1
+    if ((st == "CRIT" || st == "WARN" || st == "UNKNOWN") && ntop < 50) {
+      print st ": " host " " mon (msg != "" ? " - " msg : "") > top
+      ntop++
+    }
+    if (strict && first == "" && (bad || keys !~ /m/ || keys !~ /h/ || keys !~ /s/ || st !~ /^(OK|WARN|CRIT|UNKNOWN|SKIP)$/)) first = $0
+  }
+  END {
+    printf "%d %d %d %d %d %d\n", cnt["OK"], cnt["WARN"], cnt["CRIT"], cnt["UNKNOWN"], cnt["SKIP"], ntop
+    print first
+  }' "$tmp_monlines" 2>/dev/null)
+
+# Strict summary validation (optional)
+if [[ "$strict" -eq 1 && -n "$strict_first" ]]; then
+  strict_failed=1
+  echo "ERROR: strict summary validation failed" >&2
+  echo "ERROR: bad line: $strict_first" >&2
+  report_monitor_line "monitor=wrapper host=runner status=UNKNOWN node=$RUN_NODE reason=summary_invalid"
+  hosts_unknown=$((hosts_unknown+1))
+  [[ "$top_count" -lt 50 ]] && echo "UNKNOWN: runner wrapper" >> "$tmp_top"
+  worst=3
 fi
 
 case "$worst" in
@@ -685,9 +1035,7 @@ ts_epoch="$(lm_now_epoch)"
   # Final status summary: explicitly extract only standardized machine lines.
   # These come from lib/linux_maint.sh: lm_summary() -> lines starting with "monitor=".
   echo "FINAL_STATUS_SUMMARY (monitor= lines only)"
-  tmp_mon=$(mktemp -p "$TMPDIR" linux_maint_mon.XXXXXX)
-  grep -a '^monitor=' "$tmp_report" > "$tmp_mon" || true
-  cat "$tmp_mon" 2>/dev/null || true
+  cat "$tmp_monlines" 2>/dev/null || true
   echo "============================================================"
 
 # ------------------------
@@ -695,28 +1043,7 @@ ts_epoch="$(lm_now_epoch)"
 # ------------------------
 # Avoid reading+appending to the same file in one block: snapshot monitor lines first.
 _tmp_mon_snapshot=$(mktemp -p "$TMPDIR" linux_maint_mon_snapshot.XXXXXX)
-grep -a '^monitor=' "$tmp_report" > "$_tmp_mon_snapshot" 2>/dev/null || true
-
-# shellcheck disable=SC2030
-# shellcheck disable=SC2030
-hosts_ok=0
-# shellcheck disable=SC2030
-hosts_warn=0
-# shellcheck disable=SC2030
-hosts_crit=0
-# shellcheck disable=SC2030
-hosts_unknown=0
-# shellcheck disable=SC2030
-hosts_skip=0
-# Fleet-level counters derived from monitor= lines (per-host/per-monitor)
-if [ -f "$_tmp_mon_snapshot" ]; then
-  hosts_ok=$(grep -a -c " status=OK( |$)" "$_tmp_mon_snapshot" 2>/dev/null || echo 0)
-  hosts_warn=$(grep -a -c " status=WARN( |$)" "$_tmp_mon_snapshot" 2>/dev/null || echo 0)
-  hosts_crit=$(grep -a -c " status=CRIT( |$)" "$_tmp_mon_snapshot" 2>/dev/null || echo 0)
-  hosts_unknown=$(grep -a -c " status=UNKNOWN( |$)" "$_tmp_mon_snapshot" 2>/dev/null || echo 0)
-  hosts_skip=$(grep -a -c " status=SKIP( |$)" "$_tmp_mon_snapshot" 2>/dev/null || echo 0)
-fi
-
+cp -f "$tmp_monlines" "$_tmp_mon_snapshot" 2>/dev/null || true
 
   echo "SUMMARY_HOSTS ok=$hosts_ok warn=$hosts_warn crit=$hosts_crit unknown=$hosts_unknown skipped=$hosts_skip"
   echo ""
@@ -728,18 +1055,14 @@ fi
 {
   echo ""
   echo "HUMAN_STATUS_SUMMARY"
-  echo "run_host=$(hostname -f 2>/dev/null || hostname)"
+  echo "run_host=$RUN_NODE"
   echo "timestamp=$(lm_now_iso)"
   echo "overall=$overall exit_code=$worst ok=$ok warn=$warn crit=$crit unknown=$unk skipped=$skipped"
   echo "fleet_hosts_ok=$hosts_ok fleet_hosts_warn=$hosts_warn fleet_hosts_crit=$hosts_crit fleet_hosts_unknown=$hosts_unknown fleet_hosts_skipped=$hosts_skip"
 
   echo ""
   echo "Top CRIT/WARN/UNKNOWN (from monitor= lines)"
-  awk '
-    {mon="";host="";st="";msg=""}
-    {for(i=1;i<=NF;i++){split($i,a,"="); if(a[1]=="monitor")mon=a[2]; if(a[1]=="host")host=a[2]; if(a[1]=="status")st=a[2]; if(a[1]=="msg")msg=a[2];}}
-    st=="CRIT" || st=="WARN" || st=="UNKNOWN" {print st ": " host " " mon (msg?" - " msg:"")}
-  ' "$_tmp_mon_snapshot" | head -n 50
+  cat "$tmp_top" 2>/dev/null || true
 
   echo ""
   echo "Top runtimes (ms)"
@@ -765,8 +1088,19 @@ cat "$_tmp_human" >> "$tmp_report"
   PREV_SUMMARY="$DIFF_STATE_DIR/last_summary_monitor_lines.log"
   CUR_SUMMARY="$_tmp_mon_snapshot"
   DIFF_TEXT=""
+  # LM_NOTIFY_SUPPRESS_FLAPPING=1: keys flapping over the last LM_FLAP_WINDOW runs are listed
+  # once under FLAPPING instead of as changes, and a run whose only changes are flapping keys
+  # does not notify.
+  diff_flap=()
+  if [[ "${LM_NOTIFY_SUPPRESS_FLAPPING:-0}" == "1" ]]; then
+    diff_flap=(--flap-window "${LM_FLAP_WINDOW:-10}" --history-dir "$SUMMARY_DIR")
+  fi
   if [[ -f "$PREV_SUMMARY" && -f "$CUR_SUMMARY" && -x "$REPO_DIR/tools/summary_diff.py" ]]; then
-    DIFF_TEXT="$(python3 "$REPO_DIR/tools/summary_diff.py" "$PREV_SUMMARY" "$CUR_SUMMARY" 2>/dev/null || true)"
+    DIFF_TEXT="$(python3 "$REPO_DIR/tools/summary_diff.py" "$PREV_SUMMARY" "$CUR_SUMMARY" ${diff_flap[@]+"${diff_flap[@]}"} 2>/dev/null || true)"
+  fi
+  notify_flapping_only=0
+  if [[ "$DIFF_TEXT" =~ (^|$'\n')changes=0\ flapping_suppressed=[1-9] ]]; then
+    notify_flapping_only=1
   fi
   # persist current for next run (best-effort)
   mkdir -p "$DIFF_STATE_DIR" 2>/dev/null || true
@@ -774,8 +1108,12 @@ cat "$_tmp_human" >> "$tmp_report"
   if command -v lm_notify_should_send >/dev/null 2>&1; then
     _notify_text="$(cat "$_tmp_human" 2>/dev/null; if [ -n "$DIFF_TEXT" ]; then echo ""; echo "DIFF_SINCE_LAST_RUN"; echo "$DIFF_TEXT"; fi; echo ""; echo "FINAL_STATUS_SUMMARY"; cat "$_tmp_mon_snapshot" 2>/dev/null)"
     if lm_notify_should_send "$_notify_text"; then
-      lm_notify_send "health summary overall=$overall" "$_notify_text" || true
-      echo "NOTIFY: sent summary email" >> "$tmp_report"
+      if [[ "$notify_flapping_only" == "1" ]]; then
+        echo "NOTIFY: skipped (only flapping entities changed)" >> "$tmp_report"
+      else
+        lm_notify_send "health summary overall=$overall" "$_notify_text" || true
+        echo "NOTIFY: sent summary email" >> "$tmp_report"
+      fi
     else
       echo "NOTIFY: skipped" >> "$tmp_report"
     fi
@@ -792,7 +1130,7 @@ log_rc=$?
 set -e
 if [[ "$log_rc" -ne 0 || ! -s "$logfile" ]]; then
   echo "WARN: log write failed: $logfile" >> "$tmp_report"
-  echo "monitor=wrapper host=runner status=WARN reason=log_write_failed path=$logfile" >> "$tmp_report"
+  report_monitor_line "monitor=wrapper host=runner status=WARN reason=log_write_failed path=$logfile"
 fi
 
 ln -sfn "$logfile" "$LOG_DIR/full_health_monitor_latest.log"
@@ -800,9 +1138,7 @@ ln -sfn "$logfile" "$LOG_DIR/full_health_monitor_latest.log"
 # Write a separate, machine-parseable summary file (optional but enabled by default).
 # Contains only "monitor=" lines (no timestamps) so it can be parsed by tools/CI.
 mkdir -p "$SUMMARY_DIR" 2>/dev/null || true
-tmp_mon=$(mktemp -p "$TMPDIR" linux_maint_mon.XXXXXX)
-  grep -a '^monitor=' "$tmp_report" > "$tmp_mon" || true
-  cat "$tmp_mon" > "$tmp_summary" 2>/dev/null || :
+cp -f "$tmp_monlines" "$tmp_summary" 2>/dev/null || :
 tmp_summary_file=""
 if tmp_summary_file="$(mktemp -p "$SUMMARY_DIR" full_health_monitor_summary.XXXXXX 2>/dev/null)"; then
   { cat "$tmp_summary" > "$tmp_summary_file"; } 2>/dev/null || true
@@ -840,237 +1176,10 @@ rm -f "$tmp_summary" 2>/dev/null || true
 # Also write JSON + Prometheus outputs (best-effort)
 # shellcheck disable=SC2031
 SUMMARY_FILE="$SUMMARY_FILE" SUMMARY_JSON_FILE="$SUMMARY_JSON_FILE" SUMMARY_JSON_LATEST_FILE="$SUMMARY_JSON_LATEST_FILE" PROM_FILE="$PROM_FILE" LM_HOSTS_OK="${hosts_ok:-0}" LM_HOSTS_WARN="${hosts_warn:-0}" LM_HOSTS_CRIT="${hosts_crit:-0}" LM_HOSTS_UNKNOWN="${hosts_unknown:-0}" LM_HOSTS_SKIPPED="${hosts_skip:-0}" LM_OVERALL="$overall" LM_EXIT_CODE="$worst" LM_STATUS_FILE="$STATUS_FILE" LM_RUNTIME_FILE="$runtime_file" LM_RUNTIME_WARN_COUNT="$runtime_warn_count" LM_RUN_EPOCH="$ts_epoch" python3 - <<'PY' || true
-import json, os, tempfile
-import time
-from datetime import datetime
-summary_file=os.environ.get("SUMMARY_FILE")
-json_file=os.environ.get("SUMMARY_JSON_FILE")
-json_latest=os.environ.get("SUMMARY_JSON_LATEST_FILE")
-prom_file=os.environ.get("PROM_FILE")
-prom_format=os.environ.get("LM_PROM_FORMAT","")
-hosts_ok=int(os.environ.get("LM_HOSTS_OK","0"))
-hosts_warn=int(os.environ.get("LM_HOSTS_WARN","0"))
-hosts_crit=int(os.environ.get("LM_HOSTS_CRIT","0"))
-hosts_unknown=int(os.environ.get("LM_HOSTS_UNKNOWN","0"))
-hosts_skipped=int(os.environ.get("LM_HOSTS_SKIPPED","0"))
-overall=os.environ.get("LM_OVERALL","UNKNOWN")
-exit_code=int(os.environ.get("LM_EXIT_CODE","3"))
-runtime_file=os.environ.get("LM_RUNTIME_FILE")
-runtime_warn_count=int(os.environ.get("LM_RUNTIME_WARN_COUNT","0"))
-run_epoch=os.environ.get("LM_RUN_EPOCH","")
-
-def parse_kv(line):
-    parts=line.strip().split()
-    d={}
-    for p in parts:
-        if "=" in p:
-            k,v=p.split("=",1)
-            d[k]=v
-    return d
-
-rows=[]
-if summary_file and os.path.exists(summary_file):
-    with open(summary_file,"r",encoding="utf-8",errors="ignore") as f:
-        for line in f:
-            if line.startswith("monitor="):
-                rows.append(parse_kv(line))
-
-# Wrap rows with metadata so consumers can use one stable JSON contract.
-# Back-compat: set LM_JSON_LEGACY_LIST=1 to output only the list.
-legacy = os.environ.get("LM_JSON_LEGACY_LIST","0") == "1"
-
-def read_status_file(path):
-    d={}
-    try:
-        with open(path,"r",encoding="utf-8",errors="ignore") as f:
-            for line in f:
-                line=line.strip()
-                if not line or "=" not in line: continue
-                k,v=line.split("=",1)
-                d[k]=v
-    except FileNotFoundError:
-        pass
-    return d
-
-status_file = os.environ.get("LM_STATUS_FILE")
-meta = read_status_file(status_file) if status_file else {}
-
-payload = rows if legacy else {"meta": meta, "rows": rows}
-
-if json_file:
-    os.makedirs(os.path.dirname(json_file), exist_ok=True)
-    try:
-        tmp_dir = os.path.dirname(json_file) or "."
-        fd, tmp = tempfile.mkstemp(prefix=".summary_json.", dir=tmp_dir)
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2, sort_keys=True)
-        os.replace(tmp, json_file)
-    except Exception:
-        pass
-    if json_latest:
-        try:
-            if os.path.islink(json_latest) or os.path.exists(json_latest):
-                try: os.unlink(json_latest)
-                except: pass
-            os.symlink(os.path.basename(json_file),json_latest)
-        except: pass
-
-status_map={"OK":0,"WARN":1,"CRIT":2,"UNKNOWN":3,"SKIP":3}
-
-def worst_status(s1, s2):
-    """Return the worst of two status strings using the project's exit-code scale."""
-    return s1 if status_map.get(s1,3) >= status_map.get(s2,3) else s2
-
-def dedup_rows_worst(rows):
-    """Deduplicate monitor+host rows keeping the worst status.
-
-    Some monitors may emit more than one summary line for the same monitor/host
-    (e.g. preflight emitting both SKIP and UNKNOWN). Prometheus must not contain
-    duplicate labelsets.
-    """
-    out={}
-    for r in rows:
-        mon=r.get("monitor","unknown")
-        host=r.get("host","all")
-        key=(mon,host)
-        if key not in out:
-            out[key]=r
-            continue
-        prev=out[key]
-        st=worst_status(prev.get("status","UNKNOWN"), r.get("status","UNKNOWN"))
-        keep=prev if st==prev.get("status") else r
-        # Ensure the kept row has the worst status.
-        keep=dict(keep)
-        keep["status"]=st
-        out[key]=keep
-    return list(out.values())
-if prom_file and rows:
-    try:
-        os.makedirs(os.path.dirname(prom_file), exist_ok=True)
-        prom_rows = dedup_rows_worst(rows)
-        counts={"OK":0,"WARN":0,"CRIT":0,"UNKNOWN":0,"SKIP":0}
-        reason_counts={}
-        max_reason_labels=20
-        try:
-            max_reason_labels=max(0, int(os.environ.get("LM_PROM_MAX_REASON_LABELS","20")))
-        except Exception:
-            max_reason_labels=20
-        for r in prom_rows:
-            st=r.get("status","UNKNOWN")
-            counts[st]=counts.get(st,0)+1
-            if st != "OK":
-                reason=r.get("reason")
-                if reason:
-                    reason_counts[reason]=reason_counts.get(reason,0)+1
-        def last_run_epoch_seconds():
-            try:
-                if run_epoch and str(run_epoch).isdigit():
-                    return int(run_epoch)
-            except Exception:
-                pass
-            ts = meta.get("timestamp")
-            if not ts:
-                return -1
-            try:
-                dt = datetime.fromisoformat(ts)
-                return int(dt.timestamp())
-            except Exception:
-                return -1
-
-        def last_run_age_seconds():
-            # Prefer current run epoch if provided (close to 0), fallback to status file timestamp.
-            try:
-                if run_epoch and str(run_epoch).isdigit():
-                    return max(0, int(time.time() - int(run_epoch)))
-            except Exception:
-                pass
-            ts = meta.get("timestamp")
-            if not ts:
-                return -1
-            try:
-                dt = datetime.fromisoformat(ts)
-                return max(0, int(time.time() - dt.timestamp()))
-            except Exception:
-                return -1
-
-        with open(prom_file,"w",encoding="utf-8") as f:
-            f.write("# HELP linux_maint_monitor_status Monitor status as exit-code scale (OK=0,WARN=1,CRIT=2,UNKNOWN/SKIP=3)\n")
-            f.write("# TYPE linux_maint_monitor_status gauge\n")
-            f.write("\n# HELP linux_maint_overall_status Overall run status as exit-code scale (OK=0,WARN=1,CRIT=2,UNKNOWN=3)\n")
-            f.write("# TYPE linux_maint_overall_status gauge\n")
-            f.write(f"linux_maint_overall_status {exit_code}\n")
-            f.write("\n# HELP linux_maint_last_run_age_seconds Seconds since the last wrapper run timestamp\n")
-            f.write("# TYPE linux_maint_last_run_age_seconds gauge\n")
-            f.write(f"linux_maint_last_run_age_seconds {last_run_age_seconds()}\n")
-            f.write("\n# HELP linux_maint_last_run_exit_code Exit code of last wrapper run\n")
-            f.write("# TYPE linux_maint_last_run_exit_code gauge\n")
-            f.write(f"linux_maint_last_run_exit_code {exit_code}\n")
-            f.write("\n# HELP linux_maint_last_run_timestamp Last wrapper run timestamp as epoch seconds\n")
-            f.write("# TYPE linux_maint_last_run_timestamp gauge\n")
-            f.write(f"linux_maint_last_run_timestamp {last_run_epoch_seconds()}\n")
-            f.write("\n# HELP linux_maint_summary_hosts_count Fleet counters derived from monitor= lines\n")
-            f.write("# TYPE linux_maint_summary_hosts_count gauge\n")
-            f.write(f"linux_maint_summary_hosts_count{{status=\"ok\"}} {hosts_ok}\n")
-            f.write(f"linux_maint_summary_hosts_count{{status=\"warn\"}} {hosts_warn}\n")
-            f.write(f"linux_maint_summary_hosts_count{{status=\"crit\"}} {hosts_crit}\n")
-            f.write(f"linux_maint_summary_hosts_count{{status=\"unknown\"}} {hosts_unknown}\n")
-            f.write(f"linux_maint_summary_hosts_count{{status=\"skipped\"}} {hosts_skipped}\n")
-            f.write("\n# HELP linux_maint_monitor_status_count Count of monitor results by status (deduped by monitor+host)\n")
-            f.write("# TYPE linux_maint_monitor_status_count gauge\n")
-            for st in ("OK","WARN","CRIT","UNKNOWN","SKIP"):
-                f.write(f"linux_maint_monitor_status_count{{status=\"{st.lower()}\"}} {counts.get(st,0)}\n")
-
-            monitor_counts = {}
-            for r in prom_rows:
-                mon = r.get("monitor","unknown")
-                monitor_counts[mon] = monitor_counts.get(mon, 0) + 1
-            f.write("\n# HELP linux_maint_monitor_host_count Count of host results per monitor (deduped by monitor+host)\n")
-            f.write("# TYPE linux_maint_monitor_host_count gauge\n")
-            for mon, cnt in sorted(monitor_counts.items()):
-                esc_mon=str(mon).replace("\\","\\\\").replace("\"","\\\"")
-                f.write(f"linux_maint_monitor_host_count{{monitor=\"{esc_mon}\"}} {cnt}\n")
-
-            f.write("\n# HELP linux_maint_reason_count Count of non-OK monitor results by reason token (deduped by monitor+host; top N reasons)\n")
-            f.write("# TYPE linux_maint_reason_count gauge\n")
-            if reason_counts and max_reason_labels > 0:
-                for reason, count in sorted(reason_counts.items(), key=lambda kv: (-kv[1], kv[0]))[:max_reason_labels]:
-                    esc_reason=str(reason).replace("\\","\\\\").replace("\"","\\\"")
-                    f.write(f"linux_maint_reason_count{{reason=\"{esc_reason}\"}} {count}\n")
-
-            for r in prom_rows:
-                mon=r.get("monitor","unknown"); host=r.get("host","all"); st=r.get("status","UNKNOWN")
-                val=status_map.get(st,3)
-                f.write(f"linux_maint_monitor_status{{monitor=\"{mon}\",host=\"{host}\"}} {val}\n")
-
-            # Runtime metrics (per monitor script)
-            if runtime_file:
-                f.write("\n# HELP linux_maint_monitor_runtime_ms Monitor runtime in milliseconds (wrapper)\n")
-                f.write("# TYPE linux_maint_monitor_runtime_ms gauge\n")
-                try:
-                    with open(runtime_file,"r",encoding="utf-8",errors="ignore") as rf:
-                        for line in rf:
-                            if not line.startswith("monitor="):
-                                continue
-                            parts=line.strip().split()
-                            d={}
-                            for p in parts:
-                                if "=" in p:
-                                    k,v=p.split("=",1)
-                                    d[k]=v
-                            mon=d.get("monitor")
-                            ms=d.get("ms")
-                            if mon and ms and ms.isdigit():
-                                f.write(f"linux_maint_monitor_runtime_ms{{monitor=\"{mon}\"}} {ms}\n")
-                except FileNotFoundError:
-                    pass
-
-            # Runtime warning count (wrapper guard)
-            f.write("\n# HELP linux_maint_runtime_warn_count Count of monitors exceeding runtime warn thresholds\n")
-            f.write("# TYPE linux_maint_runtime_warn_count gauge\n")
-            f.write(f"linux_maint_runtime_warn_count {runtime_warn_count}\n")
-            if prom_format == "openmetrics":
-                f.write("# EOF\n")
-    except: pass
+import os, sys
+sys.path.insert(0, os.environ.get("LM_PYLIB_DIR") or "/usr/local/lib")
+import linux_maint_outputs as lmo
+lmo.write_from_env()
 PY
 
 write_checksum() {
@@ -1111,18 +1220,42 @@ fi
 
 {
   echo "timestamp=$(lm_now_iso)"
-  echo "host=$(hostname -f 2>/dev/null || hostname)"
+  echo "host=$RUN_NODE"
   echo "overall=$overall"
   echo "exit_code=$worst"
   echo "logfile=$logfile"
+  if [[ -n "$SHARD_NAME" ]]; then
+    echo "shard=$LM_SHARD"
+    echo "summary_file=$SUMMARY_FILE"
+  fi
 } > "$STATUS_FILE"
 chmod 0644 "$STATUS_FILE"
 
+# ---- trend index (best-effort) ----
+# One aggregate line per summary file so `linux-maint trend` never re-parses old runs.
+if [[ "${LM_TREND_INDEX:-1}" != "0" && -f "$SUMMARY_FILE" ]]; then
+python3 - "${LM_TREND_INDEX_FILE:-$SUMMARY_DIR/trend_index.jsonl}" "$SUMMARY_FILE" <<'PY' || true
+import json, os, sys
+sys.path.insert(0, os.environ.get("LM_PYLIB_DIR") or "/usr/local/lib")
+import linux_maint_outputs as lmo
+
+index_file, summary_file = sys.argv[1:3]
+with open(index_file, "a", encoding="utf-8") as f:
+    f.write(json.dumps(lmo.trend_index_entry(summary_file), sort_keys=True) + "\n")
+PY
+fi
+
 # ---- run index (best-effort) ----
-RUN_INDEX_FILE="${LM_RUN_INDEX_FILE:-$LM_STATE_DIR/run_index.jsonl}"
+# Shard runs keep their own index; the fleet run index gets one entry per `aggregate`.
+if [[ -n "$SHARD_NAME" ]]; then
+  RUN_INDEX_FILE="${LM_RUN_INDEX_FILE:-$LOG_DIR/run_index.jsonl}"
+else
+  RUN_INDEX_FILE="${LM_RUN_INDEX_FILE:-$LM_STATE_DIR/run_index.jsonl}"
+fi
 RUN_INDEX_KEEP="${LM_RUN_INDEX_KEEP:-200}"
+RUN_INDEX_SEGMENT="${LM_RUN_INDEX_SEGMENT:-50}"
 # If the run index previously lived in a legacy location, seed it once.
-if [[ ! -f "$RUN_INDEX_FILE" ]]; then
+if [[ -z "$SHARD_NAME" && ! -f "$RUN_INDEX_FILE" ]]; then
   for _old in /var/tmp/run_index.jsonl /var/tmp/linux_maint/run_index.jsonl /tmp/linux_maint/run_index.jsonl; do
     if [[ -f "$_old" ]]; then
       cp -f "$_old" "$RUN_INDEX_FILE" 2>/dev/null || true
@@ -1130,106 +1263,81 @@ if [[ ! -f "$RUN_INDEX_FILE" ]]; then
     fi
   done
 fi
-python3 - "$RUN_INDEX_FILE" "$RUN_INDEX_KEEP" "$SUMMARY_FILE" "$SUMMARY_JSON_FILE" "$logfile" "$overall" "$worst" "$ts_epoch" <<'PY' || true
-import json, os, sys, time, tempfile
+python3 - "$RUN_INDEX_FILE" "$RUN_INDEX_KEEP" "$SUMMARY_FILE" "$SUMMARY_JSON_FILE" "$logfile" "$overall" "$worst" "$ts_epoch" "$RUN_INDEX_SEGMENT" <<'PY' || true
+import os, sys
+sys.path.insert(0, os.environ.get("LM_PYLIB_DIR") or "/usr/local/lib")
+import linux_maint_runindex as lmri
+import linux_maint_outputs as lmo
 
-path, keep_s, summary_file, summary_json, logfile, overall, exit_code, ts_epoch = sys.argv[1:9]
+path, keep_s, summary_file, summary_json, logfile, overall, exit_code, ts_epoch, segment_s = sys.argv[1:10]
 try:
     keep = int(keep_s)
 except Exception:
     keep = 200
 
-def read_reason_counts(summary_path):
-    counts = {}
-    try:
-        with open(summary_path, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                if not line.startswith("monitor="):
-                    continue
-                parts = line.strip().split()
-                reason = None
-                for p in parts:
-                    if p.startswith("reason="):
-                        reason = p.split("=", 1)[1]
-                        break
-                if reason:
-                    counts[reason] = counts.get(reason, 0) + 1
-    except (FileNotFoundError, PermissionError, OSError):
-        pass
-    return counts
-
-reasons = read_reason_counts(summary_file)
-top_reasons = [
-    {"reason": r, "count": c}
-    for r, c in sorted(reasons.items(), key=lambda kv: (-kv[1], kv[0]))[:10]
-]
-
-def read_status_counts(summary_path):
-    counts = {"ok":0,"warn":0,"crit":0,"unknown":0,"skipped":0}
-    try:
-        with open(summary_path, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                if not line.startswith("monitor="):
-                    continue
-                parts = line.strip().split()
-                status = None
-                for p in parts:
-                    if p.startswith("status="):
-                        status = p.split("=",1)[1]
-                        break
-                if not status:
-                    continue
-                if status == "OK":
-                    counts["ok"] += 1
-                elif status == "WARN":
-                    counts["warn"] += 1
-                elif status == "CRIT":
-                    counts["crit"] += 1
-                elif status == "UNKNOWN":
-                    counts["unknown"] += 1
-                elif status == "SKIP":
-                    counts["skipped"] += 1
-    except (FileNotFoundError, PermissionError, OSError):
-        pass
-    return counts
-
-host_counts = read_status_counts(summary_file)
-
-entry = {
-    "run_index_version": 1,
-    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(int(ts_epoch))) if ts_epoch.isdigit() else "",
-    "timestamp_epoch": int(ts_epoch) if ts_epoch.isdigit() else None,
-    "overall": overall,
-    "exit_code": int(exit_code) if str(exit_code).isdigit() else 3,
-    "logfile": logfile,
-    "summary_file": summary_file if summary_file else None,
-    "summary_json": summary_json if summary_json else None,
-    "hosts": host_counts,
-    "top_reasons": top_reasons,
-}
-
-os.makedirs(os.path.dirname(path), exist_ok=True)
-lines = []
+# Append to the active segment; retention drops whole sealed segments (no rewrite).
 try:
-    with open(path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
+    lmri.RunIndex(path, segment_s).append(
+        lmo.run_index_entry(summary_file, summary_json, logfile, overall, exit_code, ts_epoch), keep=keep)
 except Exception:
-    lines = []
+    pass
+PY
 
-lines.append(json.dumps(entry, sort_keys=True) + "\n")
-if keep > 0 and len(lines) > keep:
-    lines = lines[-keep:]
+# ---- output schema check (optional) ----
+# LM_VALIDATE_OUTPUTS=1 checks the summary JSON and the new run index entry against
+# docs/schemas in one process. Failures are logged and reported on stderr; the run's
+# status is unchanged.
+if [[ "${LM_VALIDATE_OUTPUTS:-0}" == "1" ]]; then
+  schema_files=()
+  [[ -s "$SUMMARY_JSON_FILE" ]] && schema_files+=("$SUMMARY_JSON_FILE")
+  [[ -s "$RUN_INDEX_FILE" ]] && schema_files+=("$RUN_INDEX_FILE")
+  if [[ "${#schema_files[@]}" -gt 0 ]]; then
+    schema_rc=0
+    schema_out="$(python3 "$LM_PYLIB_DIR/linux_maint_schema.py" check --tail 1 --max-errors 20 "${schema_files[@]}" 2>&1)" || schema_rc=$?
+    [[ -n "$schema_out" ]] && printf '%s\n' "$schema_out" >> "$logfile"
+    if [[ "$schema_rc" -ne 0 ]]; then
+      echo "WARN: output schema check failed (${schema_out##*$'\n'}); details in $logfile" >&2
+    fi
+  fi
+fi
 
+# Profiling: close the run span and convert the raw spans into the trace file.
+if [[ -n "$PROFILE_TRACE_FILE" && -n "${LM_PROFILE_FILE:-}" ]]; then
+  _LM_SPAN_TID="$$" lm_span_emit run run "$profile_run_start" monitor=run overall="$overall" rc="$worst"
+  python3 - "$LM_PROFILE_FILE" "$PROFILE_TRACE_FILE" "$SUMMARY_FILE" "$overall" <<'PY' || true
+import os, sys
+sys.path.insert(0, os.environ.get("LM_PYLIB_DIR") or "/usr/local/lib")
+import linux_maint_trace as lmt
+
+raw, out, summary_file, overall = sys.argv[1:5]
+lmt.write_trace(raw, out, {"summary_file": summary_file, "overall": overall})
+latest = os.path.join(os.path.dirname(out), "full_health_monitor_trace_latest.json")
 try:
-    tmp_dir = os.path.dirname(path) or "."
-    fd, tmp = tempfile.mkstemp(prefix=".run_index.", dir=tmp_dir)
-    with os.fdopen(fd, "w", encoding="utf-8") as f:
-        f.writelines(lines)
-    os.replace(tmp, path)
-except Exception:
+    if os.path.islink(latest) or os.path.exists(latest):
+        os.unlink(latest)
+    os.symlink(os.path.basename(out), latest)
+except OSError:
     pass
 PY
+  if [[ -s "$PROFILE_TRACE_FILE" ]]; then
+    echo "TRACE: $PROFILE_TRACE_FILE" >&2
+  fi
+fi
+
+# ---- archive (best-effort) ----
+# Timestamped run files older than LM_ARCHIVE_AFTER_DAYS move into compressed per-day
+# bundles under <dir>/archive/; status/trend/runtimes/history/diff read them in place.
+ARCHIVE_AFTER_DAYS="${LM_ARCHIVE_AFTER_DAYS:-7}"
+if [[ "$ARCHIVE_AFTER_DAYS" =~ ^[0-9]+$ && "$ARCHIVE_AFTER_DAYS" -gt 0 ]]; then
+  archive_args=(archive --log-dir "$LOG_DIR" --older-than "${ARCHIVE_AFTER_DAYS}d"
+    --codec "${LM_ARCHIVE_COMPRESS:-auto}" --keep-days "${LM_ARCHIVE_KEEP_DAYS:-0}" --now "${LM_TEST_TIME_EPOCH:-}")
+  [[ "$SUMMARY_DIR" != "$LOG_DIR" ]] && archive_args+=(--log-dir "$SUMMARY_DIR")
+  archive_line="$(python3 "$LM_PYLIB_DIR/linux_maint_archive.py" "${archive_args[@]}" 2>/dev/null)" || archive_line=""
+  if [[ -n "$archive_line" ]]; then
+    echo "$archive_line" >> "$logfile"
+  fi
+fi
 
-rm -f "$tmp_report" "$runtime_file" 2>/dev/null || true
+rm -f "$tmp_report" "$tmp_monlines" "$tmp_top" "$runtime_file" 2>/dev/null || true
 
 exit "$worst"
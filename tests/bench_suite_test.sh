@@ -0,0 +1,58 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: tools/bench runs every scenario on a tiny synthetic fleet, the ssh stand-in
+# serves canned output, and --check flags regressions against a baseline.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+BENCH="$ROOT_DIR/tools/bench/run_bench.py"
+FAKEBIN="$ROOT_DIR/tools/bench/fakebin"
+
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+# ssh stand-in: runs the command locally with the fake tools first on PATH.
+out="$(PATH="$FAKEBIN:$PATH" BENCH_SSH_CALLS="$workdir/calls" ssh -o BatchMode=yes root@bench-0003 'df -P /; timedatectl show -p NTPSynchronized --value 2>/dev/null || echo no')"
+printf '%s\n' "$out" | grep -q '^/dev/' || { echo "fake df output missing: $out" >&2; exit 1; }
+grep -qx 'bench-0003' "$workdir/calls" || { echo "ssh call not recorded" >&2; cat "$workdir/calls" >&2; exit 1; }
+rc=0
+PATH="$FAKEBIN:$PATH" BENCH_SSH_FAIL_PCT=100 ssh bench-0001 true 2>/dev/null || rc=$?
+[[ "$rc" -eq 255 ]] || { echo "expected unreachable host rc=255, got $rc" >&2; exit 1; }
+
+args=(--size small --hosts 3 --runs 20 --repeat 1 --latency-ms 0 --fail-pct 0)
+python3 "$BENCH" "${args[@]}" --out "$workdir/base.json" --baseline "$workdir/baseline.json" --save-baseline >/dev/null
+python3 - "$workdir/base.json" <<'PY'
+import json, sys
+doc = json.load(open(sys.argv[1]))
+names = [r["name"] for r in doc["scenarios"]]
+assert names == ["wrapper", "trend", "status_since", "report", "history", "diff", "summary_parse"], names
+for r in doc["scenarios"]:
+    assert r["wall_s"] > 0 and r["max_rss_kb"] > 0 and r["rc"] in (0, 1, 2), r
+wrapper = doc["scenarios"][0]
+assert wrapper["ssh_calls"] > 0, wrapper
+assert doc["params"]["hosts"] == 3 and doc["params"]["runs"] == 20, doc["params"]
+PY
+[[ -f "$workdir/baseline.json" ]] || { echo "baseline not saved" >&2; exit 1; }
+
+# A baseline that was much faster makes --check fail and marks the scenario.
+python3 - "$workdir/baseline.json" <<'PY'
+import json, sys
+p = sys.argv[1]
+doc = json.load(open(p))
+for r in doc["scenarios"]:
+    if r["name"] == "status_since":
+        r["max_rss_kb"] = 1
+json.dump(doc, open(p, "w"))
+PY
+rc=0
+out="$(python3 "$BENCH" "${args[@]}" --only status_since,diff --out "$workdir/cur.json" --baseline "$workdir/baseline.json" --check)" || rc=$?
+[[ "$rc" -eq 1 ]] || { echo "expected --check rc=1, got $rc" >&2; printf '%s\n' "$out" >&2; exit 1; }
+printf '%s\n' "$out" | grep -q '^compare name=status_since metric=max_rss_kb .* REGRESSED$' || {
+  echo "missing regression line:" >&2
+  printf '%s\n' "$out" >&2
+  exit 1
+}
+
+echo "bench suite ok"
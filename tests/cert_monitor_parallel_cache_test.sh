@@ -0,0 +1,89 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: cert_monitor probes endpoints concurrently (hung endpoints only cost one
+# timeout), parses each certificate with a single openssl x509 call, and reuses
+# the parsed fields from its cache for unchanged certificates and cert files.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+REAL_OPENSSL="$(command -v openssl)"
+"$REAL_OPENSSL" req -x509 -newkey rsa:2048 -sha256 -days 20 -nodes -subj "/CN=svc.example" \
+  -keyout "$workdir/svc.key" -out "$workdir/svc.crt" >/dev/null 2>&1
+mkdir -p "$workdir/scan"
+"$REAL_OPENSSL" req -x509 -newkey rsa:2048 -sha256 -days 365 -nodes -subj "/CN=file.example" \
+  -keyout "$workdir/file.key" -out "$workdir/scan/file.crt" >/dev/null 2>&1
+
+# openssl stand-in: s_client serves svc.crt (slow* hangs, down* fails); x509 calls are counted.
+mkdir -p "$workdir/bin"
+cat > "$workdir/bin/openssl" <<'SH'
+#!/usr/bin/env bash
+case "$1" in
+  s_client)
+    host=""
+    while [ $# -gt 0 ]; do
+      [ "$1" = "-connect" ] && host="${2%:*}"
+      shift
+    done
+    case "$host" in
+      slow*) exec sleep 30 ;;
+      down*) echo "connect: Connection refused" >&2; exit 1 ;;
+    esac
+    echo "CONNECTED(00000003)"
+    cat "$FAKE_CERT"
+    echo "    Verify return code: 0 (ok)"
+    ;;
+  x509) echo x509 >> "$FAKE_CALLS"; exec "$REAL_OPENSSL" "$@" ;;
+  *) exec "$REAL_OPENSSL" "$@" ;;
+esac
+SH
+chmod +x "$workdir/bin/openssl"
+
+printf '%s\n' "a.example:443" "slow1.example:443" "slow2.example:443,sni=x.example" \
+  "down.example:8443" "b.example" > "$workdir/certs.txt"
+
+export REAL_OPENSSL FAKE_CERT="$workdir/svc.crt" FAKE_CALLS="$workdir/x509_calls"
+run_monitor() {
+  : > "$FAKE_CALLS"
+  env PATH="$workdir/bin:$PATH" HOME="$workdir" \
+    LINUX_MAINT_LIB="$ROOT_DIR/lib/linux_maint.sh" \
+    LM_LOCKDIR="$workdir" LM_STATE_DIR="$workdir/state" LM_LOGFILE="$workdir/cert.log" LM_EMAIL_ENABLED=false \
+    CERTS_TARGETS_FILE="$workdir/certs.txt" CERTS_SCAN_DIR="$workdir/scan" CERTS_SCAN_EXTS=crt \
+    LM_CERT_TIMEOUT_SECS=2 LM_CERT_PARALLEL=4 \
+    bash "$ROOT_DIR/monitors/cert_monitor.sh" 2>/dev/null | grep '^monitor=cert_monitor ' || true
+}
+x509_calls() { wc -l < "$FAKE_CALLS" | tr -d ' '; }
+
+start=$SECONDS
+line="$(run_monitor)"
+elapsed=$((SECONDS - start))
+# Two hung endpoints with a 2s timeout: sequential probing would need >= 4s.
+[ "$elapsed" -lt 4 ] || { echo "probes not concurrent (${elapsed}s)" >&2; exit 1; }
+for kv in status=CRIT checked=6 warn=2 crit=3; do
+  [[ " $line " == *" $kv "* ]] || { echo "expected $kv in: $line" >&2; exit 1; }
+done
+# Results are logged in target order regardless of completion order.
+order="$(grep -o '\] [a-z0-9.]*:[0-9]*' "$workdir/cert.log" | tr -d '] ' | paste -sd, -)"
+[ "$order" = "a.example:443,slow1.example:443,slow2.example:443,down.example:8443,b.example:443" ] || {
+  echo "unexpected result order: $order" >&2; exit 1; }
+grep -q 'slow1.example:443 .*note=connection_failed' "$workdir/cert.log"
+# One x509 call per certificate parse: a.example, b.example (same leaf, probed in parallel) and the file.
+[ "$(x509_calls)" -le 3 ] || { echo "expected <= 3 x509 calls, got $(x509_calls)" >&2; exit 1; }
+
+# Second run: unchanged leaf and file come from the cache.
+line="$(run_monitor)"
+[[ " $line " == *" warn=2 "* ]] || { echo "cached run changed result: $line" >&2; exit 1; }
+[ "$(x509_calls)" -eq 0 ] || { echo "expected cached run to skip x509, got $(x509_calls)" >&2; exit 1; }
+
+# A changed cert file (new mtime) is parsed again; LM_CERT_CACHE=0 disables the cache.
+touch -d '2 minutes ago' "$workdir/scan/file.crt"
+run_monitor >/dev/null
+[ "$(x509_calls)" -eq 1 ] || { echo "expected file re-parse, got $(x509_calls)" >&2; exit 1; }
+line="$(LM_CERT_CACHE=0 run_monitor)"
+[ "$(x509_calls)" -ge 2 ] || { echo "LM_CERT_CACHE=0 still used the cache" >&2; exit 1; }
+
+echo "cert_monitor parallel cache ok"
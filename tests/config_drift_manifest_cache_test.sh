@@ -0,0 +1,53 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# config_drift_monitor manifest cache: unchanged files are not rehashed, changed files are,
+# drift is still detected, and LM_CONFIG_DRIFT_FULL_EVERY forces a periodic full rehash.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+workdir="$(mktemp -d "${TMPDIR:-/tmp}"/lm_drift_cache.XXXXXX)"
+trap 'rm -rf "$workdir"' EXIT
+
+mkdir -p "$workdir/cfg" "$workdir/data/sub" "$workdir/state"
+echo "a=1" > "$workdir/data/a.conf"
+echo "b=1" > "$workdir/data/sub/b.conf"
+echo "c=1" > "$workdir/data/c.conf"
+printf '%s\n' "# comment" "$workdir/data/**" "$workdir/data/*.conf" > "$workdir/cfg/config_paths.txt"
+
+run_drift(){
+  HOME="$workdir" \
+  LM_CFG_DIR="$workdir/cfg" \
+  LM_STATE_DIR="$workdir/state" \
+  LM_LOCKDIR="$workdir" \
+  LM_LOGFILE="$workdir/drift.log" \
+  LM_LOCAL_ONLY=true \
+  LM_EMAIL_ENABLED=false \
+  LINUX_MAINT_LIB="$ROOT_DIR/lib/linux_maint.sh" \
+  "$@" bash "$ROOT_DIR/monitors/config_drift_monitor.sh" 2>/dev/null
+}
+last_stats(){ grep 'manifest files=' "$workdir/drift.log" | tail -n 1; }
+
+out="$(run_drift)"
+echo "$out" | grep -q 'status=SKIP .*reason=baseline_created' || { echo "FAIL first run: $out"; exit 1; }
+last_stats | grep -q 'files=3 rehashed=3 cached=0 .* full=1' || { echo "FAIL first run stats: $(last_stats)"; exit 1; }
+[ "$(wc -l < "$workdir/cfg/baselines/configs/localhost.baseline")" -eq 3 ] || { echo "FAIL baseline size"; exit 1; }
+[ -s "$workdir/state/config_drift/localhost.manifest" ] || { echo "FAIL manifest not written"; exit 1; }
+
+out="$(run_drift)"
+echo "$out" | grep -q 'status=OK .*modified=0 added=0 removed=0' || { echo "FAIL unchanged run: $out"; exit 1; }
+last_stats | grep -q 'files=3 rehashed=0 cached=3 .* full=0' || { echo "FAIL unchanged stats: $(last_stats)"; exit 1; }
+
+echo "a=2" >> "$workdir/data/a.conf"
+echo "d=1" > "$workdir/data/d.conf"
+rm -f "$workdir/data/c.conf"
+out="$(run_drift)"
+echo "$out" | grep -q 'status=WARN .*reason=config_drift_changed modified=1 added=1 removed=1' || { echo "FAIL drift run: $out"; exit 1; }
+last_stats | grep -q 'files=3 rehashed=2 cached=1 ' || { echo "FAIL drift stats: $(last_stats)"; exit 1; }
+
+out="$(run_drift env LM_CONFIG_DRIFT_FULL_EVERY=1)"
+last_stats | grep -q 'rehashed=3 cached=0 .* full=1' || { echo "FAIL full rehash stats: $(last_stats)"; exit 1; }
+
+out="$(run_drift env LM_CONFIG_DRIFT_CACHE=0)"
+last_stats | grep -q 'rehashed=3 cached=0 ' || { echo "FAIL cache disabled stats: $(last_stats)"; exit 1; }
+
+echo "config drift manifest cache ok"
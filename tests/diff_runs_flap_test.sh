@@ -0,0 +1,148 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: `diff --runs N` reads the last N runs (plain and archived, or the run index) once
+# and reports flapping keys apart from keys that stay bad, with time in state and
+# first-seen-bad; the wrapper skips notifications whose only changes are flapping keys.
+
+# Run names are parsed as local time; pin UTC so a DST change cannot shift the day gaps.
+export TZ=UTC
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+# Checkout view with its own .logs so the repo history is left alone.
+tree="$workdir/tree"
+mkdir -p "$tree/.logs" "$workdir/state"
+for name in bin lib monitors tools etc docs run_full_health_monitor.sh; do
+  ln -s "$ROOT_DIR/$name" "$tree/$name"
+done
+logs="$tree/.logs"
+
+# Ten daily runs: web1 disk toggles every run, db1 ntp is CRIT for the last 6 runs.
+# Every stamp derives from one base epoch, so the gaps are exact days.
+: > "$workdir/state/run_index.jsonl"
+base="$(date +%s)"
+for i in $(seq 1 10); do
+  ts="$(date -d "@$((base - (11 - i) * 86400 + 7200))" +%F_%H%M%S)"
+  disk=OK; [ $((i % 2)) -eq 0 ] && disk=WARN
+  ntp=OK; [ "$i" -ge 5 ] && ntp=CRIT
+  f="$logs/full_health_monitor_summary_$ts.log"
+  printf 'monitor=disk_monitor host=web1 status=%s reason=disk_high\nmonitor=ntp_monitor host=db1 status=%s reason=ntp_drift\nmonitor=service_monitor host=web2 status=OK\n' \
+    "$disk" "$ntp" > "$f"
+  printf '{"run_index_version":1,"timestamp":"x","overall":"WARN","exit_code":1,"hosts":{},"summary_file":"%s"}\n' "$f" >> "$workdir/state/run_index.jsonl"
+  last="$f"
+done
+ln -s "$(basename "$last")" "$logs/full_health_monitor_summary_latest.log"
+
+lm() {
+  env NO_COLOR=1 LM_STATE_DIR="$workdir/state" LM_SERVE_SOCKET="$workdir/none.sock" bash "$tree/bin/linux-maint" "$@"
+}
+fail() { echo "$1" >&2; exit 1; }
+
+# Older runs live in the archive; the window reads them in place.
+lm archive --older-than 4d --compress gzip >/dev/null
+
+out="$(lm diff --runs 10 --json)"
+printf '%s' "$out" | python3 "$ROOT_DIR/tools/json_schema_validate.py" "$ROOT_DIR/docs/schemas/diff_runs.json"
+printf '%s' "$out" | python3 -c '
+import json, sys
+o = json.load(sys.stdin)
+assert o["window"] == 10 and len(o["runs"]) == 10, o["runs"]
+assert sum("#" in r["file"] for r in o["runs"]) >= 5, o["runs"]
+e = {(r["monitor"], r["host"]): r for r in o["entities"]}
+disk, ntp, svc = e[("disk_monitor", "web1")], e[("ntp_monitor", "db1")], e[("service_monitor", "web2")]
+assert o["entities"][0]["host"] == "web1", o["entities"][0]
+assert disk["flapping"] and disk["transitions"] == 9 and disk["flap_score"] == 1.0, disk
+assert not ntp["flapping"] and ntp["status"] == "CRIT" and ntp["transitions"] == 1, ntp
+assert ntp["time_in_state_s"] == 5 * 86400 and ntp["bad_runs"] == 6, ntp
+assert ntp["first_seen_bad"] == o["runs"][4]["timestamp"], (ntp, o["runs"][4])
+assert ntp["state_s"] == {"CRIT": 5 * 86400, "OK": 4 * 86400}, ntp["state_s"]
+assert svc["first_seen_bad"] is None and svc["transitions"] == 0, svc
+assert o["counts"] == {"entities": 3, "flapping": 1, "bad": 2}, o["counts"]
+' || fail "diff --runs json: $out"
+
+text="$(lm diff --runs 10)"
+printf '%s\n' "$text" | grep -q '^runs=10 .* entities=3 flapping=1 bad=2$' || fail "text header: $text"
+printf '%s\n' "$text" | grep -q '^- web1 disk_monitor: WARN transitions=9 score=1.00$' || fail "text flapping: $text"
+printf '%s\n' "$text" | grep -q '^- db1 ntp_monitor: CRIT reason=ntp_drift for 5d first_seen_bad=' || fail "text bad: $text"
+[ "$(printf '%s\n' "$text" | grep -c 'web2')" -eq 0 ] || fail "stable OK key in text output"
+
+# The run index gives the same window.
+python3 "$ROOT_DIR/tools/summary_diff.py" --runs 4 --index "$workdir/state/run_index.jsonl" --json \
+  | python3 -c 'import json,sys; o=json.load(sys.stdin); assert o["window"] == 4 and o["counts"]["entities"] == 3, o' \
+  || fail "diff --runs --index"
+# ... including a window that spans sealed segments (3 records per segment).
+python3 - "$ROOT_DIR/lib" "$workdir/state/run_index.jsonl" "$workdir/seg/run_index.jsonl" <<'PY'
+import json, os, sys
+sys.path.insert(0, sys.argv.pop(1))
+import linux_maint_runindex as lmri
+os.makedirs(os.path.dirname(sys.argv[2]))
+idx = lmri.RunIndex(sys.argv[2], 3)
+for line in open(sys.argv[1]):
+    idx.append(json.loads(line), keep=100)
+assert len(idx.segment_files()) == 4, idx.segment_files()
+PY
+python3 "$ROOT_DIR/tools/summary_diff.py" --runs 10 --index "$workdir/seg/run_index.jsonl" --json \
+  | python3 -c 'import json,sys; o=json.load(sys.stdin); assert o["window"] == 10 and len(o["runs"]) == 10, o["runs"]' \
+  || fail "diff --runs --index across segments"
+if lm diff --runs 1 >/dev/null 2>&1; then fail "--runs 1 accepted"; fi
+
+# Two-run diff with flap suppression: the toggle is reported once, not as a new failure.
+printf 'monitor=disk_monitor host=web1 status=OK\nmonitor=ntp_monitor host=db1 status=CRIT reason=ntp_drift\nmonitor=service_monitor host=web2 status=OK\n' \
+  > "$workdir/cur.log"
+pair="$(python3 "$ROOT_DIR/tools/summary_diff.py" "$last" "$workdir/cur.log" --flap-window 10 --history-dir "$logs" --json)"
+printf '%s' "$pair" | python3 "$ROOT_DIR/tools/json_schema_validate.py" "$ROOT_DIR/docs/schemas/diff.json"
+printf '%s' "$pair" | python3 -c '
+import json, sys
+o = json.load(sys.stdin)
+assert o["recovered"] == [] and [f["host"] for f in o["flapping"]] == ["web1"], o
+assert [s["host"] for s in o["still_bad"]] == ["db1"], o
+' || fail "pair diff with flap suppression: $pair"
+pair="$(python3 "$ROOT_DIR/tools/summary_diff.py" "$last" "$workdir/cur.log" --flap-window 10 --history-dir "$logs")"
+printf '%s\n' "$pair" | grep -q '^changes=0 flapping_suppressed=1$' || fail "pair diff text: $pair"
+
+# Wrapper: a run whose only change is a flapping key does not notify (test mode would
+# turn notifications off, so these runs use the real clock).
+wlogs="$workdir/wlogs"
+mkdir -p "$wlogs" "$workdir/mon" "$workdir/bin"
+cat > "$workdir/mon/fixture_check.sh" <<'MON'
+#!/usr/bin/env bash
+. "$LINUX_MAINT_LIB"
+lm_summary fixture_check web1 "$FIXTURE_STATUS"
+MON
+chmod +x "$workdir/mon/fixture_check.sh"
+cat > "$workdir/bin/mail" <<'SH'
+#!/usr/bin/env bash
+cat > /dev/null
+echo sent >> "$MAIL_CALLS"
+SH
+chmod +x "$workdir/bin/mail"
+export MAIL_CALLS="$workdir/mail_calls"
+wrun() {
+  env PATH="$workdir/bin:$PATH" HOME="$workdir" SCRIPTS_DIR="$workdir/mon" LM_MONITORS="fixture_check.sh" \
+    LOG_DIR="$wlogs" LM_CFG_DIR="$workdir/cfg" LM_STATE_DIR="$workdir/wstate" LM_LOCKDIR="$workdir" LM_LOCAL_ONLY=true \
+    LM_COLLECT_FACTS=0 LM_ARCHIVE_AFTER_DAYS=0 LM_NOTIFY=1 LM_NOTIFY_TO=ops@example.com LM_NOTIFY_SUPPRESS_FLAPPING="${2:-1}" \
+    FIXTURE_STATUS="$1" bash "$ROOT_DIR/run_full_health_monitor.sh" >/dev/null 2>&1 || true
+}
+wrun OK
+first="$(find "$wlogs" -maxdepth 1 -name 'full_health_monitor_summary_2*.log' | head -n 1)"
+sleep 1
+[ -n "$first" ] || fail "wrapper wrote no summary: $(ls "$wlogs")"
+for i in $(seq 1 8); do
+  st=OK; [ $((i % 2)) -eq 1 ] && st=WARN
+  sed "s/^monitor=fixture_check host=web1 status=OK/monitor=fixture_check host=web1 status=$st/" "$first" \
+    > "$wlogs/full_health_monitor_summary_1999-12-0${i}_000000.log"
+done
+: > "$MAIL_CALLS"
+wrun WARN
+[ ! -s "$MAIL_CALLS" ] || fail "notified although only a flapping key changed"
+grep -q 'NOTIFY: skipped (only flapping entities changed)' "$wlogs/full_health_monitor_latest.log" || fail "no flapping skip in the wrapper log"
+sleep 1
+wrun OK 0
+[ -s "$MAIL_CALLS" ] || fail "no notification with flap suppression off"
+
+echo "diff runs flap ok"
@@ -0,0 +1,86 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# disk_trend_monitor time-series store: legacy CSV import, fixed-width segments, daily
+# downsampling of old points, and the O(1) least-squares forecast from the index.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+export LM_MODE=repo
+export LM_STATE_DIR="$workdir/state"
+export LM_LOG_DIR="$workdir/logs"
+export STATE_BASE="$LM_STATE_DIR/linux_maint/disk_trend"
+export LM_SERVERLIST="$workdir/servers.txt"
+export LM_EXCLUDED="$workdir/excluded.txt"
+mkdir -p "$STATE_BASE" "$LM_LOG_DIR"
+printf 'testhost\n' > "$LM_SERVERLIST"
+: > "$LM_EXCLUDED"
+
+shim="$workdir/shim"
+mkdir -p "$shim"
+cat > "$shim/ssh" <<'SH'
+#!/usr/bin/env bash
+bash -c "${@: -1}"
+SH
+# 850000 of 1000000 KB used (85%): below the hard thresholds.
+cat > "$shim/df" <<'SH'
+#!/usr/bin/env bash
+cat <<OUT
+Filesystem Type 1024-blocks Used Available Capacity Mounted on
+/dev/sda1 ext4 1000000 850000 150000 85% /
+tmpfs tmpfs 1000 10 990 1% /run
+OUT
+SH
+chmod +x "$shim/ssh" "$shim/df"
+
+run_trend(){
+  PATH="$shim:$PATH" \
+  LINUX_MAINT_LIB="$ROOT_DIR/lib/linux_maint.sh" \
+  LM_LOCKDIR="$workdir" \
+  LM_LOGFILE="$workdir/disk_trend.log" \
+  LM_EMAIL_ENABLED=false \
+  LM_COLLECT_FACTS=0 \
+  bash "$ROOT_DIR/monitors/disk_trend_monitor.sh" 2>/dev/null || true
+}
+
+# Legacy history: "/" grows 12000 KB/day over the last 40 days (one row per day).
+now="$(date +%s)"
+for d in $(seq 40 -1 1); do
+  printf '%s,/,%s,%s\n' "$((now - d * 86400))" "$(( (850000 - 12000 * d) / 10000 ))" "$((850000 - 12000 * d))"
+done > "$STATE_BASE/testhost.csv"
+
+out="$(run_trend)"
+# 150000 KB left at 12000 KB/day -> 12 days: inside WARN_DAYS (14), outside CRIT_DAYS (7).
+printf '%s\n' "$out" | grep -q '^monitor=disk_trend_monitor host=testhost status=WARN .*reason=disk_trend_warn' \
+  || { echo "FAIL expected disk_trend_warn: $out" >&2; exit 1; }
+
+store="$STATE_BASE/testhost.store"
+[ -f "$STATE_BASE/testhost.csv.imported" ] || { echo "FAIL legacy CSV not marked imported" >&2; exit 1; }
+[ ! -f "$STATE_BASE/testhost.csv" ] || { echo "FAIL legacy CSV still active" >&2; exit 1; }
+grep -q '^space|41|.*|/$' "$store/index" || { echo "FAIL index missing / series:" >&2; cat "$store/index" >&2; exit 1; }
+if grep -q '|/run$' "$store/index"; then echo "FAIL excluded fstype stored" >&2; exit 1; fi
+
+# Points older than the raw window are kept as daily means; recent ones as raw segments.
+[ -s "$store/space.%2F.daily" ] || { echo "FAIL no daily segment" >&2; ls -l "$store" >&2; exit 1; }
+ls "$store"/space.%2F.[0-9]* >/dev/null 2>&1 || { echo "FAIL no raw segment" >&2; exit 1; }
+bad="$(cat "$store"/space.%2F.* | awk 'length($0) != 30' | wc -l)"
+[ "$bad" -eq 0 ] || { echo "FAIL segment records are not fixed-width" >&2; exit 1; }
+total="$(cat "$store"/space.%2F.* | wc -l)"
+[[ "$total" -ge 40 && "$total" -le 41 ]] || { echo "FAIL expected 40-41 stored points, got $total" >&2; exit 1; }
+
+# Second run reads only the index (no history re-read) and keeps the forecast.
+out="$(run_trend)"
+printf '%s\n' "$out" | grep -q 'status=WARN .*reason=disk_trend_warn' || { echo "FAIL second run: $out" >&2; exit 1; }
+grep -q '^space|42|' "$store/index" || { echo "FAIL second sample not accumulated" >&2; exit 1; }
+
+# A fresh host only has one point: insufficient history, like before.
+rm -rf "$store" "$STATE_BASE/testhost.csv.imported"
+out="$(run_trend)"
+printf '%s\n' "$out" | grep -q 'status=OK .*note=insufficient_history' || { echo "FAIL fresh host: $out" >&2; exit 1; }
+
+echo "disk trend store ok"
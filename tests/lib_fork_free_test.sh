@@ -0,0 +1,80 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: the library hot paths (lm_info, lm_summary, lm_is_excluded, lm_hosts,
+# lm_ssh_allowed_cmd, lm_for_each_host) run without spawning processes once the
+# node name, exclusion set, allowlist and host list are resolved.
+#  - external commands are counted through logging shims placed first on PATH;
+#  - process creation by the child shell alone is counted with strace (skipped when
+#    strace is missing); markers (cd into two empty dirs) bound the measured loop.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+mkdir -p "$workdir/bin"
+for cmd in date hostname grep tr awk sed tee mkdir dirname paste cat; do
+  real="$(command -v "$cmd")"
+  # shellcheck disable=SC2016  # $EXEC_LOG and "$@" expand in the shim
+  printf '#!/bin/sh\necho %s >> "$EXEC_LOG"\nexec %s "$@"\n' "$cmd" "$real" > "$workdir/bin/$cmd"
+  chmod +x "$workdir/bin/$cmd"
+done
+
+for i in $(seq 1 50); do echo "host$i"; done > "$workdir/servers.txt"
+printf '%s\n' host7 host9 > "$workdir/excluded.txt"
+mkdir -p "$workdir/mark_start" "$workdir/mark_end"
+
+trace=()
+if command -v strace >/dev/null 2>&1; then
+  trace=(strace -f -qq -s 4096 -e "trace=clone,clone3,fork,vfork,chdir" -o "$workdir/strace.log")
+fi
+
+# shellcheck disable=SC2016  # the snippet is expanded by the child shell
+out="$(
+  env -u LM_NODE_NAME PATH="$workdir/bin:$PATH" EXEC_LOG="$workdir/exec.log" HOME="$workdir" \
+    LM_LOGFILE="$workdir/logs/lib.log" LM_SERVERLIST="$workdir/servers.txt" LM_EXCLUDED="$workdir/excluded.txt" \
+    LM_SSH_ALLOWLIST="^echo ,uptime" LM_MAX_PARALLEL=0 LIB="$ROOT_DIR/lib/linux_maint.sh" MARK="$workdir/mark" \
+    ${trace[@]+"${trace[@]}"} bash -c '
+      . "$LIB"
+      noop() { :; }
+      : > "$EXEC_LOG"
+      cd "${MARK}_start"
+      i=0
+      while [ "$i" -lt 200 ]; do
+        lm_info "tick $i"
+        lm_summary "fork_test_$i" "host$i" WARN reason=disk_warn used=91% >/dev/null
+        lm_is_excluded "host$i" || :
+        lm_ssh_allowed_cmd "echo ok" || exit 9
+        lm_hosts >/dev/null
+        i=$((i+1))
+      done
+      lm_for_each_host noop
+      cd "${MARK}_end"
+      echo "hosts=${#_LM_HOSTS[@]}"
+    ' 2>&1
+)"
+
+printf '%s\n' "$out" | grep -q 'hosts=48$' || { echo "unexpected host list: $out" >&2; exit 1; }
+execs="$(sort "$workdir/exec.log" | uniq -c | tr -s ' ' | paste -sd, -)"
+# hostname (node name) and mkdir (log dir) run at most once per process; nothing else runs.
+grep -Ev '^(hostname|mkdir)$' "$workdir/exec.log" >/dev/null && { echo "hot paths ran external commands: $execs" >&2; exit 1; }
+for once in hostname mkdir; do
+  [ "$(grep -c "^$once\$" "$workdir/exec.log" || true)" -le 1 ] || { echo "$once ran more than once: $execs" >&2; exit 1; }
+done
+[ "$(grep -c " - INFO - tick " "$workdir/logs/lib.log")" -eq 200 ] || { echo "log lines missing" >&2; exit 1; }
+grep -q '^[0-9]\{4\}-[0-9][0-9]-[0-9][0-9] [0-9:]\{8\} - INFO - tick 199$' "$workdir/logs/lib.log"
+
+if [ "${#trace[@]}" -gt 0 ]; then
+  # Process creation calls (not "<... resumed>" halves) between the two markers.
+  forks="$(awk '/chdir\(".*\/mark_start"\)/ { on = 1 } /chdir\(".*\/mark_end"\)/ { on = 0 }
+    on && /(^|[ ])(clone|clone3|fork|vfork)\(/ { n++ } END { print n + 0 }' "$workdir/strace.log")"
+  grep -q 'mark_end' "$workdir/strace.log" || { echo "strace markers missing" >&2; exit 1; }
+  # 1000 hot-path calls + a 50-host pool; hostname and mkdir may each spawn once.
+  [ "$forks" -lt 10 ] || { echo "too many process spawns in hot paths: $forks" >&2; exit 1; }
+else
+  echo "strace not found; skipping the process creation count" >&2
+fi
+
+echo "lib fork-free hot paths ok"
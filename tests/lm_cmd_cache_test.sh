@@ -0,0 +1,76 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# Test: lm_has_cmd_remote resolves LM_REMOTE_CMDS in one SSH call, persists the map
+# per host with a TTL, answers later lookups from memory/file, and re-probes when
+# the TTL expires or the host fingerprint changes.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+LIB="$ROOT_DIR/lib/linux_maint.sh"
+
+workdir="$(mktemp -d -p "${TMPDIR:-/tmp}")"
+trap 'rm -rf "$workdir"' EXIT
+mkdir -p "$workdir/bin"
+
+# Fake ssh: logs each call and runs the remote command locally.
+cat > "$workdir/bin/ssh" <<'SH'
+#!/usr/bin/env bash
+echo call >> "$FAKE_SSH_LOG"
+bash -c "${*: -1}"
+SH
+chmod +x "$workdir/bin/ssh"
+
+export PATH="$workdir/bin:$PATH"
+export FAKE_SSH_LOG="$workdir/ssh.log"
+export LM_CMD_CACHE_DIR="$workdir/cmd_cache"
+export LM_REMOTE_CMDS="awk lm_missing_cmd_fixture"
+export LM_SSH_OPTS="-o BatchMode=yes"
+export LM_EMAIL_ENABLED=false
+cache="$LM_CMD_CACHE_DIR/srv1.cmds"
+
+calls(){ if [[ -f "$FAKE_SSH_LOG" ]]; then wc -l < "$FAKE_SSH_LOG" | tr -d ' '; else echo 0; fi; }
+fail(){ echo "$1" >&2; cat "$cache" >&2 2>/dev/null || true; exit 1; }
+
+# 1) Cold: several lookups in one process -> exactly one SSH round trip.
+bash -c ". \"$LIB\"
+lm_has_cmd_remote srv1 awk || exit 10
+lm_has_cmd_remote srv1 lm_missing_cmd_fixture && exit 11
+lm_has_cmd_remote srv1 awk || exit 12
+exit 0" || fail "unexpected lookup result (rc=$?)"
+[[ "$(calls)" -eq 1 ]] || fail "expected 1 ssh call on cold cache, got $(calls)"
+grep -q '^have awk$' "$cache" || fail "cache should record awk as available"
+grep -q '^miss lm_missing_cmd_fixture$' "$cache" || fail "cache should record missing command"
+grep -q '^fp=' "$cache" || fail "cache should record host fingerprint"
+
+# 2) Warm: a new process answers from the cache file without SSH.
+: > "$FAKE_SSH_LOG"
+bash -c ". \"$LIB\"; lm_has_cmd_remote srv1 awk" || fail "awk should be available from cache"
+[[ "$(calls)" -eq 0 ]] || fail "expected no ssh call with warm cache, got $(calls)"
+
+# 3) Expired TTL -> one refresh.
+sed -i 's/^ts=.*/ts=1/' "$cache"
+bash -c ". \"$LIB\"; lm_has_cmd_remote srv1 awk" || fail "awk should be available after refresh"
+[[ "$(calls)" -eq 1 ]] || fail "expected 1 ssh call after TTL expiry, got $(calls)"
+
+# 4) Fingerprint change reported by the run's fact cache -> one refresh.
+: > "$FAKE_SSH_LOG"
+mkdir -p "$workdir/facts"
+cat > "$workdir/facts/srv1.facts" <<'FACTS'
+@@LM_FACT fingerprint BEGIN
+0.0.0-fixture-kernel|1
+@@LM_FACT fingerprint END rc=0
+@@LM_FACT __complete__ END rc=0
+FACTS
+LM_FACTS_DIR="$workdir/facts" bash -c ". \"$LIB\"; lm_has_cmd_remote srv1 awk" || fail "awk should be available after fingerprint refresh"
+[[ "$(calls)" -eq 1 ]] || fail "expected 1 ssh call after fingerprint change, got $(calls)"
+
+# 5) Commands outside LM_REMOTE_CMDS use a direct probe (remembered in memory).
+: > "$FAKE_SSH_LOG"
+bash -c ". \"$LIB\"; lm_has_cmd_remote srv1 sed && lm_has_cmd_remote srv1 sed" || fail "sed should be available"
+[[ "$(calls)" -eq 1 ]] || fail "expected 1 ssh call for unlisted command, got $(calls)"
+
+# 6) LM_CMD_CACHE_TTL=0 keeps the map in memory only.
+LM_CMD_CACHE_TTL=0 bash -c ". \"$LIB\"; lm_has_cmd_remote srv2 awk" || fail "awk should be available on srv2"
+[[ ! -e "$LM_CMD_CACHE_DIR/srv2.cmds" ]] || fail "no cache file expected with TTL=0"
+
+echo "lm cmd cache ok"
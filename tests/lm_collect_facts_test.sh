@@ -0,0 +1,84 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# Test: lm_collect_facts caches one framed probe per host, lm_fact reads sections
+# back, and monitors evaluate cached facts instead of running their own commands.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+LIB="$ROOT_DIR/lib/linux_maint.sh"
+export LINUX_MAINT_LIB="$LIB"
+
+workdir="$(mktemp -d -p "${TMPDIR:-/tmp}")"
+trap 'rm -rf "$workdir"' EXIT
+mkdir -p "$workdir/bin"
+
+# Fake ssh: logs the remote command, runs it locally for srv1, fails for srv2.
+cat > "$workdir/bin/ssh" <<'SH'
+#!/usr/bin/env bash
+cmd="${*: -1}"
+host="${*: -2:1}"
+printf '%s\n' "$host ${cmd%%$'\n'*}" >> "$FAKE_SSH_LOG"
+[[ "$host" == "srv2" ]] && exit 255
+if [[ "${FAKE_SSH_NO_DF:-0}" == "1" && "$cmd" == *"df -P"* && "$cmd" != *"@@LM_FACT"* ]]; then
+  exit 1
+fi
+bash -c "$cmd"
+SH
+chmod +x "$workdir/bin/ssh"
+
+export PATH="$workdir/bin:$PATH"
+export FAKE_SSH_LOG="$workdir/ssh.log"
+export LM_FACTS_DIR="$workdir/facts"
+export LM_FACT_COMMANDS="awk lm_no_such_cmd_fixture"
+export LM_SSH_OPTS="-o BatchMode=yes"
+export LM_EMAIL_ENABLED=false
+
+fail(){
+  echo "$1" >&2
+  echo "--- ssh log ---" >&2; cat "$FAKE_SSH_LOG" >&2 || true
+  exit 1
+}
+
+bash -c ". \"$LIB\"; lm_collect_facts srv1" || fail "expected collect to succeed for srv1"
+[[ -s "$LM_FACTS_DIR/srv1.facts" ]] || fail "expected cached facts file for srv1"
+[[ "$(wc -l < "$FAKE_SSH_LOG")" -eq 1 ]] || fail "expected exactly one ssh round trip for collection"
+
+bash -c ". \"$LIB\"; lm_fact srv1 df_pt" | head -1 | grep -q '^Filesystem' || fail "expected df -PT section"
+bash -c ". \"$LIB\"; lm_fact srv1 loadavg" | grep -Eq '^[0-9.]+ ' || fail "expected loadavg section"
+
+: > "$FAKE_SSH_LOG"
+bash -c ". \"$LIB\"; lm_has_cmd_remote srv1 awk" || fail "awk should be available from facts"
+if bash -c ". \"$LIB\"; lm_has_cmd_remote srv1 lm_no_such_cmd_fixture"; then
+  fail "lm_no_such_cmd_fixture should be missing from facts"
+fi
+[[ ! -s "$FAKE_SSH_LOG" ]] || fail "lm_has_cmd_remote should answer from facts without ssh"
+
+# Failed collection leaves no cache, so readers fall back to live commands.
+if bash -c ". \"$LIB\"; lm_collect_facts srv2"; then
+  fail "expected collect to fail for srv2"
+fi
+[[ ! -e "$LM_FACTS_DIR/srv2.facts" ]] || fail "no facts file expected for srv2"
+if bash -c ". \"$LIB\"; lm_fact srv2 df_pt" >/dev/null; then
+  fail "lm_fact should fail without cached facts"
+fi
+
+# Monitors use cached facts: replace srv1's df -PTi section with a 97% inode usage row,
+# and make live df over ssh fail. inode_monitor must still report CRIT from the cache.
+cat > "$LM_FACTS_DIR/srv1.facts" <<'FACTS'
+@@LM_FACT df_pti BEGIN
+Filesystem     Type  Inodes  IUsed  IFree IUse% Mounted on
+/dev/fixture   ext4  1000    970    30    97%   /data
+@@LM_FACT df_pti END rc=0
+@@LM_FACT __complete__ END rc=0
+FACTS
+printf '%s\n' srv1 > "$workdir/servers.txt"
+: > "$workdir/excluded.txt"
+set +e
+out="$(FAKE_SSH_NO_DF=1 LM_SERVERLIST="$workdir/servers.txt" LM_EXCLUDED="$workdir/excluded.txt" \
+  LM_LOG_DIR="$workdir" LM_LOGFILE="$workdir/inode.log" LM_LOCKDIR="$workdir" \
+  bash "$ROOT_DIR/monitors/inode_monitor.sh" 2>/dev/null)"
+set -e
+printf '%s\n' "$out" | grep -q 'monitor=inode_monitor host=srv1 status=CRIT .*reason=inode_usage_crit' \
+  || fail "expected inode_monitor CRIT from cached facts, got: $out"
+
+echo "lm collect facts ok"
@@ -0,0 +1,83 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+
+# Work-stealing host pool: a slow host must not hold back the others, a host
+# exceeding LM_HOST_TIMEOUT is killed and reported UNKNOWN, and each host logs
+# its queue/exec timings.
+
+REPO_ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+
+export LINUX_MAINT_LIB="$REPO_ROOT/lib/linux_maint.sh"
+# shellcheck disable=SC1090
+. "$LINUX_MAINT_LIB"
+
+workdir="$(mktemp -d "${TMPDIR}"/lm_host_pool.XXXXXX)"
+trap 'rm -rf "$workdir"' EXIT
+
+export LM_LOCKDIR="$workdir"
+export LM_LOGFILE="$workdir/pool.log"
+export LM_SERVERLIST="$workdir/servers.txt"
+export LM_POOL_MONITOR="pool_test"
+printf '%s\n' slow f1 f2 f3 f4 > "$LM_SERVERLIST"
+
+order_file="$workdir/order.txt"
+fn(){
+  local host="$1"
+  [ "$host" = "slow" ] && sleep 2
+  echo "$host" >> "$order_file"
+  return 0
+}
+
+# 1) With two slots, the fast hosts are stolen by the free slot while "slow" runs.
+export LM_MAX_PARALLEL=2
+lm_for_each_host fn
+[ "$(tail -n 1 "$order_file")" = "slow" ] || { echo "FAIL slow host should finish last"; cat "$order_file"; exit 1; }
+[ "$(wc -l < "$order_file")" -eq 5 ] || { echo "FAIL expected 5 hosts"; exit 1; }
+
+# 2) Per-host timing lines.
+n="$(grep -c 'host_pool host=.* queue_ms=[0-9]* exec_ms=[0-9]* limit=' "$LM_LOGFILE" || true)"
+[ "$n" -ge 5 ] || { echo "FAIL expected host_pool timing log lines, got $n"; cat "$LM_LOGFILE"; exit 1; }
+
+# 3) Host deadline: the hung host is killed and reported as UNKNOWN.
+hang(){
+  local host="$1"
+  if [ "$host" = "slow" ]; then
+    sleep 30
+  fi
+  return 0
+}
+export LM_HOST_TIMEOUT=1
+start=$SECONDS
+out="$workdir/timeout.out"
+rc=0
+lm_for_each_host_rc hang > "$out" || rc=$?
+elapsed=$((SECONDS - start))
+unset LM_HOST_TIMEOUT
+[ "$rc" -eq 3 ] || { echo "FAIL timeout expected rc=3 got $rc"; exit 1; }
+[ "$elapsed" -lt 10 ] || { echo "FAIL hung host was not killed (elapsed=${elapsed}s)"; exit 1; }
+grep -q '^monitor=pool_test host=slow status=UNKNOWN .*reason=host_timeout' "$out" \
+  || { echo "FAIL missing host_timeout summary"; cat "$out"; exit 1; }
+
+# 4) A host function that exits (instead of returning) still completes the pool.
+quitter(){
+  [ "$1" = "f2" ] && exit 2
+  return 0
+}
+rc=0
+lm_for_each_host_rc quitter || rc=$?
+[ "$rc" -eq 2 ] || { echo "FAIL exiting host expected rc=2 got $rc"; exit 1; }
+
+# 5) Adaptive limit still runs every host.
+: > "$order_file"
+LM_POOL_ADAPTIVE=1 lm_for_each_host fn
+[ "$(wc -l < "$order_file")" -eq 5 ] || { echo "FAIL adaptive pool skipped hosts"; exit 1; }
+
+# 6) Serial mode runs inline, so per-host functions may update globals.
+export LM_MAX_PARALLEL=0
+seen=0
+count_host(){ seen=$((seen + 1)); }
+lm_for_each_host count_host
+[ "$seen" -eq 5 ] || { echo "FAIL serial globals expected 5 got $seen"; exit 1; }
+
+echo "OK lm_host_pool"
@@ -0,0 +1,97 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# Test: lm_ssh reuses one ControlMaster connection per host, records pool stats,
+# falls back to a plain connection when the master is gone, and closes sockets.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+LIB="$ROOT_DIR/lib/linux_maint.sh"
+
+workdir="$(mktemp -d -p "${TMPDIR:-/tmp}")"
+trap 'rm -rf "$workdir"' EXIT
+mkdir -p "$workdir/bin"
+
+# Fake ssh: logs argv, creates a unix socket for ControlMaster=auto (like a real
+# master), fails with 255 on muxed calls when FAKE_SSH_MUX_FAIL=1 (dead master),
+# on every call when FAKE_SSH_DOWN=1 (unreachable host), and runs "exit 255" as
+# a remote command that exits 255.
+cat > "$workdir/bin/ssh" <<'SH'
+#!/usr/bin/env bash
+printf '%s\n' "$*" >> "$FAKE_SSH_LOG"
+sock="" op=""
+prev=""
+for a in "$@"; do
+  case "$a" in ControlPath=*) sock="${a#ControlPath=}" ;; esac
+  [[ "$prev" == "-O" ]] && op="$a"
+  prev="$a"
+done
+if [[ "$op" == "check" ]]; then
+  [[ "${FAKE_SSH_MUX_FAIL:-0}" != "1" && -S "$sock" ]] && exit 0
+  exit 255
+fi
+if [[ -n "$op" ]]; then rm -f "$sock"; exit 0; fi
+[[ "${FAKE_SSH_DOWN:-0}" == "1" ]] && exit 255
+[[ "${*: -1}" == "exit 255" ]] && exit 255
+if [[ -n "$sock" ]]; then
+  [[ "${FAKE_SSH_MUX_FAIL:-0}" == "1" ]] && exit 255
+  [[ -S "$sock" ]] || python3 -c 'import socket,sys; socket.socket(socket.AF_UNIX).bind(sys.argv[1])' "$sock"
+fi
+echo ok
+SH
+chmod +x "$workdir/bin/ssh"
+
+export PATH="$workdir/bin:$PATH"
+export FAKE_SSH_LOG="$workdir/ssh.log"
+export LM_SSH_MUX=1
+export LM_SSH_MUX_DIR="$workdir/mux"
+export LM_SSH_OPTS="-o BatchMode=yes"
+export LM_EMAIL_ENABLED=false
+
+fail(){
+  echo "$1" >&2
+  echo "--- ssh log ---" >&2; cat "$FAKE_SSH_LOG" >&2 || true
+  echo "--- stats ---" >&2; cat "$LM_SSH_MUX_DIR/stats" >&2 || true
+  exit 1
+}
+
+out="$(bash -c ". \"$LIB\"; lm_ssh srv1 'echo a'; lm_ssh srv1 'echo b'; lm_ssh srv1 'echo c'; lm_ssh srv2 'echo d'; lm_ssh_mux_report")"
+
+grep -q "ControlMaster=auto" "$FAKE_SSH_LOG" || fail "expected ControlMaster=auto in ssh args"
+grep -q "ControlPath=$LM_SSH_MUX_DIR/srv1.sock" "$FAKE_SSH_LOG" || fail "expected per-host control socket"
+[[ -S "$LM_SSH_MUX_DIR/srv1.sock" ]] || fail "expected master socket for srv1"
+printf '%s\n' "$out" | grep -q '^SSH_POOL hosts=2 opened=2 multiplexed=2 fallback=0$' || fail "unexpected pool stats: $out"
+
+# Stale master: lm_ssh must retry without multiplexing and still succeed.
+out="$(FAKE_SSH_MUX_FAIL=1 bash -c ". \"$LIB\"; lm_ssh srv1 'echo e'")"
+[[ "$out" == "ok" ]] || fail "expected fallback to plain ssh to succeed, got: $out"
+[[ ! -e "$LM_SSH_MUX_DIR/srv1.sock" ]] || fail "stale socket should be removed on fallback"
+grep -q '^fallback srv1$' "$LM_SSH_MUX_DIR/stats" || fail "expected fallback stat"
+
+# A remote command exiting 255 over a live master runs once and keeps the master.
+bash -c ". \"$LIB\"; lm_ssh srv2 'echo g'" >/dev/null
+: > "$FAKE_SSH_LOG"
+rc=0
+bash -c ". \"$LIB\"; lm_ssh srv2 'exit 255'" >/dev/null || rc=$?
+[[ "$rc" -eq 255 ]] || fail "expected rc=255 from the remote command, got $rc"
+[[ "$(grep -c 'exit 255' "$FAKE_SSH_LOG")" -eq 1 ]] || fail "remote command exiting 255 was run twice"
+[[ -S "$LM_SSH_MUX_DIR/srv2.sock" ]] || fail "live master socket removed after remote rc=255"
+
+# An unreachable host (no master yet) is connected to once, not again without mux.
+: > "$FAKE_SSH_LOG"
+FAKE_SSH_DOWN=1 bash -c ". \"$LIB\"; lm_ssh srv4 'echo h'" >/dev/null || true
+[[ "$(grep -c 'echo h' "$FAKE_SSH_LOG")" -eq 1 ]] || fail "unreachable host was retried without mux"
+if grep -q '^fallback srv4$' "$LM_SSH_MUX_DIR/stats"; then fail "fallback recorded for an unreachable host"; fi
+
+# Close: every live master receives -O exit and its socket is removed.
+bash -c ". \"$LIB\"; lm_ssh_mux_close"
+grep -q -- "-O exit srv2" "$FAKE_SSH_LOG" || fail "expected ssh -O exit for srv2"
+[[ ! -e "$LM_SSH_MUX_DIR/srv2.sock" ]] || fail "expected srv2 socket removed"
+
+# Opt-out: explicit ControlPath in LM_SSH_OPTS disables the built-in pool.
+: > "$FAKE_SSH_LOG"
+LM_SSH_OPTS="-o ControlPath=none" bash -c ". \"$LIB\"; lm_ssh srv3 'echo f'" >/dev/null
+if grep -q "ControlMaster=auto" "$FAKE_SSH_LOG"; then
+  fail "pool must not override user ControlPath"
+fi
+
+echo "lm_ssh mux ok"
@@ -0,0 +1,140 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: lm_log_scan cursors. log_spike_monitor reads only lines appended since the
+# previous run (byte offset + inode, rotation to <file>.1, truncation) and counts
+# named categories in the same pass; kernel_events_monitor resumes from a journal
+# cursor and falls back to the window when the cursor is rejected; in cursor mode its
+# thresholds apply to a rolling count over KERNEL_WINDOW_HOURS.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+export HOME="$workdir"
+export LINUX_MAINT_LIB="$ROOT_DIR/lib/linux_maint.sh"
+export LM_LOCKDIR="$workdir" LM_STATE_DIR="$workdir/state" LM_LOGFILE="$workdir/lm.log"
+export LM_SERVERLIST="$workdir/servers.txt" LM_EXCLUDED="$workdir/excluded.txt"
+echo localhost > "$LM_SERVERLIST"
+: > "$LM_EXCLUDED"
+
+kv() { printf '%s\n' "$1" | tr ' ' '\n' | sed -n "s/^$2=//p"; }
+expect() {
+  local line="$1" key="$2" want="$3" got
+  got="$(kv "$line" "$key")"
+  [[ "$got" == "$want" ]] || { echo "expected $key=$want, got '$got' in: $line" >&2; exit 1; }
+}
+
+log="$workdir/app.log"
+spike() {
+  LM_LOG_SPIKE_SOURCE=file LM_LOG_SPIKE_FIXTURE_FILE="$log" LM_LOG_SPIKE_CURSOR=1 \
+    LM_LOG_SPIKE_WARN=100 LM_LOG_SPIKE_CRIT=200 \
+    bash "$ROOT_DIR/monitors/log_spike_monitor.sh" 2>/dev/null | grep '^monitor=log_spike_monitor '
+}
+
+printf '%s\n' "kernel: Out of memory: Killed process 1" "app: request failed" "ok line" > "$log"
+line="$(spike)"
+expect "$line" mode window
+expect "$line" errors 2
+expect "$line" new_lines 3
+expect "$line" categories oom:1
+
+# Only the appended lines are read.
+printf '%s\n' "app[9]: segfault at 0 ip 0 sp 0 error 4" "ok again" >> "$log"
+line="$(spike)"
+expect "$line" mode cursor
+expect "$line" errors 1
+expect "$line" new_lines 2
+expect "$line" categories segfault:1
+
+line="$(spike)"
+expect "$line" errors 0
+expect "$line" new_lines 0
+
+# Rotation: the tail of the old file (now app.log.1) and the new file are read once.
+printf '%s\n' "late error before rotate" >> "$log"
+mv "$log" "$log.1"
+printf '%s\n' "fresh error after rotate" "ok" > "$log"
+line="$(spike)"
+expect "$line" errors 2
+expect "$line" new_lines 3
+
+# Truncation (copytruncate): read from the start.
+printf '%s\n' "error after truncate" > "$log"
+line="$(spike)"
+expect "$line" errors 1
+expect "$line" new_lines 1
+
+# Journal cursor: fake journalctl over a record file ("cursor<TAB>message").
+mkdir -p "$workdir/bin"
+cat > "$workdir/bin/journalctl" <<'J'
+#!/usr/bin/env bash
+after="" show=0
+for a in "$@"; do
+  case "$a" in
+    --after-cursor=*) after="${a#--after-cursor=}" ;;
+    --show-cursor) show=1 ;;
+  esac
+done
+echo "$*" >> "$JOURNAL_CALLS"
+if [[ -n "$after" ]] && ! grep -q "^${after}	" "$JOURNAL_DB"; then
+  echo "Failed to seek to cursor: Invalid argument" >&2
+  exit 1
+fi
+out="$(awk -F'\t' -v a="$after" 'a=="" || seen {print} $1==a {seen=1}' "$JOURNAL_DB")"
+if [[ -z "$out" ]]; then echo "-- No entries --"; exit 1; fi
+printf '%s\n' "$out" | cut -f2-
+[[ "$show" -eq 1 ]] && printf -- '-- cursor: %s\n' "$(printf '%s\n' "$out" | tail -n 1 | cut -f1)"
+exit 0
+J
+chmod +x "$workdir/bin/journalctl"
+export JOURNAL_DB="$workdir/journal.tsv" JOURNAL_CALLS="$workdir/journal_calls"
+printf 's=1\tkernel: EXT4-fs error (device sda1): bad block\ns=2\tkernel: usb 1-1: new device\n' > "$JOURNAL_DB"
+
+kernel() {
+  local out
+  out="$(PATH="$workdir/bin:$PATH" bash "$ROOT_DIR/monitors/kernel_events_monitor.sh" 2>/dev/null || true)"
+  printf '%s\n' "$out" | grep '^monitor=kernel_events_monitor '
+}
+line="$(kernel)"
+expect "$line" mode window
+expect "$line" matches 1
+expect "$line" categories fs_error:1
+
+printf 's=3\tkernel: Out of memory: Killed process 77 (java)\ns=4\tkernel: INFO: task kworker blocked for more than 120 seconds.\n' >> "$JOURNAL_DB"
+line="$(kernel)"
+expect "$line" mode cursor
+expect "$line" matches 3
+expect "$line" new_matches 2
+expect "$line" new_lines 2
+expect "$line" rolling_h 24
+expect "$line" window_h ""
+expect "$line" categories oom:1,hung_task:1
+grep -q -- '--after-cursor=s=2' "$JOURNAL_CALLS" || { echo "journal cursor not used" >&2; cat "$JOURNAL_CALLS" >&2; exit 1; }
+
+# No new entries: nothing new counted, cursor kept, the OOM still counts in the window.
+line="$(kernel)"
+expect "$line" mode cursor
+expect "$line" new_matches 0
+expect "$line" matches 3
+expect "$line" status WARN
+cursor_file="$LM_STATE_DIR/log_cursors/kernel_events_monitor_localhost.cursor"
+grep -qx 'cursor=j s=4' "$cursor_file"
+
+# Once those runs are older than the window, the host is OK again.
+sed -i -E 's/^hist=[0-9]+ /hist=1000 /' "$cursor_file"
+line="$(kernel)"
+expect "$line" matches 0
+expect "$line" status OK
+if grep -q '^hist=' "$cursor_file"; then echo "expired window history kept" >&2; exit 1; fi
+
+# Rejected cursor (journal vacuumed/rotated): fall back to the window.
+printf 's=9\tkernel: I/O error, dev sdb, sector 42\n' > "$JOURNAL_DB"
+line="$(kernel)"
+expect "$line" mode window
+expect "$line" matches 1
+expect "$line" categories io_error:1
+
+echo "log scan cursor ok"
@@ -0,0 +1,103 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: network_monitor sends one generated script per source host, runs that
+# host's targets concurrently (bounded by LM_NETWORK_FANOUT) and applies the
+# ping/tcp/http thresholds locally, in targets-file order.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+export HOME="$workdir"
+export LINUX_MAINT_LIB="$ROOT_DIR/lib/linux_maint.sh"
+export LM_LOCKDIR="$workdir" LM_STATE_DIR="$workdir/state" LM_EMAIL_ENABLED=false
+export LM_SERVERLIST="$workdir/servers.txt" LM_EXCLUDED="$workdir/excluded.txt"
+export LM_SSH_MUX=0 LM_CMD_CACHE_TTL=0
+printf '%s\n' web1 > "$LM_SERVERLIST"
+: > "$LM_EXCLUDED"
+
+# Stand-ins: ssh runs the remote command locally (and records it); ping logs its
+# start/end and reports the loss encoded in the target name after 0.5s; curl answers
+# 200 or 503; nc fails.
+mkdir -p "$workdir/bin"
+cat > "$workdir/bin/ssh" <<'SH'
+#!/usr/bin/env bash
+cmd="${*: -1}"
+printf '%s\n' "$cmd" | head -n 1 >> "$SSH_CALLS"
+exec bash -c "$cmd"
+SH
+cat > "$workdir/bin/ping" <<'SH'
+#!/usr/bin/env bash
+t="${*: -1}"; loss=0
+[[ "$t" =~ loss([0-9]+) ]] && loss="${BASH_REMATCH[1]}"
+echo "$(date +%s%N) 1" >> "$PING_LOG"
+sleep 0.5
+echo "$(date +%s%N) -1" >> "$PING_LOG"
+echo "3 packets transmitted, 3 received, ${loss}% packet loss, time 2003ms"
+echo "rtt min/avg/max/mdev = 10.1/20.4/30.2/1.0 ms"
+SH
+cat > "$workdir/bin/curl" <<'SH'
+#!/usr/bin/env bash
+case "${*: -1}" in
+  *down*) printf '503 0.120' ;;
+  *) printf '200 0.050' ;;
+esac
+SH
+cat > "$workdir/bin/nc" <<'SH'
+#!/usr/bin/env bash
+exit 1
+SH
+chmod +x "$workdir/bin/"*
+export PATH="$workdir/bin:$PATH" SSH_CALLS="$workdir/ssh_calls" PING_LOG="$workdir/ping.log"
+
+targets="$workdir/network_targets.txt"
+{
+  for i in 1 2 3 4 5; do echo "web1,ping,ok$i.example"; done
+  echo "web1,ping,loss60.example"
+  echo "web1,tcp,127.0.0.1:1"
+  echo "*,http,https://svc.example/health"
+  echo "web1,http,https://down.example/,expect=200"
+  echo "web1,ping,bad target"
+} > "$targets"
+
+run_monitor() {
+  : > "$SSH_CALLS"
+  : > "$workdir/net.log"
+  : > "$PING_LOG"
+  TARGETS="$targets" LM_LOGFILE="$workdir/net.log" bash "$ROOT_DIR/monitors/network_monitor.sh" 2>/dev/null | grep '^monitor=network_monitor host=web1 ' || true
+}
+
+# Most pings in flight at once, from the stand-in's own start/end log (not wall clock).
+max_in_flight() { sort -n -k1,1 -k2,2 "$PING_LOG" | awk '{ n += $2; if (n > m) m = n } END { print m + 0 }'; }
+
+line="$(LM_NETWORK_FANOUT=8 run_monitor)"
+inflight="$(max_in_flight)"
+[ "$inflight" -ge 2 ] || { echo "targets not probed concurrently (max in flight: $inflight)" >&2; exit 1; }
+[[ "$line" == *" checked=10 "* ]] || { echo "unexpected summary: $line" >&2; exit 1; }
+probes="$(grep -c '^_fanout=' "$SSH_CALLS" || true)"
+[ "$probes" -eq 1 ] || { echo "expected one batched ssh call, got $probes" >&2; cat "$SSH_CALLS" >&2; exit 1; }
+
+log="$(sed 's/^.* - \[web1\] //' "$workdir/net.log")"
+expect_log() { grep -q -- "$1" <<<"$log" || { echo "missing log line: $1" >&2; printf '%s\n' "$log" >&2; exit 1; }; }
+expect_log '\[OK\] ping ok1.example loss=0% avg=20ms'
+expect_log '\[CRIT\] ping loss60.example loss=60% avg=20ms note=loss_ge_50%'
+expect_log '\[CRIT\] tcp 127.0.0.1:1 unreachable (nc)'
+expect_log '\[OK\] http https://svc.example/health code=200 ms=50'
+expect_log '\[CRIT\] http https://down.example/ code=503 ms=120 note=bad_status:503'
+expect_log "invalid ping target 'bad target'"
+# Results are evaluated in targets-file order.
+order="$(printf '%s\n' "$log" | grep -o '^\[[A-Z]*\] [a-z]* [^ ]*' | awk '{print $3}' | paste -sd' ' -)"
+[ "$order" = "ok1.example ok2.example ok3.example ok4.example ok5.example loss60.example 127.0.0.1:1 https://svc.example/health https://down.example/" ] || {
+  echo "unexpected order: $order" >&2; exit 1; }
+
+# Fan-out of 2: never more than two pings in flight.
+LM_NETWORK_FANOUT=2 run_monitor >/dev/null
+inflight="$(max_in_flight)"
+if [ "$(grep -c ' 1$' "$PING_LOG")" -ne 6 ] || [ "$inflight" -gt 2 ]; then
+  echo "LM_NETWORK_FANOUT=2 not enforced (max in flight: $inflight)" >&2; exit 1
+fi
+
+echo "network monitor batch ok"
@@ -0,0 +1,107 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: the wrapper probes every host once before monitors run; monitors skip hosts
+# the sweep found down (one UNKNOWN reason=ssh_unreachable line each, no SSH call)
+# and the circuit breaker takes a host out mid-run after consecutive connection
+# failures (ssh rc=255; timeouts of a slow command do not count). A lost sweep probe
+# is retried. The final host state is published to $LM_STATE_DIR/host_state.tsv.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+mon_dir="$workdir/monitors"
+mkdir -p "$mon_dir" "$workdir/logs" "$workdir/state" "$workdir/cfg" "$workdir/bin"
+
+# ssh stand-in: web1 answers, slow1 answers after 0.3s, dead1 hangs,
+# flaky1 answers its first call only (then connection failures, rc=255),
+# lossy1 loses its first probe (rc=255), hang1 hangs on its 2nd and 3rd call.
+cat > "$workdir/bin/ssh" <<'SH'
+#!/usr/bin/env bash
+host="${*: -2:1}"
+echo "$host" >> "$SSH_CALLS"
+n="$(grep -c "^$host\$" "$SSH_CALLS")"
+case "$host" in
+  slow1) sleep 0.3 ;;
+  dead1) exec sleep 30 ;;
+  flaky1) [ "$n" -gt 1 ] && exit 255 ;;
+  lossy1) [ "$n" -eq 1 ] && exit 255 ;;
+  hang1) [ "$n" -eq 2 ] || [ "$n" -eq 3 ] && exec sleep 30 ;;
+esac
+exec bash -c "${*: -1}"
+SH
+chmod +x "$workdir/bin/ssh"
+printf '%s\n' web1 slow1 dead1 flaky1 lossy1 hang1 > "$workdir/servers.txt"
+: > "$workdir/excluded.txt"
+
+for m in mon_a mon_b mon_c; do
+  cat > "$mon_dir/$m.sh" <<MON
+#!/usr/bin/env bash
+. "\$LINUX_MAINT_LIB"
+LM_LOGFILE="$workdir/logs/$m.log"
+check() {
+  if lm_ssh "\$1" "echo hi" >/dev/null; then
+    lm_summary $m "\$1" OK
+  else
+    lm_summary $m "\$1" UNKNOWN reason=ssh_unreachable
+    return 3
+  fi
+}
+lm_for_each_host_rc check
+MON
+done
+chmod +x "$mon_dir/"*.sh
+
+export SSH_CALLS="$workdir/ssh_calls"
+: > "$SSH_CALLS"
+start=$SECONDS
+rc=0
+env PATH="$workdir/bin:$PATH" HOME="$workdir" LM_TEST_MODE=1 SCRIPTS_DIR="$mon_dir" LM_MONITORS="mon_a.sh mon_b.sh mon_c.sh" \
+  LOG_DIR="$workdir/logs" SUMMARY_DIR="$workdir" SUMMARY_FILE="$workdir/summary.log" \
+  LM_STATE_DIR="$workdir/state" LM_CFG_DIR="$workdir/cfg" LM_NOTIFY=0 LM_SSH_MUX=0 LM_COLLECT_FACTS=0 \
+  LM_SERVERLIST="$workdir/servers.txt" LM_EXCLUDED="$workdir/excluded.txt" LM_CMD_CACHE_TTL=0 \
+  LM_REACH_TIMEOUT=1 LM_REACH_SLOW_MS=200 LM_BREAKER_THRESHOLD=2 LM_SSH_TIMEOUT=1 \
+  bash "$ROOT_DIR/run_full_health_monitor.sh" >/dev/null 2>"$workdir/err.log" || rc=$?
+elapsed=$((SECONDS - start))
+
+[ "$rc" -eq 3 ] || { echo "expected rc=3 (down hosts are UNKNOWN), got $rc" >&2; cat "$workdir/err.log" >&2; exit 1; }
+# A hung host costs one sweep probe and its retry, not one SSH timeout per monitor.
+[ "$elapsed" -lt 12 ] || { echo "run took ${elapsed}s" >&2; exit 1; }
+
+log="$(cat "$workdir/logs/full_health_monitor_latest.log")"
+expect() { printf '%s\n' "$log" | grep -q -- "$1" || { echo "missing: $1" >&2; printf '%s\n' "$log" >&2; exit 1; }; }
+expect '] REACHABILITY hosts=6 up=3 slow=2 down=1 ms=[0-9]*$'
+expect '] CIRCUIT_BREAKER tripped=1 hosts=flaky1$'
+
+calls() { grep -c "^$1\$" "$SSH_CALLS" || true; }
+[ "$(calls dead1)" -eq 2 ] || { echo "dead1 probed $(calls dead1) times" >&2; exit 1; }
+[ "$(calls lossy1)" -eq 5 ] || { echo "lossy1 probed $(calls lossy1) times" >&2; exit 1; }
+[ "$(calls web1)" -eq 4 ] || { echo "web1 probed $(calls web1) times" >&2; exit 1; }
+# Sweep + two failed monitor calls trip the breaker; mon_c never connects.
+[ "$(calls flaky1)" -eq 3 ] || { echo "flaky1 probed $(calls flaky1) times" >&2; exit 1; }
+
+for m in mon_a mon_b mon_c; do
+  grep -q "^monitor=$m host=dead1 status=UNKNOWN .*reason=ssh_unreachable host_state=down" "$workdir/summary.log" \
+    || { echo "$m: missing ssh_unreachable line for dead1" >&2; cat "$workdir/summary.log" >&2; exit 1; }
+  [ "$(grep -c "^monitor=$m host=" "$workdir/summary.log")" -eq 6 ] || { echo "$m: expected one line per host" >&2; exit 1; }
+  grep -q "^monitor=$m host=lossy1 status=OK" "$workdir/summary.log" || { echo "$m: lossy1 not checked" >&2; exit 1; }
+done
+grep -q '^monitor=mon_b host=flaky1 status=UNKNOWN .*reason=ssh_unreachable' "$workdir/summary.log"
+if grep -q '^monitor=mon_b host=flaky1 .*host_state=down' "$workdir/summary.log"; then echo "mon_b skipped flaky1 before the breaker tripped" >&2; exit 1; fi
+grep -q '^monitor=mon_c host=flaky1 status=UNKNOWN .*host_state=down' "$workdir/summary.log"
+grep -q '^monitor=mon_c host=slow1 status=OK' "$workdir/summary.log"
+# Two timed-out commands on hang1 do not trip the breaker: mon_c still connects.
+grep -q '^monitor=mon_c host=hang1 status=OK' "$workdir/summary.log" \
+  || { echo "timeouts tripped the breaker for hang1" >&2; cat "$workdir/summary.log" >&2; exit 1; }
+
+state="$(cat "$workdir/state/host_state.tsv")"
+printf '%s\n' "$state" | grep -q $'^slow1\tslow\t[0-9]*\tsweep$'
+printf '%s\n' "$state" | grep -q $'^dead1\tdown\t[0-9]*\tsweep$'
+printf '%s\n' "$state" | grep -q $'^flaky1\tdown\t[0-9]*\tbreaker$'
+printf '%s\n' "$state" | grep -q $'^web1\tup\t[0-9]*\tsweep$'
+printf '%s\n' "$state" | grep -q $'^hang1\tup\t[0-9]*\tsweep$'
+
+echo "reachability sweep and circuit breaker ok"
@@ -0,0 +1,149 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: monitors that declare lm_result_cache re-emit per-host results within the TTL
+# (tagged cached=1 age_s=N) without contacting the host; the key file, --refresh,
+# --no-cache, UNKNOWN results and LRU eviction behave as documented; connection
+# failures are never stored and lm_result_cache_effect calls replay on a hit.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+mon_dir="$workdir/monitors"
+mkdir -p "$mon_dir" "$workdir/logs" "$workdir/state" "$workdir/cfg" "$workdir/bin"
+
+# ssh stand-in: logs "<host> <command>" and runs the command locally.
+cat > "$workdir/bin/ssh" <<'SH'
+#!/usr/bin/env bash
+echo "${*: -2:1} ${*: -1}" >> "$SSH_CALLS"
+exec bash -c "${*: -1}"
+SH
+chmod +x "$workdir/bin/ssh"
+printf '%s\n' web1 web2 db1 > "$workdir/servers.txt"
+: > "$workdir/excluded.txt"
+echo "threshold=5" > "$workdir/cfg/slow.conf"
+
+# slow_check caches (key: slow.conf); db1 is UNKNOWN and must never be cached.
+cat > "$mon_dir/slow_check.sh" <<MON
+#!/usr/bin/env bash
+. "\$LINUX_MAINT_LIB"
+LM_LOGFILE="$workdir/logs/slow_check.log"
+check() {
+  lm_ssh "\$1" "echo slow" >/dev/null
+  if [ "\$1" = db1 ]; then
+    lm_summary slow_check "\$1" UNKNOWN reason=collect_failed
+    return 3
+  fi
+  lm_summary slow_check "\$1" WARN reason=updates_pending total=4
+  return 1
+}
+lm_result_cache 3600 "$workdir/cfg/slow.conf"
+lm_for_each_host_rc check
+MON
+# fast_check never caches.
+cat > "$mon_dir/fast_check.sh" <<MON
+#!/usr/bin/env bash
+. "\$LINUX_MAINT_LIB"
+LM_LOGFILE="$workdir/logs/fast_check.log"
+check() { lm_ssh "\$1" "echo fast" >/dev/null; lm_summary fast_check "\$1" OK; }
+lm_for_each_host_rc check
+MON
+# fx_check: web1 is unreachable (never cached); web2 records a side effect whose
+# arguments carry a tab, a newline and a backslash.
+cat > "$mon_dir/fx_check.sh" <<MON
+#!/usr/bin/env bash
+. "\$LINUX_MAINT_LIB"
+LM_LOGFILE="$workdir/logs/fx_check.log"
+note() { printf '%s|%s\n' "\$1" "\$2" >> "$workdir/effects"; echo "noise"; }
+check() {
+  lm_ssh "\$1" "echo slow" >/dev/null
+  case "\$1" in
+    web1) lm_summary fx_check "\$1" CRIT reason=ssh_unreachable; return 2 ;;
+    db1) lm_summary fx_check "\$1" UNKNOWN reason=collect_failed; return 3 ;;
+  esac
+  lm_result_cache_effect note "\$1" \$'a\tb\nc\\\\d'
+  lm_summary fx_check "\$1" WARN reason=new_user
+  return 1
+}
+lm_result_cache 3600
+lm_for_each_host_rc check
+MON
+chmod +x "$mon_dir/"*.sh
+
+export SSH_CALLS="$workdir/ssh_calls"
+run_wrapper() {
+  : > "$SSH_CALLS"
+  local rc=0
+  env PATH="$workdir/bin:$PATH" HOME="$workdir" LM_TEST_MODE=1 SCRIPTS_DIR="$mon_dir" LM_MONITORS="slow_check.sh fast_check.sh" \
+    LOG_DIR="$workdir/logs" SUMMARY_DIR="$workdir" SUMMARY_FILE="$workdir/summary.log" \
+    LM_STATE_DIR="$workdir/state" LM_CFG_DIR="$workdir/cfg" LM_NOTIFY=0 LM_SSH_MUX=0 LM_COLLECT_FACTS=0 LM_REACH_SWEEP=0 \
+    LM_SERVERLIST="$workdir/servers.txt" LM_EXCLUDED="$workdir/excluded.txt" LM_CMD_CACHE_TTL=0 \
+    "$@" bash "$ROOT_DIR/run_full_health_monitor.sh" >/dev/null 2>"$workdir/err.log" || rc=$?
+  [ "$rc" -eq 3 ] || { echo "expected rc=3, got $rc" >&2; cat "$workdir/err.log" >&2; exit 1; }
+}
+slow_calls() { grep -c ' echo slow$' "$SSH_CALLS" || true; }
+report() { grep -o 'RESULT_CACHE .*' "$workdir/logs/full_health_monitor_latest.log"; }
+fail() { echo "$1" >&2; cat "$workdir/summary.log" >&2; exit 1; }
+
+# 1) Cold cache: every host runs; web1/web2 are stored, db1 (UNKNOWN) is not.
+run_wrapper
+[ "$(slow_calls)" -eq 3 ] || fail "cold run: expected 3 slow_check calls, got $(slow_calls)"
+grep -q 'cached=1' "$workdir/summary.log" && fail "cold run emitted cached lines"
+[ "$(report)" = "RESULT_CACHE hits=0 misses=3 stored=2 evicted=0" ] || fail "cold run: $(report)"
+[ -f "$workdir/state/result_cache/slow_check/web1" ] && [ ! -e "$workdir/state/result_cache/slow_check/db1" ]
+
+# 2) Warm cache: web1/web2 come from the cache; db1 and fast_check still run.
+run_wrapper
+[ "$(slow_calls)" -eq 1 ] || fail "warm run: expected only db1 to be probed, got $(slow_calls)"
+grep -q '^db1 echo slow$' "$SSH_CALLS" || fail "db1 not probed"
+grep -q '^monitor=slow_check host=web1 status=WARN .*total=4 cached=1 age_s=[0-9]*$' "$workdir/summary.log" || fail "missing cached web1 line"
+grep -q '^monitor=slow_check host=db1 status=UNKNOWN' "$workdir/summary.log" || fail "missing db1 line"
+grep -q '^monitor=fast_check host=web1 status=OK' "$workdir/summary.log" || fail "missing fast_check line"
+[ "$(grep -c ' echo fast$' "$SSH_CALLS")" -eq 3 ] || fail "fast_check should not be cached"
+[ "$(report)" = "RESULT_CACHE hits=2 misses=1 stored=0 evicted=0" ] || fail "warm run: $(report)"
+
+# Parallel host pools serve the same entries.
+run_wrapper LM_MAX_PARALLEL=3
+[ "$(slow_calls)" -eq 1 ] || fail "parallel warm run: probed $(slow_calls) hosts"
+[ "$(grep -c '^monitor=slow_check host=web[12] .* cached=1 age_s=' "$workdir/summary.log")" -eq 2 ] || fail "parallel: missing cached lines"
+
+# 3) --refresh / --no-cache bypass the entries.
+run_wrapper LM_RESULT_CACHE_REFRESH=slow_check
+[ "$(slow_calls)" -eq 3 ] || fail "refresh run probed $(slow_calls) hosts"
+run_wrapper LM_RESULT_CACHE=0
+[ "$(slow_calls)" -eq 3 ] || fail "no-cache run probed $(slow_calls) hosts"
+grep -q 'cached=1' "$workdir/summary.log" && fail "no-cache run emitted cached lines"
+
+# 4) A changed key file, an expired entry or a TTL override of 0 invalidates the entries.
+echo "threshold=6" > "$workdir/cfg/slow.conf"
+run_wrapper
+[ "$(slow_calls)" -eq 3 ] || fail "key change: probed $(slow_calls) hosts"
+sed -i '1s/ ts=[0-9]*/ ts=1000/' "$workdir/state/result_cache/slow_check/web1"
+run_wrapper
+[ "$(slow_calls)" -eq 2 ] || fail "expired entry: probed $(slow_calls) hosts"
+run_wrapper LM_RESULT_CACHE_TTL_MAP="other=5,slow_check=0"
+[ "$(slow_calls)" -eq 3 ] || fail "ttl=0: probed $(slow_calls) hosts"
+
+# 5) LRU bound: only the most recently used entry survives.
+run_wrapper LM_RESULT_CACHE_MAX=1
+[ "$(find "$workdir/state/result_cache" -type f | wc -l)" -eq 1 ] || fail "LRU bound not applied"
+report | grep -q 'evicted=1$' || fail "eviction not reported: $(report)"
+
+# 6) Connection failures are not stored; recorded side effects replay on a hit.
+rm -rf "$workdir/state/result_cache"
+: > "$workdir/effects"
+run_wrapper LM_MONITORS=fx_check.sh
+[ "$(report)" = "RESULT_CACHE hits=0 misses=3 stored=1 evicted=0" ] || fail "fx cold run: $(report)"
+[ ! -e "$workdir/state/result_cache/fx_check/web1" ] || fail "ssh_unreachable result was cached"
+run_wrapper LM_MONITORS=fx_check.sh
+[ "$(slow_calls)" -eq 2 ] || fail "fx warm run: probed $(slow_calls) hosts"
+grep -q '^web1 echo slow$' "$SSH_CALLS" || fail "unreachable host not re-probed"
+grep -q '^monitor=fx_check host=web2 .* cached=1 age_s=' "$workdir/summary.log" || fail "fx: missing cached web2 line"
+expected="$(printf 'web2|a\tb\nc\\d')"
+[ "$(cat "$workdir/effects")" = "$expected"$'\n'"$expected" ] || { echo "effects not replayed verbatim:" >&2; cat -A "$workdir/effects" >&2; exit 1; }
+grep -q noise "$workdir/summary.log" && fail "replayed effect output leaked into the summary"
+
+echo "result cache ok"
@@ -0,0 +1,128 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: `linux-maint archive` moves old runs into compressed day bundles and every
+# reader (status --since/--last, trend, runtimes, history, diff) returns the same
+# results from archived runs; the wrapper archives after a run; trend --last N
+# does not open bundles older than the newest N runs.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+# Checkout view with its own .logs so the repo history is left alone.
+tree="$workdir/tree"
+mkdir -p "$tree/.logs" "$workdir/state"
+for name in bin lib monitors tools etc docs run_full_health_monitor.sh; do
+  ln -s "$ROOT_DIR/$name" "$tree/$name"
+done
+logs="$tree/.logs"
+
+# One run per day for 20 days; the newest is the latest run.
+for d in $(seq 20 -1 1); do
+  ts="$(date -d "-$d days +2 hours" +%F_%H%M%S)"
+  printf 'monitor=disk_monitor host=web%d status=WARN reason=disk_high\nmonitor=ntp_monitor host=web1 status=OK\n' "$d" \
+    > "$logs/full_health_monitor_summary_$ts.log"
+  printf '=== Running disk_monitor.sh ===\nRUNTIME monitor=disk_monitor ms=%d\n' "$((d * 10))" > "$logs/full_health_monitor_$ts.log"
+  last_ts="$ts"
+done
+ln -s "full_health_monitor_summary_$last_ts.log" "$logs/full_health_monitor_summary_latest.log"
+printf 'overall=WARN\nexit_code=1\n' > "$logs/last_status_full"
+summaries=("$logs"/full_health_monitor_summary_2*.log)
+old_summary="${summaries[0]}"
+printf '{"run_index_version":1,"timestamp":"x","overall":"WARN","exit_code":1,"hosts":{"ok":1,"warn":1,"crit":0,"unknown":0,"skipped":0},"summary_file":"%s"}\n' \
+  "$old_summary" > "$workdir/state/run_index.jsonl"
+
+lm() {
+  env NO_COLOR=1 LM_STATE_DIR="$workdir/state" LM_SERVE_SOCKET="$workdir/none.sock" bash "$tree/bin/linux-maint" "$@"
+}
+fail() { echo "$1" >&2; exit 1; }
+views() {
+  lm trend --json --last 100 | python3 -c 'import json,sys; o=json.load(sys.stdin); print(len(o["runs"]), sorted(o["totals"].items()), o["reasons"])'
+  lm status --json --since 30d | python3 -c 'import json,sys; print(sorted(json.load(sys.stdin)["totals"].items()))'
+  lm status --last 3 | sed 's/ file=.*//'
+  lm runtimes --json --last 30 | python3 -c 'import json,sys; print([(r["monitor"], r["ms"]) for r in json.load(sys.stdin)["rows"]])'
+}
+
+views > "$workdir/before.txt"
+index_lines="$(wc -l < "$logs/trend_index.jsonl")"
+
+out="$(lm archive --older-than 7d --compress gzip --json)"
+printf '%s' "$out" | python3 -c 'import json,sys; o=json.load(sys.stdin); assert o["archived"] == 26 and o["codec"] == "gzip", o' \
+  || fail "archive: $out"
+summaries=("$logs"/full_health_monitor_summary_2*.log)
+[ "${#summaries[@]}" -eq 7 ] || fail "plain summaries left: ${summaries[*]}"
+bundles=("$logs"/archive/runs-*.gz)
+[ "${#bundles[@]}" -eq 13 ] || fail "bundles: ${bundles[*]}"
+[ ! -e "$old_summary" ] || fail "old summary not archived"
+
+views > "$workdir/after.txt"
+diff -u "$workdir/before.txt" "$workdir/after.txt" || fail "readers differ after archiving"
+[ "$(wc -l < "$logs/trend_index.jsonl")" -eq "$index_lines" ] || fail "trend re-parsed archived runs"
+
+# history points at the archived copy; diff and --cat read it in place.
+ref="$(lm history --json --last 1 | python3 -c 'import json,sys; print(json.load(sys.stdin)["runs"][0]["summary_file"])')"
+case "$ref" in
+  "$logs"/archive/runs-*.gz\#"$(basename "$old_summary")") ;;
+  *) fail "history summary_file: $ref";;
+esac
+lm archive --cat "$ref" | grep -q '^monitor=disk_monitor host=web20 status=WARN' || fail "archive --cat $ref"
+lm archive --cat "$old_summary" | grep -q 'host=web20' || fail "archive --cat of an archived plain path"
+diff_out="$(python3 "$ROOT_DIR/tools/summary_diff.py" "$ref" "$logs/full_health_monitor_summary_latest.log" --json)"
+printf '%s' "$diff_out" | python3 -c 'import json,sys; o=json.load(sys.stdin); assert [(c["type"], c["cur"]["host"]) for c in o["changed"]] == [("new", "web1")], o' \
+  || fail "diff against an archived run: $diff_out"
+[ "$(lm archive --list --last 10 | grep -c '#')" -eq 3 ] || fail "archive --list: $(lm archive --list --last 10)"
+
+# Re-running finds nothing left to archive.
+out="$(lm archive --older-than 7d --compress xz --json)"
+printf '%s' "$out" | python3 -c 'import json,sys; assert json.load(sys.stdin)["archived"] == 0' || fail "rerun: $out"
+
+# Bundles older than the newest N runs are not opened; xz bundles read back.
+python3 - "$ROOT_DIR/lib" "$logs" "$workdir/xz" <<'PY'
+import os, shutil, sys, time
+sys.path.insert(0, sys.argv[1])
+import linux_maint_archive as lma
+logs, xz = sys.argv[2], sys.argv[3]
+opened = []
+real = lma._load_bundle
+lma._load_bundle = lambda a, d: opened.append(d) or real(a, d)
+rows = lma.list_runs(logs, "summary", limit=8)
+assert len(rows) == 8 and "#" in rows[-1][1], rows
+assert len(opened) == 1, opened
+lma._load_bundle = real
+
+os.makedirs(xz)
+for i in range(3):
+    name = "full_health_monitor_summary_2020-01-0%d_000000.log" % (i + 1)
+    with open(os.path.join(xz, name), "w") as f:
+        f.write("monitor=m host=h%d status=OK\n" % i * 200)
+st = lma.archive_runs(xz, 86400, codec="xz")
+assert st["archived"] == 3 and st["codec"] in ("xz", "gzip"), st
+refs = [r for _, r in lma.list_runs(xz, "summary")]
+assert len(refs) == 3 and all("#" in r for r in refs), refs
+with lma.open_text(refs[0]) as f:
+    assert f.read() == "monitor=m host=h2 status=OK\n" * 200
+st = lma.archive_runs(xz, 0, keep_days=30, now=time.time())
+assert st["pruned"] == 3 and not lma.list_runs(xz, "summary"), st
+PY
+
+# The wrapper archives after a run; runs of the frozen test clock stay plain.
+wlogs="$workdir/wlogs"
+mkdir -p "$wlogs" "$workdir/mon"
+cp "$logs/full_health_monitor_summary_latest.log" "$wlogs/full_health_monitor_summary_1999-12-01_000000.log"
+cat > "$workdir/mon/fixture_check.sh" <<'MON'
+#!/usr/bin/env bash
+. "$LINUX_MAINT_LIB"
+lm_summary fixture_check localhost OK
+MON
+chmod +x "$workdir/mon/fixture_check.sh"
+env HOME="$workdir" LM_TEST_MODE=1 SCRIPTS_DIR="$workdir/mon" LM_MONITORS="fixture_check.sh" LOG_DIR="$wlogs" \
+  LM_CFG_DIR="$workdir/cfg" LM_STATE_DIR="$workdir/wstate" LM_LOCKDIR="$workdir" LM_LOCAL_ONLY=true LM_COLLECT_FACTS=0 LM_ARCHIVE_AFTER_DAYS=7 \
+  LM_ARCHIVE_COMPRESS=gzip bash "$ROOT_DIR/run_full_health_monitor.sh" >/dev/null 2>&1 || true
+[ -f "$wlogs/archive/runs-1999-12-01.idx" ] || fail "wrapper did not archive: $(ls -R "$wlogs")"
+ls "$wlogs"/full_health_monitor_summary_20*.log >/dev/null 2>&1 || fail "wrapper archived its own run"
+grep -q '^ARCHIVE archived=1 ' "$wlogs"/full_health_monitor_20*.log || fail "no ARCHIVE line in the wrapper log"
+
+echo "run archive ok"
@@ -11,10 +11,7 @@ cat > "$tmp_dir/run_index.jsonl" <<'JSON'
 {"run_index_version":1,"timestamp":"2026-02-24T11:00:00+0000","timestamp_epoch":1761294000,"overall":"WARN","exit_code":1,"logfile":null,"summary_file":null,"summary_json":null,"hosts":{"ok":9,"warn":1,"crit":0,"unknown":0,"skipped":0},"top_reasons":[]}
 JSON
 
-schema="$ROOT_DIR/docs/schemas/run_index.json"
-while IFS= read -r line; do
-  [[ -z "$line" ]] && continue
-  printf '%s' "$line" | python3 "$ROOT_DIR/tools/json_schema_validate.py" "$schema"
-done < "$tmp_dir/run_index.jsonl"
+# Every entry, in one process.
+python3 "$ROOT_DIR/tools/json_schema_validate.py" --batch "$tmp_dir/run_index.jsonl" | grep -q '^SCHEMA_CHECK files=1 docs=2 errors=0 '
 
 echo "run_index schema ok"
@@ -0,0 +1,99 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+LM="$ROOT_DIR/bin/linux-maint"
+
+workdir="$(mktemp -d)"
+trap 'rm -rf "$workdir"' EXIT
+
+python3 - "$ROOT_DIR/lib" "$workdir" <<'PY'
+import json, os, sys
+sys.path.insert(0, sys.argv[1])
+import linux_maint_runindex as lmri
+
+wd = sys.argv[2]
+path = os.path.join(wd, "seg", "run_index.jsonl")
+
+def rec(i):
+    return {"run_index_version": 1, "timestamp": "t%02d" % i, "overall": "OK", "exit_code": 0, "i": i}
+
+idx = lmri.RunIndex(path, segment_size=3)
+for i in range(10):
+    idx.append(rec(i))
+assert idx.count() == 10
+# 3 sealed segments of 3 records + active with 1
+assert len(idx.segment_files()) == 4, idx.segment_files()
+assert [r["i"] for r in idx.tail(4)] == [6, 7, 8, 9]
+assert idx.last()["i"] == 9
+assert os.path.exists(path + ".hdr")
+
+# Retention drops whole sealed segments and never rewrites the ones it keeps.
+sealed_before = {p: os.stat(p) for p in idx.segment_files()[1:]}
+for i in range(10, 14):
+    lmri.RunIndex(path, segment_size=3).append(rec(i), keep=7)
+idx = lmri.RunIndex(path, segment_size=3)
+assert 7 <= idx.count() <= 7 + 3, idx.count()
+assert [r["i"] for r in idx.tail(5)] == [9, 10, 11, 12, 13]
+kept = [p for p in sealed_before if os.path.exists(p)]
+assert kept and len(kept) < len(sealed_before), kept
+for p in kept:
+    st = os.stat(p)
+    assert (st.st_ino, st.st_mtime_ns) == (sealed_before[p].st_ino, sealed_before[p].st_mtime_ns)
+
+# Explicit prune is exact: whole segments + one boundary rewrite.
+before, after = idx.prune(4)
+assert after == 4 and lmri.RunIndex(path).count() == 4
+assert [r["i"] for r in lmri.RunIndex(path).tail(10)] == [10, 11, 12, 13]
+
+# Reverse reader handles lines longer than a block and a missing trailing newline.
+p = os.path.join(wd, "rev.jsonl")
+with open(p, "w") as f:
+    f.write("a" * 50 + "\n\nbb\n" + "c" * 30)
+assert list(lmri.iter_reverse_lines(p, block=7)) == ["c" * 30, "bb", "a" * 50]
+
+# Legacy single-file index (no header) becomes the active segment; a stale header
+# (file appended by something else) is corrected from the file size.
+legacy = os.path.join(wd, "legacy", "run_index.jsonl")
+os.makedirs(os.path.dirname(legacy))
+with open(legacy, "w") as f:
+    for i in range(7):
+        f.write(json.dumps(rec(i)) + "\n")
+li = lmri.RunIndex(legacy, segment_size=3)
+assert li.count() == 7
+li.append(rec(7))
+assert lmri.RunIndex(legacy, segment_size=3).count() == 8
+with open(legacy, "a") as f:
+    f.write(json.dumps(rec(8)) + "\n")
+assert lmri.RunIndex(legacy, segment_size=3).count() == 9
+assert lmri.RunIndex(legacy).last()["i"] == 8
+
+# Concurrent writers (parallel serve batches) serialize on the lock: no record or
+# sealed segment is lost when several processes seal at the same time.
+conc = os.path.join(wd, "conc", "run_index.jsonl")
+pids = []
+for w in range(6):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            for i in range(30):
+                lmri.RunIndex(conc, segment_size=4).append(rec(w * 100 + i))
+        finally:
+            os._exit(0)
+    pids.append(pid)
+for pid in pids:
+    os.waitpid(pid, 0)
+ci = lmri.RunIndex(conc, segment_size=4)
+got = sorted(r["i"] for r in ci.tail(1000))
+assert got == sorted(w * 100 + i for w in range(6) for i in range(30)), len(got)
+assert ci.count() == 180 and len(ci.segment_files()) == 45, (ci.count(), len(ci.segment_files()))
+PY
+
+# CLI reads across segments.
+export LM_RUN_INDEX_FILE="$workdir/seg/run_index.jsonl"
+hist="$(bash "$LM" history --last 2 --json)"
+printf '%s' "$hist" | python3 -c 'import json,sys; o=json.load(sys.stdin); assert [r["i"] for r in o["runs"]]==[12,13], o'
+stats="$(bash "$LM" run-index --stats --json)"
+printf '%s' "$stats" | python3 -c 'import json,sys; o=json.load(sys.stdin); assert o["count"]==4 and o["last"]["i"]==13 and o["segments"]>=1, o'
+
+echo "run index segments ok"
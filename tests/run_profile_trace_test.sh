@@ -0,0 +1,113 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: LM_PROFILE=1 (linux-maint run --profile) writes a Chrome trace with nested
+# run -> monitor -> host -> require_cmd/ssh spans, and `runtimes --hosts/--top-spans`
+# aggregate it. Without profiling no trace is written.
+
+REPO_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}" )/.." && pwd)"
+LM="$REPO_DIR/bin/linux-maint"
+
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+export HOME="$workdir"
+export LM_CFG_DIR="$workdir/etc_linux_maint"
+mkdir -p "$LM_CFG_DIR" "$workdir/monitors"
+printf '%s\n' localhost 127.0.0.1 > "$LM_CFG_DIR/servers.txt"
+: > "$LM_CFG_DIR/excluded.txt"
+export LM_SERVERLIST="$LM_CFG_DIR/servers.txt" LM_EXCLUDED="$LM_CFG_DIR/excluded.txt"
+
+cat > "$workdir/monitors/span_fixture.sh" <<'MON'
+#!/usr/bin/env bash
+. "$LINUX_MAINT_LIB"
+check(){
+  local h="$1" out
+  lm_require_cmd span_fixture "$h" sh || return 3
+  out="$(lm_ssh "$h" "printf hello-from-$h")"
+  lm_summary span_fixture "$h" OK got="$out"
+}
+lm_for_each_host_rc check
+MON
+chmod +x "$workdir/monitors/span_fixture.sh"
+
+export SCRIPTS_DIR="$workdir/monitors"
+export LM_MONITORS="span_fixture.sh"
+export LOG_DIR="$workdir/logs"
+export SUMMARY_DIR="$workdir/logs"
+export LM_STATE_DIR="$workdir/state"
+export LM_LOGFILE="$workdir/lm.log"
+export LM_PROGRESS=0
+export LM_COLLECT_FACTS=0
+export LM_MAX_PARALLEL=2
+
+"$REPO_DIR/run_full_health_monitor.sh" >/dev/null 2>&1 || true
+if ls "$workdir/logs"/full_health_monitor_trace_* >/dev/null 2>&1; then
+  echo "trace written without --profile" >&2
+  exit 1
+fi
+
+LM_PROFILE=1 "$REPO_DIR/run_full_health_monitor.sh" >/dev/null 2>&1 || true
+trace="$workdir/logs/full_health_monitor_trace_latest.json"
+[[ -f "$trace" ]] || { echo "missing trace: $trace" >&2; ls -la "$workdir/logs" >&2; exit 1; }
+grep -q 'got=hello-from-127.0.0.1' "$workdir/logs/full_health_monitor_summary_latest.log" || {
+  echo "lm_ssh output changed while profiling" >&2
+  cat "$workdir/logs/full_health_monitor_summary_latest.log" >&2
+  exit 1
+}
+
+python3 - "$trace" <<'PY'
+import json, sys
+doc = json.load(open(sys.argv[1]))
+ev = [e for e in doc["traceEvents"] if e["ph"] == "X"]
+by_cat = {}
+for e in ev:
+    by_cat.setdefault(e["cat"], []).append(e)
+    assert e["dur"] >= 0 and e["ts"] > 0, e
+for cat in ("run", "monitor", "host", "require_cmd", "ssh"):
+    assert cat in by_cat, (cat, sorted(by_cat))
+run = by_cat["run"][0]
+mon = by_cat["monitor"][0]
+assert mon["name"] == "span_fixture" and mon["args"]["rc"] == 0
+
+def inside(child, parent):
+    return parent["ts"] <= child["ts"] and child["ts"] + child["dur"] <= parent["ts"] + parent["dur"]
+
+assert inside(mon, run)
+hosts = {e["args"]["host"]: e for e in by_cat["host"]}
+assert set(hosts) == {"localhost", "127.0.0.1"}, hosts
+for h, hs in hosts.items():
+    assert hs["args"]["monitor"] == "span_fixture" and inside(hs, mon)
+    ssh = [e for e in by_cat["ssh"] if e["args"]["host"] == h]
+    assert len(ssh) == 1 and inside(ssh[0], hs) and ssh[0]["tid"] == hs["tid"], ssh
+    assert ssh[0]["args"]["bytes"] == len("hello-from-" + h) and ssh[0]["args"]["rc"] == 0
+# Parallel hosts land on separate tracks.
+assert hosts["localhost"]["tid"] != hosts["127.0.0.1"]["tid"]
+assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in doc["traceEvents"])
+PY
+
+out="$(SUMMARY_DIR="$workdir/logs" bash "$LM" runtimes --hosts --json)"
+printf '%s' "$out" | python3 -c '
+import json,sys
+o=json.load(sys.stdin)
+rows={r["host"]: r for r in o["rows"]}
+assert set(rows)=={"localhost","127.0.0.1"}, rows
+assert all(r["ssh_calls"]==1 and r["monitors"]==1 and r["ssh_bytes"]>0 for r in rows.values()), rows
+'
+out="$(SUMMARY_DIR="$workdir/logs" bash "$LM" runtimes --top-spans 3 --json)"
+printf '%s' "$out" | python3 -c '
+import json,sys
+o=json.load(sys.stdin)
+assert len(o["rows"])==3 and o["rows"][0]["cat"]=="run", o["rows"]
+assert all(r["self_ms"]<=r["total_ms"] for r in o["rows"])
+'
+out="$(SUMMARY_DIR="$workdir/logs" bash "$LM" runtimes --top-spans)"
+printf '%s\n' "$out" | grep -q '^cat=ssh monitor=span_fixture name=printf_hello-from-localhost count=1 ' || {
+  echo "unexpected runtimes --top-spans output:" >&2
+  printf '%s\n' "$out" >&2
+  exit 1
+}
+
+echo "run profile trace ok"
@@ -0,0 +1,94 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: json_schema_validate.py --batch checks many files and JSONL streams in one
+# process and reports every error with file, line and JSON path; LM_VALIDATE_OUTPUTS=1
+# makes the wrapper check its summary JSON and run index entry after the run.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+V="$ROOT_DIR/tools/json_schema_validate.py"
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+fail() { echo "$1" >&2; exit 1; }
+
+# 2000 valid run index entries plus one with two problems.
+python3 - "$workdir/run_index.jsonl" <<'PY'
+import json, sys
+with open(sys.argv[1], "w") as f:
+    for i in range(2000):
+        f.write(json.dumps({"run_index_version": 1, "timestamp": "t", "timestamp_epoch": i, "overall": "OK", "exit_code": 0,
+                            "hosts": {"ok": 1, "warn": 0, "crit": 0, "unknown": 0, "skipped": 0}}) + "\n")
+    f.write(json.dumps({"run_index_version": 1, "timestamp": 5, "overall": "OK", "exit_code": 0,
+                        "hosts": {"ok": "1", "warn": 0, "crit": 0, "unknown": 0, "skipped": 0}}) + "\n")
+PY
+printf '{"meta":{"timestamp":"t"},"rows":[{"monitor":"m","host":"h","status":"OK"}]}\n' \
+  > "$workdir/full_health_monitor_summary_2026-01-01_000000.json"
+printf '{"meta":{},"rows":[{"monitor":"m","status":"OK"},{"monitor":"m","host":1,"status":"OK"}]}\n' \
+  > "$workdir/full_health_monitor_summary_2026-01-02_000000.json"
+
+rc=0
+out="$(python3 "$V" --batch "$workdir"/full_health_monitor_summary_2026-01-0*.json "$workdir/run_index.jsonl")" || rc=$?
+[ "$rc" -eq 2 ] || fail "batch rc=$rc: $out"
+printf '%s\n' "$out" | grep -q '^SCHEMA_CHECK files=3 docs=2003 errors=4 ' || fail "batch totals: $out"
+printf '%s\n' "$out" | grep -qF "_2026-01-02_000000.json: \$.rows[0]: missing required key 'host'" || fail "summary error 1: $out"
+printf '%s\n' "$out" | grep -qF "_2026-01-02_000000.json: \$.rows[1].host: type mismatch (expected string, got int)" || fail "summary error 2: $out"
+printf '%s\n' "$out" | grep -qF "run_index.jsonl:2001: \$.timestamp: type mismatch (expected string, got int)" || fail "jsonl error 1: $out"
+printf '%s\n' "$out" | grep -qF "run_index.jsonl:2001: \$.hosts.ok: type mismatch (expected integer, got str)" || fail "jsonl error 2: $out"
+
+# --tail limits JSONL files to their newest lines; --schema applies one schema to every file.
+out="$(python3 "$V" --batch --tail 5 --schema "$ROOT_DIR/docs/schemas/run_index.json" "$workdir/run_index.jsonl" || true)"
+printf '%s\n' "$out" | grep -q '^SCHEMA_CHECK files=1 docs=5 errors=2 ' || fail "batch --tail: $out"
+head -n 2000 "$workdir/run_index.jsonl" > "$workdir/good.jsonl"
+python3 "$V" --batch --jsonl --schema "$ROOT_DIR/docs/schemas/run_index.json" "$workdir/good.jsonl" | grep -q '^SCHEMA_CHECK files=1 docs=2000 errors=0 ' \
+  || fail "valid JSONL rejected"
+
+# Sealed run index segments (run_index.jsonl.NNNNNN) are recognized by name and read as JSONL.
+mkdir -p "$workdir/seg"
+head -n 3 "$workdir/run_index.jsonl" > "$workdir/seg/run_index.jsonl.000001"
+tail -n 1 "$workdir/run_index.jsonl" > "$workdir/seg/run_index.jsonl"
+out="$(python3 "$V" --batch "$workdir/seg/run_index.jsonl.000001" "$workdir/seg/run_index.jsonl" || true)"
+printf '%s\n' "$out" | grep -q '^SCHEMA_CHECK files=2 docs=4 errors=2 ' || fail "sealed segment: $out"
+printf '%s\n' "$out" | grep -q 'no schema' && fail "sealed segment not matched: $out"
+
+# Single-document stdin mode reports every error, not just the first.
+rc=0
+err="$(tail -n 1 "$workdir/run_index.jsonl" | python3 "$V" "$ROOT_DIR/docs/schemas/run_index.json" 2>&1)" || rc=$?
+if [ "$rc" -ne 2 ] || [ "$(printf '%s\n' "$err" | grep -c '^SCHEMA FAIL: ')" -ne 2 ]; then fail "stdin mode: rc=$rc $err"; fi
+err="$(printf '{"config_json_contract_version":0,"cfg_dir":"x","sources":[],"values":{}}' \
+  | python3 "$V" "$ROOT_DIR/docs/schemas/config.json" 2>&1 || true)"
+[ "$err" = "SCHEMA FAIL: \$.config_json_contract_version: value 0 below minimum 1" ] || fail "minimum not checked: $err"
+
+# Wrapper post-run check, with the repo schemas and with a stricter copy.
+mkdir -p "$workdir/mon" "$workdir/strict"
+cat > "$workdir/mon/fixture_check.sh" <<'MON'
+#!/usr/bin/env bash
+. "$LINUX_MAINT_LIB"
+lm_summary fixture_check localhost OK
+MON
+chmod +x "$workdir/mon/fixture_check.sh"
+wrun() {
+  env HOME="$workdir" LM_TEST_MODE=1 SCRIPTS_DIR="$workdir/mon" LM_MONITORS="fixture_check.sh" LOG_DIR="$1" \
+    LM_CFG_DIR="$workdir/cfg" LM_STATE_DIR="$1/state" LM_LOCKDIR="$workdir" LM_LOCAL_ONLY=true LM_COLLECT_FACTS=0 \
+    LM_VALIDATE_OUTPUTS=1 LM_SCHEMA_DIR="$2" bash "$ROOT_DIR/run_full_health_monitor.sh" >/dev/null 2>"$1.err" || true
+}
+wrun "$workdir/ok" "$ROOT_DIR/docs/schemas"
+grep -q '^SCHEMA_CHECK files=2 docs=2 errors=0 ' "$workdir/ok/full_health_monitor_latest.log" \
+  || fail "wrapper schema check: $(grep SCHEMA "$workdir/ok/full_health_monitor_latest.log")"
+
+python3 - "$ROOT_DIR/docs/schemas" "$workdir/strict" <<'PY'
+import json, os, shutil, sys
+src, dst = sys.argv[1:3]
+shutil.copy(os.path.join(src, "run_index.json"), dst)
+s = json.load(open(os.path.join(src, "summary.json")))
+s["properties"]["meta"]["required"] = ["no_such_field"]
+json.dump(s, open(os.path.join(dst, "summary.json"), "w"))
+PY
+wrun "$workdir/bad" "$workdir/strict"
+grep -q "SCHEMA FAIL: .*\.json: \$\.meta: missing required key 'no_such_field'" "$workdir/bad/full_health_monitor_latest.log" \
+  || fail "wrapper did not log the schema error: $(grep SCHEMA "$workdir/bad/full_health_monitor_latest.log")"
+grep -q 'WARN: output schema check failed' "$workdir/bad.err" || fail "no stderr warning: $(cat "$workdir/bad.err")"
+grep -q '^overall=' "$workdir/bad/last_status_full" || fail "status file missing"
+
+echo "schema batch validate ok"
@@ -0,0 +1,108 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: `linux-maint serve` runs each monitor on its own interval through the wrapper,
+# answers status/metrics from memory over its unix socket, and removes the socket on
+# SIGTERM so the CLI falls back to the run files.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+LM="$ROOT_DIR/bin/linux-maint"
+workdir="$(mktemp -d -p "$TMPDIR")"
+pid=""
+cleanup() {
+  if [ -n "$pid" ]; then kill "$pid" 2>/dev/null || true; wait "$pid" 2>/dev/null || true; fi
+  rm -rf "$workdir"
+}
+trap cleanup EXIT
+
+mon_dir="$workdir/monitors"
+mkdir -p "$mon_dir" "$workdir/state" "$workdir/cfg"
+for m in fast_monitor slow_monitor; do
+  cat > "$mon_dir/$m.sh" <<MON
+#!/usr/bin/env bash
+. "\$LINUX_MAINT_LIB"
+echo run >> "$workdir/$m.runs"
+lm_summary $m localhost $([ "$m" = fast_monitor ] && echo OK || echo WARN) reason=test_reason
+$([ "$m" = fast_monitor ] && echo 'exit 0' || echo 'exit 1')
+MON
+done
+chmod +x "$mon_dir/"*.sh
+
+sock="$workdir/serve.sock"
+export LM_SERVE_SOCKET="$sock"
+env LM_TEST_MODE=1 SCRIPTS_DIR="$mon_dir" LM_MONITORS="fast_monitor.sh slow_monitor.sh" \
+  LM_STATE_DIR="$workdir/state" LM_CFG_DIR="$workdir/cfg" LM_NOTIFY=0 LM_COLLECT_FACTS=0 LM_REACH_SWEEP=0 \
+  LM_SERVE_DIR="$workdir/serve" LM_SERVE_KEEP_RUNS=2 \
+  bash "$LM" serve --interval fast_monitor=1 --default-interval 3600 2>"$workdir/serve.err" &
+pid=$!
+
+runs() { [ -f "$workdir/$1.runs" ] && wc -l < "$workdir/$1.runs" || echo 0; }
+for _ in $(seq 1 100); do
+  [ -S "$sock" ] && [ "$(runs fast_monitor)" -ge 3 ] && break
+  sleep 0.1
+done
+[ -S "$sock" ] || { echo "serve did not create its socket" >&2; cat "$workdir/serve.err" >&2; exit 1; }
+[ "$(runs fast_monitor)" -ge 3 ] || { echo "fast_monitor ran $(runs fast_monitor) times" >&2; cat "$workdir/serve.err" >&2; exit 1; }
+[ "$(runs slow_monitor)" -eq 1 ] || { echo "slow_monitor ran $(runs slow_monitor) times" >&2; exit 1; }
+sleep 0.5   # let the latest fast batch land in the store
+
+# status reads the daemon's store instead of the (absent) run files.
+bash "$LM" status --json | python3 -c '
+import json, sys
+obj = json.load(sys.stdin)
+assert obj["totals"]["WARN"] == 1 and obj["totals"]["OK"] == 1, obj["totals"]
+assert any(p["monitor"] == "slow_monitor" for p in obj["problems"]), obj["problems"]
+'
+
+status_doc="$(bash "$LM" serve --query /status)"
+printf '%s\n' "$status_doc" | python3 -c '
+import json, sys
+doc = json.load(sys.stdin)
+mons = {m["monitor"]: m for m in doc["monitors"]}
+assert mons["fast_monitor"]["interval_s"] == 1 and mons["slow_monitor"]["interval_s"] == 3600, mons
+assert mons["fast_monitor"]["runs"] >= 2 and mons["slow_monitor"]["runs"] == 1, mons
+'
+metrics="$(bash "$LM" serve --query /metrics)"
+printf '%s\n' "$metrics" | grep -q '^linux_maint_overall_status{status="WARN"} 1$'
+printf '%s\n' "$metrics" | grep -q '^linux_maint_monitor_interval_seconds{monitor="fast_monitor"} 1$'
+[ "$(bash "$LM" serve --query /health)" = "ok" ]
+
+# Old batch directories are pruned to LM_SERVE_KEEP_RUNS.
+[ "$(find "$workdir/serve/runs" -mindepth 1 -maxdepth 1 -type d | wc -l)" -le 3 ]
+
+# Pruning after short batches must not remove the run dir of a batch still running.
+cat > "$workdir/fake_wrapper.sh" <<'SH'
+#!/usr/bin/env bash
+case "$LM_MONITORS" in *slow_monitor*) sleep 1.5 ;; esac
+for m in $LM_MONITORS; do echo "monitor=${m%.sh} host=localhost status=OK"; done > "$LOG_DIR/full_health_monitor_summary_latest.log"
+SH
+python3 - "$ROOT_DIR/lib" "$workdir" <<'PY'
+import sys, threading, time
+sys.path.insert(0, sys.argv[1])
+import linux_maint_serve as lmsv
+wd = sys.argv[2]
+store = lmsv.Store(["fast_monitor", "slow_monitor"], {"fast_monitor": 1, "slow_monitor": 4})
+sched = lmsv.Scheduler(store, wd + "/fake_wrapper.sh", wd + "/prune", keep_runs=1)
+slow = threading.Thread(target=sched.run_batch, args=(["slow_monitor"],))
+slow.start()
+time.sleep(0.2)
+for _ in range(3):
+    sched.run_batch(["fast_monitor"])
+slow.join()
+assert store.runs["slow_monitor"]["runs"] == 1, store.runs
+assert store.rows["slow_monitor"] == ["monitor=slow_monitor host=localhost status=OK"], store.rows
+assert store.runs["fast_monitor"]["runs"] == 3, store.runs
+PY
+
+kill "$pid"
+wait "$pid" 2>/dev/null || true
+pid=""
+[ ! -e "$sock" ] || { echo "socket left behind after SIGTERM" >&2; exit 1; }
+if bash "$LM" status --json 2>/dev/null | grep -q slow_monitor; then
+  echo "status still reports daemon rows after shutdown" >&2
+  exit 1
+fi
+
+echo "serve daemon ok"
@@ -0,0 +1,126 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: `run --shard i/N` partitions the host list (every host checked by exactly one
+# shard, stable when hosts are added) and `aggregate` merges the shard directories into
+# one summary, last_status_full, run index entry and Prometheus file; a missing shard
+# makes the merged run UNKNOWN.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+LM="$ROOT_DIR/bin/linux-maint"
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+mon_dir="$workdir/monitors"
+mkdir -p "$mon_dir" "$workdir/logs" "$workdir/state" "$workdir/cfg" "$workdir/bin"
+cat > "$workdir/bin/ssh" <<'SH'
+#!/usr/bin/env bash
+echo "${*: -2:1}" >> "$SSH_CALLS"
+exec bash -c "${*: -1}"
+SH
+chmod +x "$workdir/bin/ssh"
+for i in 1 2 3 4 5 6 7 8 9; do echo "web$i"; done > "$workdir/servers.txt"
+: > "$workdir/excluded.txt"
+
+# One row per host (web3 WARN) plus a runner-level row every shard emits (WARN in shard 2).
+cat > "$mon_dir/fleet_check.sh" <<'MON'
+#!/usr/bin/env bash
+. "$LINUX_MAINT_LIB"
+check() {
+  lm_ssh "$1" "echo probe" >/dev/null
+  if [ "$1" = web3 ]; then lm_summary fleet_check "$1" WARN reason=test_warn; return 1; fi
+  lm_summary fleet_check "$1" OK
+}
+lm_for_each_host_rc check
+rc=$?
+if [ "${LM_SHARD:-}" = 2/3 ]; then
+  lm_summary fleet_check runner WARN reason=runner_warn
+  exit 1
+fi
+lm_summary fleet_check runner OK
+exit "$rc"
+MON
+chmod +x "$mon_dir/fleet_check.sh"
+
+export SSH_CALLS="$workdir/ssh_calls"
+: > "$SSH_CALLS"
+common=(PATH="$workdir/bin:$PATH" HOME="$workdir" LM_TEST_MODE=1 SCRIPTS_DIR="$mon_dir" LM_MONITORS="fleet_check.sh"
+  LOG_DIR="$workdir/logs" LM_STATE_DIR="$workdir/state" LM_CFG_DIR="$workdir/cfg" LM_NOTIFY=0 LM_SSH_MUX=0
+  LM_COLLECT_FACTS=0 LM_REACH_SWEEP=0 LM_SERVERLIST="$workdir/servers.txt" LM_EXCLUDED="$workdir/excluded.txt"
+  LM_CMD_CACHE_TTL=0 LM_LOCKDIR="$workdir/locks" PROM_DIR="$workdir/prom" LM_NODE_NAME=runner1)
+fail() { echo "$1" >&2; exit 1; }
+
+# Three shard processes on one machine, concurrently.
+pids=()
+for i in 1 2 3; do
+  env "${common[@]}" LM_SHARD="$i/3" bash "$ROOT_DIR/run_full_health_monitor.sh" >/dev/null 2>"$workdir/err$i.log" &
+  pids+=("$!")
+done
+for p in "${pids[@]}"; do wait "$p" || true; done
+
+# Every host probed exactly once, across all shards.
+[ "$(sort "$SSH_CALLS" | tr '\n' ' ')" = "web1 web2 web3 web4 web5 web6 web7 web8 web9 " ] \
+  || fail "hosts probed: $(sort "$SSH_CALLS" | tr '\n' ' ')"
+for i in 1 2 3; do
+  d="$workdir/logs/shards/shard-$i-of-3"
+  grep -q "^shard=$i/3$" "$d/last_status_full" || fail "shard $i: missing status file"
+  [ -f "$d/linux_maint.prom" ] || fail "shard $i: textfile not kept in the shard dir"
+done
+[ ! -e "$workdir/logs/last_status_full" ] || fail "a shard wrote the fleet status file"
+[ ! -e "$workdir/prom/linux_maint.prom" ] || fail "a shard wrote the fleet textfile"
+
+# The plan shows the same partition.
+plan_hosts="$(env "${common[@]}" LM_MONITORS= bash "$LM" run --plan --shard 1/3 | sed -n '/^Resolved hosts/,/^$/p' | grep '^web' | sort | tr '\n' ' ')"
+shard1_hosts="$(grep -o "^monitor=fleet_check host=web[0-9]*" "$workdir/logs/shards/shard-1-of-3/full_health_monitor_summary_latest.log" \
+  | sed 's/.*host=//' | sort | tr '\n' ' ')"
+[ "$plan_hosts" = "$shard1_hosts" ] || fail "plan ($plan_hosts) != shard 1 run ($shard1_hosts)"
+
+# Adding hosts never moves existing ones.
+python3 - "$ROOT_DIR/lib" <<'PY'
+import sys
+sys.path.insert(0, sys.argv[1])
+import linux_maint_shard as sh
+old = ["web%d" % i for i in range(1, 200)]
+new = old + ["db%d" % i for i in range(1, 50)]
+assert all(sh.shard_of(h, 3) == sh.shard_of(h, 3) for h in old)
+before = {h: sh.shard_of(h, 3) for h in old}
+after = {h: i for i in (1, 2, 3) for h in sh.select_hosts(new, i, 3)}
+assert all(after[h] == before[h] for h in old)
+moved = sum(1 for h in old if sh.shard_of(h, 4) != before[h])
+assert moved < len(old) / 2, moved
+PY
+
+# Aggregate: one canonical run.
+rc=0
+env "${common[@]}" bash "$LM" aggregate > "$workdir/agg.out" 2>&1 || rc=$?
+[ "$rc" -eq 1 ] || { cat "$workdir/agg.out" >&2; fail "aggregate rc=$rc, expected 1"; }
+grep -q '^aggregate: shards=3/3 ' "$workdir/agg.out" || fail "aggregate output: $(cat "$workdir/agg.out")"
+summary="$workdir/logs/full_health_monitor_summary_latest.log"
+[ "$(grep -c '^monitor=fleet_check host=web' "$summary")" -eq 9 ] || fail "merged summary: $(cat "$summary")"
+[ "$(grep -c '^monitor=fleet_check host=runner ' "$summary")" -eq 1 ] || fail "runner rows not deduped"
+grep -q '^monitor=fleet_check host=runner status=WARN .*reason=runner_warn' "$summary" || fail "runner row is not the worst"
+grep -q '^overall=WARN$' "$workdir/logs/last_status_full" || fail "merged status: $(cat "$workdir/logs/last_status_full")"
+grep -q '^linux_maint_monitor_status{monitor="fleet_check",host="web3"} 1$' "$workdir/prom/linux_maint.prom" || fail "textfile missing web3"
+python3 - "$workdir/state/run_index.jsonl" <<'PY'
+import json, sys
+rows = [json.loads(l) for l in open(sys.argv[1]) if l.strip()]
+assert len(rows) == 1 and rows[0]["shards"] == 3 and rows[0]["overall"] == "WARN", rows
+assert rows[0]["hosts"]["warn"] == 2 and rows[0]["hosts"]["ok"] == 8, rows[0]["hosts"]
+PY
+
+# A missing shard makes the merged run UNKNOWN. LM_RUN_INDEX_SEGMENT applies to the
+# aggregate's run index append as it does to the wrapper's: the full one-entry segment is sealed.
+rm -rf "$workdir/logs/shards/shard-3-of-3"
+rc=0
+env "${common[@]}" LM_RUN_INDEX_SEGMENT=1 bash "$LM" aggregate --json > "$workdir/agg.json" 2>/dev/null || rc=$?
+[ "$rc" -eq 3 ] || fail "aggregate with a missing shard: rc=$rc"
+python3 -c 'import json,sys; o=json.load(open(sys.argv[1])); assert o["shards_found"] == [1, 2] and o["overall"] == "UNKNOWN", o' "$workdir/agg.json"
+grep -q '^monitor=aggregate host=shard-3-of-3 status=UNKNOWN reason=shard_missing' "$summary" || fail "no shard_missing row"
+[ -f "$workdir/state/run_index.jsonl.000001" ] || fail "LM_RUN_INDEX_SEGMENT ignored by aggregate: $(ls "$workdir/state")"
+
+# Invalid shard specs are rejected.
+if bash "$LM" run --shard 4/3 --plan >/dev/null 2>&1; then fail "--shard 4/3 accepted"; fi
+
+echo "shard aggregate ok"
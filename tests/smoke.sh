@@ -46,6 +46,7 @@ LM_LOGFILE=${TMPDIR}/config_validate.log LM_LOCKDIR="${TMPDIR}" bash "$ROOT_DIR/
 
 # lm_for_each_host_rc aggregation test
 run_required "lm_for_each_host_rc_test" bash "$ROOT_DIR/tests/lm_for_each_host_rc_test.sh"
+run_required "lm_host_pool_test" bash "$ROOT_DIR/tests/lm_host_pool_test.sh"
 run_required "lm_summary_strict_test" bash "$ROOT_DIR/tests/lm_summary_strict_test.sh"
 run_required "lm_summary_allowlist_test" bash "$ROOT_DIR/tests/lm_summary_allowlist_test.sh"
 run_required "lm_summary_allowlist_strict_test" bash "$ROOT_DIR/tests/lm_summary_allowlist_strict_test.sh"
@@ -55,6 +56,9 @@ run_required "lm_ssh_allowlist_strict_test" bash "$ROOT_DIR/tests/lm_ssh_allowli
 run_required "hosts_parse_test" bash "$ROOT_DIR/tests/hosts_parse_test.sh"
 run_required "seed_known_hosts_test" bash "$ROOT_DIR/tests/seed_known_hosts_test.sh"
 run_required "lm_ssh_opts_guard_test" bash "$ROOT_DIR/tests/lm_ssh_opts_guard_test.sh"
+run_required "lm_ssh_mux_test" bash "$ROOT_DIR/tests/lm_ssh_mux_test.sh"
+run_required "lm_collect_facts_test" bash "$ROOT_DIR/tests/lm_collect_facts_test.sh"
+run_required "lm_cmd_cache_test" bash "$ROOT_DIR/tests/lm_cmd_cache_test.sh"
 run_required "lm_log_json_test" bash "$ROOT_DIR/tests/lm_log_json_test.sh"
 run_required "log_redaction_test" bash "$ROOT_DIR/tests/log_redaction_test.sh"
 run_required "config_validate_keys_test" bash "$ROOT_DIR/tests/config_validate_keys_test.sh"
@@ -71,15 +75,29 @@ run_required "lm_mktemp_fallback_test" bash "$ROOT_DIR/tests/lm_mktemp_fallback_
 run_required "monitor_summary_emission_test" bash "$ROOT_DIR/tests/monitor_summary_emission_test.sh"
 run_required "summary_contract_monitor_list_test" bash "$ROOT_DIR/tests/summary_contract_monitor_list_test.sh"
 run_required "summary_diff_canonicalization_test" bash "$ROOT_DIR/tests/summary_diff_canonicalization_test.sh"
+run_required "summary_parser_lib_test" bash "$ROOT_DIR/tests/summary_parser_lib_test.sh"
 run_required "summary_fixture_per_monitor_test" bash "$ROOT_DIR/tests/summary_fixture_per_monitor_test.sh"
 run_required "skip_gate_reason_test" bash "$ROOT_DIR/tests/skip_gate_reason_test.sh"
+run_required "config_drift_manifest_cache_test" bash "$ROOT_DIR/tests/config_drift_manifest_cache_test.sh"
 run_required "quick_check_make_target_test" bash "$ROOT_DIR/tests/quick_check_make_target_test.sh"
 run_required "wrapper_runtime_summary_test" bash "$ROOT_DIR/tests/wrapper_runtime_summary_test.sh"
 run_required "strict_run_validation_test" bash "$ROOT_DIR/tests/strict_run_validation_test.sh"
+run_required "wrapper_summary_rollup_test" bash "$ROOT_DIR/tests/wrapper_summary_rollup_test.sh"
+run_required "lib_fork_free_test" bash "$ROOT_DIR/tests/lib_fork_free_test.sh"
+run_required "reachability_breaker_test" bash "$ROOT_DIR/tests/reachability_breaker_test.sh"
+run_required "serve_daemon_test" bash "$ROOT_DIR/tests/serve_daemon_test.sh"
+run_required "result_cache_test" bash "$ROOT_DIR/tests/result_cache_test.sh"
+run_required "cli_backend_test" bash "$ROOT_DIR/tests/cli_backend_test.sh"
+run_required "shard_aggregate_test" bash "$ROOT_DIR/tests/shard_aggregate_test.sh"
+run_required "run_archive_test" bash "$ROOT_DIR/tests/run_archive_test.sh"
+run_required "diff_runs_flap_test" bash "$ROOT_DIR/tests/diff_runs_flap_test.sh"
+run_required "schema_batch_validate_test" bash "$ROOT_DIR/tests/schema_batch_validate_test.sh"
 run_required "test_mode_deterministic_test" bash "$ROOT_DIR/tests/test_mode_deterministic_test.sh"
 run_required "wrapper_tmpdir_cleanup_test" bash "$ROOT_DIR/tests/wrapper_tmpdir_cleanup_test.sh"
 run_required "run_only_skip_test" bash "$ROOT_DIR/tests/run_only_skip_test.sh"
 run_required "runtimes_command_test" bash "$ROOT_DIR/tests/runtimes_command_test.sh"
+run_required "run_profile_trace_test" bash "$ROOT_DIR/tests/run_profile_trace_test.sh"
+run_required "bench_suite_test" bash "$ROOT_DIR/tests/bench_suite_test.sh"
 run_required "runtimes_json_fields_test" bash "$ROOT_DIR/tests/runtimes_json_fields_test.sh"
 run_required "runtime_warn_threshold_test" bash "$ROOT_DIR/tests/runtime_warn_threshold_test.sh"
 run_required "report_command_test" bash "$ROOT_DIR/tests/report_command_test.sh"
@@ -107,6 +125,7 @@ run_required "list_monitors_test" bash "$ROOT_DIR/tests/list_monitors_test.sh"
 run_required "lint_summary_test" bash "$ROOT_DIR/tests/lint_summary_test.sh"
 run_required "run_plan_json_test" bash "$ROOT_DIR/tests/run_plan_json_test.sh"
 run_required "monitor_order_test" bash "$ROOT_DIR/tests/monitor_order_test.sh"
+run_required "wrapper_parallel_jobs_test" bash "$ROOT_DIR/tests/wrapper_parallel_jobs_test.sh"
 run_required "color_precedence_test" bash "$ROOT_DIR/tests/color_precedence_test.sh"
 run_required "progress_tty_test" bash "$ROOT_DIR/tests/progress_tty_test.sh"
 run_required "json_progress_guard_test" bash "$ROOT_DIR/tests/json_progress_guard_test.sh"
@@ -122,6 +141,7 @@ run_required "secret_scan_lint_test" bash "$ROOT_DIR/tests/secret_scan_lint_test
 
 # Dependency behavior example: network_monitor should emit missing_dependency when curl missing
 run_required "network_monitor_missing_curl_test" bash "$ROOT_DIR/tests/network_monitor_missing_curl_test.sh"
+run_required "network_monitor_batch_test" bash "$ROOT_DIR/tests/network_monitor_batch_test.sh"
 run_required "nfs_reason_unreachable_test" bash "$ROOT_DIR/tests/nfs_reason_unreachable_test.sh"
 run_required "nfs_tempfile_cleanup_on_timeout_test" bash "$ROOT_DIR/tests/nfs_tempfile_cleanup_on_timeout_test.sh"
 
@@ -151,10 +171,13 @@ if [[ "$SMOKE_PROFILE" != "compat" ]]; then
 run_required "resource_monitor_basic_test" bash "$ROOT_DIR/tests/resource_monitor_basic_test.sh"
 run_required "service_monitor_failed_units_test" bash "$ROOT_DIR/tests/service_monitor_failed_units_test.sh"
 run_required "disk_trend_inode_trend_test" bash "$ROOT_DIR/tests/disk_trend_inode_trend_test.sh"
+run_required "disk_trend_store_test" bash "$ROOT_DIR/tests/disk_trend_store_test.sh"
 run_required "ntp_chrony_parsing_test" bash "$ROOT_DIR/tests/ntp_chrony_parsing_test.sh"
 run_required "ntp_chrony_parsing_variants_test" bash "$ROOT_DIR/tests/ntp_chrony_parsing_variants_test.sh"
 run_required "log_spike_fixture_test" bash "$ROOT_DIR/tests/log_spike_fixture_test.sh"
+run_required "log_scan_cursor_test" bash "$ROOT_DIR/tests/log_scan_cursor_test.sh"
 run_required "cert_monitor_scan_dir_test" bash "$ROOT_DIR/tests/cert_monitor_scan_dir_test.sh"
+run_required "cert_monitor_parallel_cache_test" bash "$ROOT_DIR/tests/cert_monitor_parallel_cache_test.sh"
 run_required "verify_install_test" bash "$ROOT_DIR/tests/verify_install_test.sh"
 run_required "installed_mode_sanity_test" bash "$ROOT_DIR/tests/installed_mode_sanity_test.sh"
 run_required "init_minimal_idempotent_test" bash "$ROOT_DIR/tests/init_minimal_idempotent_test.sh"
@@ -177,12 +200,14 @@ run_required "export_csv_test" bash "$ROOT_DIR/tests/export_csv_test.sh"
 run_required "status_since_test" bash "$ROOT_DIR/tests/status_since_test.sh"
 run_required "trend_command_test" bash "$ROOT_DIR/tests/trend_command_test.sh"
 run_required "trend_cache_ttl_test" bash "$ROOT_DIR/tests/trend_cache_ttl_test.sh"
+run_required "trend_index_test" bash "$ROOT_DIR/tests/trend_index_test.sh"
 run_required "trend_golden_fixture_test" bash "$ROOT_DIR/tests/trend_golden_fixture_test.sh"
 run_required "run_index_command_test" bash "$ROOT_DIR/tests/run_index_command_test.sh"
 run_required "runtimes_json_fields_test" bash "$ROOT_DIR/tests/runtimes_json_fields_test.sh"
 run_required "summary_json_schema_test" bash "$ROOT_DIR/tests/summary_json_schema_test.sh"
 run_required "run_index_schema_test" bash "$ROOT_DIR/tests/run_index_schema_test.sh"
 run_required "run_index_prune_test" bash "$ROOT_DIR/tests/run_index_prune_test.sh"
+run_required "run_index_segments_test" bash "$ROOT_DIR/tests/run_index_segments_test.sh"
 fi
 
 # Sudo-gated tests
@@ -14,6 +14,9 @@ import re
 import sys
 from collections import defaultdict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+import linux_maint_summary as lms
+
 ALLOWED_STATUSES = {"OK", "WARN", "CRIT", "UNKNOWN", "SKIP"}
 REASON_RE = re.compile(r"^[a-z0-9_]+$")
 
@@ -42,22 +45,6 @@ def load_allowed_reasons(repo_root):
     return reasons, allow
 
 
-def parse_kv(line: str):
-    parts = line.strip().split()
-    d = {}
-    dup_keys = []
-    bad_tokens = []
-    for p in parts:
-        if "=" in p:
-            k, v = p.split("=", 1)
-            if k in d:
-                dup_keys.append(k)
-            d[k] = v
-        else:
-            bad_tokens.append(p)
-    return d, dup_keys, bad_tokens
-
-
 def main(path: str) -> int:
     repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     allowed_reasons, allowlist_reasons = load_allowed_reasons(repo_root)
@@ -74,15 +61,8 @@ def main(path: str) -> int:
         m = run_re.search(line)
         if m:
             executed.append(m.group(1))
-        if "monitor=" in line:
-            # accept both raw "monitor=..." and timestamp-prefixed lines
-            m2 = re.search(r"(^|\s)(monitor=[^\n]+)$", line)
-            if m2:
-                ml = m2.group(2)
-                # Ignore wrapper headers like "FINAL_STATUS_SUMMARY (monitor= lines only)"
-                if ml.startswith("monitor= ") or ml.startswith("monitor=lines") or ml.startswith("monitor= lines"):
-                    continue
-                monitor_lines.append(ml)
+    # accept both raw "monitor=..." and timestamp-prefixed lines
+    monitor_lines.extend(lms.iter_embedded_lines(txt))
     if not monitor_lines:
         print(f"ERROR: no monitor= lines found in {path}")
         return 2
@@ -90,7 +70,7 @@ def main(path: str) -> int:
     rows = []
     malformed = 0
     for l in monitor_lines:
-        row, dup_keys, bad_tokens = parse_kv(l)
+        row, dup_keys, bad_tokens = lms.parse_kv_strict(l)
         if bad_tokens:
             malformed += 1
             print(f"ERROR: malformed monitor= line (non key=value tokens): {l}")
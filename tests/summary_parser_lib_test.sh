@@ -0,0 +1,86 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+summary="$workdir/summary.log"
+cat > "$summary" <<'S'
+monitor=service_monitor host=web-1 status=OK node=web-1
+monitor=service_monitor host=web-2 status=CRIT node=web-2 reason=service_failed failed=2
+monitor=disk_trend_monitor host=web-1 status=WARN node=web-1 reason=disk_full
+monitor=disk_trend_monitor host=web-2 status=WARN node=web-2 reason=disk_full
+monitor=cert_monitor host=runner status=OK node=runner reason=no_certs
+  monitor=network_monitor host=runner status=BOGUS node=runner
+not a summary line
+S
+
+python3 - "$ROOT_DIR/lib" "$summary" "$workdir/missing.log" <<'PY'
+import sys
+sys.path.insert(0, sys.argv[1])
+import linux_maint_summary as lms
+
+summary, missing = sys.argv[2:4]
+
+rows = list(lms.iter_rows(summary))
+assert len(rows) == 6, rows
+r = rows[1]
+assert (r.monitor, r.host, r.status, r.reason) == ("service_monitor", "web-2", "CRIT", "service_failed")
+assert r.get("failed") == "2" and r.get("nope", "-") == "-"
+assert r.as_dict()["node"] == "web-2"
+assert rows[0].reason is None
+# Identity fields are interned so long row lists share strings.
+assert rows[2].monitor is rows[3].monitor
+assert not hasattr(r, "__dict__")
+
+agg = lms.aggregate(summary)
+assert agg.rows == 6
+assert agg.totals == {"CRIT": 1, "WARN": 2, "UNKNOWN": 1, "SKIP": 0, "OK": 2}, agg.totals
+assert agg.reasons == {"service_failed": 1, "disk_full": 2}, agg.reasons
+assert agg.all_reasons == {"service_failed": 1, "disk_full": 2, "no_certs": 1}, agg.all_reasons
+assert agg.hosts["web-2"] == {"CRIT": 1, "WARN": 1}, agg.hosts
+assert agg.monitors["disk_trend_monitor"] == 2
+assert agg.top_reasons(1) == [("disk_full", 2)]
+
+# Row-at-a-time aggregation matches the inlined fast path.
+agg2 = lms.Aggregate()
+for row in rows:
+    agg2.add(row)
+assert (agg2.totals, agg2.reasons, agg2.all_reasons, agg2.hosts) == (agg.totals, agg.reasons, agg.all_reasons, agg.hosts)
+
+assert lms.read_dicts(summary)[1]["failed"] == "2"
+assert list(lms.iter_rows(missing)) == [] and lms.aggregate(missing).rows == 0
+
+d, dups, bad = lms.parse_kv_strict("monitor=a host=b status=OK host=c junk")
+assert d["host"] == "c" and dups == ["host"] and bad == ["junk"]
+
+log = [
+    "[2026-01-01] FINAL_STATUS_SUMMARY (monitor= lines only)",
+    "[2026-01-01 00:00:00] monitor=ntp_drift_monitor host=a status=OK node=a",
+    "xmonitor=not_a_row host=a",
+    "monitor=health_monitor host=b status=WARN node=b reason=high_load",
+]
+assert list(lms.iter_embedded_lines(log)) == [log[1].split("] ", 1)[1], log[3]]
+PY
+
+# Heredocs and tools no longer carry their own summary-line parsers.
+if grep -nE '^def (get_kv|parse_kv|parse_kv_line|read_status_counts|read_reason_counts)\(' \
+  "$ROOT_DIR/bin/linux-maint" "$ROOT_DIR/run_full_health_monitor.sh" "$ROOT_DIR/tools/summary_diff.py" "$ROOT_DIR/tests/summary_contract_lint.py"; then
+  echo "duplicate summary parser found (use lib/linux_maint_summary.py)" >&2
+  exit 1
+fi
+
+out="$(python3 "$ROOT_DIR/tools/summary_parse_bench.py" --lines 20000 --json)"
+printf '%s' "$out" | python3 -c '
+import json,sys
+obj=json.load(sys.stdin)
+assert obj["lines"] == 20000
+for k in ("legacy_s","iter_rows_s","aggregate_s"):
+    assert obj[k] >= 0
+'
+
+echo "summary parser lib ok"
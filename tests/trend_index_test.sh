@@ -0,0 +1,61 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# `linux-maint trend` reads per-file aggregates from trend_index.jsonl (keyed by name + size +
+# mtime) and only parses summary files that are new or changed since they were indexed.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+LM="$ROOT_DIR/bin/linux-maint"
+LOG_DIR="$(mktemp -d)"
+export LOG_DIR
+trap 'rm -rf "$LOG_DIR"' EXIT
+index="$LOG_DIR/trend_index.jsonl"
+
+f1="$LOG_DIR/full_health_monitor_summary_9999-12-30_235958.log"
+f2="$LOG_DIR/full_health_monitor_summary_9999-12-31_235959.log"
+cat > "$f1" <<'S'
+monitor=service_monitor host=web-1 status=WARN reason=failed_units
+monitor=backup_check host=backup-1 status=OK
+S
+cat > "$f2" <<'S'
+monitor=network_monitor host=web-1 status=CRIT reason=http_down
+S
+
+out="$(bash "$LM" trend --last 5)"
+echo "$out" | grep -q 'totals: CRIT=1 WARN=1 UNKNOWN=0 SKIP=0 OK=1' || { echo "FAIL first trend: $out" >&2; exit 1; }
+[ "$(wc -l < "$index")" -eq 2 ] || { echo "FAIL expected 2 index entries" >&2; cat "$index" >&2; exit 1; }
+
+# Indexed files are not re-read: a doctored entry with matching size/mtime is trusted.
+python3 - "$index" <<'PY'
+import json, sys
+path = sys.argv[1]
+rows = [json.loads(l) for l in open(path, encoding="utf-8")]
+for r in rows:
+    if r["file"].endswith("9999-12-30_235958.log"):
+        r["totals"]["WARN"] = 7
+        r["reasons"] = {"failed_units": 7}
+with open(path, "w", encoding="utf-8") as f:
+    for r in rows:
+        f.write(json.dumps(r, sort_keys=True) + "\n")
+PY
+out="$(bash "$LM" trend --last 5)"
+echo "$out" | grep -q 'WARN=7' || { echo "FAIL index not used: $out" >&2; exit 1; }
+echo "$out" | grep -q '^failed_units=7$' || { echo "FAIL index reasons not used: $out" >&2; exit 1; }
+
+# A changed file is re-parsed and re-indexed (appended).
+echo "monitor=service_monitor host=web-2 status=WARN reason=failed_units" >> "$f1"
+json="$(bash "$LM" trend --last 5 --json)"
+printf '%s' "$json" | python3 -c 'import json,sys; o=json.load(sys.stdin); assert o["totals"]["WARN"]==2, o; assert o["reasons"][0]=={"reason":"failed_units","count":2}, o'
+printf '%s' "$json" | python3 "$ROOT_DIR/tools/json_schema_validate.py" "$ROOT_DIR/docs/schemas/trend.json"
+[ "$(wc -l < "$index")" -eq 3 ] || { echo "FAIL changed file not appended to index" >&2; exit 1; }
+
+# --since/--until and CSV read the same aggregates.
+csv="$(bash "$LM" trend --last 5 --csv --since 9999-12-31)"
+[ "$(printf '%s\n' "$csv" | tail -n 1)" = "full_health_monitor_summary_9999-12-31_235959.log,1,0,0,0,0" ] || { echo "FAIL csv: $csv" >&2; exit 1; }
+
+# Index disabled: files are parsed directly and the index is left alone.
+rm -f "$index"
+LM_TREND_INDEX=0 bash "$LM" trend --last 5 >/dev/null
+[ ! -e "$index" ] || { echo "FAIL index written while disabled" >&2; exit 1; }
+
+echo "trend index ok"
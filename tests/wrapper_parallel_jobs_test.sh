@@ -0,0 +1,99 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: LM_RUN_JOBS runs independent monitors concurrently, keeps "first"/"last"
+# ordering barriers, and merges summary lines deterministically in SCRIPT_ORDER.
+
+REPO_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}" )/.." && pwd)"
+
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+export LM_CFG_DIR="$workdir/etc_linux_maint"
+mkdir -p "$LM_CFG_DIR" "$workdir/monitors" "$workdir/markers"
+printf '%s\n' localhost > "$LM_CFG_DIR/servers.txt"
+: > "$LM_CFG_DIR/excluded.txt"
+export FIXTURE_MARKERS="$workdir/markers"
+
+# "first" barrier: must finish before any middle monitor starts.
+cat > "$workdir/monitors/preflight_check.sh" <<'MON'
+#!/usr/bin/env bash
+sleep 1
+touch "$FIXTURE_MARKERS/preflight"
+echo "monitor=preflight_check host=localhost status=OK node=fixture"
+MON
+
+# Two middle monitors that wait for each other: only pass when run concurrently.
+for pair in "pair_a:pair_b" "pair_b:pair_a"; do
+  me="${pair%%:*}"; other="${pair##*:}"
+  cat > "$workdir/monitors/${me}_fixture.sh" <<MON
+#!/usr/bin/env bash
+pre=0; [ -f "\$FIXTURE_MARKERS/preflight" ] && pre=1
+touch "\$FIXTURE_MARKERS/${me}"
+seen=0
+for _ in \$(seq 1 50); do
+  if [ -f "\$FIXTURE_MARKERS/${other}" ]; then seen=1; break; fi
+  sleep 0.1
+done
+echo "monitor=${me}_fixture host=localhost status=OK node=fixture preflight_done=\$pre saw_peer=\$seen"
+MON
+done
+
+# Middle monitor failing without a summary line (early_exit hardening).
+cat > "$workdir/monitors/broken_fixture.sh" <<'MON'
+#!/usr/bin/env bash
+echo "oops"
+exit 2
+MON
+
+# "last" barrier: sees every middle monitor's marker.
+cat > "$workdir/monitors/last_run_age_monitor.sh" <<'MON'
+#!/usr/bin/env bash
+n=$(ls "$FIXTURE_MARKERS" | wc -l | tr -d ' ')
+echo "monitor=last_run_age_monitor host=localhost status=OK node=fixture markers=$n"
+MON
+chmod +x "$workdir/monitors/"*.sh
+
+export SCRIPTS_DIR="$workdir/monitors"
+export LM_MONITORS="preflight_check.sh pair_a_fixture.sh broken_fixture.sh pair_b_fixture.sh last_run_age_monitor.sh"
+export LOG_DIR="$workdir/logs"
+export SUMMARY_DIR="$workdir/logs"
+export LM_RUN_JOBS=3
+export LM_PROGRESS=0
+
+set +e
+"$REPO_DIR/run_full_health_monitor.sh" >/dev/null 2>&1
+rc=$?
+set -e
+
+summary="$workdir/logs/full_health_monitor_summary_latest.log"
+if [[ ! -f "$summary" ]]; then
+  echo "Expected summary file to exist: $summary" >&2
+  exit 1
+fi
+
+fail(){
+  echo "$1" >&2
+  echo "--- summary ---" >&2
+  cat "$summary" >&2 || true
+  exit 1
+}
+
+[[ "$rc" -eq 2 ]] || fail "Expected wrapper rc=2 (broken_fixture CRIT), got rc=$rc"
+
+grep -q "monitor=pair_a_fixture .*preflight_done=1 saw_peer=1" "$summary" || fail "pair_a did not run after preflight and concurrently with pair_b"
+grep -q "monitor=pair_b_fixture .*preflight_done=1 saw_peer=1" "$summary" || fail "pair_b did not run after preflight and concurrently with pair_a"
+grep -q "monitor=broken_fixture .*status=UNKNOWN .*reason=early_exit rc=2" "$summary" || fail "Expected early_exit line for broken_fixture"
+grep -q "monitor=last_run_age_monitor .*markers=3" "$summary" || fail "last_run_age_monitor should run after all middle monitors"
+
+order="$(grep -o '^monitor=[a-z_]*' "$summary" | sed 's/^monitor=//' | grep -v -e '^wrapper$' -e '^runtime_guard$' | tr '\n' ' ')"
+expected="preflight_check pair_a_fixture broken_fixture pair_b_fixture last_run_age_monitor "
+[[ "$order" == "$expected" ]] || fail "Expected SCRIPT_ORDER merge '$expected', got '$order'"
+
+# The run's summary file is indexed for `linux-maint trend`.
+run_summary="$(basename "$(readlink -f "$summary")")"
+grep -q "\"file\": \"$run_summary\"" "$workdir/logs/trend_index.jsonl" || fail "Expected $run_summary in trend_index.jsonl"
+
+echo "wrapper parallel jobs ok"
@@ -0,0 +1,78 @@
+#!/usr/bin/env bash
+set -euo pipefail
+TMPDIR="${TMPDIR:-/tmp}"
+mkdir -p "$TMPDIR"
+
+# Test: the wrapper's fleet counters (SUMMARY_HOSTS), top issues, strict validation
+# and summary file all come from the monitor= lines collected per monitor buffer.
+
+ROOT_DIR="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." && pwd)"
+workdir="$(mktemp -d -p "$TMPDIR")"
+trap 'rm -rf "$workdir"' EXIT
+
+mon_dir="$workdir/monitors"
+mkdir -p "$mon_dir" "$workdir/logs" "$workdir/state" "$workdir/cfg"
+
+cat > "$mon_dir/alpha_monitor.sh" <<'MON'
+#!/usr/bin/env bash
+echo "checking alpha (not a summary line: monitor=alpha_monitor status=CRIT)"
+echo "monitor=alpha_monitor host=h1 status=OK"
+echo "monitor=alpha_monitor host=h2 status=WARN reason=disk_warn msg=disk_90%"
+echo "monitor=alpha_monitor host=h3 status=CRIT reason=disk_crit"
+exit 2
+MON
+cat > "$mon_dir/beta_monitor.sh" <<'MON'
+#!/usr/bin/env bash
+echo "monitor=beta_monitor host=h1 status=OK"
+echo "monitor=beta_monitor host=h2 status=SKIP reason=config_missing"
+exit 0
+MON
+cat > "$mon_dir/gamma_monitor.sh" <<'MON'
+#!/usr/bin/env bash
+# No summary line and a failing rc: the wrapper adds reason=early_exit.
+exit 3
+MON
+chmod +x "$mon_dir/"*.sh
+
+run_wrapper() {
+  env LM_TEST_MODE=1 SCRIPTS_DIR="$mon_dir" LM_MONITORS="alpha_monitor.sh beta_monitor.sh gamma_monitor.sh" \
+    LOG_DIR="$workdir/logs" SUMMARY_DIR="$workdir" SUMMARY_FILE="$workdir/summary.log" \
+    LM_STATE_DIR="$workdir/state" LM_CFG_DIR="$workdir/cfg" LM_NOTIFY=0 \
+    "$@" bash "$ROOT_DIR/run_full_health_monitor.sh" >/dev/null 2>"$workdir/err.log"
+}
+
+rc=0
+run_wrapper LM_STRICT=1 || rc=$?
+[[ "$rc" -eq 3 ]] || { echo "expected rc=3 (gamma UNKNOWN), got $rc" >&2; exit 1; }
+log="$(cat "$workdir/logs/full_health_monitor_latest.log")"
+expect() { printf '%s\n' "$log" | grep -q -- "$1" || { echo "missing: $1" >&2; printf '%s\n' "$log" >&2; exit 1; }; }
+expect 'SUMMARY_HOSTS ok=2 warn=1 crit=1 unknown=1 skipped=1$'
+expect 'fleet_hosts_ok=2 fleet_hosts_warn=1 fleet_hosts_crit=1 fleet_hosts_unknown=1 fleet_hosts_skipped=1$'
+expect 'WARN: h2 alpha_monitor - disk_90%'
+expect 'UNKNOWN: runner gamma_monitor'
+if grep -q 'strict summary validation failed' "$workdir/err.log"; then
+  echo "valid lines rejected by LM_STRICT" >&2; cat "$workdir/err.log" >&2; exit 1
+fi
+
+# The summary file holds exactly the monitor= lines, in SCRIPT_ORDER.
+got="$(awk '{print $1, $2, $3}' "$workdir/summary.log" | paste -sd'|' -)"
+want="monitor=alpha_monitor host=h1 status=OK|monitor=alpha_monitor host=h2 status=WARN|monitor=alpha_monitor host=h3 status=CRIT|monitor=beta_monitor host=h1 status=OK|monitor=beta_monitor host=h2 status=SKIP|monitor=gamma_monitor host=runner status=UNKNOWN"
+[[ "$got" == "$want" ]] || { echo "unexpected summary file:" >&2; cat "$workdir/summary.log" >&2; exit 1; }
+
+# Strict mode flags the first malformed line and counts the synthetic UNKNOWN.
+cat > "$mon_dir/beta_monitor.sh" <<'MON'
+#!/usr/bin/env bash
+echo "monitor=beta_monitor host=h1 status=OK"
+echo "monitor=beta_monitor host=h2 status=MAYBE"
+exit 0
+MON
+rm -f "$workdir"/logs/full_health_monitor_*.log
+rc=0
+run_wrapper LM_STRICT=1 || rc=$?
+[[ "$rc" -eq 3 ]] || { echo "expected rc=3, got $rc" >&2; exit 1; }
+grep -q 'bad line: monitor=beta_monitor host=h2 status=MAYBE' "$workdir/err.log" || { cat "$workdir/err.log" >&2; exit 1; }
+grep -q 'reason=summary_invalid' "$workdir/summary.log"
+log="$(cat "$workdir/logs/full_health_monitor_latest.log")"
+expect 'SUMMARY_HOSTS ok=2 warn=1 crit=1 unknown=2 skipped=0$'
+
+echo "wrapper summary rollup ok"
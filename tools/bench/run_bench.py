@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""Reproducible performance benchmarks for linux-maint (`make bench`).
+
+Builds a throwaway checkout view whose `.logs` holds a generated history of
+realistic size (summary files, wrapper logs, run index, diff state) and a
+synthetic fleet served by the `ssh` shim in tools/bench/fakebin (canned df,
+timedatectl, systemctl, ss and openssl s_client output, with configurable
+latency and failure rate). It then times:
+
+    wrapper          full run_full_health_monitor.sh over the fleet
+    trend            linux-maint trend --last 1000
+    status_since     linux-maint status --since 7d
+    report           linux-maint report
+    history          linux-maint history --last 50
+    diff             linux-maint diff
+    summary_parse    tools/summary_parse_bench.py (parser micro-benchmark)
+
+For each scenario it records wall time (cold = first run, median of repeats),
+forks (delta of the kernel's `processes` counter, so keep the box quiet),
+peak RSS of the process tree and rc, writes the result as JSON and compares it
+with a stored baseline.
+
+Usage: tools/bench/run_bench.py [--size small|medium|large] [--hosts N] [--runs N]
+           [--repeat N] [--parallel N] [--latency-ms N] [--fail-pct N]
+           [--only a,b] [--out FILE] [--baseline FILE] [--save-baseline]
+           [--check] [--tolerance X] [--keep] [--json]
+"""
+
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.abspath(os.path.join(HERE, "..", ".."))
+sys.path.insert(0, os.path.join(REPO, "lib"))
+import linux_maint_runindex as lmri  # noqa: E402
+
+BENCH_VERSION = 1
+SIZES = {
+    # hosts in the fleet / runs of generated history
+    "small": {"hosts": 10, "runs": 50},
+    "medium": {"hosts": 50, "runs": 1000},
+    "large": {"hosts": 200, "runs": 2000},
+}
+RUN_INTERVAL_S = 900  # generated runs are 15 minutes apart
+MONITORS = ["health_monitor", "inode_monitor", "disk_trend_monitor", "ntp_drift_monitor",
+            "service_monitor", "filesystem_readonly_monitor", "ports_baseline_monitor",
+            "cert_monitor", "patch_monitor", "network_monitor", "resource_monitor", "backup_check"]
+WRAPPER_MONITORS = ["health_monitor", "inode_monitor", "disk_trend_monitor", "ntp_drift_monitor",
+                    "service_monitor", "filesystem_readonly_monitor", "ports_baseline_monitor",
+                    "cert_monitor"]
+REASONS = {
+    "WARN": ["disk_warn", "inode_warn", "ntp_drift_high", "service_inactive", "cert_expiring"],
+    "CRIT": ["disk_crit", "service_failed", "cert_expired"],
+    "UNKNOWN": ["ssh_unreachable", "missing_dependency", "timeout"],
+}
+SCENARIOS = ["wrapper", "trend", "status_since", "report", "history", "diff", "summary_parse"]
+METRICS = (("wall_s", 0.05), ("forks", 20), ("max_rss_kb", 2048))  # (metric, noise floor)
+
+
+# ---- dataset ---------------------------------------------------------------
+def fleet(n):
+    return ["bench-%04d" % i for i in range(1, n + 1)]
+
+
+def run_rows(rnd, hosts, prev):
+    """Summary rows for one run; most rows repeat the previous run (flaps are rare)."""
+    rows = {}
+    for h in hosts:
+        for m in MONITORS:
+            old = prev.get((m, h))
+            if old is not None and rnd.random() < 0.97:
+                rows[(m, h)] = old
+                continue
+            st = rnd.choice(["OK"] * 16 + ["WARN", "WARN", "CRIT", "UNKNOWN", "SKIP"])
+            extra = ""
+            if st in REASONS:
+                extra = " reason=%s" % rnd.choice(REASONS[st])
+            elif st == "SKIP":
+                extra = " reason=config_missing"
+            rows[(m, h)] = "monitor=%s host=%s status=%s node=%s checked=%d%s" % (
+                m, h, st, h, rnd.randint(1, 40), extra)
+    return rows
+
+
+def generate_history(tree, state, hosts, runs, seed=42):
+    """Write `runs` past runs into tree/.logs and the run index/diff state into state."""
+    logs = os.path.join(tree, ".logs")
+    os.makedirs(logs, exist_ok=True)
+    os.makedirs(state, exist_ok=True)
+    rnd = random.Random(seed)
+    index = lmri.RunIndex(os.path.join(state, "run_index.jsonl"))
+    now = int(time.time())
+    prev = {}
+    prev_lines = None
+    for i in range(runs):
+        ts = now - (runs - i) * RUN_INTERVAL_S
+        stamp = time.strftime("%Y-%m-%d_%H%M%S", time.localtime(ts))
+        prefix = time.strftime("[%Y-%m-%d %H:%M:%S] ", time.localtime(ts))
+        rows = run_rows(rnd, hosts, prev)
+        lines = [rows[k] for k in sorted(rows)]
+        counts = {}
+        for line in lines:
+            st = line.split(" status=", 1)[1].split(" ", 1)[0]
+            counts[st] = counts.get(st, 0) + 1
+        overall = "CRIT" if counts.get("CRIT") else ("WARN" if counts.get("WARN") else "OK")
+        summary = os.path.join(logs, "full_health_monitor_summary_%s.log" % stamp)
+        with open(summary, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        wlog = os.path.join(logs, "full_health_monitor_%s.log" % stamp)
+        with open(wlog, "w", encoding="utf-8") as f:
+            for m in MONITORS:
+                f.write("%sRUNTIME monitor=%s ms=%d\n" % (prefix, m, rnd.randint(200, 9000)))
+            f.write("%sSUMMARY_RESULT overall=%s ok=%d warn=%d crit=%d unknown=%d skipped=%d\n" % (
+                prefix, overall, counts.get("OK", 0), counts.get("WARN", 0), counts.get("CRIT", 0),
+                counts.get("UNKNOWN", 0), counts.get("SKIP", 0)))
+            f.write("%sFINAL_STATUS_SUMMARY (monitor= lines only)\n" % prefix)
+            for line in lines:
+                f.write(prefix + line + "\n")
+        for p in (summary, wlog):
+            os.utime(p, (ts, ts))
+        index.append({
+            "run_index_version": 1,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(ts)),
+            "timestamp_epoch": ts, "overall": overall,
+            "exit_code": {"OK": 0, "WARN": 1, "CRIT": 2}[overall],
+            "logfile": wlog, "summary_file": summary, "summary_json": None,
+            "hosts": {"ok": counts.get("OK", 0), "warn": counts.get("WARN", 0),
+                      "crit": counts.get("CRIT", 0), "unknown": counts.get("UNKNOWN", 0),
+                      "skipped": counts.get("SKIP", 0)},
+            "top_reasons": [],
+        })
+        prev = rows
+        if i == runs - 2:
+            prev_lines = lines
+    for name, target in (("full_health_monitor_summary_latest.log", summary),
+                         ("full_health_monitor_latest.log", wlog)):
+        os.symlink(os.path.basename(target), os.path.join(logs, name))
+    with open(os.path.join(logs, "last_status_full"), "w", encoding="utf-8") as f:
+        f.write("timestamp=%s\nhost=bench\noverall=%s\nexit_code=0\nlogfile=%s\n" % (
+            time.strftime("%Y-%m-%dT%H:%M:%S%z"), overall, wlog))
+    with open(os.path.join(state, "last_summary_monitor_lines.log"), "w", encoding="utf-8") as f:
+        f.write("\n".join(prev_lines or lines) + "\n")
+
+
+def make_cert(path):
+    """Self-signed certificate served by the fake `openssl s_client` (None without openssl)."""
+    key = path + ".key"
+    try:
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "20",
+                        "-subj", "/CN=bench.invalid", "-keyout", key, "-out", path],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return path
+
+
+def build_tree(work, hosts, runs):
+    """Checkout view (symlinks to the repo) plus config, fleet and generated history."""
+    tree = os.path.join(work, "tree")
+    os.makedirs(tree)
+    for name in ("bin", "lib", "monitors", "tools", "etc", "docs", "run_full_health_monitor.sh"):
+        os.symlink(os.path.join(REPO, name), os.path.join(tree, name))
+    cfg = os.path.join(work, "etc")
+    os.makedirs(cfg)
+    names = fleet(hosts)
+    with open(os.path.join(cfg, "servers.txt"), "w") as f:
+        f.write("\n".join(names) + "\n")
+    open(os.path.join(cfg, "excluded.txt"), "w").close()
+    with open(os.path.join(cfg, "services.txt"), "w") as f:
+        f.write("sshd\ncrond\nchronyd\n")
+    with open(os.path.join(cfg, "ports_baseline.txt"), "w") as f:
+        f.write("tcp:22:sshd\ntcp:443:nginx\n")
+    with open(os.path.join(cfg, "certs.txt"), "w") as f:
+        f.write("".join("%s:443\n" % n for n in names))
+    os.makedirs(os.path.join(work, "home"))
+    generate_history(tree, os.path.join(work, "state"), names, runs)
+    return tree, cfg
+
+
+# ---- measurement -----------------------------------------------------------
+def fork_counter():
+    try:
+        with open("/proc/stat") as f:
+            for line in f:
+                if line.startswith("processes "):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def measure(cmd, env, cwd):
+    """(wall_s, forks, max_rss_kb, rc) for one run of *cmd* and its process tree.
+
+    Plain fork+exec instead of subprocess: subprocess may vfork, and the child
+    then inherits this interpreter's peak RSS, hiding the command's own.
+    """
+    f0 = fork_counter()
+    t0 = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - child
+        try:
+            os.chdir(cwd)
+            null = os.open(os.devnull, os.O_RDWR)
+            for fd in (0, 1, 2):
+                os.dup2(null, fd)
+            os.execvpe(cmd[0], cmd, env)
+        finally:
+            os._exit(127)
+    _, status, ru = os.wait4(pid, 0)
+    wall = time.perf_counter() - t0
+    f1 = fork_counter()
+    rc = os.WEXITSTATUS(status) if os.WIFEXITED(status) else 128 + os.WTERMSIG(status)
+    forks = (f1 - f0 - 1) if f0 is not None and f1 is not None else None
+    return wall, forks, ru.ru_maxrss, rc
+
+
+def scenario_cmds(tree, runs, hosts):
+    lm = os.path.join(tree, "bin", "linux-maint")
+    return {
+        "wrapper": ["bash", os.path.join(tree, "run_full_health_monitor.sh")],
+        "trend": ["bash", lm, "trend", "--last", str(min(1000, runs))],
+        "status_since": ["bash", lm, "status", "--since", "7d"],
+        "report": ["bash", lm, "report"],
+        "history": ["bash", lm, "history", "--last", "50"],
+        "diff": ["bash", lm, "diff"],
+        "summary_parse": [sys.executable, os.path.join(REPO, "tools", "summary_parse_bench.py"),
+                          "--lines", str(max(20000, runs * hosts * len(MONITORS) // 10)), "--json"],
+    }
+
+
+def run_scenarios(work, tree, cfg, opts):
+    base_env = dict(os.environ)
+    for k in list(base_env):
+        if k.startswith("LM_") or k in ("LOG_DIR", "SUMMARY_DIR", "SCRIPTS_DIR"):
+            del base_env[k]
+    calls = os.path.join(work, "ssh_calls.log")
+    cert = make_cert(os.path.join(work, "bench_cert.pem"))
+    base_env.update({
+        "PATH": os.path.join(HERE, "fakebin") + os.pathsep + base_env.get("PATH", ""),
+        "HOME": os.path.join(work, "home"),
+        "TMPDIR": os.path.join(work, "tmp"),
+        "NO_COLOR": "1",
+        "LM_PROGRESS": "0",
+        "LM_CFG_DIR": cfg,
+        "LM_SERVERLIST": os.path.join(cfg, "servers.txt"),
+        "LM_EXCLUDED": os.path.join(cfg, "excluded.txt"),
+        "LM_STATE_DIR": os.path.join(work, "state"),
+        "LM_LOGFILE": os.path.join(work, "linux_maint.log"),
+        "LM_NOTIFY": "0",
+        "BENCH_SSH_LATENCY_MS": str(opts["latency_ms"]),
+        "BENCH_SSH_FAIL_PCT": str(opts["fail_pct"]),
+        "BENCH_SSH_CALLS": calls,
+        "BENCH_CERT_PEM": cert or "",
+    })
+    os.makedirs(base_env["TMPDIR"], exist_ok=True)
+    wrapper_env = dict(base_env)
+    wrapper_env.update({
+        "LOG_DIR": os.path.join(work, "wrapper_logs"),
+        "SUMMARY_DIR": os.path.join(work, "wrapper_logs"),
+        "LM_MONITORS": " ".join(m + ".sh" for m in WRAPPER_MONITORS),
+        "LM_MAX_PARALLEL": str(opts["parallel"]),
+        "LM_RUN_INDEX_FILE": os.path.join(work, "wrapper_state", "run_index.jsonl"),
+        "LM_NOTIFY_STATE_DIR": os.path.join(work, "wrapper_state"),
+    })
+
+    cmds = scenario_cmds(tree, opts["runs"], opts["hosts"])
+    results = []
+    for name in opts["only"] or SCENARIOS:
+        env = wrapper_env if name == "wrapper" else base_env
+        repeat = 1 if name == "wrapper" else opts["repeat"]
+        walls, forks, rss = [], [], []
+        rc = None
+        ssh_calls = None
+        for _ in range(repeat):
+            if name == "wrapper":
+                open(calls, "w").close()
+            w, fk, r, rc = measure(cmds[name], env, tree)
+            walls.append(w)
+            if fk is not None:
+                forks.append(fk)
+            rss.append(r)
+            if name == "wrapper":
+                with open(calls) as f:
+                    ssh_calls = sum(1 for _ in f)
+        row = {
+            "name": name,
+            "cmd": " ".join(os.path.relpath(c, tree) if c.startswith(tree) else c for c in cmds[name][1:]),
+            "repeat": repeat,
+            "rc": rc,
+            "cold_s": round(walls[0], 3),
+            "wall_s": round(statistics.median(walls), 3),
+            "wall_min_s": round(min(walls), 3),
+            "forks": int(statistics.median(forks)) if forks else None,
+            "max_rss_kb": max(rss),
+        }
+        if ssh_calls is not None:
+            row["ssh_calls"] = ssh_calls
+        results.append(row)
+        if not opts["json"]:
+            print(format_row(row), flush=True)
+    return results
+
+
+# ---- reporting -------------------------------------------------------------
+def format_row(row):
+    keys = ("name", "wall_s", "cold_s", "forks", "max_rss_kb", "rc", "ssh_calls")
+    return "bench " + " ".join("%s=%s" % (k, row[k]) for k in keys if k in row)
+
+
+def compare(results, baseline, tolerance):
+    base = {r["name"]: r for r in baseline.get("scenarios", [])}
+    out = []
+    for r in results:
+        b = base.get(r["name"])
+        if not b:
+            continue
+        for metric, floor in METRICS:
+            cur, old = r.get(metric), b.get(metric)
+            if cur is None or old is None:
+                continue
+            ratio = round(cur / old, 3) if old else None
+            regressed = cur > old * tolerance and cur - old > floor
+            out.append({"name": r["name"], "metric": metric, "baseline": old, "current": cur,
+                        "ratio": ratio, "regressed": regressed})
+    return out
+
+
+def parse_args(argv):
+    opts = {"size": "medium", "hosts": None, "runs": None, "repeat": 3, "parallel": 10,
+            "latency_ms": 20, "fail_pct": 2, "only": [], "out": None, "baseline": None,
+            "save_baseline": False, "check": False, "tolerance": 1.25, "keep": False, "json": False}
+    args = list(argv)
+    ints = {"--hosts": "hosts", "--runs": "runs", "--repeat": "repeat", "--parallel": "parallel",
+            "--latency-ms": "latency_ms", "--fail-pct": "fail_pct"}
+    while args:
+        a = args.pop(0)
+        if a in ints and args:
+            opts[ints[a]] = int(args.pop(0))
+        elif a == "--size" and args and args[0] in SIZES:
+            opts["size"] = args.pop(0)
+        elif a == "--only" and args:
+            opts["only"] = [s for s in args.pop(0).split(",") if s]
+        elif a in ("--out", "--baseline") and args:
+            opts[a[2:]] = args.pop(0)
+        elif a == "--tolerance" and args:
+            opts["tolerance"] = float(args.pop(0))
+        elif a in ("--save-baseline", "--check", "--keep", "--json"):
+            opts[a[2:].replace("-", "_")] = True
+        else:
+            return None
+    bad = [s for s in opts["only"] if s not in SCENARIOS]
+    if bad:
+        print("ERROR: unknown scenario(s): %s (known: %s)" % (",".join(bad), ",".join(SCENARIOS)),
+              file=sys.stderr)
+        return None
+    for k in ("hosts", "runs"):
+        if opts[k] is None:
+            opts[k] = SIZES[opts["size"]][k]
+    opts["repeat"] = max(1, opts["repeat"])
+    return opts
+
+
+def main(argv):
+    opts = parse_args(argv)
+    if opts is None:
+        print(__doc__.split("Usage:", 1)[1].rstrip(), file=sys.stderr)
+        return 2
+    bench_dir = os.path.join(REPO, ".logs", "bench")
+    baseline_path = opts["baseline"] or os.path.join(bench_dir, "baseline_%s.json" % opts["size"])
+    out_path = opts["out"] or os.path.join(
+        bench_dir, "bench_%s_%s.json" % (opts["size"], time.strftime("%Y-%m-%d_%H%M%S")))
+
+    work = tempfile.mkdtemp(prefix="lm_bench.")
+    try:
+        t0 = time.perf_counter()
+        tree, cfg = build_tree(work, opts["hosts"], opts["runs"])
+        gen_s = round(time.perf_counter() - t0, 3)
+        if not opts["json"]:
+            print("bench size=%s hosts=%d runs=%d generate_s=%s work=%s" % (
+                opts["size"], opts["hosts"], opts["runs"], gen_s, work), flush=True)
+        results = run_scenarios(work, tree, cfg, opts)
+    finally:
+        if opts["keep"]:
+            print("kept work dir: %s" % work, file=sys.stderr)
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+    doc = {
+        "bench_version": BENCH_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "params": {k: opts[k] for k in ("size", "hosts", "runs", "repeat", "parallel",
+                                        "latency_ms", "fail_pct")},
+        "generate_s": gen_s,
+        "scenarios": results,
+    }
+    comparison = []
+    if os.path.isfile(baseline_path) and not opts["save_baseline"]:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("params") != doc["params"]:
+            print("WARN: baseline %s was recorded with different params" % baseline_path, file=sys.stderr)
+        comparison = compare(results, baseline, opts["tolerance"])
+        doc["baseline"] = baseline_path
+    doc["comparison"] = comparison
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+    if opts["save_baseline"]:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        shutil.copyfile(out_path, baseline_path)
+
+    regressed = [c for c in comparison if c["regressed"]]
+    if opts["json"]:
+        print(json.dumps(doc, sort_keys=True))
+    else:
+        for c in comparison:
+            print("compare name=%s metric=%s baseline=%s current=%s ratio=%s%s" % (
+                c["name"], c["metric"], c["baseline"], c["current"], c["ratio"],
+                " REGRESSED" if c["regressed"] else ""))
+        print("result=%s%s" % (out_path, " baseline_saved=%s" % baseline_path if opts["save_baseline"] else ""))
+    failed = [r["name"] for r in results if r["rc"] not in (0, 1, 2)]
+    if failed:
+        print("WARN: scenario(s) exited with rc>2: %s" % ",".join(failed), file=sys.stderr)
+    return 1 if (opts["check"] and regressed) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
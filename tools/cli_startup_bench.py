@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Startup-time benchmark for the CLI's Python backend (lib/linux_maint_cli.py).
+
+Times, as the median of --repeat runs:
+
+    python_floor_s   bare interpreter start (`python3 -c pass`)
+    source_s         backend compiled from source on every call (how inline heredocs ran)
+    bytecode_s       backend imported from its cached bytecode (how `lm_py` runs it)
+    status_json_s    `linux-maint status --json` end to end
+    report_json_s    `linux-maint report --json` end to end
+
+The end-to-end commands run in a throwaway checkout view with a small generated
+history (see tools/bench/run_bench.py).
+
+Usage: tools/cli_startup_bench.py [--repeat N] [--runs N] [--json]
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_here = os.path.dirname(os.path.abspath(__file__))
+LIB = os.path.join(_here, "..", "lib")
+sys.path.insert(0, os.path.join(_here, "bench"))
+import run_bench  # noqa: E402
+
+IMPORT_STUB = "import sys; sys.path.insert(0, sys.argv[1]); import linux_maint_cli"
+
+
+def median_wall(cmd, repeat, env=None, cwd=None, stdin_path=None):
+    walls = []
+    for _ in range(repeat):
+        stdin = open(stdin_path, "rb") if stdin_path else subprocess.DEVNULL
+        try:
+            t0 = time.perf_counter()
+            subprocess.run(cmd, stdin=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           env=env, cwd=cwd)
+            walls.append(time.perf_counter() - t0)
+        finally:
+            if stdin_path:
+                stdin.close()
+    return round(statistics.median(walls), 4)
+
+
+def main(argv):
+    repeat = 10
+    runs = 50
+    as_json = False
+    args = list(argv)
+    while args:
+        a = args.pop(0)
+        if a in ("--repeat", "--runs") and args:
+            val = max(1, int(args.pop(0)))
+            if a == "--repeat":
+                repeat = val
+            else:
+                runs = val
+        elif a == "--json":
+            as_json = True
+        else:
+            print(__doc__.strip().splitlines()[-1], file=sys.stderr)
+            return 2
+
+    py = sys.executable
+    src = os.path.join(LIB, "linux_maint_cli.py")
+    # Precompile like install.sh does (PYTHONDONTWRITEBYTECODE would otherwise skip it).
+    subprocess.run([py, "-m", "compileall", "-q", src], check=True)
+    res = {
+        "repeat": repeat,
+        "python_floor_s": median_wall([py, "-c", "pass"], repeat),
+        "source_s": median_wall([py, "-B", "-"], repeat, stdin_path=src),
+        "bytecode_s": median_wall([py, "-c", IMPORT_STUB, LIB], repeat),
+    }
+
+    work = tempfile.mkdtemp(prefix="lm_cli_bench.")
+    try:
+        tree, cfg = run_bench.build_tree(work, 10, runs)
+        env = dict(os.environ)
+        for k in list(env):
+            if k.startswith("LM_") or k in ("LOG_DIR", "SUMMARY_DIR", "SCRIPTS_DIR"):
+                del env[k]
+        env.update({"NO_COLOR": "1", "LM_CFG_DIR": cfg, "LM_STATE_DIR": os.path.join(work, "state"),
+                    "TMPDIR": work, "HOME": os.path.join(work, "home")})
+        lm = os.path.join(tree, "bin", "linux-maint")
+        res["status_json_s"] = median_wall(["bash", lm, "status", "--json"], repeat, env=env, cwd=tree)
+        res["report_json_s"] = median_wall(["bash", lm, "report", "--json"], repeat, env=env, cwd=tree)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    if as_json:
+        print(json.dumps(res, sort_keys=True))
+    else:
+        print("bench=cli_startup " + " ".join("%s=%s" % (k, res[k]) for k in
+                                               ("repeat", "python_floor_s", "source_s", "bytecode_s",
+                                                "status_json_s", "report_json_s")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
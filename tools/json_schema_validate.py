@@ -1,5 +1,15 @@
 #!/usr/bin/env python3
-"""Minimal JSON Schema validator (subset) for repo tests.
+"""JSON Schema (subset) validator for repo tests, release checks and run artifacts.
+
+Schemas are compiled once into validator closures (lib/linux_maint_schema.py);
+every error is reported with its JSON path.
+
+    json_schema_validate.py SCHEMA < doc.json
+    json_schema_validate.py --batch [--schema SCHEMA] [--jsonl] [--tail N] FILE...
+
+--batch checks many files (or JSONL streams such as run_index.jsonl, one
+document per line) in one process. Without --schema the schema is picked by
+file name (summary JSON, run_index.jsonl).
 
 Supported keywords:
 - type (string or list)
@@ -7,94 +17,50 @@ Supported keywords:
 - properties (object)
 - items (schema)
 - enum (list)
+- minimum (number)
 - additionalProperties (bool)
 """
 
 import json
+import os
 import sys
-from typing import Any, Dict, Iterable, List, Tuple
-
-
-def _fail(path: str, msg: str) -> None:
-    raise ValueError(f"{path}: {msg}")
-
-
-def _type_matches(expected: Any, value: Any) -> bool:
-    if expected is None:
-        return value is None
-    if expected == "null":
-        return value is None
-    if expected == "string":
-        return isinstance(value, str)
-    if expected == "integer":
-        return isinstance(value, int) and not isinstance(value, bool)
-    if expected == "number":
-        return isinstance(value, (int, float)) and not isinstance(value, bool)
-    if expected == "boolean":
-        return isinstance(value, bool)
-    if expected == "object":
-        return isinstance(value, dict)
-    if expected == "array":
-        return isinstance(value, list)
-    return False
-
+from typing import Any, Dict, List
 
-def _ensure_type(schema_type: Any, value: Any, path: str) -> None:
-    if schema_type is None:
-        return
-    if isinstance(schema_type, list):
-        if not any(_type_matches(t, value) for t in schema_type):
-            _fail(path, f"type mismatch (expected one of {schema_type}, got {type(value).__name__})")
-    else:
-        if not _type_matches(schema_type, value):
-            _fail(path, f"type mismatch (expected {schema_type}, got {type(value).__name__})")
+# linux_maint_schema.py lives in lib/ (repo) or next to linux_maint.sh (installed).
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [d for d in (os.environ.get('LM_PYLIB_DIR'), os.path.join(_here, '..', 'lib'),
+                            os.path.join(_here, '..', '..', 'lib'), '/usr/local/lib', '/usr/lib') if d]
+import linux_maint_schema as lmsc  # noqa: E402
 
 
 def validate(schema: Dict[str, Any], value: Any, path: str = "$") -> None:
-    if "type" in schema:
-        _ensure_type(schema.get("type"), value, path)
-
-    if "enum" in schema:
-        if value not in schema["enum"]:
-            _fail(path, f"value {value!r} not in enum")
-
-    schema_type = schema.get("type")
-    if schema_type == "object" or (isinstance(schema_type, list) and "object" in schema_type):
-        props = schema.get("properties", {})
-        required = schema.get("required", [])
-        for key in required:
-            if not isinstance(value, dict) or key not in value:
-                _fail(path, f"missing required key {key!r}")
-        if isinstance(value, dict):
-            for k, v in value.items():
-                if k in props:
-                    validate(props[k], v, f"{path}.{k}")
-                elif schema.get("additionalProperties") is False:
-                    _fail(path, f"unexpected key {k!r}")
-
-    if schema_type == "array" or (isinstance(schema_type, list) and "array" in schema_type):
-        if isinstance(value, list) and "items" in schema:
-            for i, item in enumerate(value):
-                validate(schema["items"], item, f"{path}[{i}]")
+    """Raise ValueError with the first error of *value* against *schema*."""
+    errs = lmsc.errors(lmsc.compile_schema(schema), value, path)
+    if errs:
+        raise ValueError(errs[0])
 
 
 def main(argv: List[str]) -> int:
+    if len(argv) > 1 and argv[1] == "--batch":
+        return lmsc.main(["check"] + argv[2:])
     if len(argv) != 2:
         print(f"Usage: {argv[0]} <schema.json>", file=sys.stderr)
+        print(f"       {argv[0]} --batch [--schema SCHEMA] [--jsonl] [--tail N] FILE...", file=sys.stderr)
+        return 2
+    try:
+        validator = lmsc.load(argv[1])
+    except (OSError, ValueError) as e:
+        print(f"ERROR: cannot load schema {argv[1]}: {e}", file=sys.stderr)
         return 2
-    schema_path = argv[1]
-    schema = json.load(open(schema_path, "r", encoding="utf-8"))
     try:
         payload = json.load(sys.stdin)
     except json.JSONDecodeError as e:
         print(f"ERROR: invalid JSON input: {e}", file=sys.stderr)
         return 2
-    try:
-        validate(schema, payload)
-    except ValueError as e:
+    errs = lmsc.errors(validator, payload)
+    for e in errs:
         print(f"SCHEMA FAIL: {e}", file=sys.stderr)
-        return 2
-    return 0
+    return 2 if errs else 0
 
 
 if __name__ == "__main__":
@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
-import sys, json, os
+"""Compare summary runs.
+
+Two-run mode (the wrapper's notification diff and `linux-maint diff`):
+    summary_diff.py PREV CUR [--json] [--flap-window N --history-dir DIR]
+N-run mode (`linux-maint diff --runs N`): stream the newest N runs once and report,
+per (monitor, host), transitions, flap score, time in state and first-seen-bad:
+    summary_diff.py --runs N [--log-dir DIR | --index RUN_INDEX | SUMMARY...] [--json]
+"""
+import sys, json, os, time
 from pathlib import Path
 
-def parse_line(line: str):
-    parts=line.strip().split()
-    d={}
-    for p in parts:
-        if '=' in p:
-            k,v=p.split('=',1)
-            d[k]=v
-    return d
+# linux_maint_summary.py lives in lib/ (repo) or next to linux_maint.sh (installed).
+_here=os.path.dirname(os.path.abspath(__file__))
+sys.path[:0]=[d for d in (os.environ.get('LM_PYLIB_DIR'), os.path.join(_here,'..','lib'),
+                          os.path.join(_here,'..','..','lib'), '/usr/local/lib', '/usr/lib') if d]
+import linux_maint_summary as lms
+import linux_maint_archive as lma
+import linux_maint_runindex as lmri
 
 def sev(st):
     return {'OK':0,'SKIP':0,'WARN':1,'CRIT':2,'UNKNOWN':3}.get(st,3)
@@ -38,17 +45,194 @@ def canonicalize_rows_worst(rows):
     return out
 
 def load_summary_map(path: Path):
-    rows=[]
-    if not path.exists():
+    # Plain file or archived run (bundle#member); a missing input diffs as empty.
+    try:
+        with lma.open_text(str(path)) as f:
+            return canonicalize_rows_worst(lms.read_dicts(f))
+    except OSError:
         return {}
-    for line in path.read_text(errors='ignore').splitlines():
-        if line.startswith('monitor='):
-            rows.append(parse_line(line))
-    return canonicalize_rows_worst(rows)
 
-def main(prev_path, cur_path, fmt='text'):
+BAD=('WARN','CRIT','UNKNOWN')
+FLAP_THRESHOLD=0.3
+FLAP_MIN_TRANSITIONS=3
+
+class Entity(object):
+    """Status history of one (monitor, host) over a window of runs."""
+    __slots__=('status','reason','since','last','runs','bad_runs','transitions','weight','state_s','bad_since')
+
+    def __init__(self, row, epoch):
+        self.status=row.get('status','UNKNOWN')
+        self.reason=row.get('reason','')
+        self.since=self.last=epoch
+        self.runs=1
+        self.bad_runs=1 if self.status in BAD else 0
+        self.transitions=0
+        self.weight=0.0
+        self.state_s={}
+        self.bad_since=epoch if self.status in BAD else None
+
+    def score(self):
+        return round(self.weight/(self.runs-1), 3) if self.runs > 1 else 0.0
+
+
+class FlapTracker(object):
+    """Fold runs, oldest first, into per-(monitor, host) Entity records in one pass.
+
+    A transition is a status change between two runs that report the key. Transitions
+    are weighted from 0.8 (oldest run of the window) to 1.2 (newest) like Nagios flap
+    detection, so the score is the weighted share of the key's runs that changed status.
+    """
+
+    def __init__(self, window, threshold=FLAP_THRESHOLD, min_transitions=FLAP_MIN_TRANSITIONS):
+        self.window=max(int(window), 1)
+        self.threshold=threshold
+        self.min_transitions=min_transitions
+        self.entities={}
+        self.runs=[]
+
+    def feed(self, epoch, rows, label=''):
+        i=len(self.runs)
+        w=0.8 + 0.4*(i-1)/max(self.window-2, 1) if i else 0.0
+        self.runs.append((epoch, label))
+        ents=self.entities
+        for k, r in rows.items():
+            e=ents.get(k)
+            if e is None:
+                ents[k]=Entity(r, epoch)
+                continue
+            st=r.get('status','UNKNOWN')
+            e.state_s[e.status]=e.state_s.get(e.status,0)+max(epoch-e.last, 0)
+            if st != e.status:
+                e.transitions+=1
+                e.weight+=w
+                e.since=epoch
+                if st in BAD and e.status not in BAD:
+                    e.bad_since=epoch
+                elif st not in BAD:
+                    e.bad_since=None
+                e.status=st
+            e.reason=r.get('reason','')
+            e.last=epoch
+            e.runs+=1
+            if st in BAD:
+                e.bad_runs+=1
+
+    def feed_file(self, epoch, ref):
+        self.feed(epoch, load_summary_map(ref), str(ref))
+
+    def flapping(self, e):
+        return e.transitions >= self.min_transitions and e.score() >= self.threshold
+
+    def rows(self):
+        """Entity dicts, flapping first, then worst status and longest in that state."""
+        end=self.runs[-1][0] if self.runs else 0
+        out=[]
+        for k, e in self.entities.items():
+            state_s=dict(e.state_s)
+            state_s[e.status]=state_s.get(e.status,0)+max(end-e.last, 0)
+            out.append({
+                'monitor':k[0], 'host':k[1], 'status':e.status, 'reason':e.reason,
+                'runs_seen':e.runs, 'bad_runs':e.bad_runs, 'transitions':e.transitions,
+                'flap_score':e.score(), 'flapping':self.flapping(e),
+                'since':_iso(e.since), 'time_in_state_s':int(max(end-e.since, 0)),
+                'state_s':{st:int(v) for st, v in sorted(state_s.items())},
+                'first_seen_bad':_iso(e.bad_since) if e.bad_since is not None else None,
+                'last_seen':_iso(e.last),
+            })
+        out.sort(key=lambda r: (not r['flapping'], -sev(r['status']), -r['time_in_state_s'], r['monitor'], r['host']))
+        return out
+
+
+def _iso(epoch):
+    return time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(epoch))
+
+def _dur(s):
+    s=int(s)
+    for unit, n, sub, m in (('d',86400,'h',3600), ('h',3600,'m',60), ('m',60,'s',1)):
+        if s >= n:
+            rest=(s % n)//m
+            return f"{s//n}{unit}{rest}{sub}" if rest else f"{s//n}{unit}"
+    return f"{s}s"
+
+def summary_runs(log_dir, n):
+    """[(epoch, ref)] of the newest n summary runs in log_dir (plain or archived), oldest first."""
+    return list(reversed(lma.list_runs(log_dir, 'summary', limit=n)))
+
+def index_runs(index_file, n):
+    """[(epoch, ref)] of the summaries behind the last n run index entries (all segments), oldest first."""
+    out=[]
+    for o in lmri.RunIndex(index_file).tail(n):
+        if not isinstance(o, dict) or not o.get('summary_file'):
+            continue
+        ep=o.get('timestamp_epoch')
+        if not isinstance(ep, (int, float)):
+            ep=lma.run_epoch(o['summary_file'])
+        if ep is None:
+            continue
+        out.append((ep, lma.locate(o['summary_file'])))
+    return out
+
+def file_runs(paths):
+    """[(epoch, path)] for explicit summary files, ordered by the run time in the name (else mtime)."""
+    out=[]
+    for p in paths:
+        ep=lma.run_epoch(p)
+        if ep is None:
+            try:
+                ep=lma.stat_ref(p)[1]/1e9
+            except OSError:
+                continue
+        out.append((ep, p))
+    out.sort()
+    return out
+
+def runs_main(runs, fmt='text', threshold=FLAP_THRESHOLD, min_transitions=FLAP_MIN_TRANSITIONS):
+    tr=FlapTracker(len(runs), threshold, min_transitions)
+    for ep, ref in runs:
+        tr.feed_file(ep, ref)
+    rows=tr.rows()
+    flapping=sum(1 for r in rows if r['flapping'])
+    bad=sum(1 for r in rows if r['status'] in BAD)
+    if fmt=='json':
+        out={
+            'window':len(runs),
+            'runs':[{'epoch':int(ep), 'timestamp':_iso(ep), 'file':ref} for ep, ref in tr.runs],
+            'flap_threshold':threshold,
+            'flap_min_transitions':min_transitions,
+            'counts':{'entities':len(rows), 'flapping':flapping, 'bad':bad},
+            'entities':rows,
+        }
+        print(json.dumps(out, indent=2, sort_keys=True))
+        return 0
+    first=_iso(tr.runs[0][0]) if tr.runs else '-'
+    last=_iso(tr.runs[-1][0]) if tr.runs else '-'
+    print(f"runs={len(runs)} from={first} to={last} entities={len(rows)} flapping={flapping} bad={bad}")
+    print(f"FLAPPING {flapping}")
+    for r in rows:
+        if r['flapping']:
+            print(f"- {r['host']} {r['monitor']}: {r['status']} transitions={r['transitions']} score={r['flap_score']:.2f}")
+    print(f"BAD {bad - sum(1 for r in rows if r['flapping'] and r['status'] in BAD)}")
+    for r in rows:
+        if r['status'] in BAD and not r['flapping']:
+            reason=f" reason={r['reason']}" if r['reason'] else ''
+            print(f"- {r['host']} {r['monitor']}: {r['status']}{reason} for {_dur(r['time_in_state_s'])} first_seen_bad={r['first_seen_bad']}")
+    return 0
+
+def flapping_keys(history_dir, window, cur_map, threshold=FLAP_THRESHOLD, min_transitions=FLAP_MIN_TRANSITIONS):
+    """{key: Entity} flapping over the newest window-1 runs in history_dir plus the current run."""
+    runs=summary_runs(history_dir, max(window-1, 1))
+    tr=FlapTracker(len(runs)+1, threshold, min_transitions)
+    for ep, ref in runs:
+        tr.feed_file(ep, ref)
+    tr.feed(time.time(), cur_map, 'current')
+    return {k: e for k, e in tr.entities.items() if tr.flapping(e)}
+
+def main(prev_path, cur_path, fmt='text', flap=None):
     prev_map=load_summary_map(Path(prev_path))
     cur_map=load_summary_map(Path(cur_path))
+    flaps={}
+    if flap:
+        flaps=flapping_keys(flap['history_dir'], flap['window'], cur_map, flap['threshold'], flap['min_transitions'])
 
     color = os.environ.get("LM_COLOR", "0") == "1"
 
@@ -76,11 +260,18 @@ def main(prev_path, cur_path, fmt='text'):
     changed=[]
     still_bad=[]
 
+    suppressed=[]
+
     for k, r in cur_map.items():
         prev_r = prev_map.get(k)
         cur_st=r.get('status','UNKNOWN')
         prev_st=prev_r.get('status','MISSING') if prev_r else 'MISSING'
 
+        if k in flaps and prev_st != cur_st:
+            # flapping: reported once under "flapping" instead of as a change
+            suppressed.append((k, r))
+            continue
+
         if prev_r is None:
             # new entity
             if cur_st != 'OK':
@@ -103,6 +294,7 @@ def main(prev_path, cur_path, fmt='text'):
     new_fail.sort(key=lambda x: (-sev(x[2].get('status','UNKNOWN')), x[0]))
     recovered.sort(key=lambda x: (x[0]))
     still_bad.sort(key=lambda x: (-sev(x[1].get('status','UNKNOWN')), x[0]))
+    suppressed.sort(key=lambda x: x[0])
 
     if fmt=='json':
         out={
@@ -111,6 +303,9 @@ def main(prev_path, cur_path, fmt='text'):
             'still_bad':[{'monitor':k[0],'host':k[1],'cur':cur} for k, cur in still_bad],
             'changed':changed,
         }
+        if flap:
+            out['flapping']=[{'monitor':k[0],'host':k[1],'cur':cur,'transitions':flaps[k].transitions,
+                              'flap_score':flaps[k].score()} for k, cur in suppressed]
         print(json.dumps(out, indent=2, sort_keys=True))
         return 0
 
@@ -124,14 +319,21 @@ def main(prev_path, cur_path, fmt='text'):
 
     print(f"diff_prev={prev_path}")
     print(f"diff_cur={cur_path}")
+    if flap:
+        print(f"changes={len(new_fail)+len(recovered)+len(changed)} flapping_suppressed={len(suppressed)}")
     print("")
 
+    def more(rows, shown):
+        if len(rows) > shown:
+            print(f"- ... {len(rows)-shown} more (see --json)")
+
     new_label = f"NEW_FAILURES {len(new_fail)}"
     if len(new_fail) > 0:
         new_label = c(new_label, "1;31")
     print(new_label)
     for k, prev, cur in new_fail[:80]:
         print(f"- {k[1]} {k[0]}: {brief(prev)} -> {brief(cur)}")
+    more(new_fail, 80)
 
     print("")
     rec_label = f"RECOVERED {len(recovered)}"
@@ -140,6 +342,7 @@ def main(prev_path, cur_path, fmt='text'):
     print(rec_label)
     for k, prev, cur in recovered[:80]:
         print(f"- {k[1]} {k[0]}: {brief(prev)} -> {brief(cur)}")
+    more(recovered, 80)
 
     print("")
     still_label = f"STILL_BAD {len(still_bad)}"
@@ -148,13 +351,56 @@ def main(prev_path, cur_path, fmt='text'):
     print(still_label)
     for k, cur in still_bad[:120]:
         print(f"- {k[1]} {k[0]}: {brief(cur)}")
+    more(still_bad, 120)
+
+    if flap:
+        print("")
+        print(f"FLAPPING {len(suppressed)}")
+        for k, cur in suppressed[:80]:
+            print(f"- {k[1]} {k[0]}: {brief(cur)} transitions={flaps[k].transitions} score={flaps[k].score():.2f}")
+        more(suppressed, 80)
 
     return 0
 
+def _env_num(name, default, cast):
+    try:
+        return cast(os.environ.get(name, '') or default)
+    except ValueError:
+        return default
+
+def cli(argv):
+    import argparse
+    ap=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('files', nargs='*')
+    ap.add_argument('--json', action='store_true')
+    ap.add_argument('--runs', type=int, default=0)
+    ap.add_argument('--log-dir', default='')
+    ap.add_argument('--index', default='')
+    ap.add_argument('--flap-window', type=int, default=0)
+    ap.add_argument('--history-dir', default='')
+    ap.add_argument('--flap-threshold', type=float, default=_env_num('LM_FLAP_THRESHOLD', FLAP_THRESHOLD, float))
+    ap.add_argument('--flap-min-transitions', type=int, default=_env_num('LM_FLAP_MIN_TRANSITIONS', FLAP_MIN_TRANSITIONS, int))
+    a=ap.parse_args(argv)
+    fmt='json' if a.json else 'text'
+    if a.runs:
+        if a.runs < 2:
+            ap.error('--runs needs at least 2 runs')
+        if a.index:
+            runs=index_runs(a.index, a.runs)
+        elif a.log_dir:
+            runs=summary_runs(a.log_dir, a.runs)
+        else:
+            runs=file_runs(a.files)[-a.runs:]
+        return runs_main(runs, fmt, a.flap_threshold, a.flap_min_transitions)
+    if len(a.files) != 2:
+        print(f"Usage: {sys.argv[0]} <prev_summary> <cur_summary> [--json] [--flap-window N --history-dir DIR]", file=sys.stderr)
+        print(f"       {sys.argv[0]} --runs N [--log-dir DIR | --index RUN_INDEX | SUMMARY...] [--json]", file=sys.stderr)
+        return 2
+    flap=None
+    if a.flap_window > 1 and a.history_dir:
+        flap={'window':a.flap_window, 'history_dir':a.history_dir,
+              'threshold':a.flap_threshold, 'min_transitions':a.flap_min_transitions}
+    return main(a.files[0], a.files[1], fmt, flap)
+
 if __name__=='__main__':
-    if len(sys.argv) < 3:
-        print(f"Usage: {sys.argv[0]} <prev_summary> <cur_summary> [--json]", file=sys.stderr)
-        sys.exit(2)
-    prev=sys.argv[1]; cur=sys.argv[2]
-    fmt='json' if (len(sys.argv)>3 and sys.argv[3]=='--json') else 'text'
-    sys.exit(main(prev, cur, fmt))
+    sys.exit(cli(sys.argv[1:]))
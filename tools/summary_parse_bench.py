@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for lib/linux_maint_summary.py over a synthetic summary file.
+
+Compares the per-line dict parsing the CLI used to do (two passes for totals and
+reasons) with the shared parser's streaming rows and one-pass aggregate.
+
+Usage: tools/summary_parse_bench.py [--lines N] [--json]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_here, "..", "lib"))
+import linux_maint_summary as lms
+
+MONITORS = ["health_monitor", "disk_trend_monitor", "service_monitor", "ntp_drift_monitor",
+            "cert_monitor", "network_monitor", "patch_monitor", "inode_monitor"]
+STATUSES = ["OK"] * 12 + ["WARN", "WARN", "CRIT", "UNKNOWN", "SKIP"]
+REASONS = ["disk_full", "ssh_unreachable", "service_failed", "ntp_drift_high", "cert_expiring"]
+
+
+def write_fixture(path, n):
+    rnd = random.Random(42)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            st = rnd.choice(STATUSES)
+            host = "host%04d" % (i % 2000)
+            extra = " reason=%s" % rnd.choice(REASONS) if st != "OK" else ""
+            f.write("monitor=%s host=%s status=%s node=%s checked=%d warn=0 crit=0%s\n"
+                    % (rnd.choice(MONITORS), host, st, host, i % 97, extra))
+
+
+def legacy(path):
+    def parse_kv(line):
+        d = {}
+        for p in line.strip().split():
+            if "=" in p:
+                k, v = p.split("=", 1)
+                d[k] = v
+        return d
+
+    totals = {k: 0 for k in lms.STATUSES}
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            if line.startswith("monitor="):
+                st = parse_kv(line).get("status", "UNKNOWN")
+                totals[st if st in totals else "UNKNOWN"] += 1
+    reasons = {}
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            if line.startswith("monitor="):
+                d = parse_kv(line)
+                if d.get("status") != "OK" and d.get("reason"):
+                    reasons[d["reason"]] = reasons.get(d["reason"], 0) + 1
+    return totals, reasons
+
+
+def rows(path):
+    n = 0
+    for _ in lms.iter_rows(path):
+        n += 1
+    return n
+
+
+def aggregate(path):
+    agg = lms.aggregate(path)
+    return agg.totals, agg.reasons
+
+
+def timed(fn, path):
+    t0 = time.perf_counter()
+    out = fn(path)
+    return time.perf_counter() - t0, out
+
+
+def main(argv):
+    n = 1000000
+    as_json = False
+    args = list(argv)
+    while args:
+        a = args.pop(0)
+        if a == "--lines" and args:
+            n = int(args.pop(0))
+        elif a == "--json":
+            as_json = True
+        else:
+            print(__doc__.strip().splitlines()[-1], file=sys.stderr)
+            return 2
+
+    fd, path = tempfile.mkstemp(prefix="lm_summary_bench.", suffix=".log")
+    os.close(fd)
+    try:
+        write_fixture(path, n)
+        legacy_s, legacy_out = timed(legacy, path)
+        rows_s, _ = timed(rows, path)
+        agg_s, agg_out = timed(aggregate, path)
+    finally:
+        os.unlink(path)
+
+    if legacy_out != agg_out:
+        print("ERROR: aggregate() disagrees with the legacy parser", file=sys.stderr)
+        return 1
+    res = {
+        "lines": n,
+        "legacy_s": round(legacy_s, 3),
+        "iter_rows_s": round(rows_s, 3),
+        "aggregate_s": round(agg_s, 3),
+        "speedup": round(legacy_s / agg_s, 2) if agg_s > 0 else None,
+    }
+    if as_json:
+        print(json.dumps(res, sort_keys=True))
+    else:
+        print("bench=summary_parse " + " ".join("%s=%s" % (k, res[k]) for k in
+                                                 ("lines", "legacy_s", "iter_rows_s", "aggregate_s", "speedup")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))